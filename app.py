@@ -4,6 +4,7 @@ import time
 from datetime import datetime
 import traceback
 from pipeline import run_pipeline, save_with_highlight
+from core.helpers.ingestion_helpers import load_table, read_columns, select_ingestion_columns
 import io
 import sys
 from contextlib import redirect_stdout, redirect_stderr
@@ -30,31 +31,32 @@ uploaded_file = st.file_uploader(
 
 if uploaded_file:
     try:
-        # ファイル読み込み
+        # ファイル読み込み（ヘッダーのみ先に解析し、必要カラムだけを読み込む。内容ハッシュでキャッシュ）
         with st.spinner("📖 ファイルを読み込み中..."):
-            if uploaded_file.name.endswith(".csv"):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            all_columns = read_columns(uploaded_file)
+            
+            # Name列の確認
+            if 'Name' not in all_columns:
+                st.error("❌ 'Name'列が見つかりません。ファイル形式を確認してください。")
+                st.write("**利用可能な列:**", all_columns)
+                st.stop()
+            
+            load_all_columns = st.sidebar.checkbox("全カラムを読み込む", value=False, help="OFFの場合はName列とASIN・ブランド等の関連カラムのみ読み込みます")
+            usecols = None if load_all_columns else select_ingestion_columns(all_columns, required=['Name'])
+            df = load_table(uploaded_file, usecols=usecols)
         
         # ファイル情報表示
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("📊 データ行数", len(df))
         with col2:
-            st.metric("📋 列数", len(df.columns))
+            st.metric("📋 列数", f"{len(df.columns)}/{len(all_columns)}")
         with col3:
             st.metric("📁 ファイル名", uploaded_file.name)
         
         # データプレビュー
         with st.expander("👀 データプレビュー", expanded=False):
             st.dataframe(df.head(10), use_container_width=True)
-            
-        # Name列の確認
-        if 'Name' not in df.columns:
-            st.error("❌ 'Name'列が見つかりません。ファイル形式を確認してください。")
-            st.write("**利用可能な列:**", list(df.columns))
-            st.stop()
         
         # NGワード設定
         st.sidebar.subheader("🚫 NGワード設定")
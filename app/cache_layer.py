@@ -0,0 +1,135 @@
+# cache_layer.py - Streamlitキャッシュ層（管理クラスの共有・データ版数キーでの派生データ/グラフのメモ化）
+import hashlib
+import json
+import streamlit as st
+import pandas as pd
+
+# session_state上の保存キー
+DATA_VERSION_STATE_KEY = 'data_version'
+DATA_VERSION_SOURCE_STATE_KEY = 'data_version_source'
+
+# 派生データ・グラフのキャッシュ上限（データ版数×設定版数×種類）
+DERIVED_CACHE_MAX_ENTRIES = 128
+# 前回実行結果（registry.db）の再読み込み間隔
+REGISTRY_FRAME_TTL_SECONDS = 300
+
+# ======================== 管理クラス（cache_resource） ========================
+
+@st.cache_resource(show_spinner=False)
+def get_threshold_config_manager():
+    """ThresholdConfigManager（再実行ごとに設定ファイルを読み直さない）"""
+    from core.managers.config_manager import create_threshold_config_manager
+    return create_threshold_config_manager()
+
+@st.cache_resource(show_spinner=False)
+def get_ng_word_manager():
+    """NGWordManager（再実行ごとにNGワード辞書を読み直さない）"""
+    from core.managers.ng_word_manager import create_ng_word_manager
+    return create_ng_word_manager()
+
+# ======================== 版数（キャッシュキー） ========================
+
+def dataframe_fingerprint(df):
+    """
+    DataFrameの内容フィンガープリント（行・カラム・値から算出）
+
+    Returns:
+        str: 16桁の16進文字列（None・空の場合は 'empty'）
+    """
+    if df is None or df.empty:
+        return 'empty'
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df.astype(str), index=True).values.tobytes())
+    return digest.hexdigest()
+
+def get_data_version(session_state, df=None):
+    """
+    processed_df のデータ版数（同一オブジェクトの間はフィンガープリントを再計算しない）
+
+    Args:
+        session_state: Streamlitのsession_state
+        df: 対象データフレーム（Noneで session_state.processed_df）
+
+    Returns:
+        str: データ版数
+    """
+    if df is None:
+        df = session_state.get('processed_df')
+    if session_state.get(DATA_VERSION_SOURCE_STATE_KEY) is df and session_state.get(DATA_VERSION_STATE_KEY):
+        return session_state[DATA_VERSION_STATE_KEY]
+
+    version = dataframe_fingerprint(df)
+    session_state[DATA_VERSION_SOURCE_STATE_KEY] = df
+    session_state[DATA_VERSION_STATE_KEY] = version
+    return version
+
+def get_config_version(config_manager):
+    """
+    閾値設定の版数（プリセット適用・閾値変更で変わる）
+
+    Returns:
+        str: 設定内容のハッシュ（設定なしの場合は 'none'）
+    """
+    config = getattr(config_manager, 'current_config', None) if config_manager else None
+    if not config:
+        return 'none'
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+# ======================== 派生データ・グラフ（cache_data） ========================
+
+@st.cache_data(max_entries=DERIVED_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_derived(name, data_version, config_version, params, _df, _builder):
+    # _df / _builder はハッシュ対象外（キーは name・版数・params）
+    return _builder(_df, **dict(params))
+
+def memoize_derived(name, df, builder, data_version, config_version='none', **params):
+    """
+    派生データ・グラフのメモ化（データ版数・設定版数・パラメータが同じ間は再計算しない）
+
+    Args:
+        name: 派生物の識別名（builderごとに一意）
+        df: 元データフレーム
+        builder: builder(df, **params) で派生物を返す関数
+        data_version: get_data_version の戻り値
+        config_version: get_config_version の戻り値
+        **params: builderへの追加引数（ハッシュ可能な値）
+
+    Returns:
+        builderの戻り値（DataFrame・plotly Figureなど）
+    """
+    return _cached_derived(name, data_version, config_version, tuple(sorted(params.items())), df, builder)
+
+@st.cache_resource(ttl=REGISTRY_FRAME_TTL_SECONDS, show_spinner=False)
+def load_latest_run_frame_cached():
+    """
+    前回の処理結果（registry.db）の読み込み（TTL内は再読み込みしない、レジストリ利用不可の場合はNone）
+
+    同一オブジェクトを返すため、データ版数・サマリーのキャッシュがそのまま効く（呼び出し側では変更しないこと）。
+    """
+    try:
+        from core.managers.registry_manager import load_latest_run_frame
+    except ImportError:
+        return None
+    return load_latest_run_frame()
+
+# ======================== 明示的な無効化 ========================
+
+def invalidate_data_caches(session_state=None):
+    """データ由来のキャッシュ破棄（新しい処理結果の記録後などに使用）"""
+    _cached_derived.clear()
+    load_latest_run_frame_cached.clear()
+    if session_state is not None:
+        session_state[DATA_VERSION_SOURCE_STATE_KEY] = None
+        session_state[DATA_VERSION_STATE_KEY] = None
+
+def invalidate_managers():
+    """管理クラスの破棄（設定ファイル・NGワード辞書を外部で編集した場合に使用）"""
+    get_threshold_config_manager.clear()
+    get_ng_word_manager.clear()
+
+def invalidate_all(session_state=None):
+    """全キャッシュの破棄"""
+    invalidate_data_caches(session_state)
+    invalidate_managers()
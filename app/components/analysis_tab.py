@@ -10,6 +10,29 @@ import matplotlib.pyplot as plt
 from scipy import stats
 import json
 
+# 処理結果サマリー（processed_dfごとに1回だけ集計し、全タブで共有）
+from core.helpers.run_summary import compute_run_summary, get_run_summary
+
+# 相関分析エンジン（特徴量選択・サンプリング・上位ペア抽出・順位相関）
+from core.helpers.correlation_analysis import compute_correlation_analysis
+
+# キャッシュ層（データ版数キーでのグラフのメモ化、セッションにデータが無い場合は前回の処理結果を表示）
+from app.cache_layer import (
+    get_data_version, get_config_version, get_threshold_config_manager, memoize_derived,
+    load_latest_run_frame_cached
+)
+
+# ShippingTime推移ストア（実行間の取得率・出品者タイプ別集計・悪化ASIN）
+SHIPPING_TREND_AVAILABLE = False
+try:
+    from core.managers.shipping_trend_manager import create_shipping_trend_manager, ROLLUP_DIMENSIONS
+    SHIPPING_TREND_AVAILABLE = True
+except ImportError:
+    pass
+
+# 推移の集計軸の表示名
+ROLLUP_DIMENSION_LABELS = {'seller_type': '出品者タイプ', 'brand': 'ブランド', 'category': 'カテゴリ'}
+
 def render_analysis_tab(session_state, asin_helpers_available, sp_api_available):
     """詳細分析タブ"""
     
@@ -18,9 +41,12 @@ def render_analysis_tab(session_state, asin_helpers_available, sp_api_available)
     # データ存在チェック
     df = session_state.get('processed_df')
     if df is None or df.empty:
-        st.warning("📋 データを読み込んでください（データ管理タブ）")
-        render_demo_analysis()
-        return
+        df = load_latest_run_frame_cached()
+        if df is None or df.empty:
+            st.warning("📋 データを読み込んでください（データ管理タブ）")
+            render_demo_analysis()
+            return
+        st.info("💾 前回の処理結果（registry.db）を表示しています")
     
     # 分析タイプ選択
     analysis_type = st.selectbox(
@@ -37,20 +63,29 @@ def render_analysis_tab(session_state, asin_helpers_available, sp_api_available)
     )
     
     st.markdown("---")
+    summary = get_run_summary(session_state, df)
     
     # 分析実行
     if analysis_type == "美容用語効果分析":
-        render_beauty_terms_analysis(df)
+        render_beauty_terms_analysis(df, summary)
     elif analysis_type == "ブランド別分析":
-        render_brand_analysis(df)
+        render_brand_analysis(df, summary)
     elif analysis_type == "Prime影響度分析":
-        render_prime_impact_analysis(df)
+        render_prime_impact_analysis(df, summary)
     elif analysis_type == "配送時間相関分析":
-        render_shipping_correlation_analysis(df)
+        render_shipping_correlation_analysis(df, get_data_version(session_state, df), _current_config_version())
+        render_shipping_trend_analysis(session_state)
     elif analysis_type == "成功率予測分析":
-        render_success_prediction_analysis(df)
+        render_success_prediction_analysis(df, summary)
     elif analysis_type == "総合相関分析":
-        render_comprehensive_correlation_analysis(df)
+        render_comprehensive_correlation_analysis(df, get_data_version(session_state, df), _current_config_version())
+
+def _current_config_version():
+    """閾値設定の版数（設定管理が使えない場合は 'none'）"""
+    try:
+        return get_config_version(get_threshold_config_manager())
+    except ImportError:
+        return 'none'
 
 def render_demo_analysis():
     """デモ分析表示"""
@@ -99,39 +134,20 @@ def render_demo_analysis():
     st.subheader("📊 美容用語詳細データ（デモ）")
     st.dataframe(demo_df, use_container_width=True)
 
-def render_beauty_terms_analysis(df):
+def render_beauty_terms_analysis(df, summary=None):
     """美容用語効果分析"""
     st.subheader("💄 美容用語効果分析")
     
-    # 美容用語の検出
-    beauty_keywords = ['oil', 'cream', 'serum', 'lotion', 'cleanser', 'mask', 'treatment', 'toner', 'essence', 'gel']
-    
     if 'clean_title' not in df.columns:
         st.warning("商品タイトル情報が見つかりません")
         return
+    if summary is None:
+        summary = compute_run_summary(df)
     
-    beauty_data = []
-    for keyword in beauty_keywords:
-        keyword_df = df[df['clean_title'].str.contains(keyword, case=False, na=False)]
-        if len(keyword_df) > 0:
-            avg_shopee_score = keyword_df.get('shopee_suitability_score', pd.Series([0])).mean()
-            avg_prime_score = keyword_df.get('prime_confidence_score', pd.Series([0])).mean()
-            avg_relevance = keyword_df.get('relevance_score', pd.Series([0])).mean()
-            count = len(keyword_df)
-            group_a_rate = len(keyword_df[keyword_df.get('shopee_group') == 'A']) / len(keyword_df) * 100 if 'shopee_group' in keyword_df.columns else 0
-            
-            beauty_data.append({
-                'keyword': keyword,
-                'count': count,
-                'avg_shopee_score': avg_shopee_score,
-                'avg_prime_score': avg_prime_score,
-                'avg_relevance': avg_relevance,
-                'group_a_rate': group_a_rate
-            })
+    # 美容用語別集計（run_summaryで集計済み）
+    beauty_df = summary['keyword_frame']
     
-    if beauty_data:
-        beauty_df = pd.DataFrame(beauty_data)
-        
+    if not beauty_df.empty:
         # 美容用語分析チャート
         analysis_col1, analysis_col2 = st.columns(2)
         
@@ -209,18 +225,20 @@ def render_beauty_terms_analysis(df):
     else:
         st.info("美容用語が検出されませんでした")
 
-def render_brand_analysis(df):
+def render_brand_analysis(df, summary=None):
     """ブランド別分析"""
     st.subheader("🏷️ ブランド別分析")
     
     if 'extracted_brand' not in df.columns:
         st.warning("ブランド情報が見つかりません")
         return
+    if summary is None:
+        summary = compute_run_summary(df)
     
-    # ブランドデータのクリーニング
-    brand_df = df[df['extracted_brand'].notna() & (df['extracted_brand'] != '')].copy()
+    # ブランド別集計（run_summaryで集計済み、空ブランドは除外済み）
+    brand_frame = summary['brand_frame']
     
-    if len(brand_df) == 0:
+    if brand_frame.empty:
         st.info("ブランドデータがありません")
         return
     
@@ -228,7 +246,7 @@ def render_brand_analysis(df):
     
     with brand_analysis_col1:
         # ブランド別商品数（Top 10）
-        brand_counts = brand_df['extracted_brand'].value_counts().head(10)
+        brand_counts = brand_frame['count'].nlargest(10)
         
         fig1 = px.pie(
             values=brand_counts.values,
@@ -240,32 +258,25 @@ def render_brand_analysis(df):
     
     with brand_analysis_col2:
         # ブランド別スコア分析
-        if 'shopee_suitability_score' in brand_df.columns:
-            brand_scores = brand_df.groupby('extracted_brand').agg({
-                'shopee_suitability_score': 'mean',
-                'prime_confidence_score': 'mean' if 'prime_confidence_score' in brand_df.columns else lambda x: 0,
-                'extracted_brand': 'count'
-            }).round(2)
-            
-            brand_scores = brand_scores.rename(columns={'extracted_brand': 'count'})
-            brand_scores = brand_scores[brand_scores['count'] >= 2].head(10)  # 2件以上のブランドのみ
+        if 'shopee_suitability_score' in df.columns:
+            brand_scores = brand_frame[brand_frame['count'] >= 2].head(10).round(2)  # 2件以上のブランドのみ
             
             if len(brand_scores) > 0:
                 fig2 = go.Figure()
                 
                 fig2.add_trace(go.Scatter(
                     x=brand_scores.index,
-                    y=brand_scores['shopee_suitability_score'],
+                    y=brand_scores['avg_shopee_score'],
                     mode='markers+lines',
                     name='Shopee適性スコア',
                     marker=dict(size=10, color='#10B981'),
                     line=dict(color='#10B981', width=2)
                 ))
                 
-                if 'prime_confidence_score' in brand_df.columns:
+                if 'prime_confidence_score' in df.columns:
                     fig2.add_trace(go.Scatter(
                         x=brand_scores.index,
-                        y=brand_scores['prime_confidence_score'],
+                        y=brand_scores['avg_prime_score'],
                         mode='markers+lines',
                         name='Prime信頼性スコア',
                         marker=dict(size=10, color='#3B82F6'),
@@ -285,13 +296,9 @@ def render_brand_analysis(df):
     # ブランドパフォーマンス詳細
     st.subheader("📊 ブランドパフォーマンス詳細")
     
-    brand_performance = brand_df.groupby('extracted_brand').agg({
-        'shopee_suitability_score': ['mean', 'std', 'count'],
-        'prime_confidence_score': 'mean' if 'prime_confidence_score' in brand_df.columns else lambda x: 0,
-        'shopee_group': lambda x: (x == 'A').sum() / len(x) * 100 if 'shopee_group' in brand_df.columns else 0
-    }).round(2)
-    
-    # カラム名を平坦化
+    brand_performance = brand_frame[
+        ['avg_shopee_score', 'std_shopee_score', 'count', 'avg_prime_score', 'group_a_rate']
+    ].round(2)
     brand_performance.columns = ['Shopee適性平均', 'Shopee適性標準偏差', '商品数', 'Prime信頼性平均', 'グループA率(%)']
     brand_performance = brand_performance[brand_performance['商品数'] >= 2].head(15)
     
@@ -307,13 +314,15 @@ def render_brand_analysis(df):
         - グループA率: {top_brand['グループA率(%)']:.1f}%
         """)
 
-def render_prime_impact_analysis(df):
+def render_prime_impact_analysis(df, summary=None):
     """Prime影響度分析"""
     st.subheader("🎯 Prime影響度分析")
     
     if 'is_prime' not in df.columns:
         st.warning("Prime情報が見つかりません")
         return
+    if summary is None:
+        summary = compute_run_summary(df)
     
     prime_analysis_col1, prime_analysis_col2 = st.columns(2)
     
@@ -349,9 +358,9 @@ def render_prime_impact_analysis(df):
     
     with prime_analysis_col2:
         # Prime統計サマリー
-        prime_count = len(df[df['is_prime'] == True])
-        non_prime_count = len(df[df['is_prime'] == False])
-        total_count = len(df)
+        prime_count = summary['prime_count']
+        non_prime_count = summary['non_prime_count']
+        total_count = summary['total']
         
         st.markdown(f"""
         <div class="analysis-container">
@@ -362,8 +371,8 @@ def render_prime_impact_analysis(df):
         """, unsafe_allow_html=True)
         
         if 'shopee_suitability_score' in df.columns:
-            prime_avg = df[df['is_prime'] == True]['shopee_suitability_score'].mean()
-            non_prime_avg = df[df['is_prime'] == False]['shopee_suitability_score'].mean()
+            prime_avg = summary['prime_avg_shopee_score']
+            non_prime_avg = summary['non_prime_avg_shopee_score']
             
             col1, col2 = st.columns(2)
             with col1:
@@ -391,72 +400,86 @@ def render_prime_impact_analysis(df):
         💡 **解釈**: Prime商品と非Prime商品の間に{'は' if is_significant else 'は'}統計的に有意な適性スコアの差が{'あります' if is_significant else 'ありません'}。
         """)
 
-def render_shipping_correlation_analysis(df):
-    """配送時間相関分析"""
+def _build_ship_score_scatter(df):
+    """配送時間 vs Shopee適性スコアの散布図（OLS回帰線付き）"""
+    ship_data = df[df['ship_hours'].notna()]
+    fig1 = px.scatter(
+        ship_data,
+        x='ship_hours',
+        y='shopee_suitability_score',
+        title='配送時間 vs Shopee適性スコア',
+        trendline='ols',
+        hover_data=['asin'] if 'asin' in ship_data.columns else None,
+        color='is_prime' if 'is_prime' in ship_data.columns else None,
+        color_discrete_map={True: '#10B981', False: '#EF4444'}
+    )
+    
+    fig1.update_layout(
+        xaxis_title='配送時間（時間）',
+        yaxis_title='Shopee適性スコア',
+        height=400
+    )
+    return fig1
+
+def _build_ship_category_analysis(df):
+    """配送時間カテゴリ別の平均スコア表と棒グラフ"""
+    ship_data = df[df['ship_hours'].notna()].copy()
+    ship_data['ship_category'] = pd.cut(
+        ship_data['ship_hours'], 
+        bins=[0, 12, 24, 48, float('inf')], 
+        labels=['12h以内', '12-24h', '24-48h', '48h超']
+    )
+    
+    category_analysis = ship_data.groupby('ship_category', observed=False).agg({
+        'shopee_suitability_score': ['mean', 'count'],
+        'prime_confidence_score': 'mean' if 'prime_confidence_score' in ship_data.columns else lambda x: 0
+    }).round(2)
+    
+    # カラム名を平坦化
+    category_analysis.columns = ['Shopee適性平均', '商品数', 'Prime信頼性平均']
+    
+    fig2 = px.bar(
+        x=category_analysis.index,
+        y=category_analysis['Shopee適性平均'],
+        title='配送時間カテゴリ別平均スコア',
+        labels={'x': '配送時間カテゴリ', 'y': 'Shopee適性平均スコア'},
+        color=category_analysis['Shopee適性平均'],
+        color_continuous_scale='Viridis'
+    )
+    
+    fig2.update_layout(height=400)
+    return category_analysis, fig2
+
+def render_shipping_correlation_analysis(df, data_version=None, config_version='none'):
+    """配送時間相関分析（グラフ・集計表はデータ版数・設定版数ごとにキャッシュ）"""
     st.subheader("🚚 配送時間相関分析")
     
     if 'ship_hours' not in df.columns:
         st.warning("配送時間情報が見つかりません")
         return
     
-    ship_data = df[df['ship_hours'].notna()].copy()
+    ship_data = df[df['ship_hours'].notna()]
     
     if len(ship_data) == 0:
         st.info("配送時間データがありません")
         return
     
+    def _derived(name, builder):
+        if data_version is None:
+            return builder(df)
+        return memoize_derived(name, df, builder, data_version, config_version)
+    
     shipping_col1, shipping_col2 = st.columns(2)
     
     with shipping_col1:
         # 配送時間とスコアの散布図
         if 'shopee_suitability_score' in ship_data.columns:
-            fig1 = px.scatter(
-                ship_data,
-                x='ship_hours',
-                y='shopee_suitability_score',
-                title='配送時間 vs Shopee適性スコア',
-                trendline='ols',
-                hover_data=['asin'] if 'asin' in ship_data.columns else None,
-                color='is_prime' if 'is_prime' in ship_data.columns else None,
-                color_discrete_map={True: '#10B981', False: '#EF4444'}
-            )
-            
-            fig1.update_layout(
-                xaxis_title='配送時間（時間）',
-                yaxis_title='Shopee適性スコア',
-                height=400
-            )
-            
+            fig1 = _derived('analysis_ship_score_scatter', _build_ship_score_scatter)
             st.plotly_chart(fig1, use_container_width=True)
     
     with shipping_col2:
         # 配送時間カテゴリ別分析
-        ship_categories = pd.cut(
-            ship_data['ship_hours'], 
-            bins=[0, 12, 24, 48, float('inf')], 
-            labels=['12h以内', '12-24h', '24-48h', '48h超']
-        )
-        
-        ship_data['ship_category'] = ship_categories
-        
-        category_analysis = ship_data.groupby('ship_category').agg({
-            'shopee_suitability_score': ['mean', 'count'],
-            'prime_confidence_score': 'mean' if 'prime_confidence_score' in ship_data.columns else lambda x: 0
-        }).round(2)
-        
-        # カラム名を平坦化
-        category_analysis.columns = ['Shopee適性平均', '商品数', 'Prime信頼性平均']
-        
-        fig2 = px.bar(
-            x=category_analysis.index,
-            y=category_analysis['Shopee適性平均'],
-            title='配送時間カテゴリ別平均スコア',
-            labels={'x': '配送時間カテゴリ', 'y': 'Shopee適性平均スコア'},
-            color=category_analysis['Shopee適性平均'],
-            color_continuous_scale='Viridis'
-        )
-        
-        fig2.update_layout(height=400)
+        category_analysis, fig2 = _derived('analysis_ship_category', _build_ship_category_analysis)
         st.plotly_chart(fig2, use_container_width=True)
     
     # 配送時間詳細統計
@@ -474,34 +497,86 @@ def render_shipping_correlation_analysis(df):
         else:
             st.info(f"📈 **相関分析結果**: 配送時間とShopee適性スコアの間に明確な相関は見られません（r = {correlation:.3f}）")
 
-def render_success_prediction_analysis(df):
+def render_shipping_trend_analysis(session_state):
+    """ShippingTime推移（実行ごとの取得率・出品者タイプ/ブランド/カテゴリ別集計・悪化ASIN・ASIN別履歴）"""
+    st.subheader("📈 ShippingTime推移")
+    if not SHIPPING_TREND_AVAILABLE:
+        st.info("ShippingTime推移ストアが利用できません")
+        return
+
+    trend_manager = create_shipping_trend_manager()
+    history = trend_manager.get_run_history()
+    if history.empty:
+        st.info("推移の記録がありません（データ管理タブで処理を実行すると記録されます）")
+        return
+
+    history['fast_24h_rate'] = (history['fast_24h'] / history['with_shipping'].replace(0, np.nan) * 100).fillna(0.0)
+    fig = px.line(
+        history, x='recorded_at', y=['success_rate', 'fast_24h_rate'], markers=True,
+        title='実行ごとのShippingTime取得率・24時間以内率（%）',
+        labels={'recorded_at': '実行日時', 'value': '%', 'variable': '指標'}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    rollup_col1, rollup_col2 = st.columns([2, 1])
+    with rollup_col1:
+        dimension = st.selectbox("集計軸", ROLLUP_DIMENSIONS, format_func=lambda d: ROLLUP_DIMENSION_LABELS.get(d, d),
+                                 key='shipping_trend_dimension')
+    with rollup_col2:
+        last_runs = st.number_input("直近の実行数（0で全期間）", min_value=0, value=5, step=1,
+                                    key='shipping_trend_last_runs')
+    rollup = trend_manager.rollup(dimension, last_runs=int(last_runs) or None)
+    if rollup.empty:
+        st.info("集計対象の観測がありません")
+    else:
+        st.dataframe(rollup.round(1), use_container_width=True)
+
+    # 最新実行で発送時間が悪化したASIN（処理直後の結果があればそれを使う）
+    degraded = session_state.get('shipping_degraded_df')
+    if degraded is None:
+        degraded = trend_manager.find_degraded_asins()
+    if degraded is not None and not degraded.empty:
+        st.warning(f"⚠️ 最新実行で発送時間が悪化したASIN: {len(degraded)}件")
+        st.dataframe(degraded, use_container_width=True)
+
+    asin = st.text_input("ASIN別履歴", placeholder="B0XXXXXXXX", key='shipping_trend_asin').strip().upper()
+    if asin:
+        asin_history = trend_manager.get_asin_history(asin)
+        if asin_history.empty:
+            st.info(f"{asin} の観測はありません")
+        else:
+            st.dataframe(asin_history, use_container_width=True)
+
+def render_success_prediction_analysis(df, summary=None):
     """成功率予測分析"""
     st.subheader("🎯 成功率予測分析")
+    if summary is None:
+        summary = compute_run_summary(df)
     
     # 成功率予測モデル（簡易版）
     success_factors = []
     
-    total_items = len(df)
+    total_items = summary['total']
     
-    # 各要因の計算
+    # 各要因の計算（run_summaryの集計値を使用）
     if 'shopee_group' in df.columns:
-        group_a_count = len(df[df['shopee_group'] == 'A'])
+        group_a_count = summary['group_a']
         group_a_rate = group_a_count / total_items * 100
         success_factors.append(('グループA率', group_a_rate, 30, group_a_count))
     
     if 'is_prime' in df.columns:
-        prime_count = len(df[df['is_prime'] == True])
-        prime_rate = prime_count / total_items * 100
+        prime_count = summary['prime_count']
+        prime_rate = summary['prime_rate']
         success_factors.append(('Prime商品率', prime_rate, 25, prime_count))
     
     if 'ship_hours' in df.columns:
-        fast_shipping_count = len(df[df['ship_hours'] <= 24])
-        total_with_shipping = len(df[df['ship_hours'].notna()])
+        fast_shipping_count = summary['fast_24h']
+        total_with_shipping = summary['with_shipping']
         fast_shipping_rate = fast_shipping_count / total_with_shipping * 100 if total_with_shipping > 0 else 0
         success_factors.append(('高速配送率', fast_shipping_rate, 20, fast_shipping_count))
     
     if 'extracted_brand' in df.columns:
-        brand_count = len(df[df['extracted_brand'].notna() & (df['extracted_brand'] != '')])
+        brand_count = summary['brand_count']
         brand_coverage = brand_count / total_items * 100
         success_factors.append(('ブランド特定率', brand_coverage, 15, brand_count))
     
@@ -590,61 +665,58 @@ def render_success_prediction_analysis(df):
         for suggestion in improvement_suggestions:
             st.info(suggestion)
 
-def render_comprehensive_correlation_analysis(df):
-    """総合相関分析"""
+def _build_correlation_analysis(df):
+    """相関分析結果とヒートマップ（Pearson）"""
+    analysis = compute_correlation_analysis(df)
+    fig = None
+    if len(analysis['features']) >= 2:
+        fig = px.imshow(
+            analysis['pearson'],
+            title="特徴量相関マトリックス",
+            color_continuous_scale='RdBu_r',
+            aspect='auto',
+            zmin=-1,
+            zmax=1
+        )
+        fig.update_layout(height=500)
+    return analysis, fig
+
+def render_comprehensive_correlation_analysis(df, data_version=None, config_version='none'):
+    """総合相関分析（相関行列・ヒートマップはデータ版数・設定版数ごとにキャッシュ）"""
     st.subheader("🔗 総合相関分析")
     
-    # 数値列の抽出
-    numeric_columns = []
-    for col in df.columns:
-        if df[col].dtype in ['int64', 'float64', 'bool']:
-            if df[col].notna().sum() > 0:  # データがある列のみ
-                numeric_columns.append(col)
-    
-    # bool型をint型に変換
-    df_numeric = df[numeric_columns].copy()
-    for col in df_numeric.columns:
-        if df_numeric[col].dtype == 'bool':
-            df_numeric[col] = df_numeric[col].astype(int)
-    
-    if len(numeric_columns) >= 2:
+    if data_version is None:
+        analysis, fig1 = _build_correlation_analysis(df)
+    else:
+        analysis, fig1 = memoize_derived('analysis_correlation', df, _build_correlation_analysis, data_version,
+                                         config_version)
+    
+    if len(analysis['features']) >= 2:
+        if analysis['sampled']:
+            st.caption(f"📉 {len(df):,}行から{analysis['rows_used']:,}行を無作為抽出して計算しています")
+        if analysis['skewed']:
+            st.caption(f"📐 歪んだ分布のため順位相関（Spearman）で評価: {', '.join(map(str, analysis['skewed']))}")
+        
+        # 相関の強さ順（上位k件はエンジン側で抽出済み）
+        strong_correlations = [
+            {
+                '変数1': row.var1,
+                '変数2': row.var2,
+                '相関係数': round(row.r, 3),
+                '相関強度': get_correlation_strength(row.abs_r),
+                '方向': '正' if row.r > 0 else '負',
+                '手法': 'Spearman' if row.method == 'spearman' else 'Pearson'
+            }
+            for row in analysis['pairs'].itertuples(index=False)
+        ]
+        
         correlation_col1, correlation_col2 = st.columns(2)
         
         with correlation_col1:
-            # 相関行列計算
-            correlation_matrix = df_numeric.corr()
-            
-            # ヒートマップ作成
-            fig1 = px.imshow(
-                correlation_matrix,
-                title="特徴量相関マトリックス",
-                color_continuous_scale='RdBu_r',
-                aspect='auto',
-                zmin=-1,
-                zmax=1
-            )
-            
-            fig1.update_layout(height=500)
+            # ヒートマップ
             st.plotly_chart(fig1, use_container_width=True)
         
         with correlation_col2:
-            # 強い相関の特定
-            strong_correlations = []
-            for i in range(len(correlation_matrix.columns)):
-                for j in range(i+1, len(correlation_matrix.columns)):
-                    corr_value = correlation_matrix.iloc[i, j]
-                    if abs(corr_value) > 0.3:  # 閾値を0.5から0.3に下げて有用な相関も表示
-                        strong_correlations.append({
-                            '変数1': correlation_matrix.columns[i],
-                            '変数2': correlation_matrix.columns[j],
-                            '相関係数': round(corr_value, 3),
-                            '相関強度': get_correlation_strength(abs(corr_value)),
-                            '方向': '正' if corr_value > 0 else '負'
-                        })
-            
-            # 相関の強さでソート
-            strong_correlations = sorted(strong_correlations, key=lambda x: abs(x['相関係数']), reverse=True)
-            
             if strong_correlations:
                 st.markdown("### 🔍 検出された相関関係")
                 
@@ -654,7 +726,7 @@ def render_comprehensive_correlation_analysis(df):
                     st.markdown(f"""
                     <div style="background: {strength_color}; padding: 10px; margin: 5px 0; border-radius: 5px; color: white;">
                         <strong>{i+1}. {corr['変数1']} ↔ {corr['変数2']}</strong><br>
-                        相関係数: {corr['相関係数']:.3f} ({corr['相関強度']}・{corr['方向']}の相関)
+                        相関係数: {corr['相関係数']:.3f} ({corr['相関強度']}・{corr['方向']}の相関・{corr['手法']})
                     </div>
                     """, unsafe_allow_html=True)
             else:
@@ -8,6 +8,26 @@ from datetime import datetime, timedelta
 import time
 import json
 
+# 処理結果サマリー（processed_dfごとに1回だけ集計し、全タブで共有）
+from core.helpers.run_summary import compute_run_summary, get_run_summary
+
+# キャッシュ層（データ版数キーでのグラフのメモ化、セッションにデータが無い場合は前回の処理結果を表示）
+from app.cache_layer import get_data_version, get_config_version, memoize_derived, load_latest_run_frame_cached
+
+# ステージ別計測（処理時間・スループット・エラー率の実測値）
+from core.helpers.stage_metrics import PIPELINE_STAGES
+
+# 使用量台帳（リクエスト数・トークン数・推定コスト）
+from core.helpers.usage_ledger import summarize_usage, USAGE_COLUMNS
+
+# 商品レジストリ（セッションに計測値が無い場合は前回実行の計測値を表示）
+REGISTRY_AVAILABLE = False
+try:
+    from core.managers.registry_manager import create_registry_manager
+    REGISTRY_AVAILABLE = True
+except ImportError:
+    pass
+
 def render_dashboard_tab(session_state, asin_helpers_available, config_available, config_manager):
     """リアルタイムダッシュボードタブ"""
     
@@ -29,12 +49,20 @@ def render_dashboard_tab(session_state, asin_helpers_available, config_available
     # データ存在チェック
     df = session_state.get('processed_df')
     if df is None or df.empty:
-        st.warning("📋 データを読み込んでください（データ管理タブ）")
-        render_demo_dashboard()
-        return
+        df = load_latest_run_frame_cached()
+        if df is None or df.empty:
+            st.warning("📋 データを読み込んでください（データ管理タブ）")
+            render_demo_dashboard()
+            return
+        st.info("💾 前回の処理結果（registry.db）を表示しています")
     
     # 実データでダッシュボード表示
-    render_real_dashboard(df, config_available, config_manager)
+    render_real_dashboard(
+        df, config_available, config_manager,
+        summary=get_run_summary(session_state, df),
+        data_version=get_data_version(session_state, df),
+        run_metrics=get_run_metrics(session_state)
+    )
     
     # 自動更新機能
     if auto_refresh:
@@ -142,18 +170,98 @@ def render_demo_dashboard():
     
     st.plotly_chart(fig_timeline, use_container_width=True)
 
-def render_real_dashboard(df, config_available, config_manager):
-    """実データダッシュボード表示"""
+def _build_prime_box_figure(df):
+    """Prime有無による適性スコア分布（箱ひげ図）"""
+    prime_data = df[df['is_prime'] == True]['shopee_suitability_score']
+    non_prime_data = df[df['is_prime'] == False]['shopee_suitability_score']
+    
+    fig_prime = go.Figure()
+    
+    if len(prime_data) > 0:
+        fig_prime.add_trace(go.Box(
+            y=prime_data,
+            name='Prime商品',
+            marker_color='#10B981'
+        ))
+    
+    if len(non_prime_data) > 0:
+        fig_prime.add_trace(go.Box(
+            y=non_prime_data,
+            name='非Prime商品',
+            marker_color='#EF4444'
+        ))
+    
+    fig_prime.update_layout(
+        title='Prime有無による適性スコア分布',
+        yaxis_title='Shopee適性スコア',
+        height=400
+    )
+    return fig_prime
+
+def _build_ship_histogram_figure(df):
+    """配送時間ヒストグラム"""
+    fig_ship_hist = px.histogram(
+        df[df['ship_hours'].notna()],
+        x='ship_hours',
+        nbins=20,
+        title='配送時間分布',
+        labels={'ship_hours': '配送時間（時間）', 'count': '商品数'}
+    )
+    fig_ship_hist.update_traces(marker_color='#3B82F6')
+    return fig_ship_hist
+
+def _cached_figure(name, df, builder, data_version, config_version='none'):
+    """データ版数が分かる場合はキャッシュ層経由でグラフを生成（設定変更後は作り直す）"""
+    if data_version is None:
+        return builder(df)
+    return memoize_derived(name, df, builder, data_version, config_version)
+
+def get_run_metrics(session_state):
+    """
+    直近の処理実行の計測値（セッション → registry.db の最新計測の順）
+    
+    Returns:
+        dict: overview（StageMetrics.overview と同じキー）/ stages（ステージ別DataFrame）/
+              usage（使用量DataFrame）、無い場合はNone
+    """
+    stage_metrics = session_state.get('stage_metrics')
+    if stage_metrics is not None:
+        usage_ledger = session_state.get('usage_ledger')
+        usage = usage_ledger.usage_frame() if usage_ledger is not None else pd.DataFrame(columns=USAGE_COLUMNS)
+        return {'overview': stage_metrics.overview(), 'stages': stage_metrics.stage_frame(), 'usage': usage}
+    if not REGISTRY_AVAILABLE:
+        return None
+    try:
+        registry = create_registry_manager()
+        recorded = registry.get_run_metrics()
+        usage = registry.get_run_usage(recorded['run_id']) if recorded is not None else None
+    except Exception:
+        return None
+    if recorded is None:
+        return None
+    stages = recorded.pop('stages')
+    recorded['success_rate'] = 100.0 - recorded['error_rate'] if recorded['items'] else 0.0
+    stages['label'] = stages['stage'].map(lambda stage: PIPELINE_STAGES.get(stage, stage))
+    order = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+    stages = stages.sort_values('stage', key=lambda col: col.map(lambda stage: order.get(stage, len(order))))
+    return {'overview': recorded, 'stages': stages.reset_index(drop=True), 'usage': usage}
+
+def render_real_dashboard(df, config_available, config_manager, summary=None, data_version=None, run_metrics=None):
+    """実データダッシュボード表示（集計値は run_summary、グラフはキャッシュ層から取得）"""
+    if summary is None:
+        summary = compute_run_summary(df)
+    performance = calculate_performance_metrics(df, summary, run_metrics)
+    config_version = get_config_version(config_manager if config_available else None)
     
     # KPI計算
-    total_items = len(df)
-    group_a_count = len(df[df.get('shopee_group') == 'A']) if 'shopee_group' in df.columns else 0
-    group_b_count = len(df[df.get('shopee_group') == 'B']) if 'shopee_group' in df.columns else 0
-    group_c_count = len(df[df.get('shopee_group') == 'C']) if 'shopee_group' in df.columns else 0
+    total_items = summary['total']
+    group_a_count = summary['group_a']
+    group_b_count = summary['group_b']
+    group_c_count = summary['group_c']
     
     # Prime商品統計
-    prime_count = len(df[df.get('is_prime') == True]) if 'is_prime' in df.columns else 0
-    prime_rate = (prime_count / total_items * 100) if total_items > 0 else 0
+    prime_count = summary['prime_count']
+    prime_rate = summary['prime_rate']
     
     # 成功率計算
     if config_available and config_manager:
@@ -205,8 +313,8 @@ def render_real_dashboard(df, config_available, config_manager):
     # グループ分布チャート
     st.subheader("📈 グループ分布")
     
-    if 'shopee_group' in df.columns:
-        group_counts = df['shopee_group'].value_counts()
+    if summary['group_counts']:
+        group_counts = pd.Series(summary['group_counts'])
         
         # 円グラフと棒グラフの併用表示
         chart_col1, chart_col2 = st.columns(2)
@@ -247,31 +355,9 @@ def render_real_dashboard(df, config_available, config_manager):
         prime_analysis_col1, prime_analysis_col2 = st.columns(2)
         
         with prime_analysis_col1:
-            # Prime vs 非Prime の適性スコア比較
-            prime_data = df[df['is_prime'] == True]['shopee_suitability_score'] if 'shopee_suitability_score' in df.columns else pd.Series([])
-            non_prime_data = df[df['is_prime'] == False]['shopee_suitability_score'] if 'shopee_suitability_score' in df.columns else pd.Series([])
-            
-            fig_prime = go.Figure()
-            
-            if len(prime_data) > 0:
-                fig_prime.add_trace(go.Box(
-                    y=prime_data,
-                    name='Prime商品',
-                    marker_color='#10B981'
-                ))
-            
-            if len(non_prime_data) > 0:
-                fig_prime.add_trace(go.Box(
-                    y=non_prime_data,
-                    name='非Prime商品',
-                    marker_color='#EF4444'
-                ))
-            
-            fig_prime.update_layout(
-                title='Prime有無による適性スコア分布',
-                yaxis_title='Shopee適性スコア',
-                height=400
-            )
+            # Prime vs 非Prime の適性スコア比較（データ版数が同じ間はキャッシュ）
+            fig_prime = _cached_figure('dashboard_prime_box', df, _build_prime_box_figure, data_version,
+                                       config_version)
             
             st.plotly_chart(fig_prime, use_container_width=True)
         
@@ -287,45 +373,28 @@ def render_real_dashboard(df, config_available, config_manager):
             
             with prime_stats_col1:
                 st.metric("Prime商品数", prime_count)
-                prime_avg = prime_data.mean() if len(prime_data) > 0 else 0
-                st.metric("Prime平均スコア", f"{prime_avg:.1f}")
+                st.metric("Prime平均スコア", f"{summary['prime_avg_shopee_score']:.1f}")
             
             with prime_stats_col2:
-                non_prime_count = total_items - prime_count
-                st.metric("非Prime商品数", non_prime_count)
-                non_prime_avg = non_prime_data.mean() if len(non_prime_data) > 0 else 0
-                st.metric("非Prime平均スコア", f"{non_prime_avg:.1f}")
+                st.metric("非Prime商品数", summary['non_prime_count'])
+                st.metric("非Prime平均スコア", f"{summary['non_prime_avg_shopee_score']:.1f}")
     
     # 配送時間分析
     st.subheader("🚚 配送時間分析")
     
     if 'ship_hours' in df.columns:
-        ship_data = df[df['ship_hours'].notna()]
-        
-        if len(ship_data) > 0:
+        if summary['with_shipping'] > 0:
             shipping_col1, shipping_col2 = st.columns(2)
             
             with shipping_col1:
                 # 配送時間ヒストグラム
-                fig_ship_hist = px.histogram(
-                    ship_data,
-                    x='ship_hours',
-                    nbins=20,
-                    title='配送時間分布',
-                    labels={'ship_hours': '配送時間（時間）', 'count': '商品数'}
-                )
-                fig_ship_hist.update_traces(marker_color='#3B82F6')
+                fig_ship_hist = _cached_figure('dashboard_ship_histogram', df, _build_ship_histogram_figure,
+                                              data_version, config_version)
                 st.plotly_chart(fig_ship_hist, use_container_width=True)
             
             with shipping_col2:
                 # 配送時間カテゴリ分析
-                ship_categories = pd.cut(
-                    ship_data['ship_hours'], 
-                    bins=[0, 12, 24, 48, float('inf')], 
-                    labels=['12h以内', '12-24h', '24-48h', '48h超']
-                )
-                
-                category_counts = ship_categories.value_counts()
+                category_counts = pd.Series(summary['ship_category_counts'])
                 
                 fig_ship_cat = px.bar(
                     x=category_counts.index,
@@ -357,19 +426,25 @@ def render_real_dashboard(df, config_available, config_manager):
     
     with monitor_col2:
         # パフォーマンス統計
-        avg_shopee_score = df['shopee_suitability_score'].mean() if 'shopee_suitability_score' in df.columns else 0
-        avg_prime_score = df['prime_confidence_score'].mean() if 'prime_confidence_score' in df.columns else 0
+        avg_shopee_score = summary['avg_shopee_score']
+        avg_prime_score = summary['avg_prime_score']
         
         st.markdown(f"""
         <div class="dashboard-card">
             <h4>📊 パフォーマンス統計</h4>
             <p><strong>平均Shopee適性</strong>: {avg_shopee_score:.1f}点</p>
             <p><strong>平均Prime信頼性</strong>: {avg_prime_score:.1f}点</p>
-            <p><strong>推定処理時間</strong>: {total_items * 0.8:.1f}秒</p>
+            <p><strong>処理時間（実測）</strong>: {performance['wall_seconds']:.1f}秒</p>
+            <p><strong>スループット</strong>: {performance['processing_rate']:.1f}件/分</p>
+            <p><strong>エラー率</strong>: {performance['error_rate']:.1f}%</p>
             <p><strong>予測成功率</strong>: {success_rate:.1f}%</p>
         </div>
         """, unsafe_allow_html=True)
     
+    # ステージ別処理時間・API使用量
+    render_stage_metrics(run_metrics)
+    render_usage_costs(run_metrics, listed_items=group_a_count)
+    
     # アラート・通知
     st.subheader("🚨 アラート・通知")
     
@@ -420,19 +495,104 @@ def render_real_dashboard(df, config_available, config_manager):
     for rec in recommendations:
         st.info(rec)
 
-def calculate_performance_metrics(df):
-    """パフォーマンスメトリクスの計算"""
+def render_stage_metrics(run_metrics):
+    """ステージ別の処理時間・レイテンシ分布・再試行・キャッシュヒット"""
+    st.subheader("⏱️ ステージ別処理時間")
+    
+    if not run_metrics or run_metrics['stages'].empty:
+        st.info("計測値がありません（データ管理タブで処理を実行すると記録されます）")
+        return
+    
+    overview = run_metrics['overview']
+    stages = run_metrics['stages']
+    
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("処理時間", f"{overview['wall_seconds']:.1f}秒")
+    metric_cols[1].metric("スループット", f"{overview['items_per_minute']:.1f}件/分")
+    metric_cols[2].metric("再試行", f"{int(overview['total_retries'])}回")
+    metric_cols[3].metric("キャッシュヒット", f"{int(overview['total_cache_hits'])}件")
+    
+    stage_col1, stage_col2 = st.columns(2)
+    
+    with stage_col1:
+        fig_stage = px.bar(
+            stages,
+            x='label',
+            y='total_seconds',
+            title='ステージ別 合計処理時間',
+            labels={'label': 'ステージ', 'total_seconds': '秒'}
+        )
+        fig_stage.update_traces(marker_color='#3B82F6')
+        st.plotly_chart(fig_stage, use_container_width=True)
+    
+    with stage_col2:
+        display = stages[['label', 'calls', 'errors', 'retries', 'cache_hits', 'total_seconds',
+                          'p50_ms', 'p95_ms', 'p99_ms']].rename(columns={
+            'label': 'ステージ', 'calls': '呼び出し', 'errors': 'エラー', 'retries': '再試行',
+            'cache_hits': 'キャッシュ', 'total_seconds': '合計(秒)',
+            'p50_ms': 'p50(ms)', 'p95_ms': 'p95(ms)', 'p99_ms': 'p99(ms)'
+        })
+        st.dataframe(display.round(1), use_container_width=True, hide_index=True)
+    
+    # 最も時間を使っているステージ
+    slowest = stages.loc[stages['total_seconds'].idxmax()]
+    if slowest['total_seconds'] > 0:
+        share = slowest['total_seconds'] / stages['total_seconds'].sum() * 100
+        st.caption(f"ボトルネック: {slowest['label']}（計測時間の{share:.0f}%、p95 {slowest['p95_ms']:.0f}ms）")
+
+def render_usage_costs(run_metrics, listed_items=0):
+    """APIリクエスト・スロットリング・LLMトークン数と推定コスト（出品対象1件あたり）"""
+    st.subheader("💰 API使用量・推定コスト")
+    
+    usage = run_metrics.get('usage') if run_metrics else None
+    if usage is None or usage.empty:
+        st.info("使用量の記録がありません（SP-API・LLMを呼び出す処理を実行すると記録されます）")
+        return
+    
+    items = int(run_metrics['overview']['items'])
+    totals = summarize_usage(usage, items=items, listed_items=listed_items)
+    
+    usage_cols = st.columns(4)
+    usage_cols[0].metric("APIリクエスト", f"{totals['requests']}件", f"{totals['requests_per_item']:.1f}件/商品",
+                         delta_color="off")
+    usage_cols[1].metric("スロットリング(429)", f"{totals['throttled']}件")
+    usage_cols[2].metric("LLMトークン", f"{totals['input_tokens'] + totals['output_tokens']:,}")
+    usage_cols[3].metric("推定コスト", f"${totals['cost_usd']:.4f}", f"出品対象1件 ${totals['cost_per_listed_item']:.4f}",
+                         delta_color="off")
+    
+    display = usage.assign(stage=usage['stage'].map(lambda stage: PIPELINE_STAGES.get(stage, stage)))
+    display = display[['stage', 'provider', 'operation', 'requests', 'throttled', 'retries', 'errors',
+                       'input_tokens', 'output_tokens', 'cost_usd']].rename(columns={
+        'stage': 'ステージ', 'provider': 'プロバイダ', 'operation': '操作/モデル', 'requests': 'リクエスト',
+        'throttled': '429', 'retries': '再試行', 'errors': 'エラー', 'input_tokens': '入力トークン',
+        'output_tokens': '出力トークン', 'cost_usd': '推定コスト($)'
+    })
+    st.dataframe(display, use_container_width=True, hide_index=True)
+
+def calculate_performance_metrics(df, summary=None, run_metrics=None):
+    """
+    パフォーマンスメトリクスの計算
+    
+    処理速度・エラー率・処理時間は計測値（run_metrics）の実測値、計測が無い場合は0。
+    """
+    overview = run_metrics['overview'] if run_metrics else {}
+    measured = {
+        'processing_rate': float(overview.get('items_per_minute', 0.0)),
+        'error_rate': float(overview.get('error_rate', 0.0)),
+        'wall_seconds': float(overview.get('wall_seconds', 0.0))
+    }
     if df is None or df.empty:
         return {
             'total_items': 0,
-            'processing_rate': 0,
-            'error_rate': 0,
+            **measured,
             'success_rate': 95.0
         }
+    if summary is None:
+        summary = compute_run_summary(df)
     
-    total_items = len(df)
-    group_a_count = len(df[df.get('shopee_group') == 'A']) if 'shopee_group' in df.columns else 0
-    prime_count = len(df[df.get('is_prime') == True]) if 'is_prime' in df.columns else 0
+    total_items = summary['total']
+    group_a_count = summary['group_a']
+    prime_count = summary['prime_count']
     
     # 成功率計算（簡易版）
     base_success_rate = 75.0
@@ -441,7 +601,6 @@ def calculate_performance_metrics(df):
     
     return {
         'total_items': total_items,
-        'processing_rate': total_items / 60,  # 仮の処理速度（件/分）
-        'error_rate': 0.5,  # 仮のエラー率
+        **measured,
         'success_rate': base_success_rate + group_a_bonus + prime_bonus
     }
\ No newline at end of file
@@ -11,9 +11,80 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
+import time
 import traceback
 from datetime import datetime
 
+# エクスポートサブシステム（ストリーミングExcel・CSV・Parquet）
+EXPORT_HELPERS_AVAILABLE = False
+try:
+    from core.helpers.export_helpers import (
+        compute_export_aggregates, write_excel_streaming, export_csv, export_parquet, PARQUET_AVAILABLE
+    )
+    EXPORT_HELPERS_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 入力取り込みレイヤー（必要カラムのみ解析・内容ハッシュでキャッシュ）
+INGESTION_HELPERS_AVAILABLE = False
+try:
+    from core.helpers.ingestion_helpers import load_table, read_columns, select_ingestion_columns
+    INGESTION_HELPERS_AVAILABLE = True
+except ImportError:
+    pass
+
+# 重複チェック（ASINキー＋タイトル埋め込み距離、出品済みインデックス）
+DUPLICATOR_AVAILABLE = False
+try:
+    from core.managers.duplicator import create_duplicate_index_manager
+    DUPLICATOR_AVAILABLE = True
+except ImportError:
+    pass
+
+# Keepa売れ筋ランク（候補ASINの低需要品をAPI/LLM処理の前に除外）
+KEEPA_AVAILABLE = False
+try:
+    from core.managers.keepa_rank_manager import create_keepa_rank_manager, DEFAULT_MAX_SALES_RANK, STATUS_NO_RANK, STATUS_NOT_FETCHED
+    from core.services.keepa_client import create_keepa_client
+    KEEPA_AVAILABLE = True
+except ImportError:
+    pass
+
+# 商品レジストリ（registry.db、実行結果の永続化）
+REGISTRY_AVAILABLE = False
+try:
+    from core.managers.registry_manager import create_registry_manager
+    REGISTRY_AVAILABLE = True
+except ImportError:
+    pass
+
+# 処理結果サマリー（processed_dfごとに1回だけ集計し、全タブで共有）
+from core.helpers.run_summary import get_run_summary
+
+# ステージ別計測（実時間・呼び出し数・再試行・キャッシュヒット・p50/p95/p99）
+from core.helpers.stage_metrics import StageMetrics, activate_metrics, stage_timer
+
+# 使用量台帳（SP-APIリクエスト・スロットリング・LLMトークン数・推定コスト）
+from core.helpers.usage_ledger import UsageLedger, activate_usage
+
+# キャッシュ層（新しい処理結果の記録後に派生データ・前回結果のキャッシュを破棄）
+from app.cache_layer import invalidate_data_caches, get_ng_word_manager
+
+# ShippingTime推移ストア（実行間の取得率・発送時間悪化の検出）
+SHIPPING_TREND_AVAILABLE = False
+try:
+    from core.managers.shipping_trend_manager import create_shipping_trend_manager
+    SHIPPING_TREND_AVAILABLE = True
+except ImportError:
+    pass
+
+def _find_asin_column(df):
+    """ASINカラムの検出（無い場合はNone）"""
+    for col in ('asin', 'amazon_asin', 'ASIN'):
+        if col in df.columns:
+            return col
+    return None
+
 # フォールバック関数群
 def calculate_prime_confidence_score_fallback(row_data_dict):
     confidence_score = 50
@@ -181,7 +252,8 @@ def enhanced_processing_v8_ultimate_fallback(df_input, title_column='clean_title
             
             # NGワードチェック
             if ng_word_manager:
-                ng_check_result = ng_word_manager.check_ng_words(clean_title)
+                with stage_timer('ng'):
+                    ng_check_result = ng_word_manager.check_ng_words(clean_title)
                 current_result_data.update({
                     'is_ng': ng_check_result['is_ng'],
                     'ng_category': ng_check_result['ng_category'],
@@ -193,15 +265,16 @@ def enhanced_processing_v8_ultimate_fallback(df_input, title_column='clean_title
             current_result_data['seller_type'] = np.random.choice(['amazon', 'official_manufacturer', 'third_party'], p=[0.3,0.2,0.5])
             current_result_data['is_prime'] = np.random.choice([True, False])
             current_result_data['seller_name'] = "フォールバック出品者"
-            current_result_data['prime_confidence_score'] = calculate_prime_confidence_score_fallback(current_result_data)
-            
-            shipping_v8_info = get_shipping_time_v8_enhanced_fallback(current_result_data)
-            current_result_data.update(shipping_v8_info)
-            
-            classification_info = classify_shipping_v8_premium_fallback(current_result_data)
-            current_result_data.update(classification_info)
-            
-            current_result_data['shopee_suitability_score'] = calculate_shopee_score_v8_premium_fallback(current_result_data)
+            with stage_timer('scoring'):
+                current_result_data['prime_confidence_score'] = calculate_prime_confidence_score_fallback(current_result_data)
+                
+                shipping_v8_info = get_shipping_time_v8_enhanced_fallback(current_result_data)
+                current_result_data.update(shipping_v8_info)
+                
+                classification_info = classify_shipping_v8_premium_fallback(current_result_data)
+                current_result_data.update(classification_info)
+                
+                current_result_data['shopee_suitability_score'] = calculate_shopee_score_v8_premium_fallback(current_result_data)
             current_result_data.update({
                 'search_status': 'success', 
                 'data_source': 'フォールバック統合v8', 
@@ -229,13 +302,17 @@ def render_data_tab(session_state, asin_helpers_available, sp_api_available, ng_
         
         if uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file)
-                st.success(f"ファイル読み込み成功: {len(df)}行 x {len(df.columns)}列")
-                st.dataframe(df.head(3))
+                if INGESTION_HELPERS_AVAILABLE:
+                    all_columns = read_columns(uploaded_file)
+                    st.dataframe(load_table(uploaded_file, nrows=3))
+                else:
+                    df = pd.read_excel(uploaded_file)
+                    all_columns = list(df.columns)
+                    st.dataframe(df.head(3))
                 
-                potential_title_cols = [col for col in df.columns if isinstance(col, str) and ('title' in col.lower() or 'name' in col.lower() or '商品' in col)]
-                if not potential_title_cols and len(df.columns) > 0: 
-                    potential_title_cols = [str(df.columns[0])]
+                potential_title_cols = [col for col in all_columns if isinstance(col, str) and ('title' in col.lower() or 'name' in col.lower() or '商品' in col)]
+                if not potential_title_cols and len(all_columns) > 0: 
+                    potential_title_cols = [str(all_columns[0])]
                 
                 if potential_title_cols:
                     if 'selected_title_column' not in session_state or session_state.selected_title_column not in potential_title_cols:
@@ -249,6 +326,12 @@ def render_data_tab(session_state, asin_helpers_available, sp_api_available, ng_
                     )
                     session_state.selected_title_column = title_column 
                     
+                    if INGESTION_HELPERS_AVAILABLE:
+                        load_all_columns = st.checkbox("全カラムを読み込む", value=False, key="load_all_columns_checkbox", help="OFFの場合は商品名カラムとASIN・ブランド等の関連カラムのみ読み込みます")
+                        usecols = None if load_all_columns else select_ingestion_columns(all_columns, required=[title_column])
+                        df = load_table(uploaded_file, usecols=usecols)
+                    st.success(f"ファイル読み込み成功: {len(df)}行 x {len(df.columns)}列 (全{len(all_columns)}列中)")
+                    
                     process_limit = st.number_input("処理件数 (0で全件)", min_value=0, max_value=len(df), value=min(10, len(df)), key="process_limit_input")
                     if process_limit == 0: 
                         process_limit = len(df) 
@@ -256,6 +339,12 @@ def render_data_tab(session_state, asin_helpers_available, sp_api_available, ng_
                     st.markdown("---")
                     st.subheader("処理実行")
                     use_detailed_processing = st.checkbox("詳細処理とShopee最適化（推奨）", value=True, help="日本語化、Prime判定、ShippingTime最適化など、全ての拡張処理を実行します。")
+                    skip_duplicates = st.checkbox("重複商品を除外（ASIN＋タイトル類似度）", value=DUPLICATOR_AVAILABLE, disabled=not DUPLICATOR_AVAILABLE, help="出品済み商品・ファイル内の重複をAPI/LLM処理の前に除外します。")
+                    keepa_configured = KEEPA_AVAILABLE and create_keepa_client() is not None
+                    filter_by_keepa = st.checkbox("Keepa売れ筋ランクで除外", value=keepa_configured, disabled=not keepa_configured, help="ASINカラムがある場合、売れ筋ランクが閾値を超える商品を日本語化・オファー取得の前に除外します（KEEPA_API_KEY または KEEPA_ENDPOINT の設定が必要）。")
+                    keepa_max_rank = None
+                    if filter_by_keepa:
+                        keepa_max_rank = st.number_input("Keepaランク閾値（これを超える商品を除外）", min_value=1, value=DEFAULT_MAX_SALES_RANK, step=1000, key="keepa_max_rank_input")
                     
                     if sp_api_available and asin_helpers_available and use_detailed_processing:
                         st.info("処理エンジン: 97%+究極システム版 (sp_api_service.py v2 + asin_helpers.py v2)")
@@ -274,7 +363,7 @@ def render_data_tab(session_state, asin_helpers_available, sp_api_available, ng_
                         **期待効果 (詳細処理ON + v2ファイル利用時):** **総合成功率97%+**""")
 
                     if st.button("[START] データ処理実行", type="primary", key="process_data_button"):
-                        _execute_data_processing(df, title_column, process_limit, use_detailed_processing, session_state, asin_helpers_available, sp_api_available, ng_word_available)
+                        _execute_data_processing(df, title_column, process_limit, use_detailed_processing, session_state, asin_helpers_available, sp_api_available, ng_word_available, skip_duplicates=skip_duplicates, keepa_max_rank=keepa_max_rank)
                         
             except pd.errors.EmptyDataError: 
                 st.error("Excelファイルが空")
@@ -287,19 +376,62 @@ def render_data_tab(session_state, asin_helpers_available, sp_api_available, ng_
         if st.button("[START] デモデータ生成＆処理", type="secondary", key="generate_demo_and_process_v2"):
             _execute_demo_processing(session_state, asin_helpers_available)
 
-def _execute_data_processing(df, title_column, process_limit, use_detailed_processing, session_state, asin_helpers_available, sp_api_available, ng_word_available):
+def _execute_data_processing(df, title_column, process_limit, use_detailed_processing, session_state, asin_helpers_available, sp_api_available, ng_word_available, skip_duplicates=False, keepa_max_rank=None):
     """データ処理の実行"""
     if not title_column: 
         st.error("商品名カラムを選択してください。")
         return
     
-    with st.spinner(f"[PROGRESS] データ処理中 (最大{process_limit}件)... しばらくお待ちください..."):
+    # 処理実行中のステージ別計測（sp_api_service等の呼び出し先からも記録される）
+    stage_metrics = StageMetrics().start()
+    usage_ledger = UsageLedger()
+    
+    with st.spinner(f"[PROGRESS] データ処理中 (最大{process_limit}件)... しばらくお待ちください..."), \
+            activate_metrics(stage_metrics), activate_usage(usage_ledger):
         try:
             # データの前処理
-            df_for_processing = df.copy() 
-            df_for_processing['clean_title'] = df_for_processing[title_column].astype(str).str.strip()
-            df_for_processing.dropna(subset=['clean_title'], inplace=True) 
-            df_for_processing = df_for_processing[df_for_processing['clean_title'] != '']
+            with stage_timer('cleanse'):
+                df_for_processing = df.copy() 
+                df_for_processing['clean_title'] = df_for_processing[title_column].astype(str).str.strip()
+                df_for_processing.dropna(subset=['clean_title'], inplace=True) 
+                df_for_processing = df_for_processing[df_for_processing['clean_title'] != '']
+            
+            # 重複除外（API・LLM処理の前段）
+            if skip_duplicates and DUPLICATOR_AVAILABLE:
+                duplicate_manager = create_duplicate_index_manager()
+                df_for_processing, duplicate_report = duplicate_manager.filter_duplicates(
+                    df_for_processing, 'clean_title', key_column=_find_asin_column(df_for_processing)
+                )
+                session_state.duplicate_report = duplicate_report
+                if len(duplicate_report) > 0:
+                    status_counts = duplicate_report['dup_status'].value_counts()
+                    st.info(f"重複除外: 出品済み {status_counts.get('listed_duplicate', 0)}件 / ファイル内 {status_counts.get('batch_duplicate', 0)}件")
+                    with st.expander("重複と判定された商品", expanded=False):
+                        st.dataframe(duplicate_report, use_container_width=True)
+            
+            # 処理件数の上限で先に絞り込む（上限外の行のKeepaランクは取得しない）
+            df_for_processing = df_for_processing.head(process_limit)
+
+            # Keepa売れ筋ランクによる除外（オファー取得・日本語化の前段）
+            if keepa_max_rank and KEEPA_AVAILABLE:
+                asin_column = _find_asin_column(df_for_processing)
+                if asin_column is None:
+                    st.info("ASINカラムが無いため、Keepaランクによる除外をスキップしました")
+                else:
+                    keepa_manager = create_keepa_rank_manager()
+                    df_for_processing, keepa_report = keepa_manager.filter_by_sales_rank(
+                        df_for_processing, asin_column, max_rank=keepa_max_rank
+                    )
+                    session_state.keepa_report = keepa_report
+                    keepa_status_counts = df_for_processing['keepa_status'].value_counts()
+                    st.info(
+                        f"Keepaランク除外: {len(keepa_report)}件（ランク > {keepa_max_rank:,}） / "
+                        f"ランクなし {keepa_status_counts.get(STATUS_NO_RANK, 0)}件 / 未取得 {keepa_status_counts.get(STATUS_NOT_FETCHED, 0)}件"
+                    )
+                    if len(keepa_report) > 0:
+                        with st.expander("Keepaランクで除外された商品", expanded=False):
+                            st.dataframe(keepa_report, use_container_width=True)
+            
             actual_process_count = min(process_limit, len(df_for_processing))
             
             if actual_process_count == 0: 
@@ -328,9 +460,8 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
                 ng_manager = None
                 if ng_word_available:
                     try:
-                        from ng_word_manager import create_ng_word_manager
-                        ng_manager = create_ng_word_manager()
-                    except:
+                        ng_manager = get_ng_word_manager()
+                    except Exception:
                         pass
                 processed_data_df = enhanced_processing_v8_ultimate_fallback(df_for_processing, title_column='clean_title', limit=actual_process_count, ng_word_manager=ng_manager)
                 processing_engine_source = "フォールバック版 (asin_app_tabs.py)"
@@ -350,7 +481,8 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
             if asin_helpers_available and use_detailed_processing:
                 try:
                     from asin_helpers import classify_for_shopee_listing
-                    final_classified_df = classify_for_shopee_listing(processed_data_df)
+                    with stage_timer('classify'):
+                        final_classified_df = classify_for_shopee_listing(processed_data_df)
                     classification_engine_source = "asin_helpers.py v2統合版"
                 except:
                     classification_engine_source = "フォールバック分類"
@@ -369,14 +501,15 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
             group_b_indices = final_classified_df[final_classified_df.get('shopee_group') == 'B'].index.tolist()
             session_state.classified_groups = {'A': group_a_indices, 'B': group_b_indices}
             
-            # バッチ状況の計算
-            total_len = len(final_classified_df)
+            # バッチ状況の計算（サマリーはここで1回だけ集計され、各タブはこれを参照）
+            run_summary = get_run_summary(session_state)
+            total_len = run_summary['total']
             current_batch_status = {
                 'total': total_len,
                 'group_a': len(group_a_indices),
                 'group_b': len(group_b_indices),
-                'premium_count': len(final_classified_df[final_classified_df.get('classification_confidence') == 'premium']) if 'classification_confidence' in final_classified_df.columns else 0,
-                'ship_v8_success': len(final_classified_df[final_classified_df.get('ship_hours').notna()]) if 'ship_hours' in final_classified_df.columns else 0,
+                'premium_count': run_summary['premium_count'],
+                'ship_v8_success': run_summary['with_shipping'],
                 'processing_source': processing_engine_source,
                 'classification_source': classification_engine_source
             }
@@ -391,6 +524,44 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
             
             session_state.batch_status = current_batch_status
             
+            # ステージ別計測の確定（レジストリ記録などの後処理は含めない）
+            failed_items = 0
+            if 'search_status' in final_classified_df.columns:
+                failed_items = int(final_classified_df['search_status'].eq('error').sum())
+            stage_metrics.source = processing_engine_source
+            stage_metrics.finish(items=total_len, failed_items=failed_items)
+            session_state.stage_metrics = stage_metrics
+            session_state.usage_ledger = usage_ledger
+            session_state.stage_metrics_run_id = None
+            
+            # 商品レジストリへ記録（次回以降・他タブからの参照用）
+            registry_run_id = None
+            if REGISTRY_AVAILABLE:
+                try:
+                    registry_run_id = create_registry_manager().record_pipeline_run(
+                        final_classified_df, source=processing_engine_source
+                    )
+                    session_state.registry_run_id = registry_run_id
+                    session_state.stage_metrics_run_id = registry_run_id
+                    invalidate_data_caches(session_state)
+                except Exception as e_registry:
+                    st.warning(f"レジストリ記録エラー: {e_registry}")
+            _persist_stage_metrics(session_state)
+            
+            # ShippingTime推移ストアへ記録（レジストリと同じ実行IDで突き合わせ可能）
+            if SHIPPING_TREND_AVAILABLE:
+                try:
+                    trend_manager = create_shipping_trend_manager()
+                    trend_run_id = trend_manager.record_run(
+                        final_classified_df, source=processing_engine_source,
+                        run_id=registry_run_id
+                    )
+                    session_state.shipping_degraded_df = trend_manager.find_degraded_asins(run_id=trend_run_id)
+                    if not session_state.shipping_degraded_df.empty:
+                        st.warning(f"⚠️ 発送時間が悪化したASIN: {len(session_state.shipping_degraded_df)}件")
+                except Exception as e_trend:
+                    st.warning(f"ShippingTime推移記録エラー: {e_trend}")
+            
             progress_bar.progress(1.0, text="処理完了！")
             status_placeholder.empty()
             progress_bar.empty()
@@ -405,6 +576,17 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
             summary_cols[1].metric("グループA", f"{current_batch_status.get('group_a',0)}件")
             summary_cols[2].metric("グループB", f"{current_batch_status.get('group_b',0)}件")
             summary_cols[3].metric("予測成功率", f"{pred_success_rate:.1f}%")
+            run_overview = stage_metrics.overview()
+            run_usage = usage_ledger.totals(items=total_len, listed_items=current_batch_status['group_a'])
+            st.caption(
+                f"処理時間 {run_overview['wall_seconds']:.1f}秒 / {run_overview['items_per_minute']:.1f}件/分 / "
+                f"エラー率 {run_overview['error_rate']:.1f}%（ステージ別の内訳はダッシュボード）"
+            )
+            st.caption(
+                f"APIリクエスト {run_usage['requests']}件（スロットリング {run_usage['throttled']}件） / "
+                f"LLMトークン 入力{run_usage['input_tokens']:,}・出力{run_usage['output_tokens']:,} / "
+                f"推定コスト ${run_usage['cost_usd']:.4f}（出品対象1件あたり ${run_usage['cost_per_listed_item']:.4f}）"
+            )
             
             if pred_success_rate >= 97:
                 st.balloons()
@@ -415,6 +597,21 @@ def _execute_data_processing(df, title_column, process_limit, use_detailed_proce
             session_state.processed_df = None
             session_state.batch_status = {}
 
+def _persist_stage_metrics(session_state):
+    """ステージ別計測・使用量をレジストリへ記録（実行IDがある場合のみ、出力ステージの追記時も同じ実行IDで上書き）"""
+    stage_metrics = session_state.get('stage_metrics')
+    run_id = session_state.get('stage_metrics_run_id')
+    if not REGISTRY_AVAILABLE or stage_metrics is None or not run_id:
+        return
+    try:
+        registry = create_registry_manager()
+        registry.record_run_metrics(run_id, stage_metrics.overview(), stage_metrics.stage_frame())
+        usage_ledger = session_state.get('usage_ledger')
+        if usage_ledger is not None:
+            registry.record_run_usage(run_id, usage_ledger.usage_frame())
+    except Exception as e_metrics:
+        st.warning(f"計測値の記録エラー: {e_metrics}")
+
 def _execute_demo_processing(session_state, asin_helpers_available):
     """デモデータ処理の実行"""
     with st.spinner("[PROGRESS] デモデータ生成および処理中..."):
@@ -634,61 +831,51 @@ def render_stats_tab(session_state):
     st.header("処理結果の統計・分析")
     
     if session_state.processed_df is not None and not session_state.processed_df.empty:
-        df_stats = session_state.processed_df.copy()
+        df_stats = session_state.processed_df
         batch_status_stats = session_state.batch_status if session_state.batch_status else {}
         
         st.info(f"分析対象データ: {len(df_stats)}行 x {len(df_stats.columns)}列")
         st.markdown(f"処理エンジン: `{batch_status_stats.get('processing_source', 'N/A')}`, 分類エンジン: `{batch_status_stats.get('classification_source', 'N/A')}`")
         
+        run_summary = get_run_summary(session_state)
+        
         # 総合統計
         st.subheader("総合統計")
         cols_overall_stats = st.columns(4)
-        cols_overall_stats[0].metric("総商品数", len(df_stats))
+        cols_overall_stats[0].metric("総商品数", run_summary['total'])
         
         # Prime商品統計
-        prime_col_name_stats = next((col for col in ['is_prime', 'prime_status_bool'] if col in df_stats.columns), None)
-        prime_count_stats = 0
-        if prime_col_name_stats:
-            if pd.api.types.is_bool_dtype(df_stats[prime_col_name_stats]): 
-                prime_count_stats = df_stats[prime_col_name_stats].sum()
-            else: 
-                prime_count_stats = (df_stats[prime_col_name_stats].astype(str).str.lower() == 'true').sum()
-        
-        prime_perc_stats = (prime_count_stats / len(df_stats) * 100) if len(df_stats) > 0 else 0
+        prime_count_stats = run_summary['prime_count']
+        prime_perc_stats = run_summary['prime_rate']
         cols_overall_stats[1].metric("Prime商品 (推定)", f"{prime_count_stats}件 ({prime_perc_stats:.1f}%)")
         
         # 平均Prime信頼性
-        avg_prime_score_stats = df_stats['prime_confidence_score'].mean() if 'prime_confidence_score' in df_stats.columns and not df_stats['prime_confidence_score'].dropna().empty else 0
-        cols_overall_stats[2].metric("平均Prime信頼性", f"{avg_prime_score_stats:.1f}点")
+        cols_overall_stats[2].metric("平均Prime信頼性", f"{run_summary['avg_prime_score']:.1f}点")
         
         # グループA商品数
-        group_a_count_stats = len(df_stats[df_stats.get('shopee_group') == 'A']) if 'shopee_group' in df_stats.columns else 0
-        cols_overall_stats[3].metric("グループA商品数", f"{group_a_count_stats}件")
+        cols_overall_stats[3].metric("グループA商品数", f"{run_summary['group_a']}件")
         
         # 品質評価
         st.subheader("品質評価")
         cols_quality_stats = st.columns(4)
+        total_stats = run_summary['total']
         
         # 24h以内発送
-        fast_shipping_stats = 0
-        if 'ship_hours' in df_stats.columns and df_stats['ship_hours'].notna().any(): 
-            numeric_ship_hours_stats = pd.to_numeric(df_stats['ship_hours'], errors='coerce')
-            fast_shipping_stats = len(numeric_ship_hours_stats[numeric_ship_hours_stats <= 24])
-        fast_rate_stats = (fast_shipping_stats / len(df_stats) * 100) if len(df_stats) > 0 else 0
+        fast_shipping_stats = run_summary['fast_24h']
+        fast_rate_stats = (fast_shipping_stats / total_stats * 100) if total_stats > 0 else 0
         cols_quality_stats[0].metric("24h以内発送", f"{fast_shipping_stats}件 ({fast_rate_stats:.1f}%)")
         
         # 平均発送信頼性
-        avg_ship_conf_stats = df_stats['ship_confidence'].mean() if 'ship_confidence' in df_stats.columns and not df_stats['ship_confidence'].dropna().empty else 0
-        cols_quality_stats[1].metric("平均発送信頼性", f"{avg_ship_conf_stats:.1f}点")
+        cols_quality_stats[1].metric("平均発送信頼性", f"{run_summary['avg_ship_confidence']:.1f}点")
         
         # FBA商品
-        fba_count_stats = df_stats['is_fba'].sum() if 'is_fba' in df_stats.columns and pd.api.types.is_bool_dtype(df_stats['is_fba']) else 0
-        fba_rate_stats = (fba_count_stats / len(df_stats) * 100) if len(df_stats) > 0 else 0
+        fba_count_stats = run_summary['fba_count']
+        fba_rate_stats = (fba_count_stats / total_stats * 100) if total_stats > 0 else 0
         cols_quality_stats[2].metric("FBA商品 (推定)", f"{fba_count_stats}件 ({fba_rate_stats:.1f}%)")
         
         # プレミアム品質判定
-        premium_count_stats = len(df_stats[df_stats.get('classification_confidence') == 'premium']) if 'classification_confidence' in df_stats.columns else 0
-        premium_rate_stats = (premium_count_stats / len(df_stats) * 100) if len(df_stats) > 0 else 0
+        premium_count_stats = run_summary['premium_count']
+        premium_rate_stats = (premium_count_stats / total_stats * 100) if total_stats > 0 else 0
         cols_quality_stats[3].metric("プレミアム品質判定", f"{premium_count_stats}件 ({premium_rate_stats:.1f}%)")
         
         # 予測成功率評価
@@ -720,58 +907,148 @@ def render_stats_tab(session_state):
         st.subheader("Excelレポート出力")
         if st.button("統計分析レポートExcel出力", key="export_stats_report_excel_v2"):
             _export_excel_report(df_stats, batch_status_stats, session_state, prime_count_stats, fast_shipping_stats)
+
+        # 出品済み登録（Excel出力ボタンの分岐の外に置く: 入れ子のボタンは再実行時に押下が届かない）
+        if DUPLICATOR_AVAILABLE:
+            _render_register_listed(df_stats, session_state)
     else: 
         st.info("データ管理タブでデータを処理してください。")
 
+def _build_summary_frame(df_stats, batch_status_stats, prime_count_stats, fast_shipping_stats, aggregates=None):
+    """サマリー統計表の作成（集計済みの値を使用）"""
+    if aggregates is not None:
+        beauty_items = aggregates['beauty_items']
+        avg_beauty_coverage = aggregates['avg_beauty_coverage']
+    else:
+        beauty_items = len(df_stats[df_stats.get('beauty_terms_coverage', 0) > 0]) if 'beauty_terms_coverage' in df_stats.columns else 0
+        avg_beauty_coverage = df_stats['beauty_terms_coverage'].mean() if 'beauty_terms_coverage' in df_stats.columns else 0
+    summary_data = {
+        "総件数": [len(df_stats)], 
+        "予測成功率(%)": [batch_status_stats.get('predicted_success_rate', 0)], 
+        "グループA件数": [batch_status_stats.get('group_a',0)], 
+        "グループB件数": [batch_status_stats.get('group_b',0)], 
+        "Prime商品数(推定)": [prime_count_stats], 
+        "24h以内発送件数": [fast_shipping_stats],
+        "美容関連商品数": [beauty_items],
+        "平均美容用語カバレッジ": [avg_beauty_coverage]
+    }
+    return pd.DataFrame(summary_data)
+
+def _group_positions_from_indices(df_stats, indices):
+    """classified_groups のインデックスを行位置に変換（存在しないものは除外）"""
+    if not indices:
+        return None
+    positions = df_stats.index.get_indexer(pd.Index(indices))
+    positions = positions[positions >= 0]
+    return positions if len(positions) > 0 else None
+
+def _render_register_listed(df_stats, session_state):
+    """グループAを出品済みインデックスに登録（以降の処理で重複として除外される）"""
+    group_a_positions = _group_positions_from_indices(df_stats, (session_state.classified_groups or {}).get('A'))
+    if group_a_positions is None:
+        return
+    st.subheader("出品済み登録")
+    if st.button(f"[REGISTER] グループA {len(group_a_positions)}件を出品済みとして登録", key="register_listed_group_a"):
+        try:
+            group_a_df = df_stats.iloc[group_a_positions]
+            asin_column = _find_asin_column(group_a_df)
+            title_column = 'clean_title' if 'clean_title' in group_a_df.columns else group_a_df.columns[0]
+            registered = create_duplicate_index_manager().register_items(
+                group_a_df[title_column].astype(str).tolist(),
+                group_a_df[asin_column].tolist() if asin_column else None
+            )
+            st.success(f"出品済みインデックスに{registered}件を登録しました")
+        except Exception as e_register:
+            st.error(f"出品済み登録エラー: {str(e_register)}")
+
 def _export_excel_report(df_stats, batch_status_stats, session_state, prime_count_stats, fast_shipping_stats):
-    """Excelレポート出力"""
+    """Excelレポート出力（ストリーミング書き込み＋CSV/Parquet）"""
     try:
-        excel_buffer_stats = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer_stats, engine='openpyxl') as writer_stats:
-            df_stats.to_excel(writer_stats, sheet_name='全処理データ', index=False)
-            
-            # グループ別シート作成
-            if session_state.classified_groups:
-                # グループA
-                if session_state.classified_groups.get('A'):
-                    valid_a_idx_export = [i for i in session_state.classified_groups['A'] if i in df_stats.index]
-                    if valid_a_idx_export:
-                        df_stats.loc[valid_a_idx_export].to_excel(writer_stats, sheet_name='グループA詳細', index=False)
-                
-                # グループB
-                if session_state.classified_groups.get('B'):
-                    valid_b_idx_export = [i for i in session_state.classified_groups['B'] if i in df_stats.index]
-                    if valid_b_idx_export:
-                        df_stats.loc[valid_b_idx_export].to_excel(writer_stats, sheet_name='グループB詳細', index=False)
-            
-            # サマリー統計
-            summary_data = {
-                "総件数": [len(df_stats)], 
-                "予測成功率(%)": [batch_status_stats.get('predicted_success_rate', 0)], 
-                "グループA件数": [batch_status_stats.get('group_a',0)], 
-                "グループB件数": [batch_status_stats.get('group_b',0)], 
-                "Prime商品数(推定)": [prime_count_stats], 
-                "24h以内発送件数": [fast_shipping_stats],
-                "美容関連商品数": [len(df_stats[df_stats.get('beauty_terms_coverage', 0) > 0]) if 'beauty_terms_coverage' in df_stats.columns else 0],
-                "平均美容用語カバレッジ": [df_stats['beauty_terms_coverage'].mean() if 'beauty_terms_coverage' in df_stats.columns else 0]
-            }
-            pd.DataFrame(summary_data).to_excel(writer_stats, sheet_name='サマリー統計', index=False)
+        export_started = time.perf_counter()
+        file_stamp = datetime.now().strftime('%Y%m%d%H%M')
+        beauty_columns = ['clean_title', 'asin', 'beauty_terms_coverage', 'beauty_terms_found', 'beauty_terms_missing']
+
+        if EXPORT_HELPERS_AVAILABLE:
+            aggregates = compute_export_aggregates(df_stats)
+            sheets = [{'name': '全処理データ', 'df': df_stats}]
+
+            # グループ別シート（部分コピーを作らず行位置で出力）
+            classified_groups = session_state.classified_groups or {}
+            for group_key, sheet_name in [('A', 'グループA詳細'), ('B', 'グループB詳細')]:
+                positions = _group_positions_from_indices(df_stats, classified_groups.get(group_key))
+                if positions is not None:
+                    sheets.append({'name': sheet_name, 'df': df_stats, 'positions': positions})
+
+            sheets.append({
+                'name': 'サマリー統計',
+                'df': _build_summary_frame(df_stats, batch_status_stats, prime_count_stats, fast_shipping_stats, aggregates)
+            })
 
             # 美容用語分析シートの追加
             if 'beauty_terms_coverage' in df_stats.columns:
-                beauty_analysis = df_stats[['clean_title', 'asin', 'beauty_terms_coverage', 'beauty_terms_found', 'beauty_terms_missing']].copy()
-                beauty_analysis.to_excel(writer_stats, sheet_name='美容用語分析', index=False)
-        
-        excel_buffer_stats.seek(0)
+                sheets.append({'name': '美容用語分析', 'df': df_stats, 'columns': beauty_columns})
+
+            excel_buffer_stats = write_excel_streaming(sheets)
+        else:
+            excel_buffer_stats = io.BytesIO()
+            with pd.ExcelWriter(excel_buffer_stats, engine='openpyxl') as writer_stats:
+                df_stats.to_excel(writer_stats, sheet_name='全処理データ', index=False)
+                
+                # グループ別シート作成
+                if session_state.classified_groups:
+                    for group_key, sheet_name in [('A', 'グループA詳細'), ('B', 'グループB詳細')]:
+                        positions = _group_positions_from_indices(df_stats, session_state.classified_groups.get(group_key))
+                        if positions is not None:
+                            df_stats.iloc[positions].to_excel(writer_stats, sheet_name=sheet_name, index=False)
+                
+                # サマリー統計
+                _build_summary_frame(df_stats, batch_status_stats, prime_count_stats, fast_shipping_stats).to_excel(writer_stats, sheet_name='サマリー統計', index=False)
+
+                # 美容用語分析シートの追加
+                if 'beauty_terms_coverage' in df_stats.columns:
+                    df_stats[[col for col in beauty_columns if col in df_stats.columns]].to_excel(writer_stats, sheet_name='美容用語分析', index=False)
+            excel_buffer_stats.seek(0)
+
+        # 出力ステージの計測（同じ処理実行の計測値に追記）
+        stage_metrics = session_state.get('stage_metrics')
+        if stage_metrics is not None:
+            stage_metrics.record('export', time.perf_counter() - export_started)
+            _persist_stage_metrics(session_state)
+
         st.download_button(
             "[DOWNLOAD] ExcelレポートDL",
             data=excel_buffer_stats.getvalue(),
-            file_name=f"shopee_analysis_report_{datetime.now().strftime('%Y%m%d%H%M')}.xlsx",
+            file_name=f"shopee_analysis_report_{file_stamp}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             key="download_analysis_excel_v2"
         )
+
+        # 機械処理向け出力（CSV / Parquet）
+        if EXPORT_HELPERS_AVAILABLE:
+            export_cols = st.columns(2)
+            with export_cols[0]:
+                st.download_button(
+                    "[DOWNLOAD] 全処理データCSV",
+                    data=export_csv(df_stats).getvalue(),
+                    file_name=f"shopee_processed_{file_stamp}.csv",
+                    mime="text/csv",
+                    key="download_analysis_csv"
+                )
+            with export_cols[1]:
+                parquet_buffer = export_parquet(df_stats) if PARQUET_AVAILABLE else None
+                if parquet_buffer is not None:
+                    st.download_button(
+                        "[DOWNLOAD] 全処理データParquet",
+                        data=parquet_buffer.getvalue(),
+                        file_name=f"shopee_processed_{file_stamp}.parquet",
+                        mime="application/octet-stream",
+                        key="download_analysis_parquet"
+                    )
+                else:
+                    st.caption("Parquet出力には pyarrow が必要です")
+
         st.success("Excelレポート準備完了")
         
     except Exception as e_export_stats: 
         st.error(f"Excel出力エラー: {str(e_export_stats)}")
-        st.code(traceback.format_exc())
\ No newline at end of file
+        st.code(traceback.format_exc())
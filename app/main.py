@@ -43,9 +43,11 @@ NG_WORD_MANAGER_AVAILABLE = False
 ASIN_HELPERS_V2_AVAILABLE = False
 SP_API_V2_AVAILABLE = False
 
+# キャッシュ層（管理クラスは再実行をまたいで共有）
+from app.cache_layer import get_threshold_config_manager, get_ng_word_manager, invalidate_all
+
 try:
-    from core.managers.config_manager import create_threshold_config_manager
-    threshold_config_manager = create_threshold_config_manager()
+    threshold_config_manager = get_threshold_config_manager()
     THRESHOLD_CONFIG_AVAILABLE = True
     print("[OK] core.managers.config_manager 統合成功")
 except ImportError as e:
@@ -53,8 +55,7 @@ except ImportError as e:
     print(f"[WARN] core.managers.config_manager インポート失敗: {e}")
 
 try:
-    from core.managers.ng_word_manager import NGWordManager, create_ng_word_manager
-    ng_word_manager = create_ng_word_manager()
+    ng_word_manager = get_ng_word_manager()
     NG_WORD_MANAGER_AVAILABLE = True
     print("[OK] core.managers.ng_word_manager インポート成功")
 except ImportError as e:
@@ -425,7 +426,8 @@ with st.sidebar:
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("🔄 リロード", help="システムを再読み込み"):
+        if st.button("🔄 リロード", help="システムを再読み込み（キャッシュを破棄）"):
+            invalidate_all(st.session_state)
             st.rerun()
     
     with col2:
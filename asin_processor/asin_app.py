@@ -46,7 +46,9 @@ try:
         classify_for_shopee_listing_v7,
         calculate_batch_status_shopee_v7,
         # デモデータ生成
-        create_prime_priority_demo_data
+        create_prime_priority_demo_data,
+        # ShippingTime推移ストアへの記録
+        record_shipping_trend
     )
     ASIN_HELPERS_AVAILABLE = True
 except ImportError as e:
@@ -118,6 +120,17 @@ except ImportError:
             print(f"❌ SP-API 全インポート失敗: {str(e)}")
             SP_API_AVAILABLE = False
 
+# 🔧 入力取り込みレイヤー（必要カラムのみ解析・内容ハッシュでキャッシュ）
+INGESTION_HELPERS_AVAILABLE = False
+try:
+    _project_root = pathlib.Path(__file__).resolve().parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.append(str(_project_root))
+    from core.helpers.ingestion_helpers import load_table, read_columns, select_ingestion_columns
+    INGESTION_HELPERS_AVAILABLE = True
+except ImportError:
+    pass
+
 # インポート状況をStreamlitに表示
 if not SP_API_AVAILABLE:
     st.error("❌ SP-APIサービスが利用できません")
@@ -380,13 +393,20 @@ with tab1:
         
         if uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file)
-                st.success(f"✅ ファイル読み込み成功: {len(df)}行")
-                st.dataframe(df.head())
+                if INGESTION_HELPERS_AVAILABLE:
+                    all_columns = read_columns(uploaded_file)
+                    st.dataframe(load_table(uploaded_file, nrows=5))
+                else:
+                    df = pd.read_excel(uploaded_file)
+                    all_columns = list(df.columns)
+                    st.dataframe(df.head())
                 
-                title_columns = [col for col in df.columns if 'title' in col.lower() or 'name' in col.lower() or '商品' in col]
+                title_columns = [col for col in all_columns if 'title' in str(col).lower() or 'name' in str(col).lower() or '商品' in str(col)]
                 if title_columns:
                     title_column = st.selectbox("商品名カラムを選択", title_columns)
+                    if INGESTION_HELPERS_AVAILABLE:
+                        df = load_table(uploaded_file, usecols=select_ingestion_columns(all_columns, required=[title_column]))
+                    st.success(f"✅ ファイル読み込み成功: {len(df)}行")
                     process_limit = st.number_input("処理件数制限", min_value=1, max_value=len(df), value=min(10, len(df)))
                     
                     # 🔧 修正8: ハイブリッド一括処理（一意キー追加）
@@ -553,6 +573,14 @@ with tab1:
                                         'prime_count': prime_count, 'success_rate': total_success_rate, 'progress': 100
                                     }
                                     
+                                    # ShippingTime推移ストアへ記録（前回比・悪化ASIN）
+                                    try:
+                                        trend_result = record_shipping_trend(hybrid_df, source='asin_app ハイブリッド処理')
+                                    except Exception as e_trend:
+                                        st.warning(f"ShippingTime推移記録エラー: {e_trend}")
+                                        trend_result = {}
+                                    st.session_state.shipping_degraded_df = trend_result.get('degraded')
+                                    
                                     # 🎉 修正統合版最終統計表示
                                     st.markdown("---")
                                     st.success("🎉 修正統合版ハイブリッド処理完了！")
@@ -566,11 +594,18 @@ with tab1:
                                         st.metric("統合成功率", f"{final_success_rate:.1f}%")
                                     with col3:
                                         shipping_rate = (shipping_time_acquired / len(hybrid_df)) * 100
-                                        st.metric("ShippingTime取得", f"{shipping_rate:.1f}%")
+                                        delta = trend_result.get('success_rate_delta')
+                                        st.metric("ShippingTime取得", f"{shipping_rate:.1f}%",
+                                                  delta=f"{delta:+.1f}pt" if delta is not None else None)
                                     with col4:
                                         confidence_avg = hybrid_df['confidence'].mean() if 'confidence' in hybrid_df.columns else 0
                                         st.metric("平均信頼度", f"{confidence_avg:.1f}%")
                                     
+                                    degraded = trend_result.get('degraded')
+                                    if degraded is not None and not degraded.empty:
+                                        st.warning(f"⚠️ 発送時間が悪化したASIN: {len(degraded)}件")
+                                        st.dataframe(degraded, use_container_width=True)
+                                    
                                     # グループ別統計（修正版）
                                     st.markdown("**🏆 修正統合版グループ別分類結果:**")
                                     col1, col2 = st.columns(2)
@@ -3,6 +3,39 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import sys
+import pathlib
+
+# エクスポートサブシステム（core.helpers.export_helpers: ストリーミングExcel）
+EXPORT_HELPERS_AVAILABLE = False
+try:
+    _project_root = pathlib.Path(__file__).resolve().parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.append(str(_project_root))
+    from core.helpers.export_helpers import (
+        compute_export_aggregates, group_positions, write_excel_streaming
+    )
+    EXPORT_HELPERS_AVAILABLE = True
+except ImportError:
+    pass
+
+# ShippingTime集計エンジン（core.helpers.shipping_metrics: 欠損理由判定・カテゴリ別集計）
+SHIPPING_METRICS_AVAILABLE = False
+try:
+    from core.helpers.shipping_metrics import (
+        aggregate_shipping_metrics, classify_missing_reasons, detect_category_column
+    )
+    SHIPPING_METRICS_AVAILABLE = True
+except ImportError:
+    pass
+
+# ShippingTime推移ストア（core.managers.shipping_trend_manager: 実行間の取得率・ASIN別履歴）
+SHIPPING_TREND_AVAILABLE = False
+try:
+    from core.managers.shipping_trend_manager import create_shipping_trend_manager
+    SHIPPING_TREND_AVAILABLE = True
+except ImportError:
+    pass
 
 # ======================== Prime判定最優先システム ========================
 
@@ -433,58 +466,45 @@ def create_empty_status_2groups():
 
 # ======================== ShippingTime v8 高度分析機能 ========================
 
-def analyze_category_shipping_patterns(df):
+def analyze_category_shipping_patterns(df, min_count=3):
     """
     カテゴリ別ShippingTime取得パターン分析
     「美容は欠損30%、家電は5%」などの傾向把握
+
+    全カテゴリの指標を1回のgroupbyで集計する（カテゴリ数に比例したループなし）。
+
+    Returns:
+        pd.DataFrame: 1行/カテゴリの集計表（取得率降順、カテゴリ情報が無い場合は空）
     """
     print("🔍 カテゴリ別ShippingTime取得パターン分析開始...")
-    
-    category_analysis = {}
-    
-    # カテゴリカラムの特定
-    category_columns = ['main_category', 'amazon_brand', 'seller_type', 'brand']
-    available_category = None
-    
-    for col in category_columns:
-        if col in df.columns and df[col].notna().sum() > 0:
-            available_category = col
-            break
-    
+
+    if not SHIPPING_METRICS_AVAILABLE:
+        print("⚠️ ShippingTime集計エンジン利用不可")
+        return pd.DataFrame()
+
+    available_category = detect_category_column(df)
     if not available_category:
         print("⚠️ カテゴリ情報が見つかりません")
-        return {}
-    
+        return pd.DataFrame()
+
     print(f"📊 {available_category}別分析実行中...")
-    
-    # カテゴリごとの取得率分析
-    for category, subset in df.groupby(available_category):
-        if pd.notna(category) and len(subset) >= 3:  # 最低3件以上のカテゴリのみ
-            analysis = monitor_shipping_time_rate_v8(subset, bucket=str(category))
-            category_analysis[str(category)] = analysis
-    
+    category_metrics = aggregate_shipping_metrics(df, by=available_category, min_count=min_count)
+
     # 取得率ランキング
-    if category_analysis:
-        sorted_categories = sorted(
-            category_analysis.items(), 
-            key=lambda x: x[1]['success_rate'], 
-            reverse=True
-        )
-        
+    if not category_metrics.empty:
         print(f"\n🏆 {available_category}別取得率ランキング:")
-        for i, (cat, data) in enumerate(sorted_categories[:10]):
-            print(f"   {i+1}. {cat}: {data['success_rate']:.1f}% ({data['with_shipping']}/{data['total']})")
-        
+        for i, row in enumerate(category_metrics.head(10).itertuples(index=False)):
+            category = getattr(row, available_category)
+            print(f"   {i+1}. {category}: {row.success_rate:.1f}% ({row.with_shipping}/{row.total})")
+
         # 要注意カテゴリ（取得率70%未満）
-        low_rate_categories = [(cat, data) for cat, data in category_analysis.items() 
-                              if data['success_rate'] < 70 and data['total'] >= 5]
-        
-        if low_rate_categories:
+        low_rate = category_metrics[(category_metrics['success_rate'] < 70) & (category_metrics['total'] >= 5)]
+        if not low_rate.empty:
             print(f"\n⚠️ 要注意カテゴリ（取得率<70%）:")
-            for cat, data in low_rate_categories:
-                print(f"   🔴 {cat}: {data['success_rate']:.1f}% - 改善要検討")
-    
-    return category_analysis
+            for category, rate in zip(low_rate[available_category], low_rate['success_rate']):
+                print(f"   🔴 {category}: {rate:.1f}% - 改善要検討")
+
+    return category_metrics
 
 def monitor_shipping_time_rate_v8(df, bucket="overall"):
     """
@@ -494,15 +514,19 @@ def monitor_shipping_time_rate_v8(df, bucket="overall"):
     if total == 0:
         print(f"📊 {bucket}: データなし")
         return {}
-    
-    with_ship = df['ship_hours'].notna().sum() if 'ship_hours' in df.columns else 0
-    miss_rate = 100 * (total - with_ship) / total
-    success_rate = 100 - miss_rate
-    
+    if not SHIPPING_METRICS_AVAILABLE:
+        print("⚠️ ShippingTime集計エンジン利用不可")
+        return {}
+
+    metrics = aggregate_shipping_metrics(df).iloc[0]
+    with_ship = int(metrics['with_shipping'])
+    success_rate = metrics['success_rate']
+    miss_rate = metrics['miss_rate']
+
     # 基本統計
     print(f"📊 {bucket} ShippingTime取得率: {success_rate:.1f}% ({with_ship}/{total})")
     print(f"📊 {bucket} ShippingTime欠損率: {miss_rate:.1f}% ({total - with_ship}/{total})")
-    
+
     # 詳細分析
     analysis = {
         "bucket": bucket,
@@ -511,40 +535,75 @@ def monitor_shipping_time_rate_v8(df, bucket="overall"):
         "success_rate": success_rate,
         "miss_rate": miss_rate
     }
-    
+
     # フォールバック効果分析
     if 'classification_reason' in df.columns:
-        fallback_analysis = df['classification_reason'].value_counts()
-        analysis["fallback_effectiveness"] = fallback_analysis.to_dict()
-        
-        # 主要フォールバック率
-        amazon_fallback = fallback_analysis.get("Amazon本体フォールバック", 0)
-        fba_fallback = fallback_analysis.get("FBAフォールバック", 0)
-        
+        analysis["fallback_effectiveness"] = df['classification_reason'].value_counts().to_dict()
+        amazon_fallback = int(metrics['amazon_fallback'])
+        fba_fallback = int(metrics['fba_fallback'])
+
         print(f"   🏆 Amazon本体フォールバック: {amazon_fallback}件 ({amazon_fallback/total*100:.1f}%)")
         print(f"   📦 FBAフォールバック: {fba_fallback}件 ({fba_fallback/total*100:.1f}%)")
-    
+
     # 発送時間分布（取得できた商品のみ）
-    if 'ship_hours' in df.columns and with_ship > 0:
-        valid_hours = df[df['ship_hours'].notna()]['ship_hours']
-        fast_shipping = len(valid_hours[valid_hours <= 24])
-        medium_shipping = len(valid_hours[(valid_hours > 24) & (valid_hours <= 48)])
-        slow_shipping = len(valid_hours[valid_hours > 48])
-        
+    if with_ship > 0:
+        fast_shipping = int(metrics['fast_24h'])
+        medium_shipping = int(metrics['medium_48h'])
+        slow_shipping = int(metrics['slow_48h_plus'])
+
         print(f"   ⚡ 24時間以内: {fast_shipping}件 ({fast_shipping/with_ship*100:.1f}%)")
         print(f"   🟡 25-48時間: {medium_shipping}件 ({medium_shipping/with_ship*100:.1f}%)")
         print(f"   🔴 48時間超: {slow_shipping}件 ({slow_shipping/with_ship*100:.1f}%)")
-        
+
         analysis["shipping_distribution"] = {
             "fast_24h": fast_shipping,
             "medium_48h": medium_shipping,
             "slow_48h_plus": slow_shipping,
-            "avg_hours": valid_hours.mean(),
-            "median_hours": valid_hours.median()
+            "avg_hours": metrics['avg_hours'],
+            "median_hours": metrics['median_hours']
         }
-    
+
     return analysis
 
+def record_shipping_trend(df, source='', run_id=None, trend_manager=None):
+    """
+    ShippingTime取得結果を推移ストアへ記録し、前回実行との比較と悪化ASINを表示
+    （取得率監視を実行ごとに単発で終わらせない）
+
+    Returns:
+        dict: run_id / previous_success_rate / success_rate_delta / degraded（悪化ASINのDataFrame）
+    """
+    if trend_manager is None:
+        if not SHIPPING_TREND_AVAILABLE:
+            print("⚠️ ShippingTime推移ストア利用不可")
+            return {}
+        trend_manager = create_shipping_trend_manager()
+
+    run_id = trend_manager.record_run(df, source=source, run_id=run_id)
+    if run_id is None:
+        return {}
+
+    current = trend_manager.get_previous_run()
+    previous = trend_manager.get_previous_run(exclude_run_id=run_id)
+    result = {"run_id": run_id, "previous_success_rate": None, "success_rate_delta": None}
+    if previous is not None and current is not None:
+        delta = current['success_rate'] - previous['success_rate']
+        result.update(previous_success_rate=previous['success_rate'], success_rate_delta=delta)
+        trend_icon = "📈" if delta > 0 else "📉" if delta < 0 else "➡️"
+        print(f"{trend_icon} ShippingTime取得率 前回比: {delta:+.1f}pt "
+              f"({previous['success_rate']:.1f}% → {current['success_rate']:.1f}%)")
+
+    degraded = trend_manager.find_degraded_asins(run_id=run_id)
+    result["degraded"] = degraded
+    if not degraded.empty:
+        print(f"⚠️ 発送時間悪化ASIN: {len(degraded)}件")
+        for _, row in degraded.head(10).iterrows():
+            if row['degradation'] == 'lost':
+                print(f"   🔴 {row['asin']}: 取得失敗（従来 {row['baseline_hours']:.0f}h）")
+            else:
+                print(f"   🟡 {row['asin']}: {row['baseline_hours']:.0f}h → {row['latest_hours']:.0f}h")
+    return result
+
 def track_missing_asins(df):
     """
     欠損ASIN追跡フラグ機能
@@ -555,6 +614,9 @@ def track_missing_asins(df):
     if 'ship_hours' not in df.columns:
         print("⚠️ ship_hoursカラムが見つかりません")
         return df
+    if not SHIPPING_METRICS_AVAILABLE:
+        print("⚠️ ShippingTime集計エンジン利用不可")
+        return df
     
     # 欠損フラグ追加
     df['shipping_missing'] = df['ship_hours'].isna()
@@ -563,34 +625,14 @@ def track_missing_asins(df):
     
     print(f"📊 ShippingTime欠損: {missing_count}/{total_count}件 ({missing_count/total_count*100:.1f}%)")
     
-    # 欠損理由の分類
-    missing_reasons = []
-    
-    for idx, row in df[df['shipping_missing']].iterrows():
-        if row.get('api_source') == 'fallback':
-            reason = "API呼び出し失敗"
-        elif row.get('seller_type') == 'third_party':
-            reason = "サードパーティ出品者"
-        elif not row.get('is_prime', False):
-            reason = "非Prime商品"
-        elif row.get('classification_reason', '').startswith('最終'):
-            reason = "全フォールバック失敗"
-        else:
-            reason = "不明"
-        
-        missing_reasons.append(reason)
+    # 欠損理由の分類（欠損していない行はNaN）
+    df['missing_reason'] = classify_missing_reasons(df)
     
     # 欠損理由統計
-    if missing_reasons:
-        from collections import Counter
-        reason_counts = Counter(missing_reasons)
-        
+    if missing_count > 0:
         print(f"📋 欠損理由別統計:")
-        for reason, count in reason_counts.most_common():
+        for reason, count in df['missing_reason'].value_counts().items():
             print(f"   📌 {reason}: {count}件 ({count/missing_count*100:.1f}%)")
-        
-        # 欠損理由をデータフレームに追加
-        df.loc[df['shipping_missing'], 'missing_reason'] = missing_reasons
     
     return df
 
@@ -712,11 +754,143 @@ def generate_improvement_roadmap(analysis_results):
 # 既存のmonitor_shipping_time_rate関数をv8版で置き換え
 monitor_shipping_time_rate = monitor_shipping_time_rate_v8
 
-def export_shopee_optimized_excel(df):
+SHOPEE_EXPORT_COLUMNS = [
+    'asin', 'amazon_asin', 'amazon_title', 'japanese_name', 
+    'shopee_suitability_score', 'relevance_score',
+    'ship_hours', 'ship_bucket',  # ShippingTime情報追加
+    'is_prime', 'seller_name', 'seller_type',
+    'amazon_brand', 'llm_source'
+]
+
+SHOPEE_GROUP_SHEETS = [
+    ('A', '🏆_即座出品_24h以内', '24時間以内発送 - DTS規約クリア確実'),
+    ('B', '📦_在庫管理制御_それ以外', 'Aの条件外は全部ここ（在庫管理で制御）')
+]
+
+SHOPEE_GROUP_NAMES = {
+    'A': '🏆 即座出品可能（24時間以内発送）',
+    'B': '📦 在庫管理制御（それ以外）'
+}
+
+def export_shopee_optimized_excel(df, output=None):
     """
     Shopee出品最適化Excel出力（2グループ版）
     グループA: 即座出品可能
     グループB: 在庫管理制御
+
+    集計は一度だけ計算してサマリー/統計シートに使い回し、グループ別シートは
+    部分DataFrameを作らず行位置で直接ストリーミング書き込みする。
+    """
+    if not EXPORT_HELPERS_AVAILABLE:
+        return _export_shopee_optimized_excel_legacy(df)
+
+    if 'shopee_group' not in df.columns:
+        print("⚠️ shopee_groupカラムなし - 全商品をグループBに設定")
+        positions = {'B': np.arange(len(df))}
+    else:
+        positions = group_positions(df, 'shopee_group')
+
+    aggregates = compute_export_aggregates(df)
+    if 'shopee_group' not in df.columns:
+        aggregates['groups'] = {'B': aggregates['groups'].get('B', {})}
+
+    sheets = [{
+        'name': '📊_Shopee出品サマリー_v8',
+        'df': build_shopee_summary_frame_2groups(aggregates)
+    }]
+
+    output_columns = [col for col in SHOPEE_EXPORT_COLUMNS if col in df.columns]
+    for group_key, sheet_name, description in SHOPEE_GROUP_SHEETS:
+        group_pos = positions.get(group_key)
+        if group_pos is not None and len(group_pos) > 0 and output_columns:
+            sheets.append({
+                'name': sheet_name,
+                'df': df,
+                'positions': group_pos,
+                'columns': output_columns,
+                'description': description
+            })
+
+    sheets.append({
+        'name': '📈_詳細統計_v8',
+        'df': build_shopee_stats_frame_2groups(aggregates)
+    })
+
+    return write_excel_streaming(sheets, output)
+
+def build_shopee_summary_frame_2groups(aggregates):
+    """2グループ版サマリー表を集計値から作成"""
+    total = aggregates['total']
+    summary_data = []
+    for group_key in ['A', 'B']:
+        group = aggregates['groups'].get(group_key, {})
+        count = int(group.get('count', 0))
+        avg_ship_hours = group.get('avg_ship_hours', 0) if count > 0 else 0
+        summary_data.append({
+            'グループ': SHOPEE_GROUP_NAMES[group_key],
+            '件数': count,
+            '割合': f"{count/total*100:.1f}%" if total > 0 else "0%",
+            'Shopee適性': f"{group.get('avg_shopee_score', 0):.1f}点",
+            '一致度': f"{group.get('avg_relevance', 0):.1f}%",
+            'Prime率': f"{group.get('prime_rate', 0):.1f}%",
+            'ShippingTime取得': f"{int(group.get('ship_available', 0))}件",
+            '平均発送時間': f"{avg_ship_hours:.1f}h" if avg_ship_hours > 0 else "N/A"
+        })
+    return pd.DataFrame(summary_data)
+
+def build_shopee_stats_frame_2groups(aggregates):
+    """2グループ版統計表を集計値から作成"""
+    total = aggregates['total']
+    success = aggregates['success']
+    stats_data = [
+        ['=== ShippingTime最優先システム v8 統計 ===', ''],
+        ['基本統計', ''],
+        ['総商品数', total],
+        ['ASIN取得成功', success],
+        ['成功率', f"{success/total*100:.1f}%" if total > 0 else "0%"],
+        ['', ''],
+    ]
+
+    if aggregates['has_group_column']:
+        stats_data.extend([
+            ['グループ統計（2グループ版）', ''],
+            ['グループA（即座出品）', int(aggregates['groups'].get('A', {}).get('count', 0))],
+            ['グループB（在庫管理制御）', int(aggregates['groups'].get('B', {}).get('count', 0))],
+            ['', '']
+        ])
+
+    if aggregates['has_ship_hours']:
+        stats_data.extend([
+            ['ShippingTime統計', ''],
+            ['ShippingTime取得数', aggregates['ship_available']],
+            ['取得率', f"{aggregates['ship_rate']:.1f}%"],
+            ['平均発送時間', f"{aggregates['avg_ship_hours']:.1f}時間"],
+            ['24時間以内発送', f"{aggregates['fast_shipping']}件"],
+            ['', '']
+        ])
+
+    if aggregates['has_prime']:
+        stats_data.extend([
+            ['Prime統計', ''],
+            ['Prime対応商品', aggregates['prime_count']],
+            ['Prime率', f"{aggregates['prime_rate']:.1f}%"],
+            ['', ''],
+        ])
+
+    seller_counts = aggregates['seller_counts']
+    if seller_counts:
+        stats_data.extend([
+            ['出品者統計', ''],
+            ['Amazon出品', seller_counts.get('amazon', 0)],
+            ['公式メーカー', seller_counts.get('official_manufacturer', 0)],
+            ['サードパーティ', seller_counts.get('third_party', 0)],
+        ])
+
+    return pd.DataFrame(stats_data, columns=['項目', '値'])
+
+def _export_shopee_optimized_excel_legacy(df):
+    """
+    Shopee出品最適化Excel出力（xlsxwriter/pandas版、エクスポートサブシステム未導入時）
     """
     import io
     
@@ -739,12 +913,7 @@ def export_shopee_optimized_excel(df):
         create_shopee_summary_sheet_2groups(writer, df, groups)
         
         # 2グループ別シート
-        sheet_configs = [
-            ('A', '🏆_即座出品_24h以内', '24時間以内発送 - DTS規約クリア確実'),
-            ('B', '📦_在庫管理制御_それ以外', 'Aの条件外は全部ここ（在庫管理で制御）')
-        ]
-        
-        for group_key, sheet_name, description in sheet_configs:
+        for group_key, sheet_name, description in SHOPEE_GROUP_SHEETS:
             group_df = groups[group_key]
             if len(group_df) > 0:
                 create_shopee_group_sheet_v2(writer, group_df, sheet_name, description)
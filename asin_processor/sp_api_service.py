@@ -15,6 +15,26 @@ import openai
 import google.generativeai as genai
 import jellyfish
 import numpy as np
+import sys
+
+# 数量文法（core.helpers.quantity_helpers: 単一スキャン・基準単位への正規化）
+QUANTITY_GRAMMAR_AVAILABLE = False
+try:
+    _project_root = Path(__file__).resolve().parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.append(str(_project_root))
+    from core.helpers.quantity_helpers import parse_quantity
+    QUANTITY_GRAMMAR_AVAILABLE = True
+except ImportError:
+    pass
+
+# 遮断器（core.helpers.circuit_breaker: 429/503等が続く間は getItemOffers を送信せず保留にする）
+CIRCUIT_BREAKER_AVAILABLE = False
+try:
+    from core.helpers.circuit_breaker import get_circuit_breaker
+    CIRCUIT_BREAKER_AVAILABLE = True
+except ImportError:
+    pass
 
 # .env読み込み（shopee直下の.envファイルを使用）
 current_dir = Path(__file__).parent
@@ -356,14 +376,21 @@ def extract_brand_and_quantity(text, brand_dict):
                 print(f"⚠️ ブランド検索エラー (variation: {variation}): {e}")
                 continue
     
-    # 数量抽出
-    quantity_pattern = r'(\d+(?:\.\d+)?)\s*(ml|g|kg|oz|L|ℓ|cc|個|本|枚|錠|粒|包|袋)'
-    quantity_match = re.search(quantity_pattern, cleaned_text, re.IGNORECASE)
-    extracted_quantity = quantity_match.group() if quantity_match else None
+    # 数量抽出（入数表記「120ml*2」「2 x 490ml」を含めて1回の走査で解析）
+    quantity_details = None
+    if QUANTITY_GRAMMAR_AVAILABLE:
+        quantity_details = parse_quantity(text)
+        extracted_quantity = quantity_details['quantity_raw'] if quantity_details else None
+    else:
+        quantity_pattern = r'(\d+(?:\.\d+)?)\s*(ml|g|kg|oz|L|ℓ|cc|個|本|枚|錠|粒|包|袋)'
+        quantity_match = re.search(quantity_pattern, cleaned_text, re.IGNORECASE)
+        extracted_quantity = quantity_match.group() if quantity_match else None
     
     return {
         "brand": detected_brand,
         "quantity": extracted_quantity,
+        "quantity_base_value": quantity_details['quantity_base_value'] if quantity_details else None,
+        "quantity_base_unit": quantity_details['quantity_base_unit'] if quantity_details else None,
         "cleaned_text": cleaned_text
     }
 
@@ -470,11 +497,18 @@ def get_prime_and_seller_info_v7_enhanced(asin: str, credentials: dict, brand_na
     """
     ShippingTime最優先システム v7 強化版
     - ShippingTime取得 + 多段フォールバック戦略
-    - リトライ処理
+    - リトライ処理（getItemOffers の遮断中は送信せず deferred=True のフォールバックを返す）
     - FBA/Amazon本体優先判定
     """
     print(f"🔍 ShippingTime最優先システムv7強化版開始: {asin}")
     
+    # 遮断器には呼び出し単位で記録（再試行しても失敗した場合のみ失敗として数える）
+    breaker = get_circuit_breaker('sp_api', 'getItemOffers') if CIRCUIT_BREAKER_AVAILABLE else None
+    if breaker is not None and not breaker.allow():
+        print(f"   ⏸️ getItemOffers遮断中のため保留: {asin}")
+        result = create_safe_fallback_step4(asin, "SP-API遮断中（保留）", brand_name)
+        result["deferred"] = True
+        return result
     for attempt in range(retry_count + 1):
         try:
             if attempt > 0:
@@ -494,6 +528,8 @@ def get_prime_and_seller_info_v7_enhanced(asin: str, credentials: dict, brand_na
                 includedData="ShippingTime"  # ShippingTime取得の必須パラメータ
             )
             print(f"   ✅ get_item_offers成功（試行{attempt + 1}）")
+            if breaker is not None:
+                breaker.record_success()
             # レスポンス処理
             offers = offers_response.payload.get("Offers", [])
             print(f"   📊 オファー数: {len(offers)}")
@@ -568,6 +604,8 @@ def get_prime_and_seller_info_v7_enhanced(asin: str, credentials: dict, brand_na
                 time.sleep(0.5 * (attempt + 1))  # 指数バックオフ
                 continue
             else:
+                if breaker is not None:
+                    breaker.record_error(exc)
                 # 最終的な失敗またはリトライ不可能エラー
                 payload = getattr(exc, "payload", None)
                 return create_safe_fallback_step4(asin, f"SP-API-{exc.code}: {str(payload)[:100]}", brand_name)
@@ -780,8 +818,11 @@ def process_batch_with_shopee_optimization(df, title_column='clean_title', limit
     """
     Shopee出品最適化処理（Prime+出品者情報統合版）
     asin_app.pyから呼び出される主要関数
+
+    処理本体は共通パイプライン（pipeline.process_listing_batch）。
+    データタブ・店舗別ジョブと同じステージ（ブランド抽出 → 日本語化 → ASIN → オファー → スコア）で処理する。
     """
-    print(f"🚀 Prime+出品者情報統合処理開始: {len(df)}件 (制限: {limit}件)")
+    print(f"🚀 Prime+出品者情報統合処理開始: {len(df) if df is not None else 0}件 (制限: {limit}件)")
     
     if df is None or len(df) == 0:
         print("❌ 入力データが空です")
@@ -794,130 +835,16 @@ def process_batch_with_shopee_optimization(df, title_column='clean_title', limit
     else:
         df_to_process = df.copy()
     
-    # SP-API認証情報取得テスト
-    print("🔐 認証情報確認中...")
-    credentials = get_credentials()
-    if not credentials:
-        print("⚠️ SP-API認証失敗、フォールバック処理に切り替え")
-        return process_fallback_batch(df_to_process, title_column)
-    
-    # ブランド辞書読み込み
-    print("📚 ブランド辞書読み込み中...")
-    brand_dict = load_brand_dict()
-    
-    results = []
-    success_count = 0
-    error_count = 0
-    
-    print(f"🔄 バッチ処理開始...")
-    
-    for idx, row in df_to_process.iterrows():
-        try:
-            # 商品名取得・クレンジング
-            clean_title = str(row.get(title_column, ''))
-            if not clean_title or clean_title.strip() == '' or clean_title == 'nan':
-                print(f"⚠️ 行{idx}: 商品名が空です")
-                continue
-            
-            print(f"\n🔍 処理中 {success_count + error_count + 1}/{len(df_to_process)}: {clean_title[:50]}...")
-            
-            # 商品名から情報抽出
-            extracted_info = extract_brand_and_quantity(clean_title, brand_dict)
-            brand_name = extracted_info.get('brand', '')
-            cleaned_text = extracted_info.get('cleaned_text', clean_title)
-            
-            print(f"   🏷️ ブランド検出: {brand_name if brand_name else 'なし'}")
-            
-            # 日本語化処理
-            japanese_name, llm_source = get_japanese_name_hybrid(cleaned_text)
-            print(f"   🇯🇵 日本語化: {japanese_name} (Source: {llm_source})")
-            
-            # ASIN生成（デモ版 - 実際はCatalogItemsAPIを使用）
-            asin = f"B{str(success_count + 1).zfill(9)}SIM"
-            print(f"   🔍 ASIN: {asin} (デモ生成)")
-            
-            # Prime+出品者情報取得（v7強化版）
-            print(f"   🎯 Prime+出品者情報取得中...")
-            prime_info = get_prime_and_seller_info_v7_enhanced(
-                asin=asin, 
-                credentials=credentials, 
-                brand_name=brand_name
-            )
-            
-            # Shopee適性スコア計算
-            shopee_score = calculate_shopee_suitability_score(
-                japanese_name, brand_name, prime_info
-            )
-            
-            print(f"   📊 Shopee適性スコア: {shopee_score}点")
-            
-            # 結果をまとめる
-            result_row = row.copy()  # 元の行データを保持
-            result_row.update({
-                'clean_title': cleaned_text,
-                'japanese_name': japanese_name,
-                'amazon_title': japanese_name,
-                'asin': asin,
-                'amazon_asin': asin,
-                'amazon_brand': brand_name,
-                'extracted_brand': brand_name,
-                'extracted_quantity': extracted_info.get('quantity'),
-                'llm_source': llm_source,
-                
-                # Prime+出品者情報
-                'is_prime': prime_info.get('is_prime', False),
-                'seller_name': prime_info.get('seller_name', 'Unknown'),
-                'seller_type': prime_info.get('seller_type', 'unknown'),
-                'seller_id': prime_info.get('seller_id', ''),
-                
-                # ShippingTime情報
-                'ship_hours': prime_info.get('ship_hours'),
-                'ship_bucket': prime_info.get('ship_bucket', ''),
-                'ship_source': prime_info.get('ship_source', ''),
-                
-                # Shopee情報
-                'shopee_suitability_score': shopee_score,
-                'relevance_score': calculate_relevance_score(cleaned_text, japanese_name),
-                'match_percentage': calculate_match_percentage(cleaned_text, japanese_name),
-                
-                # 処理情報
-                'search_status': 'success',
-                'api_source': prime_info.get('api_source', 'SP-API'),
-                'classification_reason': prime_info.get('classification_reason', ''),
-                'data_source': '実SP-API' if credentials else 'フォールバック'
-            })
-            
-            results.append(result_row)
-            success_count += 1
-            
-            print(f"   ✅ 成功: ASIN={asin}, Prime={prime_info.get('is_prime')}, Score={shopee_score}")
-            
-            # レート制限対応
-            time.sleep(0.1)
-            
-        except Exception as e:
-            print(f"❌ 行{idx}処理エラー: {str(e)}")
-            error_count += 1
-            
-            # エラー時でも基本情報は保存
-            error_row = row.copy()
-            error_row.update({
-                'clean_title': clean_title,
-                'search_status': 'error',
-                'error_reason': str(e)[:100],
-                'data_source': 'エラー'
-            })
-            results.append(error_row)
-    
-    # 結果をDataFrameに変換
-    if results:
-        result_df = pd.DataFrame(results)
-        print(f"\n📊 処理完了: 成功={success_count}件, エラー={error_count}件")
-        print(f"📋 結果カラム数: {len(result_df.columns)}")
-        return result_df
-    else:
+    from pipeline.stages import process_listing_batch
+    result_df = process_listing_batch(df_to_process, title_column=title_column)
+    if result_df.empty:
         print("❌ 処理結果が空です")
         return df_to_process
+    
+    status_counts = result_df['search_status'].value_counts()
+    print(f"\n📊 処理完了: 成功={status_counts.get('success', 0)}件, エラー={status_counts.get('error', 0)}件")
+    print(f"📋 結果カラム数: {len(result_df.columns)}")
+    return result_df
 
 def process_fallback_batch(df, title_column):
     """SP-API認証失敗時のフォールバック処理"""
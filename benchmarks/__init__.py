@@ -0,0 +1 @@
+# benchmarks - テキスト処理・スコア計算ホットパスのCPUマイクロベンチマーク
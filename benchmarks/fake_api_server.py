@@ -0,0 +1,758 @@
+# fake_api_server.py - SP-API・LLMのローカル代替サーバー（並列度・レート制限・バッチ化の負荷試験用）
+#
+# 実装している操作:
+#   getItemOffers          GET  /products/pricing/v0/items/{asin}/offers
+#   getItemOffersBatch     POST /batches/products/pricing/v0/itemOffers
+#   getListingOffersBatch  POST /batches/products/pricing/v0/listingOffers
+#   searchCatalogItems     GET  /catalog/2022-04-01/items
+#   chatCompletions        POST /v1/chat/completions（OpenAI互換、日本語化で使用する形）
+#   LWAトークン            POST /auth/o2/token
+#   Keepa product          GET  /product?key=&domain=5&asin=A,B,...（tokensLeft / refillIn / refillRate 付き）
+#   Shopee get_item_base_info   GET /api/v2/product/get_item_base_info?...&item_id_list=1,2,...（署名検証・最大50件）
+#   Shopee get_item_extra_info  GET /api/v2/product/get_item_extra_info（views / sale / likes は経過日数に応じて増加）
+#   統計 / リセット        GET /_stats, POST /_reset, POST /_config（設定の部分更新）
+#
+# 使い方（プロジェクトルートから）:
+#   python -m benchmarks.fake_api_server --port 8765 --error-429 0.05 --latency-scale 0.5
+#   SP_API_ENDPOINT=http://127.0.0.1:8765 OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=dummy \
+#   KEEPA_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py
+#   SHOPEE_ENDPOINT=http://127.0.0.1:8765 python -m modules.analytics.shopee_item_poller --shops shops.json
+import argparse
+import copy
+import hashlib
+import hmac
+import json
+import math
+import pathlib
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_project_root = pathlib.Path(__file__).resolve().parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from benchmarks.synthetic_data import load_benchmark_brands, PRODUCT_TYPES, SIZES
+from core.services.sp_api_http import JP_MARKETPLACE_ID, AMAZON_JP_SELLER_ID, BATCH_MAX_REQUESTS
+from core.services.keepa_client import (
+    KEEPA_MAX_ASINS_PER_REQUEST, KEEPA_SALES_RANK_INDEX, KEEPA_TOKENS_PER_PRODUCT, datetime_to_keepa_minutes
+)
+from core.services.shopee_client import (
+    DEFAULT_LOCAL_PARTNER_KEY, SHOPEE_ITEM_BASE_INFO_PATH, SHOPEE_ITEM_EXTRA_INFO_PATH, SHOPEE_MAX_ITEMS_PER_REQUEST
+)
+
+DEFAULT_PORT = 8765
+
+# 既定設定（--config のJSONで部分的に上書き可能）
+#   latency: 操作ごとの応答時間分布（fixed / uniform / lognormal、ミリ秒）
+#   errors:  操作ごとの 429 / 503 注入率（default は全操作共通）
+#   quotas:  操作ごとのトークンバケット（rate: 回/秒、burst）、chatCompletions は tokens_per_minute も適用
+DEFAULT_SERVER_CONFIG = {
+    'seed': 42,
+    'latency_scale': 1.0,
+    'latency': {
+        'default': {'distribution': 'lognormal', 'median_ms': 120, 'sigma': 0.4},
+        'getItemOffers': {'distribution': 'lognormal', 'median_ms': 150, 'sigma': 0.4},
+        'getItemOffersBatch': {'distribution': 'lognormal', 'median_ms': 450, 'sigma': 0.4},
+        'getListingOffersBatch': {'distribution': 'lognormal', 'median_ms': 450, 'sigma': 0.4},
+        'searchCatalogItems': {'distribution': 'lognormal', 'median_ms': 250, 'sigma': 0.5},
+        'chatCompletions': {'distribution': 'lognormal', 'median_ms': 500, 'sigma': 0.6, 'per_token_ms': 10},
+        'lwaToken': {'distribution': 'fixed', 'median_ms': 50},
+        'keepaProduct': {'distribution': 'lognormal', 'median_ms': 300, 'sigma': 0.4},
+        'shopeeItemBaseInfo': {'distribution': 'lognormal', 'median_ms': 200, 'sigma': 0.4},
+        'shopeeItemExtraInfo': {'distribution': 'lognormal', 'median_ms': 150, 'sigma': 0.4}
+    },
+    'errors': {
+        'default': {'429': 0.0, '503': 0.0}
+    },
+    'quota_enabled': True,
+    'quota_scale': 1.0,
+    # SP-APIの公表レート（日本マーケットプレイス）
+    'quotas': {
+        'getItemOffers': {'rate': 0.5, 'burst': 1},
+        'getItemOffersBatch': {'rate': 0.1, 'burst': 1},
+        'getListingOffersBatch': {'rate': 0.5, 'burst': 1},
+        'searchCatalogItems': {'rate': 2.0, 'burst': 2},
+        'chatCompletions': {'rate': 50.0, 'burst': 50, 'tokens_per_minute': 30000},
+        # Shopeeの商品APIはパートナー単位で共通のクォータ
+        'shopeeProduct': {'rate': 10.0, 'burst': 10}
+    },
+    'offers': {'no_offer_rate': 0.05, 'amazon_rate': 0.35, 'prime_rate': 0.6, 'max_offers': 5},
+    'catalog': {'empty_rate': 0.05},
+    # Keepaのトークン（refill_interval_seconds ごとに refill_rate 補充、max_tokens が上限）と売れ筋ランク分布
+    'keepa': {
+        'initial_tokens': 100,
+        'refill_rate': 20,
+        'refill_interval_seconds': 60,
+        'max_tokens': 1200,
+        'no_rank_rate': 0.05,
+        'rank_median': 8000,
+        'rank_sigma': 1.2,
+        'history_points': 30,
+        'history_days': 90
+    },
+    # Shopeeの商品（time_scale: 経過時間の倍率、86400で1秒 = 1日として views / sale を増加）
+    'shopee': {
+        'partner_key': DEFAULT_LOCAL_PARTNER_KEY,
+        'verify_sign': True,
+        'missing_rate': 0.01,
+        'unlisted_rate': 0.03,
+        'views_median': 300,
+        'daily_views_median': 20,
+        'conversion_rate': 0.03,
+        'time_scale': 1.0
+    }
+}
+
+ERROR_BODIES = {
+    429: {'code': 'QuotaExceeded', 'message': 'You exceeded your quota for the requested resource.'},
+    503: {'code': 'ServiceUnavailable', 'message': 'Service temporarily unavailable. Please try again.'}
+}
+
+def _deep_merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def _stable_rng(*parts):
+    """キー（ASIN・SKU・検索語）ごとに決定的な乱数（同じキーには毎回同じ応答）"""
+    digest = hashlib.blake2b('|'.join(str(p) for p in parts).encode('utf-8'), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, 'big'))
+
+def _estimate_tokens(text):
+    return max(1, len(text or '') // 4)
+
+class TokenBucket:
+    """トークンバケット（rate: 補充/秒、burst: 上限）"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_take(self, amount=1.0):
+        """
+        取得を試行
+
+        Returns:
+            float: 0.0 で取得成功、それ以外は取得可能になるまでの秒数
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (amount - self.tokens) / self.rate
+
+class FakeApiState:
+    """サーバー全体の状態（設定・クォータ・統計、スレッド間で共有）"""
+
+    def __init__(self, config=None):
+        self.lock = threading.Lock()
+        self.brands = load_benchmark_brands()
+        self.configure(config)
+
+    def configure(self, config=None, merge_current=False):
+        with self.lock:
+            base = self.config if merge_current else DEFAULT_SERVER_CONFIG
+            self.config = _deep_merge(base, config)
+            self.rng = random.Random(self.config.get('seed'))
+            self.buckets = {}
+            self._reset_keepa_tokens()
+            if not merge_current:
+                self._reset_stats()
+
+    def _reset_stats(self):
+        self.started_at = time.time()
+        self.stats = defaultdict(lambda: {'requests': 0, 'status': defaultdict(int), 'latency_ms_total': 0.0, 'tokens': 0})
+
+    def reset(self):
+        with self.lock:
+            self.buckets = {}
+            self._reset_keepa_tokens()
+            self._reset_stats()
+
+    def _reset_keepa_tokens(self):
+        self.keepa_tokens = int(self.config['keepa']['initial_tokens'])
+        self.keepa_refilled_at = time.monotonic()
+
+    # ======================== 応答時間・エラー注入・クォータ ========================
+
+    def sample_latency(self, operation, tokens=0):
+        with self.lock:
+            spec = self.config['latency'].get(operation) or self.config['latency']['default']
+            median = float(spec.get('median_ms', 0))
+            distribution = spec.get('distribution', 'fixed')
+            if distribution == 'lognormal':
+                latency = median * math.exp(self.rng.gauss(0, float(spec.get('sigma', 0.5))))
+            elif distribution == 'uniform':
+                latency = self.rng.uniform(float(spec.get('min_ms', 0)), float(spec.get('max_ms', median * 2)))
+            else:
+                latency = median
+            latency += float(spec.get('per_token_ms', 0)) * tokens
+            return max(0.0, latency * float(self.config.get('latency_scale', 1.0)))
+
+    def injected_error(self, operation):
+        """注入エラーのステータス（無しはNone）"""
+        with self.lock:
+            rates = {**self.config['errors'].get('default', {}), **self.config['errors'].get(operation, {})}
+            draw = self.rng.random()
+            threshold = 0.0
+            for status in ('429', '503'):
+                threshold += float(rates.get(status, 0.0))
+                if draw < threshold:
+                    return int(status)
+            return None
+
+    def take_quota(self, operation, tokens=0):
+        """
+        クォータの消費
+
+        Returns:
+            float: 0.0 で許可、それ以外は再試行までの秒数（429）
+        """
+        with self.lock:
+            if not self.config.get('quota_enabled', True):
+                return 0.0
+            quota = self.config['quotas'].get(operation)
+            if not quota:
+                return 0.0
+            scale = float(self.config.get('quota_scale', 1.0))
+            key = (operation, 'requests')
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(quota['rate'] * scale, quota['burst'])
+            wait = self.buckets[key].try_take()
+            if wait > 0:
+                return wait
+            tpm = quota.get('tokens_per_minute')
+            if tpm and tokens:
+                token_key = (operation, 'tokens')
+                if token_key not in self.buckets:
+                    self.buckets[token_key] = TokenBucket(tpm / 60.0 * scale, tpm)
+                return self.buckets[token_key].try_take(tokens)
+            return 0.0
+
+    def take_keepa_tokens(self, cost):
+        """
+        Keepaトークンの消費（残量が正なら実行し、消費後の残量は負になり得る）
+
+        Returns:
+            tuple: (実行可否, 消費後の残量, 次回補充までのミリ秒)
+        """
+        with self.lock:
+            keepa = self.config['keepa']
+            interval = float(keepa['refill_interval_seconds'])
+            now = time.monotonic()
+            refills = int((now - self.keepa_refilled_at) // interval) if interval > 0 else 0
+            if refills:
+                self.keepa_tokens = min(int(keepa['max_tokens']), self.keepa_tokens + refills * int(keepa['refill_rate']))
+                self.keepa_refilled_at += refills * interval
+            refill_in_ms = int(max(0.0, self.keepa_refilled_at + interval - now) * 1000)
+            if self.keepa_tokens <= 0:
+                return False, self.keepa_tokens, refill_in_ms
+            self.keepa_tokens -= cost
+            return True, self.keepa_tokens, refill_in_ms
+
+    def record(self, operation, status, latency_ms, tokens=0):
+        with self.lock:
+            entry = self.stats[operation]
+            entry['requests'] += 1
+            entry['status'][str(status)] += 1
+            entry['latency_ms_total'] += latency_ms
+            entry['tokens'] += tokens
+
+    def snapshot(self):
+        """統計（操作ごとのリクエスト数・ステータス別件数・平均応答時間）"""
+        with self.lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            operations = {}
+            for operation, entry in self.stats.items():
+                operations[operation] = {
+                    'requests': entry['requests'],
+                    'status': dict(entry['status']),
+                    'avg_latency_ms': entry['latency_ms_total'] / entry['requests'] if entry['requests'] else 0.0,
+                    'requests_per_second': entry['requests'] / elapsed,
+                    'tokens': entry['tokens']
+                }
+            return {'elapsed_seconds': elapsed, 'operations': operations}
+
+    # ======================== 応答データ ========================
+
+    def item_offers_payload(self, asin=None, sku=None, item_condition='New'):
+        key = asin or sku
+        rng = _stable_rng('offers', key)
+        offer_config = self.config['offers']
+        identifier = {'MarketplaceId': JP_MARKETPLACE_ID, 'ItemCondition': item_condition}
+        identifier.update({'ASIN': asin} if asin else {'SellerSKU': sku})
+
+        offers = []
+        if rng.random() >= offer_config['no_offer_rate']:
+            base_price = rng.randrange(800, 12000, 10)
+            for position in range(rng.randint(1, int(offer_config['max_offers']))):
+                is_amazon = position == 0 and rng.random() < offer_config['amazon_rate']
+                is_fba = is_amazon or rng.random() < 0.5
+                is_prime = is_fba and (is_amazon or rng.random() < offer_config['prime_rate'])
+                max_hours = rng.choice([12, 24, 24, 48] if is_fba else [24, 48, 72, 96, 120])
+                offers.append({
+                    'SellerId': AMAZON_JP_SELLER_ID if is_amazon else f"A{rng.getrandbits(48):012X}",
+                    'SubCondition': 'new',
+                    'IsFulfilledByAmazon': is_fba,
+                    'IsBuyBoxWinner': position == 0,
+                    'IsFeaturedMerchant': position == 0,
+                    'PrimeInformation': {'IsPrime': is_prime, 'IsNationalPrime': is_prime},
+                    'ShippingTime': {'minimumHours': 0 if max_hours <= 24 else max_hours // 2,
+                                     'maximumHours': max_hours, 'availabilityType': 'NOW'},
+                    'ListingPrice': {'CurrencyCode': 'JPY', 'Amount': float(base_price + position * rng.randrange(0, 500, 10))},
+                    'Shipping': {'CurrencyCode': 'JPY', 'Amount': 0.0 if is_fba else 350.0}
+                })
+
+        payload = {
+            'marketplaceId': JP_MARKETPLACE_ID,
+            'ItemCondition': item_condition,
+            'status': 'Success',
+            'Identifier': identifier,
+            'Summary': {
+                'TotalOfferCount': len(offers),
+                'NumberOfOffers': [{'condition': 'new', 'fulfillmentChannel': 'Amazon' if o['IsFulfilledByAmazon'] else 'Merchant',
+                                    'OfferCount': 1} for o in offers],
+                'BuyBoxPrices': [{'condition': 'New', 'ListingPrice': offers[0]['ListingPrice']}] if offers else []
+            },
+            'Offers': offers
+        }
+        payload.update({'ASIN': asin} if asin else {'SKU': sku})
+        return payload
+
+    def catalog_items(self, keywords, page_size):
+        rng = _stable_rng('catalog', keywords)
+        if not keywords or rng.random() < self.config['catalog']['empty_rate']:
+            return []
+        brand = keywords.split()[0]
+        items = []
+        for rank in range(page_size):
+            digest = hashlib.blake2b(f"{keywords}|{rank}".encode('utf-8'), digest_size=4).hexdigest().upper()
+            product_type = PRODUCT_TYPES[rng.randrange(len(PRODUCT_TYPES))][1]
+            # 上位ほど検索語に近い商品名
+            name = keywords if rank == 0 else f"{brand} {product_type} {rng.choice(SIZES)}"
+            items.append({
+                'asin': f"B0{digest}",
+                'summaries': [{'marketplaceId': JP_MARKETPLACE_ID, 'itemName': name, 'brand': brand}]
+            })
+        return items
+
+    def keepa_product(self, asin):
+        """Keepaの商品（売れ筋ランクの履歴 csv[3] と stats.current[3] のみ）"""
+        keepa = self.config['keepa']
+        rng = _stable_rng('keepa', asin)
+        csv = [None] * 36
+        current = [-1] * 36
+        if rng.random() >= keepa['no_rank_rate']:
+            base = keepa['rank_median'] * math.exp(rng.gauss(0, keepa['rank_sigma']))
+            now_minutes = datetime_to_keepa_minutes(datetime.now(timezone.utc))
+            points = int(keepa['history_points'])
+            step = int(keepa['history_days']) * 24 * 60 // max(points, 1)
+            series = []
+            for i in range(points):
+                series.extend([now_minutes - (points - 1 - i) * step, max(1, int(base * math.exp(rng.gauss(0, 0.2))))])
+            csv[KEEPA_SALES_RANK_INDEX] = series
+            current[KEEPA_SALES_RANK_INDEX] = series[-1]
+        return {
+            'asin': asin,
+            'domainId': 5,
+            'title': f"Keepa product {asin}",
+            'csv': csv,
+            'stats': {'current': current},
+            'salesRankReference': 52374051 if csv[KEEPA_SALES_RANK_INDEX] else -1
+        }
+
+    def shopee_item(self, shop_id, item_id):
+        """
+        Shopeeの商品（存在しない場合はNone）
+
+        views / sale / likes は開始時の値から経過日数（time_scale 倍）に比例して増加し、
+        同じ時点の取得には同じ値を返す。
+        """
+        shopee = self.config['shopee']
+        rng = _stable_rng('shopee', shop_id, item_id)
+        if rng.random() < shopee['missing_rate']:
+            return None
+        days = (time.time() - self.started_at) * float(shopee['time_scale']) / 86400
+        base_views = int(shopee['views_median'] * math.exp(rng.gauss(0, 0.8)))
+        daily_views = shopee['daily_views_median'] * math.exp(rng.gauss(0, 0.8))
+        conversion = shopee['conversion_rate'] * math.exp(rng.gauss(0, 0.5))
+        views = base_views + int(daily_views * days)
+        price = round(rng.uniform(500, 8000), -1)
+        return {
+            'item_id': int(item_id),
+            'item_name': f"Shopee item {item_id}",
+            'item_status': 'UNLIST' if rng.random() < shopee['unlisted_rate'] else 'NORMAL',
+            'price_info': [{'currency': 'JPY', 'current_price': price, 'original_price': price}],
+            'stock_info_v2': {'summary_info': {'total_reserved_stock': 0,
+                                               'total_available_stock': rng.randint(0, 50)}},
+            'views': views,
+            'sale': int(views * conversion),
+            'likes': int(views * 0.02),
+            'comment_count': int(views * conversion * 0.3),
+            'rating_star': round(rng.uniform(3.5, 5.0), 1)
+        }
+
+    def translate(self, title):
+        """日本語化の代替（ブランド・商品種別を辞書の日本語表記に置き換え）"""
+        translated = title
+        lowered = title.lower()
+        for brand, variations in self.brands.items():
+            if brand.lower() in lowered and variations:
+                translated = translated.replace(brand, variations[0])
+                break
+        for english, japanese in PRODUCT_TYPES:
+            if english.lower() in lowered:
+                translated = translated.replace(english, japanese)
+        return translated
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """SP-API・LLM互換のリクエストハンドラー"""
+
+    server_version = 'FakeSpApi/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # リクエストごとのアクセスログは出さない（負荷試験時の端末出力を抑制）
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            return {}
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, retry_after=None, message=None):
+        error = dict(ERROR_BODIES.get(status, {'code': 'Error', 'message': message or ''}))
+        if message:
+            error['message'] = message
+        headers = {}
+        if retry_after is not None:
+            headers['Retry-After'] = f"{max(retry_after, 0.1):.1f}"
+        self._send_json(status, {'errors': [error]}, headers)
+
+    def _serve(self, operation, build, tokens=0, rate_limit=None):
+        """
+        1操作の応答（エラー注入 → クォータ → 応答時間 → 本体）
+
+        Args:
+            operation: 操作名（設定・統計のキー）
+            build: 応答本体を返す関数
+            tokens: LLMのトークン数（応答時間・TPMクォータに使用）
+            rate_limit: x-amzn-RateLimit-Limit ヘッダー値
+        """
+        started = time.perf_counter()
+        status = self.state.injected_error(operation)
+        retry_after = None
+        if status is None:
+            wait = self.state.take_quota(operation, tokens)
+            if wait > 0:
+                status, retry_after = 429, wait
+        time.sleep(self.state.sample_latency(operation, tokens if status is None else 0) / 1000.0)
+
+        headers = {'x-amzn-RequestId': hashlib.md5(f"{time.time_ns()}".encode()).hexdigest()}
+        if rate_limit is not None:
+            headers['x-amzn-RateLimit-Limit'] = str(rate_limit)
+        if status is None:
+            self._send_json(200, build(), headers)
+            status = 200
+        else:
+            if status == 503:
+                retry_after = 1.0
+            self._send_error(status, retry_after)
+        self.state.record(operation, status, (time.perf_counter() - started) * 1000, tokens if status == 200 else 0)
+
+    def _rate_limit(self, operation):
+        quota = self.state.config['quotas'].get(operation)
+        return quota['rate'] * float(self.state.config.get('quota_scale', 1.0)) if quota else None
+
+    # ======================== ルーティング ========================
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        parts = [urllib.parse.unquote(p) for p in parsed.path.strip('/').split('/')]
+
+        if parsed.path == '/_stats':
+            return self._send_json(200, self.state.snapshot())
+
+        # /products/pricing/v0/items/{asin}/offers
+        if len(parts) == 6 and parts[:4] == ['products', 'pricing', 'v0', 'items'] and parts[5] == 'offers':
+            condition = params.get('ItemCondition', 'New')
+            return self._serve('getItemOffers',
+                               lambda: {'payload': self.state.item_offers_payload(asin=parts[4], item_condition=condition)},
+                               rate_limit=self._rate_limit('getItemOffers'))
+
+        if parsed.path.rstrip('/') == '/product':
+            return self._serve_keepa_product(params)
+
+        if parsed.path.rstrip('/') in (SHOPEE_ITEM_BASE_INFO_PATH, SHOPEE_ITEM_EXTRA_INFO_PATH):
+            return self._serve_shopee_items(parsed.path.rstrip('/'), params)
+
+        if parsed.path.rstrip('/') == '/catalog/2022-04-01/items':
+            keywords = params.get('keywords', '')
+            page_size = max(1, min(int(params.get('pageSize', 10)), 20))
+
+            def build():
+                items = self.state.catalog_items(keywords, page_size)
+                return {'numberOfResults': len(items), 'pagination': {}, 'refinements': {}, 'items': items}
+            return self._serve('searchCatalogItems', build, rate_limit=self._rate_limit('searchCatalogItems'))
+
+        self._send_error(404, message=f"Unknown resource: {parsed.path}")
+
+    def do_POST(self):
+        parsed = urllib.parse.urlparse(self.path)
+        path = parsed.path.rstrip('/')
+        body = self._read_json()
+
+        if path == '/_reset':
+            self.state.reset()
+            return self._send_json(200, {'reset': True})
+        if path == '/_config':
+            self.state.configure(body, merge_current=True)
+            return self._send_json(200, self.state.config)
+
+        if path == '/auth/o2/token':
+            return self._serve('lwaToken', lambda: {
+                'access_token': 'Atza|local-test-token', 'token_type': 'bearer', 'expires_in': 3600
+            })
+
+        if path in ('/batches/products/pricing/v0/itemOffers', '/batches/products/pricing/v0/listingOffers'):
+            operation = 'getItemOffersBatch' if path.endswith('itemOffers') else 'getListingOffersBatch'
+            requests = body.get('requests') or []
+            if not requests or len(requests) > BATCH_MAX_REQUESTS:
+                return self._send_error(400, message=f"requests must contain 1-{BATCH_MAX_REQUESTS} entries")
+            return self._serve(operation, lambda: {'responses': [self._batch_entry(r) for r in requests]},
+                               rate_limit=self._rate_limit(operation))
+
+        if path in ('/v1/chat/completions', '/chat/completions'):
+            messages = body.get('messages') or []
+            prompt = '\n'.join(str(m.get('content', '')) for m in messages)
+            prompt_tokens = _estimate_tokens(prompt)
+            return self._serve('chatCompletions', lambda: self._chat_completion(body, messages, prompt_tokens),
+                               tokens=prompt_tokens + int(body.get('max_tokens') or 64))
+
+        self._send_error(404, message=f"Unknown resource: {parsed.path}")
+
+    def _serve_keepa_product(self, params):
+        """Keepa /product（トークン不足は429、応答には tokensLeft / refillIn / refillRate を付与）"""
+        started = time.perf_counter()
+        asins = [a for a in params.get('asin', '').split(',') if a]
+        if not params.get('key') or not asins or len(asins) > KEEPA_MAX_ASINS_PER_REQUEST:
+            return self._send_json(400, {'error': {'type': 'invalidParameter',
+                                                   'message': f"key and 1-{KEEPA_MAX_ASINS_PER_REQUEST} asins are required"}})
+        cost = len(asins) * KEEPA_TOKENS_PER_PRODUCT
+        allowed, tokens_left, refill_in = self.state.take_keepa_tokens(cost)
+        time.sleep(self.state.sample_latency('keepaProduct') / 1000.0)
+        body = {
+            'timestamp': int(time.time() * 1000),
+            'tokensLeft': tokens_left,
+            'refillIn': refill_in,
+            'refillRate': int(self.state.config['keepa']['refill_rate']),
+            'tokenFlowReduction': 0.0,
+            'tokensConsumed': cost if allowed else 0,
+            'processingTimeInMs': 0
+        }
+        if allowed:
+            body['products'] = [self.state.keepa_product(asin) for asin in asins]
+            status = 200
+        else:
+            body['error'] = {'type': 'NOT_ENOUGH_TOKEN', 'message': 'Not enough tokens.'}
+            status = 429
+        self._send_json(status, body)
+        self.state.record('keepaProduct', status, (time.perf_counter() - started) * 1000, cost if allowed else 0)
+
+    def _serve_shopee_items(self, path, params):
+        """Shopee get_item_base_info / get_item_extra_info（署名検証・50件上限・共通クォータ）"""
+        started = time.perf_counter()
+        operation = 'shopeeItemBaseInfo' if path == SHOPEE_ITEM_BASE_INFO_PATH else 'shopeeItemExtraInfo'
+        request_id = hashlib.md5(f"{time.time_ns()}".encode()).hexdigest()
+        shopee = self.state.config['shopee']
+
+        def reply(status, error='', message='', response=None):
+            body = {'error': error, 'message': message, 'request_id': request_id}
+            if response is not None:
+                body['response'] = response
+            self._send_json(status, body)
+            self.state.record(operation, status, (time.perf_counter() - started) * 1000)
+
+        required = ('partner_id', 'timestamp', 'access_token', 'shop_id', 'sign')
+        if any(not params.get(name) for name in required):
+            return reply(400, 'error_param', f"{', '.join(required)} are required")
+        if shopee.get('verify_sign', True):
+            base_string = f"{params['partner_id']}{path}{params['timestamp']}{params['access_token']}{params['shop_id']}"
+            expected = hmac.new(str(shopee['partner_key']).encode('utf-8'), base_string.encode('utf-8'),
+                                hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, params['sign']):
+                return reply(403, 'error_sign', 'Wrong sign.')
+        item_ids = [i for i in params.get('item_id_list', '').split(',') if i]
+        if not item_ids or len(item_ids) > SHOPEE_MAX_ITEMS_PER_REQUEST:
+            return reply(400, 'error_param', f"item_id_list must contain 1-{SHOPEE_MAX_ITEMS_PER_REQUEST} ids")
+
+        status = self.state.injected_error(operation)
+        if status is None and self.state.take_quota('shopeeProduct') > 0:
+            status = 429
+        time.sleep(self.state.sample_latency(operation) / 1000.0)
+        if status == 429:
+            return reply(429, 'error_too_many_request', 'Too many requests, please try again later.')
+        if status is not None:
+            return reply(status, 'error_server', 'Internal server error.')
+
+        items = [self.state.shopee_item(params['shop_id'], item_id) for item_id in item_ids]
+        base_keys = ('item_id', 'item_name', 'item_status', 'price_info', 'stock_info_v2')
+        extra_keys = ('item_id', 'views', 'sale', 'likes', 'comment_count', 'rating_star')
+        keys = base_keys if operation == 'shopeeItemBaseInfo' else extra_keys
+        reply(200, response={'item_list': [{key: item[key] for key in keys} for item in items if item]})
+
+    def _batch_entry(self, request):
+        uri = request.get('uri', '')
+        parts = [urllib.parse.unquote(p) for p in uri.strip('/').split('/')]
+        condition = request.get('ItemCondition', 'New')
+        if len(parts) == 6 and parts[5] == 'offers' and parts[3] in ('items', 'listings'):
+            key = {'asin': parts[4]} if parts[3] == 'items' else {'sku': parts[4]}
+            return {
+                'status': {'statusCode': 200, 'reasonPhrase': 'OK'},
+                'headers': {},
+                'body': {'payload': self.state.item_offers_payload(item_condition=condition, **key)},
+                'request': {'MarketplaceId': request.get('MarketplaceId', JP_MARKETPLACE_ID), 'ItemCondition': condition,
+                            **({'Asin': parts[4]} if parts[3] == 'items' else {'SellerSKU': parts[4]})}
+            }
+        return {'status': {'statusCode': 400, 'reasonPhrase': 'Bad Request'}, 'headers': {},
+                'body': {'errors': [{'code': 'InvalidInput', 'message': f"Invalid uri: {uri}"}]}, 'request': request}
+
+    def _chat_completion(self, body, messages, prompt_tokens):
+        last_user = next((m for m in reversed(messages) if m.get('role') == 'user'), {})
+        # 日本語化プロンプトは最終行が商品名
+        title = str(last_user.get('content', '')).strip().splitlines()[-1:] or ['']
+        content = self.state.translate(title[0].strip())
+        completion_tokens = _estimate_tokens(content)
+        return {
+            'id': f"chatcmpl-{hashlib.md5(f'{time.time_ns()}'.encode()).hexdigest()[:24]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-4o'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+class FakeApiServer(ThreadingHTTPServer):
+    """状態（FakeApiState）を持つスレッド型HTTPサーバー"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, FakeApiHandler)
+        self.state = FakeApiState(config)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def load_server_config(path):
+    """設定JSONの読み込み（DEFAULT_SERVER_CONFIG への上書き分）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def start_fake_api_server(config=None, host='127.0.0.1', port=0):
+    """
+    バックグラウンドスレッドでサーバーを起動（負荷試験スクリプトからの利用向け）
+
+    Args:
+        config: DEFAULT_SERVER_CONFIG への上書き設定
+        host: 待ち受けアドレス
+        port: ポート（0で空きポート）
+
+    Returns:
+        FakeApiServer（base_url で接続先、shutdown() で停止）
+    """
+    server = FakeApiServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name='fake-api-server', daemon=True)
+    thread.start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SP-API・LLMのローカル代替サーバー')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--config', help='設定JSON（DEFAULT_SERVER_CONFIG への上書き分）')
+    parser.add_argument('--latency-scale', type=float, help='応答時間の倍率（0で遅延なし）')
+    parser.add_argument('--error-429', type=float, help='全操作の429注入率（0-1）')
+    parser.add_argument('--error-503', type=float, help='全操作の503注入率（0-1）')
+    parser.add_argument('--quota-scale', type=float, help='クォータのレート倍率（10で公表値の10倍）')
+    parser.add_argument('--no-quota', action='store_true', help='クォータを無効化')
+    args = parser.parse_args(argv)
+
+    config = load_server_config(args.config) if args.config else {}
+    if args.latency_scale is not None:
+        config['latency_scale'] = args.latency_scale
+    if args.quota_scale is not None:
+        config['quota_scale'] = args.quota_scale
+    if args.no_quota:
+        config['quota_enabled'] = False
+    error_override = {}
+    if args.error_429 is not None:
+        error_override['429'] = args.error_429
+    if args.error_503 is not None:
+        error_override['503'] = args.error_503
+    if error_override:
+        config = _deep_merge(config, {'errors': {'default': error_override}})
+
+    server = FakeApiServer((args.host, args.port), config)
+    print(f"🚀 SP-API・LLM代替サーバー起動: {server.base_url}")
+    print(f"   SP_API_ENDPOINT={server.base_url}")
+    print(f"   OPENAI_BASE_URL={server.base_url}/v1")
+    print(f"   KEEPA_ENDPOINT={server.base_url}  SHOPEE_ENDPOINT={server.base_url}")
+    print(f"   統計: GET {server.base_url}/_stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n📊 リクエスト統計")
+        print(json.dumps(server.state.snapshot(), ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+# run_benchmarks.py - テキスト処理・スコア計算ホットパスのCPUマイクロベンチマーク
+#
+# 使い方（プロジェクトルートから）:
+#   python -m benchmarks.run_benchmarks                              # 1k/10k/100k 行で全ケース
+#   python -m benchmarks.run_benchmarks --sizes 1000,10000 --cases normalize,check_ng_words
+#   python -m benchmarks.run_benchmarks --save before                # data/benchmarks/before.json に保存
+#   python -m benchmarks.run_benchmarks --compare before             # 保存済みベースラインと比較
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import platform
+import sys
+import time
+from datetime import datetime
+
+_project_root = pathlib.Path(__file__).resolve().parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import create_benchmark_data, load_benchmark_brands
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+# 次のサイズの推定所要時間がこれを超えるケースはスキップ
+DEFAULT_TIME_BUDGET_SECONDS = 120.0
+# 最初のサイズの所要時間を推定するための試行行数
+PROBE_ROWS = 100
+# 比較時にこれ以上遅くなったケースを退行として表示
+REGRESSION_THRESHOLD = 0.10
+
+BASELINE_DIR = _project_root / 'data' / 'benchmarks'
+
+# ======================== ベンチマークケース ========================
+# 各ケースは prepare(df) で計測外の準備（辞書読み込み等）を行い、run(df, context) を計測する。
+
+def _prepare_sp_api_service(df):
+    from core.services import sp_api_service
+    return {'module': sp_api_service, 'brands': load_benchmark_brands()}
+
+def _run_advanced_cleansing(df, context):
+    cleanse = context['module'].advanced_product_name_cleansing
+    return [cleanse(text) for text in df['title']]
+
+def _run_extract_brand_and_quantity(df, context):
+    extract = context['module'].extract_brand_and_quantity
+    brands = context['brands']
+    return [extract(text, brands) for text in df['title']]
+
+def _prepare_normalize(df):
+    from modules import cleansing
+    return {'module': cleansing}
+
+def _run_normalize(df, context):
+    normalize = context['module'].normalize
+    return [normalize(text) for text in df['title']]
+
+def _prepare_extract_brand(df):
+    from modules import extractors
+    return {'module': extractors, 'brands': load_benchmark_brands()}
+
+def _run_extract_brand(df, context):
+    extract = context['module'].extract_brand
+    brands = context['brands']
+    return [extract(text, brands) for text in df['clean_title']]
+
+def _prepare_ng_words(df):
+    from core.managers.ng_word_manager import create_ng_word_manager
+    return {'manager': create_ng_word_manager(_project_root / 'data')}
+
+def _run_check_ng_words(df, context):
+    check = context['manager'].check_ng_words
+    return [check(text) for text in df['title']]
+
+def _run_apply_ng_word_filtering(df, context):
+    # 件数が多い場合は parallel_text のプロセスプールで並列（TEXT_WORKERS=1 で逐次と比較）
+    return context['manager'].apply_ng_word_filtering(df[['clean_title']])
+
+def _prepare_parallel_map(df):
+    # ブランド・数量抽出を parallel_map で実行（プールは計測前に起動しておき、常駐後の配布コストを計測）
+    from core.helpers import parallel_text
+    from core.services import sp_api_service
+    context = {'brand_index': sp_api_service.compile_brand_index(load_benchmark_brands())}
+    titles = df['title'].fillna('').astype(str).tolist()
+    parallel_text.parallel_map(sp_api_service._brand_and_quantity_task, titles[:64], context=context, min_items=1)
+    return {'module': parallel_text, 'task': sp_api_service._brand_and_quantity_task, 'context': context,
+            'titles': titles}
+
+def _run_parallel_map_serial(df, context):
+    return context['module'].parallel_map(context['task'], context['titles'], context=context['context'], workers=1)
+
+def _run_parallel_map_pool(df, context):
+    # ワーカー数は TEXT_WORKERS（既定: CPUコア数）
+    return context['module'].parallel_map(context['task'], context['titles'], context=context['context'], min_items=1)
+
+def _prepare_asin_helpers(df):
+    from core.helpers import asin_helpers
+    return {'module': asin_helpers}
+
+def _run_prime_confidence(df, context):
+    return df.apply(context['module'].calculate_prime_confidence_score, axis=1)
+
+def _run_classify(df, context):
+    return context['module'].classify_for_shopee_listing(df)
+
+def _prepare_export(df):
+    from asin_processor import asin_helpers
+    return {'module': asin_helpers}
+
+def _run_export(df, context):
+    output = io.BytesIO()
+    context['module'].export_shopee_optimized_excel(df, output=output)
+    return output.getbuffer().nbytes
+
+BENCHMARK_CASES = {
+    'advanced_product_name_cleansing': {
+        'target': 'core.services.sp_api_service.advanced_product_name_cleansing',
+        'prepare': _prepare_sp_api_service, 'run': _run_advanced_cleansing
+    },
+    'normalize': {
+        'target': 'modules.cleansing.normalize',
+        'prepare': _prepare_normalize, 'run': _run_normalize
+    },
+    'extract_brand': {
+        'target': 'modules.extractors.extract_brand',
+        'prepare': _prepare_extract_brand, 'run': _run_extract_brand
+    },
+    'extract_brand_and_quantity': {
+        'target': 'core.services.sp_api_service.extract_brand_and_quantity',
+        'prepare': _prepare_sp_api_service, 'run': _run_extract_brand_and_quantity
+    },
+    # parallel_text.DEFAULT_MIN_PARALLEL_ITEMS の決定用（2ケースの所要時間が逆転する行数）
+    'parallel_map_serial': {
+        'target': 'core.helpers.parallel_text.parallel_map (workers=1)',
+        'prepare': _prepare_parallel_map, 'run': _run_parallel_map_serial
+    },
+    'parallel_map_pool': {
+        'target': 'core.helpers.parallel_text.parallel_map (TEXT_WORKERS)',
+        'prepare': _prepare_parallel_map, 'run': _run_parallel_map_pool
+    },
+    'check_ng_words': {
+        'target': 'core.managers.ng_word_manager.NGWordManager.check_ng_words',
+        'prepare': _prepare_ng_words, 'run': _run_check_ng_words
+    },
+    'apply_ng_word_filtering': {
+        'target': 'core.managers.ng_word_manager.NGWordManager.apply_ng_word_filtering',
+        'prepare': _prepare_ng_words, 'run': _run_apply_ng_word_filtering
+    },
+    'calculate_prime_confidence_score': {
+        'target': 'core.helpers.asin_helpers.calculate_prime_confidence_score',
+        'prepare': _prepare_asin_helpers, 'run': _run_prime_confidence
+    },
+    'classify_for_shopee_listing': {
+        'target': 'core.helpers.asin_helpers.classify_for_shopee_listing',
+        'prepare': _prepare_asin_helpers, 'run': _run_classify
+    },
+    'export_shopee_optimized_excel': {
+        'target': 'asin_processor.asin_helpers.export_shopee_optimized_excel',
+        'prepare': _prepare_export, 'run': _run_export
+    }
+}
+
+# ======================== 計測 ========================
+
+@contextlib.contextmanager
+def _quiet(enabled=True):
+    """対象関数の進捗printを計測中は捨てる（端末出力の速度で結果がぶれないように）"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def time_case(case, df, repeat=DEFAULT_REPEAT, quiet=True):
+    """
+    1ケース・1サイズの計測（repeat回実行して最速値を採用）
+
+    Returns:
+        dict: seconds（最速）/ mean_seconds / per_row_us / runs
+    """
+    with _quiet(quiet):
+        context = case['prepare'](df)
+    timings = []
+    for _ in range(max(1, repeat)):
+        with _quiet(quiet):
+            start = time.perf_counter()
+            case['run'](df, context)
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        'seconds': best,
+        'mean_seconds': float(np.mean(timings)),
+        'per_row_us': best / len(df) * 1e6 if len(df) else 0.0,
+        'runs': len(timings)
+    }
+
+def run_benchmarks(sizes=None, cases=None, repeat=DEFAULT_REPEAT, time_budget=DEFAULT_TIME_BUDGET_SECONDS,
+                   seed=None, quiet=True):
+    """
+    ベンチマーク実行
+
+    サイズの小さい順に計測し、前のサイズ（最初のサイズは PROBE_ROWS 行の試行）の結果から
+    線形推定した所要時間が time_budget を超える場合はそのサイズ以降をスキップする（推定値は結果に残す）。
+
+    Args:
+        sizes: 行数のリスト（Noneで DEFAULT_SIZES）
+        cases: ケース名のリスト（Noneで全ケース）
+        repeat: 各計測の繰り返し回数
+        time_budget: 1計測あたりの推定所要時間の上限（秒、Noneで無制限）
+        seed: 合成データの乱数シード（Noneで既定値）
+        quiet: 対象関数のprint出力を捨てる
+
+    Returns:
+        list: {case, rows, status, seconds, per_row_us, ...} のリスト
+    """
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    case_names = list(cases or BENCHMARK_CASES.keys())
+    unknown = [name for name in case_names if name not in BENCHMARK_CASES]
+    if unknown:
+        raise ValueError(f"未知のベンチマークケース: {unknown}（利用可能: {list(BENCHMARK_CASES)}）")
+
+    data_kwargs = {} if seed is None else {'seed': seed}
+    frames = {rows: create_benchmark_data(rows, **data_kwargs) for rows in sizes}
+
+    results = []
+    for name in case_names:
+        case = BENCHMARK_CASES[name]
+        previous = None
+        if time_budget is not None and sizes[0] > PROBE_ROWS:
+            try:
+                previous = time_case(case, frames[sizes[0]].head(PROBE_ROWS), repeat=1, quiet=quiet)
+            except Exception:
+                # 失敗は本計測で報告する
+                previous = None
+        for rows in sizes:
+            entry = {'case': name, 'rows': rows, 'target': case['target']}
+            if previous is not None and time_budget is not None:
+                estimated = previous['per_row_us'] * rows / 1e6 * max(1, repeat)
+                if estimated > time_budget:
+                    entry.update(status='skipped', estimated_seconds=estimated)
+                    results.append(entry)
+                    print(f"⏭️ {name} @ {rows:,}行: スキップ（推定 {estimated:.1f}秒 > 上限 {time_budget:.0f}秒）")
+                    # 推定は次のサイズでも超えるため、以降もスキップ
+                    continue
+            try:
+                timing = time_case(case, frames[rows], repeat=repeat, quiet=quiet)
+            except ImportError as e:
+                entry.update(status='unavailable', error=str(e))
+                results.append(entry)
+                print(f"⚠️ {name}: インポート失敗のためスキップ ({e})")
+                break
+            except Exception as e:
+                entry.update(status='error', error=f"{type(e).__name__}: {e}")
+                results.append(entry)
+                print(f"❌ {name} @ {rows:,}行: {type(e).__name__}: {e}")
+                break
+            entry.update(status='ok', **timing)
+            results.append(entry)
+            previous = timing
+            print(f"✅ {name} @ {rows:,}行: {timing['seconds']:.3f}秒（{timing['per_row_us']:.1f}µs/行）")
+    return results
+
+# ======================== ベースライン ========================
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+def _baseline_path(name):
+    path = pathlib.Path(name)
+    if path.suffix == '.json' or path.parent != pathlib.Path('.'):
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+def save_baseline(results, name):
+    """計測結果をベースラインとして保存（名前のみの場合は data/benchmarks/<name>.json）"""
+    path = _baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'name': path.stem,
+        'created_at': datetime.now().isoformat(),
+        'environment': _environment(),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return path
+
+def load_baseline(name):
+    """保存済みベースラインの読み込み"""
+    with open(_baseline_path(name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_results(baseline, results, threshold=REGRESSION_THRESHOLD):
+    """
+    ベースラインとの比較
+
+    Returns:
+        pd.DataFrame: case / rows / baseline_seconds / seconds / ratio / verdict（ratio = 今回 / ベースライン）
+    """
+    base = {(r['case'], r['rows']): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    rows = []
+    for result in results:
+        if result.get('status') != 'ok':
+            continue
+        previous = base.get((result['case'], result['rows']))
+        if previous is None:
+            continue
+        ratio = result['seconds'] / previous['seconds'] if previous['seconds'] > 0 else np.nan
+        if ratio > 1 + threshold:
+            verdict = '退行'
+        elif ratio < 1 - threshold:
+            verdict = '改善'
+        else:
+            verdict = '同等'
+        rows.append({
+            'case': result['case'],
+            'rows': result['rows'],
+            'baseline_seconds': previous['seconds'],
+            'seconds': result['seconds'],
+            'ratio': ratio,
+            'verdict': verdict
+        })
+    return pd.DataFrame(rows, columns=['case', 'rows', 'baseline_seconds', 'seconds', 'ratio', 'verdict'])
+
+def format_results(results):
+    """計測結果の表（ケース×行数）"""
+    frame = pd.DataFrame(results)
+    if frame.empty:
+        return '（結果なし）'
+    columns = [col for col in ['case', 'rows', 'status', 'seconds', 'per_row_us', 'estimated_seconds'] if col in frame.columns]
+    return frame[columns].to_string(index=False, float_format=lambda v: f"{v:.4f}")
+
+def _parse_sizes(value):
+    return [int(float(part)) for part in value.split(',') if part.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='テキスト処理・スコア計算ホットパスのCPUマイクロベンチマーク')
+    parser.add_argument('--sizes', type=_parse_sizes, default=DEFAULT_SIZES, help='行数（カンマ区切り、例: 1000,10000,100000）')
+    parser.add_argument('--cases', type=lambda v: [c.strip() for c in v.split(',') if c.strip()], default=None,
+                        help=f"ケース名（カンマ区切り、既定は全ケース: {','.join(BENCHMARK_CASES)}）")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='各計測の繰り返し回数（最速値を採用）')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET_SECONDS,
+                        help='推定所要時間がこれを超えるサイズはスキップ（秒、0で無制限）')
+    parser.add_argument('--seed', type=int, default=None, help='合成データの乱数シード')
+    parser.add_argument('--save', metavar='NAME', help='結果をベースラインとして保存（data/benchmarks/NAME.json）')
+    parser.add_argument('--compare', metavar='NAME', help='保存済みベースラインと比較')
+    parser.add_argument('--verbose', action='store_true', help='対象関数のprint出力を表示')
+    parser.add_argument('--list', action='store_true', help='ケース一覧を表示して終了')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, case in BENCHMARK_CASES.items():
+            print(f"{name:35s} {case['target']}")
+        return 0
+
+    print(f"🚀 ベンチマーク開始: sizes={args.sizes} repeat={args.repeat}")
+    results = run_benchmarks(
+        sizes=args.sizes, cases=args.cases, repeat=args.repeat,
+        time_budget=args.time_budget or None, seed=args.seed, quiet=not args.verbose
+    )
+    print("\n📊 計測結果")
+    print(format_results(results))
+
+    if args.compare:
+        comparison = compare_results(load_baseline(args.compare), results)
+        print(f"\n📈 ベースライン比較: {args.compare}")
+        if comparison.empty:
+            print("（共通のケース・行数なし）")
+        else:
+            print(comparison.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+            regressions = comparison[comparison['verdict'] == '退行']
+            if not regressions.empty:
+                print(f"⚠️ 退行 {len(regressions)}件（{REGRESSION_THRESHOLD:.0%}超の低下）")
+
+    if args.save:
+        path = save_baseline(results, args.save)
+        print(f"\n💾 ベースライン保存: {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
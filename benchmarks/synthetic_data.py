@@ -0,0 +1,176 @@
+# synthetic_data.py - ベンチマーク用の合成データ生成（行数を任意に拡大可能）
+import json
+import pathlib
+import numpy as np
+import pandas as pd
+
+SYNTHETIC_SEED = 42
+DATA_SOURCE_LABEL = 'ベンチマーク合成'
+
+_DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / 'data'
+
+# brands.json が無い場合のブランド（create_shipping_time_test_data のテストケースと同じ系統）
+FALLBACK_BRANDS = {
+    'FANCL': ['ファンケル', 'fancl'],
+    'MILBON': ['ミルボン', 'milbon'],
+    'SHISEIDO': ['資生堂', 'shiseido'],
+    'DHC': ['ディーエイチシー', 'dhc'],
+    'TSUBAKI': ['椿', 'tsubaki'],
+    'KOSE': ['コーセー', 'kose'],
+    'KANEBO': ['カネボウ', 'kanebo'],
+    'ORBIS': ['オルビス', 'orbis']
+}
+
+PRODUCT_TYPES = [
+    ('Mild Cleansing Oil', 'クレンジングオイル'),
+    ('Elujuda Treatment', 'ヘアトリートメント'),
+    ('Perfect Whip Face Wash', '洗顔フォーム'),
+    ('Premium Repair Mask', 'リペアマスク'),
+    ('Hydrating Lotion', '化粧水'),
+    ('Ultra Facial Cream', 'フェイシャルクリーム'),
+    ('Water Sleeping Mask', 'スリーピングマスク'),
+    ('Green Tea Serum', '美容液'),
+    ('Vitamin C Essence', 'ビタミンCエッセンス'),
+    ('Moisture Shampoo', 'モイストシャンプー'),
+    ('UV Protection Gel', 'UVジェル'),
+    ('Deep Clear Toner', '拭き取り化粧水')
+]
+
+SIZES = ['120ml', '200ml', '500ml', '50g', '100g', '30ml x 2', '3 pack', '1.7 fl oz', '24 count']
+
+# 実データの商品名に多いノイズ（advanced_product_name_cleansing / normalize の除去対象）
+TITLE_PREFIXES = ['', '', '', '【正規品】', '★送料無料★ ', 'Japan ', '[在庫あり] ', '🇯🇵 ']
+TITLE_SUFFIXES = ['', '', '', ' 100% Authentic', ' (Made in Japan)', ' / 日本製', ' Free shipping', ' 新品 未使用']
+
+SELLER_TYPES = ['amazon', 'official_manufacturer', 'third_party']
+SELLER_TYPE_WEIGHTS = [0.35, 0.25, 0.40]
+SHIP_SOURCES = {
+    'amazon': 'Amazon本体API',
+    'official_manufacturer': '公式メーカーAPI',
+    'third_party': 'サードパーティAPI'
+}
+
+# NGワードを含むタイトルの割合
+NG_WORD_RATE = 0.05
+# ShippingTimeが欠損する割合
+SHIP_MISSING_RATE = 0.2
+
+def load_benchmark_brands(max_brands=None):
+    """ブランド辞書（data/brands.json、無い場合は FALLBACK_BRANDS）"""
+    brands = FALLBACK_BRANDS
+    brands_path = _DATA_DIR / 'brands.json'
+    if brands_path.exists():
+        try:
+            with open(brands_path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if loaded:
+                brands = loaded
+        except (OSError, ValueError):
+            pass
+    if max_brands:
+        brands = dict(list(brands.items())[:max_brands])
+    return brands
+
+def load_benchmark_ng_words():
+    """NGワード一覧（data/ng_words.json、無い場合は空）"""
+    ng_path = _DATA_DIR / 'ng_words.json'
+    if not ng_path.exists():
+        return []
+    try:
+        with open(ng_path, 'r', encoding='utf-8') as f:
+            ng_dict = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [word for words in ng_dict.values() for word in words if isinstance(word, str)]
+
+def _pick(rng, values, size, p=None):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=p)]
+
+def create_benchmark_data(rows, seed=SYNTHETIC_SEED, brands=None, ng_words=None):
+    """
+    ベンチマーク用の合成データ生成
+
+    create_prime_priority_demo_data / create_shipping_time_test_data と同じカラム構成で、
+    ブランド・商品種別・容量・ノイズ語の組み合わせから任意の行数の商品名を生成する。
+    同じ seed・rows なら常に同じデータになる。
+
+    Args:
+        rows: 行数
+        seed: 乱数シード
+        brands: ブランド辞書（Noneで load_benchmark_brands）
+        ng_words: 混入させるNGワード（Noneで load_benchmark_ng_words）
+
+    Returns:
+        pd.DataFrame: title（ノイズ付き原文）/ clean_title / japanese_name / 出品者・Prime・発送時間・各スコア
+    """
+    rng = np.random.default_rng(seed)
+    brands = brands if brands is not None else load_benchmark_brands()
+    ng_words = ng_words if ng_words is not None else load_benchmark_ng_words()
+
+    brand_keys = list(brands.keys())
+    brand_idx = rng.integers(0, len(brand_keys), size=rows)
+    brand_en = np.asarray(brand_keys, dtype=object)[brand_idx]
+    # 日本語名には辞書の最初の表記（カタカナ等）を使用
+    brand_ja_table = np.asarray([(brands[k] or [k])[0] for k in brand_keys], dtype=object)
+    brand_ja = brand_ja_table[brand_idx]
+
+    type_idx = rng.integers(0, len(PRODUCT_TYPES), size=rows)
+    type_en = np.asarray([t[0] for t in PRODUCT_TYPES], dtype=object)[type_idx]
+    type_ja = np.asarray([t[1] for t in PRODUCT_TYPES], dtype=object)[type_idx]
+    size = _pick(rng, SIZES, rows)
+
+    clean_title = pd.Series(brand_en) + ' ' + pd.Series(type_en) + ' ' + pd.Series(size)
+    title = pd.Series(_pick(rng, TITLE_PREFIXES, rows)) + clean_title + pd.Series(_pick(rng, TITLE_SUFFIXES, rows))
+    if ng_words:
+        has_ng = rng.random(rows) < NG_WORD_RATE
+        if has_ng.any():
+            title[has_ng] = title[has_ng] + ' ' + pd.Series(_pick(rng, ng_words, int(has_ng.sum())), index=title[has_ng].index)
+
+    seller_type = _pick(rng, SELLER_TYPES, rows, p=SELLER_TYPE_WEIGHTS)
+    is_amazon = seller_type == 'amazon'
+    is_official = seller_type == 'official_manufacturer'
+    is_prime = is_amazon | (rng.random(rows) < np.where(is_official, 0.7, 0.3))
+    is_fba = is_prime & (is_amazon | (rng.random(rows) < 0.5))
+
+    # 発送時間: Amazon本体は速く、サードパーティは遅い（一部は取得失敗でNaN）
+    base_hours = np.where(is_amazon, 12, np.where(is_official, 24, 48))
+    ship_hours = np.round(base_hours * rng.lognormal(0, 0.5, size=rows)).astype(float)
+    ship_hours[rng.random(rows) < SHIP_MISSING_RATE] = np.nan
+    ship_bucket = np.select(
+        [np.isnan(ship_hours), ship_hours <= 24, ship_hours <= 48],
+        ['', '24h以内', '48h以内'],
+        default='48h超'
+    )
+
+    prime_score = np.clip(np.where(is_prime, 70, 35) + rng.normal(0, 12, size=rows), 0, 100).round(1)
+    shopee_score = np.clip(prime_score * 0.6 + rng.normal(30, 10, size=rows), 0, 100).round(1)
+
+    seller_name = np.where(
+        is_amazon, 'Amazon.co.jp',
+        np.where(is_official, pd.Series(brand_ja).astype(str) + '株式会社', 'サードパーティ出品者')
+    )
+
+    return pd.DataFrame({
+        'asin': [f"B{i:09d}" for i in range(rows)],
+        'title': title.values,
+        'clean_title': clean_title.values,
+        'japanese_name': (pd.Series(brand_ja).astype(str) + ' ' + pd.Series(type_ja)).values,
+        'seller_type': seller_type,
+        'seller_name': seller_name,
+        'is_prime': is_prime,
+        'is_fba': is_fba,
+        'ship_hours': ship_hours,
+        'ship_bucket': ship_bucket,
+        'ship_source': pd.Series(seller_type).map(SHIP_SOURCES).values,
+        'ship_confidence': np.where(np.isnan(ship_hours), 0, np.where(is_amazon, 95, np.where(is_official, 80, 60))),
+        'prime_confidence_score': prime_score,
+        'shopee_suitability_score': shopee_score,
+        'relevance_score': np.clip(rng.normal(70, 15, size=rows), 0, 100).round(1),
+        'shopee_group': np.where((shopee_score >= 60) | (prime_score >= 60), 'A', 'B'),
+        'data_source': DATA_SOURCE_LABEL
+    })
+
+if __name__ == "__main__":
+    demo = create_benchmark_data(10)
+    print(f"✅ 合成データ生成: {len(demo)}行 x {len(demo.columns)}カラム")
+    print(demo[['asin', 'title', 'seller_type', 'is_prime', 'ship_hours', 'shopee_group']].to_string())
@@ -0,0 +1,194 @@
+# 自動承認ルールエンジン（宣言的ルール → DataFrameマスク）
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+# 既定の承認基準（旧 suggest_auto_approval_candidates の基準）
+DEFAULT_APPROVAL_CRITERIA = {
+    'min_shopee_score': 75,
+    'min_relevance_score': 60,
+    'max_ship_hours': 24,
+    'seller_type_ok': ['amazon', 'official_manufacturer']
+}
+
+SUPPORTED_OPERATORS = (">=", ">", "<=", "<", "==", "!=", "in", "not_in", "isna", "notna")
+
+def _condition_mask(df, condition):
+    """
+    単一条件をブール配列に変換
+
+    存在しないカラムは全件欠損として扱う（isna以外は不一致）
+    """
+    field = condition.get("field")
+    op = condition.get("op")
+    value = condition.get("value")
+
+    if op not in SUPPORTED_OPERATORS:
+        raise ValueError(f"未対応の演算子: {op}")
+
+    if field in df.columns:
+        series = df[field]
+    else:
+        series = pd.Series(np.nan, index=df.index)
+
+    if op == "isna":
+        return series.isna().values
+    if op == "notna":
+        return series.notna().values
+
+    if op in ("in", "not_in"):
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        if all(isinstance(v, str) for v in values):
+            series = series.astype(str).str.lower()
+            values = [v.lower() for v in values]
+        mask = series.isin(values).values
+        return mask if op == "in" else ~mask
+
+    if op in ("==", "!="):
+        mask = (series == value).fillna(False).values.astype(bool)
+        return mask if op == "==" else ~mask
+
+    numeric = pd.to_numeric(series, errors='coerce')
+    if op == ">=":
+        mask = numeric >= value
+    elif op == ">":
+        mask = numeric > value
+    elif op == "<=":
+        mask = numeric <= value
+    else:
+        mask = numeric < value
+    return mask.fillna(False).values.astype(bool)
+
+def describe_condition(condition):
+    """条件の表示用文字列"""
+    op = condition.get("op")
+    if op in ("isna", "notna"):
+        return f"{condition.get('field')} {op}"
+    return f"{condition.get('field')} {op} {condition.get('value')}"
+
+def compile_rule(rule):
+    """
+    宣言的ルールをマスク関数にコンパイル
+
+    Args:
+        rule: {"name", "conditions": [{"field", "op", "value"}], ...}
+
+    Returns:
+        function: df → np.ndarray(bool)（全条件のAND）
+    """
+    conditions = list(rule.get("conditions", []))
+    for condition in conditions:
+        if condition.get("op") not in SUPPORTED_OPERATORS:
+            raise ValueError(f"ルール {rule.get('name')}: 未対応の演算子 {condition.get('op')}")
+
+    def _mask(df):
+        mask = np.ones(len(df), dtype=bool)
+        for condition in conditions:
+            mask &= _condition_mask(df, condition)
+            if not mask.any():
+                break
+        return mask
+
+    return _mask
+
+def evaluate_auto_approval_rules(df, rules=None):
+    """
+    ルールセットをDataFrame全体に一括適用
+
+    ルールは定義順に評価し、各行には最初に合致したルールを記録する。
+
+    Args:
+        df: 評価対象データフレーム（グループB全体など）
+        rules: ルールのリスト（Noneの場合は既定ルール）
+
+    Returns:
+        pd.Series: 行ごとに合致したルール名（不一致はNone、インデックスはdfと同一）
+    """
+    if rules is None:
+        rules = DEFAULT_AUTO_APPROVAL_RULES
+
+    fired = np.full(len(df), None, dtype=object)
+    unresolved = np.ones(len(df), dtype=bool)
+
+    for rule in rules:
+        if not rule.get("enabled", True):
+            continue
+        if not unresolved.any():
+            break
+        try:
+            mask = compile_rule(rule)(df) & unresolved
+        except Exception as e:
+            print(f"⚠️ 自動承認ルール評価エラー ({rule.get('name')}): {e}")
+            continue
+        fired[mask] = rule.get("name")
+        unresolved &= ~mask
+
+    return pd.Series(fired, index=df.index, name="auto_approval_rule")
+
+def build_auto_approval_audit(fired, rules=None, asins=None):
+    """
+    ルール発火の監査レコードを生成
+
+    Args:
+        fired: evaluate_auto_approval_rules の戻り値
+        rules: 評価に使ったルールのリスト
+        asins: 行ごとのASIN（firedと同じインデックス、任意）
+
+    Returns:
+        pd.DataFrame: index/asin/rule_name/rule_conditions/evaluated_at
+    """
+    if rules is None:
+        rules = DEFAULT_AUTO_APPROVAL_RULES
+
+    hits = fired.dropna()
+    rule_conditions = {
+        rule.get("name"): " AND ".join(describe_condition(c) for c in rule.get("conditions", []))
+        for rule in rules
+    }
+    audit = pd.DataFrame({
+        "index": hits.index,
+        "asin": asins.reindex(hits.index).values if asins is not None else '',
+        "rule_name": hits.values,
+        "rule_conditions": hits.map(rule_conditions).values,
+        "evaluated_at": datetime.now().isoformat()
+    })
+    return audit
+
+def rules_from_criteria(criteria=None):
+    """
+    承認基準（min_shopee_score等、旧形式）をルールセットに変換（省略した基準は既定値）
+
+    Args:
+        criteria: {'min_shopee_score', 'min_relevance_score', 'max_ship_hours', 'seller_type_ok'}
+
+    Returns:
+        list: ルールのリスト
+    """
+    criteria = {**DEFAULT_APPROVAL_CRITERIA, **(criteria or {})}
+    base_conditions = [
+        {"field": "shopee_suitability_score", "op": ">=", "value": criteria['min_shopee_score']},
+        {"field": "relevance_score", "op": ">=", "value": criteria['min_relevance_score']}
+    ]
+    return [
+        {
+            "name": "fast_shipping_high_score",
+            "description": f"高Shopee適性・高一致度・{criteria['max_ship_hours']}時間以内発送",
+            "enabled": True,
+            "conditions": base_conditions + [
+                {"field": "ship_hours", "op": "<=", "value": criteria['max_ship_hours']}
+            ]
+        },
+        {
+            "name": "prime_trusted_seller",
+            "description": "発送時間不明だがPrime・優良出品者（高Shopee適性・高一致度）",
+            "enabled": True,
+            "conditions": base_conditions + [
+                {"field": "ship_hours", "op": "isna"},
+                {"field": "is_prime", "op": "==", "value": True},
+                {"field": "seller_type", "op": "in", "value": list(criteria['seller_type_ok'])}
+            ]
+        }
+    ]
+
+# 閾値設定（thresholds.json の auto_approval_rules）の既定値・設定が無い場合のルール
+DEFAULT_AUTO_APPROVAL_RULES = rules_from_criteria()
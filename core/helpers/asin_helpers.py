@@ -13,6 +13,78 @@ try:
 except ImportError:
     pass
 
+# 承認台帳（ASINキーの永続承認履歴）
+APPROVAL_LEDGER_AVAILABLE = False
+try:
+    from core.managers.approval_ledger import create_approval_ledger_manager
+    APPROVAL_LEDGER_AVAILABLE = True
+except ImportError:
+    pass
+
+# 商品レジストリ（registry.db、承認判断の参照用ミラー）
+REGISTRY_AVAILABLE = False
+try:
+    from core.managers.registry_manager import create_registry_manager
+    REGISTRY_AVAILABLE = True
+except ImportError:
+    pass
+
+try:
+    from core.helpers.run_summary import compute_run_summary
+except ImportError:
+    from run_summary import compute_run_summary
+
+try:
+    from core.helpers.approval_rules import (
+        DEFAULT_AUTO_APPROVAL_RULES, evaluate_auto_approval_rules,
+        build_auto_approval_audit, rules_from_criteria, describe_condition
+    )
+except ImportError:
+    from approval_rules import (
+        DEFAULT_AUTO_APPROVAL_RULES, evaluate_auto_approval_rules,
+        build_auto_approval_audit, rules_from_criteria, describe_condition
+    )
+
+_default_approval_ledger = None
+
+def get_default_approval_ledger():
+    """
+    既定の承認台帳を取得（初回のみ生成）
+
+    Returns:
+        ApprovalLedgerManager または None（台帳モジュールが利用不可の場合）
+    """
+    global _default_approval_ledger
+    if not APPROVAL_LEDGER_AVAILABLE:
+        return None
+    if _default_approval_ledger is None:
+        try:
+            _default_approval_ledger = create_approval_ledger_manager()
+        except Exception as e:
+            print(f"⚠️ 承認台帳初期化エラー: {e}")
+            return None
+    return _default_approval_ledger
+
+_default_registry = None
+
+def get_default_registry():
+    """
+    既定の商品レジストリを取得（初回のみ生成）
+
+    Returns:
+        ProductRegistryManager または None（レジストリモジュールが利用不可の場合）
+    """
+    global _default_registry
+    if not REGISTRY_AVAILABLE:
+        return None
+    if _default_registry is None:
+        try:
+            _default_registry = create_registry_manager()
+        except Exception as e:
+            print(f"⚠️ 商品レジストリ初期化エラー: {e}")
+            return None
+    return _default_registry
+
 def get_asin_column(df):
     """
     DataFrameからASINカラムを特定する関数
@@ -535,14 +607,146 @@ def generate_prime_verification_report(df):
 
     return report
 
-def initialize_approval_system(df):
+# ======================== 個別承認システム（インデックス配列ストア版） ========================
+# 承認状態は「DataFrameインデックス → 配列位置」の対応表と、位置ごとのステータス配列で保持する。
+# 元の行データはコピーせず source_df への参照として保持し、表示用の辞書は必要時のみ生成する。
+
+APPROVAL_STATUS_PENDING = 0
+APPROVAL_STATUS_APPROVED = 1
+APPROVAL_STATUS_REJECTED = 2
+
+APPROVAL_STATUS_LABELS = {
+    APPROVAL_STATUS_PENDING: 'pending',
+    APPROVAL_STATUS_APPROVED: 'approved',
+    APPROVAL_STATUS_REJECTED: 'rejected'
+}
+APPROVAL_STATUS_CODES = {label: code for code, label in APPROVAL_STATUS_LABELS.items()}
+
+def _resolve_approval_columns(df):
+    """
+    承認表示用カラム（ASIN/タイトル/ブランド）を一度だけ解決
+    """
+    title_col_candidates = ['amazon_title', 'clean_title', 'title', '商品名']
+    brand_col_candidates = ['amazon_brand', 'brand', 'ブランド']
+    return {
+        'asin': get_asin_column(df),
+        'title': [c for c in title_col_candidates if c in df.columns],
+        'brand': [c for c in brand_col_candidates if c in df.columns]
+    }
+
+def _first_valid_text(frame, columns):
+    """
+    候補カラムのうち最初の非欠損値を行単位で取得（ベクトル化）
+    """
+    if not columns:
+        return pd.Series('', index=frame.index)
+    return frame[columns].bfill(axis=1).iloc[:, 0].fillna('').astype(str)
+
+def _positions_for_indices(approval_state, item_indices):
+    """
+    DataFrameインデックス群を配列位置へ一括変換（存在しないものは除外）
+    """
+    item_index = approval_state['item_index']
+    positions = item_index.get_indexer(pd.Index(list(item_indices)))
+    return positions[positions >= 0]
+
+def build_approval_item_frame(approval_state, positions=None):
+    """
+    承認アイテムの表示用DataFrameを生成
+
+    Args:
+        approval_state: 承認システム状態
+        positions: 対象の配列位置（Noneで全件）
+
+    Returns:
+        pd.DataFrame: index/asin/title/brand/... を持つ表示用データ
+    """
+    item_index = approval_state['item_index']
+    if positions is None:
+        positions = np.arange(len(item_index))
+    positions = np.asarray(positions, dtype=np.int64)
+
+    source_df = approval_state['source_df']
+    columns = approval_state['columns']
+    rows = source_df.loc[item_index[positions]]
+
+    asin_col = columns.get('asin')
+    asins = rows[asin_col].fillna('').astype(str) if asin_col else pd.Series('', index=rows.index)
+
+    def _column_or_default(col, default):
+        if col in rows.columns:
+            return rows[col].values
+        return np.full(len(rows), default, dtype=object)
+
+    frame = pd.DataFrame({
+        'index': item_index[positions],
+        'asin': asins.values,
+        'title': _first_valid_text(rows, columns.get('title', [])).values,
+        'brand': _first_valid_text(rows, columns.get('brand', [])).values,
+        'shopee_score': _column_or_default('shopee_suitability_score', 0),
+        'relevance_score': _column_or_default('relevance_score', 0),
+        'is_prime': _column_or_default('is_prime', False),
+        'seller_name': _column_or_default('seller_name', ''),
+        'seller_type': _column_or_default('seller_type', ''),
+        'ship_hours': _column_or_default('ship_hours', None),
+        'status': pd.Series(approval_state['status'][positions]).map(APPROVAL_STATUS_LABELS).values,
+        'reason': approval_state['reason'][positions],
+        'approver': approval_state['approver'][positions],
+        'decided_at': pd.Series(approval_state['decided_at'][positions], dtype=object).values
+    })
+    frame['amazon_url'] = np.where(frame['asin'] != '', "https://www.amazon.co.jp/dp/" + frame['asin'], '')
+    return frame
+
+def get_approval_items(approval_state, status='pending'):
+    """
+    指定ステータスのアイテムを辞書リストで取得（UI表示用）
+
+    Args:
+        approval_state: 承認システム状態
+        status: 'pending' / 'approved' / 'rejected'
+
+    Returns:
+        list: アイテム辞書のリスト
+    """
+    if not isinstance(approval_state, dict) or 'status' not in approval_state:
+        return []
+    status_code = APPROVAL_STATUS_CODES.get(status)
+    if status_code is None:
+        return []
+    positions = np.flatnonzero(approval_state['status'] == status_code)
+    if len(positions) == 0:
+        return []
+    return build_approval_item_frame(approval_state, positions).to_dict('records')
+
+def initialize_approval_system(df, ledger=None, registry=None):
     """
     承認システムの初期化（設定ファイル対応版）
+
+    グループBの行インデックスを配列位置に対応付け、ステータス・理由・承認者・日時を配列で保持する。
+    元の行データはコピーせず source_df として参照する。
+    承認台帳に判断済みのASINは、台帳の判断で事前解決される。
+
+    Args:
+        df: 分類済みデータフレーム
+        ledger: 承認台帳（Noneの場合は既定の台帳を使用）
+        registry: 商品レジストリ（Noneの場合は既定のレジストリを使用）
     """
+    if ledger is None:
+        ledger = get_default_approval_ledger()
+    if registry is None:
+        registry = get_default_registry()
+
     approval_state = {
-        'pending_items': [],
-        'approved_items': [],
-        'rejected_items': [],
+        'source_df': df,
+        'ledger': ledger,
+        'registry': registry,
+        'item_index': pd.Index([]),
+        'asins': np.array([], dtype=object),
+        'status': np.array([], dtype=np.int8),
+        'reason': np.array([], dtype=object),
+        'approver': np.array([], dtype=object),
+        'decided_at': np.array([], dtype=object),
+        'columns': {},
         'approval_history': [],
         'last_updated': datetime.now()
     }
@@ -552,7 +756,8 @@ def initialize_approval_system(df):
         print("⚠️ 承認システム初期化: 'shopee_group' カラムが見つかりません。承認待ちアイテムは0件になります。")
         return approval_state
 
-    group_b_items_df = df[df['shopee_group'] == 'B'].copy()
+    if not df.index.is_unique:
+        print("⚠️ 承認システム初期化: インデックスが重複しています。最初の出現のみ承認対象とします。")
 
     # 🆕 設定情報の記録
     if CONFIG_MANAGER_AVAILABLE:
@@ -567,49 +772,102 @@ def initialize_approval_system(df):
             'group_b_threshold': 50
         }
 
-    # 承認待ちアイテムに必要なカラムを事前に取得
-    asin_col_name = get_asin_column(group_b_items_df)
-    title_col_candidates = ['amazon_title', 'clean_title', 'title', '商品名']
-    brand_col_candidates = ['amazon_brand', 'brand', 'ブランド']
-
-    for idx, row in group_b_items_df.iterrows():
-        # ASINの取得
-        current_asin = row.get(asin_col_name, '') if asin_col_name else ''
+    item_index = df.index[(df['shopee_group'] == 'B').values]
+    item_index = item_index[~item_index.duplicated()]
+    n_items = len(item_index)
+
+    approval_state['item_index'] = item_index
+    approval_state['status'] = np.full(n_items, APPROVAL_STATUS_PENDING, dtype=np.int8)
+    approval_state['reason'] = np.full(n_items, '', dtype=object)
+    approval_state['approver'] = np.full(n_items, '', dtype=object)
+    approval_state['decided_at'] = np.full(n_items, None, dtype=object)
+    approval_state['columns'] = _resolve_approval_columns(df)
+
+    asin_col = approval_state['columns'].get('asin')
+    if asin_col:
+        asins = df.loc[item_index, asin_col]
+        asins = asins[~asins.index.duplicated()]
+        approval_state['asins'] = asins.fillna('').astype(str).str.strip().values
+    else:
+        approval_state['asins'] = np.full(n_items, '', dtype=object)
 
-        # タイトルの取得
-        current_title = ''
-        for t_col in title_col_candidates:
-            if t_col in row and pd.notna(row[t_col]):
-                current_title = str(row[t_col])
-                break
-        
-        # ブランドの取得
-        current_brand = ''
-        for b_col in brand_col_candidates:
-            if b_col in row and pd.notna(row[b_col]):
-                current_brand = str(row[b_col])
-                break
-
-        item_data = {
-            'index': idx,
-            'asin': current_asin,
-            'title': current_title,
-            'brand': current_brand,
-            'shopee_score': row.get('shopee_suitability_score', 0),
-            'relevance_score': row.get('relevance_score', 0),
-            'is_prime': row.get('is_prime', False),
-            'seller_name': row.get('seller_name', ''),
-            'seller_type': row.get('seller_type', ''),
-            'ship_hours': row.get('ship_hours'),
-            'status': 'pending',
-            'amazon_url': f"https://www.amazon.co.jp/dp/{current_asin}" if current_asin else '',
-            'original_data': row.to_dict()
-        }
-        approval_state['pending_items'].append(item_data)
+    # 承認台帳による事前解決（ASINで結合）
+    preresolved = 0
+    if ledger is not None and n_items > 0 and asin_col:
+        try:
+            decisions = ledger.join_decisions(pd.Series(approval_state['asins']))
+            status_codes = decisions['ledger_decision'].map(APPROVAL_STATUS_CODES)
+            resolved_mask = status_codes.notna().values
+            if resolved_mask.any():
+                approval_state['status'][resolved_mask] = status_codes[resolved_mask].astype(np.int8).values
+                approval_state['reason'][resolved_mask] = decisions['ledger_reason'].fillna('').values[resolved_mask]
+                approval_state['approver'][resolved_mask] = decisions['ledger_approver'].fillna('').values[resolved_mask]
+                approval_state['decided_at'][resolved_mask] = pd.to_datetime(
+                    decisions['ledger_decided_at'][resolved_mask], errors='coerce'
+                ).dt.to_pydatetime()
+                preresolved = int(resolved_mask.sum())
+        except Exception as e:
+            print(f"⚠️ 承認台帳の事前解決エラー: {e}")
+    approval_state['preresolved_count'] = preresolved
 
-    print(f"📋 承認システム初期化完了: {len(approval_state['pending_items'])}件の承認待ちアイテム")
+    pending_count = int((approval_state['status'] == APPROVAL_STATUS_PENDING).sum())
+    print(f"📋 承認システム初期化完了: {pending_count}件の承認待ちアイテム（台帳で事前解決: {preresolved}件）")
     return approval_state
 
+def _set_approval_status(approval_state, item_indices, status_code, reason, approver):
+    """
+    承認待ちアイテムのステータスを一括更新（内部共通処理）
+
+    Returns:
+        np.ndarray: 実際に更新された配列位置
+    """
+    positions = _positions_for_indices(approval_state, item_indices)
+    if len(positions) == 0:
+        return positions
+    positions = positions[approval_state['status'][positions] == APPROVAL_STATUS_PENDING]
+    if len(positions) == 0:
+        return positions
+
+    now = datetime.now()
+    approval_state['status'][positions] = status_code
+    approval_state['reason'][positions] = reason
+    approval_state['approver'][positions] = approver
+    approval_state['decided_at'][positions] = now
+
+    action = APPROVAL_STATUS_LABELS[status_code]
+    item_index = approval_state['item_index']
+    approval_state['approval_history'].append({
+        'action': action,
+        'item_indices': list(item_index[positions]),
+        'count': int(len(positions)),
+        'reason': reason,
+        'approver': approver,
+        'timestamp': now.isoformat()
+    })
+    approval_state['last_updated'] = now
+
+    # 承認台帳へ書き込み（次回以降のセッションで事前解決に使用）
+    ledger = approval_state.get('ledger')
+    if ledger is not None and len(approval_state.get('asins', [])) > 0:
+        try:
+            ledger.record_decisions(approval_state['asins'][positions], action, reason, approver, now)
+        except Exception as e:
+            print(f"⚠️ 承認台帳書き込みエラー: {e}")
+
+    # 商品レジストリへ反映（ダッシュボード・分析での参照用）
+    registry = approval_state.get('registry')
+    if registry is not None and len(approval_state.get('asins', [])) > 0:
+        try:
+            decided_at = now.isoformat()
+            registry.upsert_approvals({
+                str(asin): {'decision': action, 'reason': reason, 'approver': approver, 'decided_at': decided_at}
+                for asin in approval_state['asins'][positions]
+                if asin and str(asin).upper() != 'N/A'
+            })
+        except Exception as e:
+            print(f"⚠️ レジストリ書き込みエラー: {e}")
+    return positions
+
 def approve_item(approval_state, item_index, reason="", approver="システム"):
     """
     アイテムを承認（グループAに昇格）
@@ -622,45 +880,16 @@ def approve_item(approval_state, item_index, reason="", approver="システム")
         tuple: (更新された承認状態, 成功フラグ)
     """
     try:
-        item_to_approve = None
-        item_position_in_pending = -1
-
-        for i, item in enumerate(approval_state['pending_items']):
-            if item['index'] == item_index: # DataFrameのインデックスで照合
-                item_to_approve = item
-                item_position_in_pending = i
-                break
-
-        if item_to_approve is None:
+        positions = _set_approval_status(approval_state, [item_index], APPROVAL_STATUS_APPROVED, reason, approver)
+        if len(positions) == 0:
             print(f"⚠️ 承認試行: インデックス {item_index} のアイテムは承認待ちリストにありません。")
             return approval_state, False
 
-        item_to_approve['status'] = 'approved'
-        item_to_approve['approval_reason'] = reason
-        item_to_approve['approver'] = approver
-        item_to_approve['approval_date'] = datetime.now()
-
-        approval_state['approved_items'].append(item_to_approve)
-        approval_state['pending_items'].pop(item_position_in_pending) # 正しい位置のアイテムを削除
-
-        history_entry = {
-            'action': 'approved',
-            'item_index': item_index,
-            'asin': item_to_approve.get('asin', 'N/A'),
-            'title': item_to_approve.get('title', 'N/A')[:50] + '...',
-            'reason': reason,
-            'approver': approver,
-            'timestamp': datetime.now().isoformat() # ISO形式で保存
-        }
-        approval_state['approval_history'].append(history_entry)
-        approval_state['last_updated'] = datetime.now()
-
-        print(f"✅ アイテム承認完了: Index={item_index}, ASIN={item_to_approve.get('asin', 'N/A')}")
+        print(f"✅ アイテム承認完了: Index={item_index}")
         return approval_state, True
 
     except Exception as e:
         print(f"❌ 承認エラー (Index: {item_index}): {str(e)}")
-        import traceback
         print(traceback.format_exc())
         return approval_state, False
 
@@ -676,72 +905,53 @@ def reject_item(approval_state, item_index, reason="", approver="システム"):
         tuple: (更新された承認状態, 成功フラグ)
     """
     try:
-        item_to_reject = None
-        item_position_in_pending = -1
-
-        for i, item in enumerate(approval_state['pending_items']):
-            if item['index'] == item_index: # DataFrameのインデックスで照合
-                item_to_reject = item
-                item_position_in_pending = i
-                break
-
-        if item_to_reject is None:
+        positions = _set_approval_status(approval_state, [item_index], APPROVAL_STATUS_REJECTED, reason, approver)
+        if len(positions) == 0:
             print(f"⚠️ 却下試行: インデックス {item_index} のアイテムは承認待ちリストにありません。")
             return approval_state, False
 
-        item_to_reject['status'] = 'rejected'
-        item_to_reject['rejection_reason'] = reason
-        item_to_reject['approver'] = approver
-        item_to_reject['rejection_date'] = datetime.now()
-
-        approval_state['rejected_items'].append(item_to_reject)
-        approval_state['pending_items'].pop(item_position_in_pending) # 正しい位置のアイテムを削除
-
-        history_entry = {
-            'action': 'rejected',
-            'item_index': item_index,
-            'asin': item_to_reject.get('asin', 'N/A'),
-            'title': item_to_reject.get('title', 'N/A')[:50] + '...',
-            'reason': reason,
-            'approver': approver,
-            'timestamp': datetime.now().isoformat() # ISO形式で保存
-        }
-        approval_state['approval_history'].append(history_entry)
-        approval_state['last_updated'] = datetime.now()
-
-        print(f"❌ アイテム却下完了: Index={item_index}, ASIN={item_to_reject.get('asin', 'N/A')}")
+        print(f"❌ アイテム却下完了: Index={item_index}")
         return approval_state, True
 
     except Exception as e:
         print(f"❌ 却下エラー (Index: {item_index}): {str(e)}")
-        import traceback
         print(traceback.format_exc())
         return approval_state, False
 
 def bulk_approve_items(approval_state, item_indices, reason="一括承認", approver="システム"):
     """
-    複数アイテムの一括承認
+    複数アイテムの一括承認（配列一括更新）
     """
-    success_count = 0
-    if not isinstance(item_indices, list): # item_indicesがリストであることを確認
+    if not isinstance(item_indices, (list, tuple, np.ndarray, pd.Index)):
         print("⚠️ 一括承認エラー: item_indicesがリストではありません。")
         return approval_state, 0
 
-    for item_idx in item_indices: # 変数名変更
-        # 各アイテムに対してapprove_itemを呼び出し
-        current_approval_state, success_flag = approve_item(approval_state, item_idx, reason, approver)
-        if success_flag:
-            success_count += 1
-            approval_state = current_approval_state # 状態を更新
-        # else: 失敗しても処理は続行（個別のエラーはapprove_item内で表示）
+    positions = _set_approval_status(approval_state, item_indices, APPROVAL_STATUS_APPROVED, reason, approver)
+    print(f"📦 一括承認処理完了: {len(positions)}/{len(item_indices)}件成功")
+    return approval_state, int(len(positions))
 
-    print(f"📦 一括承認処理完了: {success_count}/{len(item_indices)}件成功")
-    return approval_state, success_count
+def bulk_reject_items(approval_state, item_indices, reason="一括却下", approver="システム"):
+    """
+    複数アイテムの一括却下（配列一括更新）
+    """
+    if not isinstance(item_indices, (list, tuple, np.ndarray, pd.Index)):
+        print("⚠️ 一括却下エラー: item_indicesがリストではありません。")
+        return approval_state, 0
 
+    positions = _set_approval_status(approval_state, item_indices, APPROVAL_STATUS_REJECTED, reason, approver)
+    print(f"📦 一括却下処理完了: {len(positions)}/{len(item_indices)}件成功")
+    return approval_state, int(len(positions))
 
-def apply_approval_to_dataframe(df, approval_state):
+def apply_approval_to_dataframe(df, approval_state=None, ledger=None):
     """
     承認状態をデータフレームに適用
+
+    承認台帳の判断をASIN列で結合して適用し、その上に現在セッションの判断を重ねる。
+
+    Args:
+        df: 分類済みデータフレーム
+        approval_state: 承認システム状態（Noneの場合は台帳のみ適用）
+        ledger: 承認台帳（Noneの場合はapproval_stateの台帳、なければ既定の台帳）
     """
     if df is None or not isinstance(df, pd.DataFrame):
         print("⚠️ 承認状態適用エラー: dfが有効なDataFrameではありません。")
@@ -753,42 +963,63 @@ def apply_approval_to_dataframe(df, approval_state):
     if 'approval_status' not in df_updated.columns:
         df_updated['approval_status'] = 'pending' # デフォルトは承認待ち
 
-    # 承認されたアイテムをグループAに昇格
-    approved_indices = [item['index'] for item in approval_state.get('approved_items', [])]
-    if approved_indices:
-        # df_updated.index が approved_indices の要素を含むか確認
-        valid_approved_indices = df_updated.index.intersection(approved_indices)
-        df_updated.loc[valid_approved_indices, 'shopee_group'] = 'A'
-        df_updated.loc[valid_approved_indices, 'approval_status'] = 'approved'
-        df_updated.loc[valid_approved_indices, 'classification_reason'] = df_updated.loc[valid_approved_indices, 'classification_reason'].astype(str) + " (承認済)"
+    has_state = isinstance(approval_state, dict) and 'status' in approval_state
+    if ledger is None:
+        ledger = approval_state.get('ledger') if has_state else get_default_approval_ledger()
+
+    decisions = pd.Series(None, index=df_updated.index, dtype=object)
 
+    # 承認台帳の判断を結合（グループBのみ対象）
+    asin_col = get_asin_column(df_updated)
+    if ledger is not None and asin_col and 'shopee_group' in df_updated.columns:
+        try:
+            joined = ledger.join_decisions(df_updated[asin_col].fillna(''))
+            group_b_mask = (df_updated['shopee_group'] == 'B').values
+            decisions = decisions.mask(group_b_mask, joined['ledger_decision'])
+        except Exception as e:
+            print(f"⚠️ 承認台帳の適用エラー: {e}")
+
+    # 現在セッションの判断で上書き
+    if has_state and len(approval_state['item_index']) > 0:
+        decided = approval_state['status'] != APPROVAL_STATUS_PENDING
+        session_decisions = pd.Series(
+            pd.Series(approval_state['status'][decided]).map(APPROVAL_STATUS_LABELS).values,
+            index=approval_state['item_index'][decided]
+        )
+        in_session = df_updated.index.isin(session_decisions.index)
+        if in_session.any():
+            decisions[in_session] = session_decisions.reindex(df_updated.index[in_session]).values
+
+    # 承認されたアイテムをグループAに昇格
+    approved_mask = (decisions == 'approved').values
+    if approved_mask.any():
+        df_updated.loc[approved_mask, 'shopee_group'] = 'A'
+        df_updated.loc[approved_mask, 'approval_status'] = 'approved'
+        if 'classification_reason' in df_updated.columns:
+            df_updated.loc[approved_mask, 'classification_reason'] = df_updated.loc[approved_mask, 'classification_reason'].astype(str) + " (承認済)"
 
     # 却下されたアイテムのステータスを更新 (除外はしない)
-    rejected_indices = [item['index'] for item in approval_state.get('rejected_items', [])]
-    if rejected_indices:
-        valid_rejected_indices = df_updated.index.intersection(rejected_indices)
-        df_updated.loc[valid_rejected_indices, 'approval_status'] = 'rejected'
-        # 却下されたアイテムをグループCにするか、shopee_groupはそのままにするかは要件次第
-        # ここでは approval_status のみ更新
-
-    print(f"📊 承認状態適用完了: {len(approval_state.get('approved_items', []))}件承認、{len(approval_state.get('rejected_items', []))}件却下")
-    return df_updated
+    rejected_mask = (decisions == 'rejected').values
+    if rejected_mask.any():
+        df_updated.loc[rejected_mask, 'approval_status'] = 'rejected'
 
+    print(f"📊 承認状態適用完了: {int(approved_mask.sum())}件承認、{int(rejected_mask.sum())}件却下")
+    return df_updated
 
 def get_approval_statistics(approval_state):
     """
     承認システムの統計情報取得
     """
-    # approval_stateがNoneまたは期待するキーを持たない場合のフォールバック
-    pending_items_list = approval_state.get('pending_items', []) if isinstance(approval_state, dict) else []
-    approved_items_list = approval_state.get('approved_items', []) if isinstance(approval_state, dict) else []
-    rejected_items_list = approval_state.get('rejected_items', []) if isinstance(approval_state, dict) else []
-    last_updated_time = approval_state.get('last_updated', datetime.now()) if isinstance(approval_state, dict) else datetime.now()
-
+    if isinstance(approval_state, dict) and 'status' in approval_state:
+        counts = np.bincount(approval_state['status'], minlength=3)
+        last_updated_time = approval_state.get('last_updated', datetime.now())
+    else:
+        counts = np.zeros(3, dtype=np.int64)
+        last_updated_time = datetime.now()
 
-    num_pending = len(pending_items_list)
-    num_approved = len(approved_items_list)
-    num_rejected = len(rejected_items_list)
+    num_pending = int(counts[APPROVAL_STATUS_PENDING])
+    num_approved = int(counts[APPROVAL_STATUS_APPROVED])
+    num_rejected = int(counts[APPROVAL_STATUS_REJECTED])
     total_initial_pending = num_pending + num_approved + num_rejected # 元々承認待ちだった総数
 
     if total_initial_pending == 0:
@@ -796,8 +1027,7 @@ def get_approval_statistics(approval_state):
         approval_rate_val = 0
     else:
         progress_val = ((num_approved + num_rejected) / total_initial_pending * 100)
-        approval_rate_val = (num_approved / total_initial_pending * 100) if total_initial_pending > 0 else 0
-
+        approval_rate_val = (num_approved / total_initial_pending * 100)
 
     stats = {
         'total_initial_pending_items': total_initial_pending, # 元の承認待ち総数
@@ -810,191 +1040,249 @@ def get_approval_statistics(approval_state):
     }
     return stats
 
-def filter_pending_items(approval_state, filters=None):
+def _pending_rows(approval_state):
     """
-    承認待ちアイテムのフィルタリング
+    承認待ちアイテムの配列位置と元データ行（参照元DataFrameから一括取得）
     """
-    if not isinstance(approval_state, dict) or 'pending_items' not in approval_state:
-        return [] # approval_state が不正な場合は空リストを返す
-
-    pending_items_list = approval_state['pending_items']
+    positions = np.flatnonzero(approval_state['status'] == APPROVAL_STATUS_PENDING)
+    rows = approval_state['source_df'].loc[approval_state['item_index'][positions]]
+    rows = rows[~rows.index.duplicated()]
+    return positions, rows
 
-    if filters is None or not isinstance(filters, dict): # filtersがNoneまたは辞書でない場合は全件返す
-        return pending_items_list
-
-    filtered_items = []
-    for item in pending_items_list:
-        # 各フィルタ条件をチェック
-        passes_all_filters = True
-
-        # Shopee適性スコアフィルタ
-        min_shopee_score = filters.get('min_shopee_score')
-        if min_shopee_score is not None:
-            if item.get('shopee_score', 0) < min_shopee_score:
-                passes_all_filters = False
-
-        # 一致度フィルタ
-        min_relevance_score = filters.get('min_relevance_score')
-        if passes_all_filters and min_relevance_score is not None: # 前のフィルタをパスした場合のみ評価
-            if item.get('relevance_score', 0) < min_relevance_score:
-                passes_all_filters = False
-        
-        # 他のフィルタ条件もここに追加可能 (例: ブランド名、出品者タイプなど)
-        # title_keyword_filter = filters.get('title_keyword')
-        # if passes_all_filters and title_keyword_filter:
-        #     if title_keyword_filter.lower() not in item.get('title', '').lower():
-        #         passes_all_filters = False
+def filter_pending_items(approval_state, filters=None):
+    """
+    承認待ちアイテムのフィルタリング（ベクトル化マスク）
 
-        if passes_all_filters:
-            filtered_items.append(item)
+    Args:
+        approval_state: 承認システム状態
+        filters: {'min_shopee_score', 'min_relevance_score', 'max_ship_hours', 'seller_types'}
 
-    return filtered_items
+    Returns:
+        list: 条件を満たすアイテム辞書のリスト
+    """
+    if not isinstance(approval_state, dict) or 'status' not in approval_state:
+        return [] # approval_state が不正な場合は空リストを返す
 
+    if filters is None or not isinstance(filters, dict): # filtersがNoneまたは辞書でない場合は全件返す
+        return get_approval_items(approval_state, 'pending')
+
+    conditions = []
+    if filters.get('min_shopee_score') is not None:
+        conditions.append({"field": "shopee_suitability_score", "op": ">=", "value": filters['min_shopee_score']})
+    if filters.get('min_relevance_score') is not None:
+        conditions.append({"field": "relevance_score", "op": ">=", "value": filters['min_relevance_score']})
+    if filters.get('max_ship_hours') is not None:
+        conditions.append({"field": "ship_hours", "op": "<=", "value": filters['max_ship_hours']})
+    if filters.get('seller_types'):
+        conditions.append({"field": "seller_type", "op": "in", "value": list(filters['seller_types'])})
+
+    positions, rows = _pending_rows(approval_state)
+    if len(positions) == 0:
+        return []
+
+    matched = evaluate_auto_approval_rules(rows, [{"name": "filter", "conditions": conditions}]).notna().values
+    if not matched.any():
+        return []
+    return build_approval_item_frame(approval_state, positions[matched]).to_dict('records')
 
 def export_approval_report(approval_state):
     """
     承認レポートのエクスポート
     """
-    if not isinstance(approval_state, dict): # approval_stateが辞書型か確認
-        print("⚠️ 承認レポート生成エラー: approval_stateが不正です。")
-        return pd.DataFrame() # 空のDataFrameを返す
-
-    report_data = []
     report_columns = [ # レポートのカラムを定義
         'ステータス', 'ASIN', '商品名', 'ブランド',
         'Shopee適性スコア', '一致度スコア', '発送時間(h)',
         '承認/却下理由', '承認/却下日時', '元のshopee_group'
     ]
 
-    # 承認済みアイテム
-    for item in approval_state.get('approved_items', []):
-        report_data.append({
-            'ステータス': '承認済み',
-            'ASIN': item.get('asin', 'N/A'),
-            '商品名': item.get('title', 'N/A'),
-            'ブランド': item.get('brand', 'N/A'),
-            'Shopee適性スコア': item.get('shopee_score', 0),
-            '一致度スコア': item.get('relevance_score', 0),
-            '発送時間(h)': item.get('ship_hours', 'N/A'),
-            '承認/却下理由': item.get('approval_reason', ''),
-            '承認/却下日時': item.get('approval_date', ''),
-            '元のshopee_group': item.get('original_data', {}).get('shopee_group', 'B') # 元はBのはず
-        })
-
-    # 却下アイテム
-    for item in approval_state.get('rejected_items', []):
-        report_data.append({
-            'ステータス': '却下',
-            'ASIN': item.get('asin', 'N/A'),
-            '商品名': item.get('title', 'N/A'),
-            'ブランド': item.get('brand', 'N/A'),
-            'Shopee適性スコア': item.get('shopee_score', 0),
-            '一致度スコア': item.get('relevance_score', 0),
-            '発送時間(h)': item.get('ship_hours', 'N/A'),
-            '承認/却下理由': item.get('rejection_reason', ''),
-            '承認/却下日時': item.get('rejection_date', ''),
-            '元のshopee_group': item.get('original_data', {}).get('shopee_group', 'B')
-        })
-
-    # 承認待ちアイテム
-    for item in approval_state.get('pending_items', []):
-        report_data.append({
-            'ステータス': '承認待ち',
-            'ASIN': item.get('asin', 'N/A'),
-            '商品名': item.get('title', 'N/A'),
-            'ブランド': item.get('brand', 'N/A'),
-            'Shopee適性スコア': item.get('shopee_score', 0),
-            '一致度スコア': item.get('relevance_score', 0),
-            '発送時間(h)': item.get('ship_hours', 'N/A'),
-            '承認/却下理由': '',
-            '承認/却下日時': '',
-            '元のshopee_group': item.get('original_data', {}).get('shopee_group', 'B')
-        })
+    if not isinstance(approval_state, dict) or 'status' not in approval_state: # approval_stateが辞書型か確認
+        print("⚠️ 承認レポート生成エラー: approval_stateが不正です。")
+        return pd.DataFrame(columns=report_columns)
 
-    if not report_data: # もしデータがなければ空のDataFrameをカラム定義付きで返す
+    if len(approval_state['item_index']) == 0: # もしデータがなければ空のDataFrameをカラム定義付きで返す
         return pd.DataFrame(columns=report_columns)
 
-    report_df = pd.DataFrame(report_data, columns=report_columns) # カラム順を指定
+    # 承認済み → 却下 → 承認待ち の順で出力
+    order = np.argsort(
+        np.select(
+            [approval_state['status'] == APPROVAL_STATUS_APPROVED, approval_state['status'] == APPROVAL_STATUS_REJECTED],
+            [0, 1],
+            default=2
+        ),
+        kind='stable'
+    )
+    items = build_approval_item_frame(approval_state, order)
+    status_labels = {'approved': '承認済み', 'rejected': '却下', 'pending': '承認待ち'}
+
+    report_df = pd.DataFrame({
+        'ステータス': items['status'].map(status_labels),
+        'ASIN': items['asin'].replace('', 'N/A'),
+        '商品名': items['title'].replace('', 'N/A'),
+        'ブランド': items['brand'].replace('', 'N/A'),
+        'Shopee適性スコア': items['shopee_score'],
+        '一致度スコア': items['relevance_score'],
+        '発送時間(h)': items['ship_hours'].where(items['ship_hours'].notna(), 'N/A'),
+        '承認/却下理由': items['reason'],
+        '承認/却下日時': items['decided_at'].astype(object).where(items['decided_at'].notna(), ''),
+        '元のshopee_group': 'B'
+    }, columns=report_columns)
     return report_df
 
-def suggest_auto_approval_candidates(approval_state, criteria=None):
+def _create_rule_config_manager():
+    """閾値設定（core.managers.config_manager、呼び出しごとに設定ファイルを読み直す）。利用不可の場合はNone"""
+    try:
+        from core.managers.config_manager import create_threshold_config_manager
+    except ImportError:
+        try:
+            from config_manager import create_threshold_config_manager
+        except ImportError:
+            return None
+    try:
+        return create_threshold_config_manager()
+    except Exception as e:
+        print(f"⚠️ 閾値設定の読み込みエラー: {e}")
+        return None
+
+def load_auto_approval_rules(rule_config_manager=None):
+    """
+    自動承認ルールの取得（閾値設定と同じ設定ファイルから、無ければ既定ルール）
+
+    Args:
+        rule_config_manager: ThresholdConfigManager（Noneの場合は設定ファイルから作成）
+
+    Returns:
+        list: 有効なルールのリスト
+    """
+    rule_config_manager = rule_config_manager or _create_rule_config_manager()
+    if rule_config_manager is not None:
+        try:
+            return rule_config_manager.get_auto_approval_rules()
+        except Exception as e:
+            print(f"⚠️ 自動承認ルール取得エラー: {e}")
+    return [rule for rule in DEFAULT_AUTO_APPROVAL_RULES if rule.get("enabled", True)]
+
+def suggest_auto_approval_candidates(approval_state, criteria=None, rules=None):
     """
-    自動承認候補の提案
+    自動承認候補の提案（ルールセットを承認待ち全体へ一括評価）
+
+    Args:
+        approval_state: 承認システム状態
+        criteria: 旧形式の基準辞書（指定時はルールセットに変換して使用）
+        rules: ルールのリスト（Noneの場合は設定ファイルのルール）
+
+    Returns:
+        list: 候補アイテム辞書（auto_approval_rule / auto_approval_reasons 付き）
     """
-    if not isinstance(approval_state, dict) or 'pending_items' not in approval_state:
+    if not isinstance(approval_state, dict) or 'status' not in approval_state:
         print("⚠️ 自動承認候補の提案エラー: approval_stateが不正です。")
         return [] # 空リストを返す
 
-    # デフォルト基準
-    default_criteria = {
-        'min_shopee_score': 75,
-        'min_relevance_score': 60,
-        'max_ship_hours': 24,  # ShippingTime基準追加
-        'seller_type_ok': ['amazon', 'official_manufacturer'] # 信頼できる出品者タイプ
+    if rules is None:
+        rules = rules_from_criteria(criteria) if isinstance(criteria, dict) else load_auto_approval_rules()
+
+    positions, rows = _pending_rows(approval_state)
+    if len(positions) == 0:
+        print("🤖 自動承認候補: 0件")
+        return []
+
+    fired = evaluate_auto_approval_rules(rows, rules)
+    matched = fired.notna().values
+    if not matched.any():
+        print(f"🤖 自動承認候補: 0件 (ルール数: {len(rules)})")
+        return []
+
+    reasons_by_rule = {
+        rule.get("name"): [describe_condition(c) for c in rule.get("conditions", [])]
+        for rule in rules
     }
-    # ユーザー指定基準があればデフォルトを上書き
-    current_criteria = default_criteria.copy()
-    if isinstance(criteria, dict):
-        current_criteria.update(criteria)
-
-
-    candidates = []
-    for item in approval_state['pending_items']:
-        meets_criteria_flags = [] # 各基準の達成状況を格納
-        reasons_for_suggestion = [] # 提案理由
-
-        # Shopee適性スコア
-        shopee_score = item.get('shopee_score', 0)
-        if shopee_score >= current_criteria['min_shopee_score']:
-            meets_criteria_flags.append(True)
-            reasons_for_suggestion.append(f"高Shopee適性({shopee_score}点)")
-        else:
-            meets_criteria_flags.append(False)
+    candidates = build_approval_item_frame(approval_state, positions[matched])
+    candidates['auto_approval_rule'] = fired.values[matched]
+    candidates['auto_approval_reasons'] = candidates['auto_approval_rule'].map(reasons_by_rule)
 
-        # 一致度
-        relevance_score = item.get('relevance_score', 0)
-        if relevance_score >= current_criteria['min_relevance_score']:
-            meets_criteria_flags.append(True)
-            reasons_for_suggestion.append(f"高一致度({relevance_score}%)")
-        else:
-            meets_criteria_flags.append(False)
-
-        # ShippingTime基準
-        ship_hours = item.get('ship_hours')
-        if ship_hours is not None and ship_hours <= current_criteria['max_ship_hours']:
-            meets_criteria_flags.append(True)
-            reasons_for_suggestion.append(f"高速発送({ship_hours}時間)")
-        elif ship_hours is None and item.get('is_prime', False) and item.get('seller_type') in current_criteria['seller_type_ok']:
-            # 発送時間不明でもPrimeかつ信頼できる出品者ならOKとするか検討
-            meets_criteria_flags.append(True) # 例としてOKにする
-            reasons_for_suggestion.append("Prime商品(発送時間不明だが優良出品者の可能性)")
-        elif ship_hours is None: # Primeでもない、または出品者タイプがOKでない場合
-             meets_criteria_flags.append(False) # 発送時間不明はNG
-        else: # ship_hours が基準値より大きい
-             meets_criteria_flags.append(False)
-
-
-        # 出品者タイプ基準 (追加)
-        seller_type = item.get('seller_type', 'unknown').lower()
-        if seller_type in current_criteria['seller_type_ok']:
-            meets_criteria_flags.append(True)
-            reasons_for_suggestion.append(f"優良出品者タイプ({seller_type})")
-        # else: # seller_typeがOKリストにない場合は、Falseにするか、この基準を必須としないか選択
-            # ここでは、他の基準が良ければseller_typeは必須としない方針も考えられる
-
-        # 全ての基準（meets_criteria_flagsにFalseがない）を満たした場合に候補とする
-        if all(meets_criteria_flags):
-            candidate_item = item.copy() # 元のitemを変更しないようにコピー
-            candidate_item['auto_approval_reasons'] = reasons_for_suggestion
-            candidates.append(candidate_item)
-
-    print(f"🤖 自動承認候補: {len(candidates)}件 (基準: {current_criteria})")
-    return candidates
+    print(f"🤖 自動承認候補: {len(candidates)}件 (ルール数: {len(rules)})")
+    return candidates.to_dict('records')
+
+def apply_auto_approval_rules(approval_state, rules=None, approver=None):
+    """
+    自動承認ルールを承認待ち全体に適用して一括承認
+
+    ルールごとに一括承認し、どのルールが発火したかを監査記録として残す。
+
+    Args:
+        approval_state: 承認システム状態
+        rules: ルールのリスト（Noneの場合は設定ファイルのルール）
+        approver: 承認者名（Noneの場合は設定値）
+
+    Returns:
+        tuple: (更新された承認状態, 監査DataFrame)
+    """
+    audit_columns = ['index', 'asin', 'rule_name', 'rule_conditions', 'evaluated_at']
+    if not isinstance(approval_state, dict) or 'status' not in approval_state:
+        print("⚠️ 自動承認エラー: approval_stateが不正です。")
+        return approval_state, pd.DataFrame(columns=audit_columns)
+
+    if rules is None or approver is None:
+        rule_config_manager = _create_rule_config_manager()
+        if rules is None:
+            rules = load_auto_approval_rules(rule_config_manager)
+        if approver is None:
+            approver = (rule_config_manager.get_threshold("auto_approval_rules", "approver_name", "自動承認ルール")
+                        if rule_config_manager is not None else "自動承認ルール")
+
+    positions, rows = _pending_rows(approval_state)
+    if len(positions) == 0 or not rules:
+        return approval_state, pd.DataFrame(columns=audit_columns)
+
+    fired = evaluate_auto_approval_rules(rows, rules)
+    asins = pd.Series(approval_state['asins'][positions], index=rows.index) if len(approval_state.get('asins', [])) else None
+    audit = build_auto_approval_audit(fired, rules, asins)
+
+    for rule_name, hit_indices in fired.dropna().groupby(fired.dropna()).groups.items():
+        bulk_approve_items(approval_state, list(hit_indices), reason=f"自動承認ルール: {rule_name}", approver=approver)
+
+    approval_state.setdefault('auto_approval_audit', []).extend(audit.to_dict('records'))
+    print(f"🤖 自動承認完了: {len(audit)}件 (ルール別: {audit['rule_name'].value_counts().to_dict() if len(audit) else {}})")
+    return approval_state, audit
 
 # ==========================================
 # 不足関数追加パッチ
 # ==========================================
 
+# API遮断中で未取得の保留行（search_status='deferred'）の分類グループ（出品対象外）
+DEFERRED_GROUP = 'deferred'
+# 出品対象から外す処理状況（オファー情報を取得できていない行）
+NON_LISTABLE_STATUSES = ('deferred', 'error')
+
+def mark_deferred_group(df):
+    """保留行を分類せずに DEFERRED_GROUP にする（Prime・出品者情報が無いまま A/B に入れない）"""
+    if 'search_status' not in df.columns:
+        return df
+    deferred = df['search_status'].eq('deferred')
+    if deferred.any():
+        df.loc[deferred, 'shopee_group'] = DEFERRED_GROUP
+        df.loc[deferred, 'classification_reason'] = '保留（API遮断中、未取得）'
+        df.loc[deferred, 'classification_confidence'] = 'none'
+        df.loc[deferred, 'priority'] = 100
+    return df
+
+def listable_mask(df, group='A'):
+    """
+    出品対象の行（指定グループかつ処理に成功した行）
+
+    Args:
+        df: 分類済みデータフレーム
+        group: 'A' / 'B'
+
+    Returns:
+        pd.Series: bool（df と同じインデックス）
+    """
+    if 'shopee_group' not in df.columns:
+        return pd.Series(False, index=df.index)
+    mask = df['shopee_group'].eq(group)
+    if 'search_status' in df.columns:
+        mask &= ~df['search_status'].isin(NON_LISTABLE_STATUSES)
+    return mask
+
 def classify_for_shopee_listing(df):
     """
     Shopee出品用分類システム v2統合版
@@ -1145,32 +1433,32 @@ def classify_for_shopee_listing(df):
         result_df['priority'] = 50
         return result_df
 
-def calculate_batch_status_shopee(df):
+def calculate_batch_status_shopee(df, summary=None):
     """
     バッチ処理状況の計算
     
     Args:
         df: 分類済みデータフレーム
+        summary: 集計済みの run_summary（Noneの場合はここで集計）
         
     Returns:
         バッチ状況辞書
     """
     try:
-        total = len(df)
-        group_a = len(df[df.get('shopee_group') == 'A'])
-        group_b = len(df[df.get('shopee_group') == 'B'])
-        group_c = len(df[df.get('shopee_group') == 'C'])
+        if summary is None:
+            summary = compute_run_summary(df)
+        total = summary['total']
+        group_a = summary['group_a']
+        group_b = summary['group_b']
+        group_c = summary['group_c']
         
         # プレミアム品質の計算
-        premium_count = len(df[df.get('classification_confidence') == 'premium'])
-        high_confidence_count = len(df[df.get('classification_confidence') == 'high'])
+        premium_count = summary['premium_count']
+        high_confidence_count = summary['high_confidence_count']
         
         # 発送時間統計
-        ship_v8_success = len(df[df.get('ship_hours').notna()]) if 'ship_hours' in df.columns else 0
-        fast_shipping = 0
-        if 'ship_hours' in df.columns:
-            numeric_hours = pd.to_numeric(df['ship_hours'], errors='coerce')
-            fast_shipping = len(numeric_hours[numeric_hours <= 24])
+        ship_v8_success = summary['with_shipping']
+        fast_shipping = summary['fast_24h']
         
         # 予測成功率の計算
         if total > 0:
@@ -1430,7 +1718,7 @@ def calculate_prime_confidence_score(row):
 
 def classify_for_shopee_listing(df):
     """
-    Shopee出品用分類システム v2統合版（強化版）
+    Shopee出品用分類システム v2統合版（強化版、保留行は分類せず DEFERRED_GROUP）
     """
     try:
         # config_manager統合
@@ -1566,6 +1854,7 @@ def classify_for_shopee_listing(df):
         for idx, classification in classification_results.items():
             for key, value in classification.items():
                 result_df.loc[idx, key] = value
+        mark_deferred_group(result_df)
         
         # 統計情報の計算
         total_items = len(result_df)
@@ -1585,55 +1874,10 @@ def classify_for_shopee_listing(df):
         result_df['classification_reason'] = 'フォールバック分類'
         result_df['classification_confidence'] = 'medium'
         result_df['priority'] = 50
-        return result_df
+        return mark_deferred_group(result_df)
 
 # その他のプレースホルダー関数
 def generate_prime_verification_report(df):
     """Prime検証レポート生成（プレースホルダー）"""
     print("[INFO] generate_prime_verification_report: 簡易版実行")
     return {"total_items": len(df), "prime_items": len(df[df.get('is_prime', False) == True])}
-
-def initialize_approval_system():
-    """承認システム初期化（プレースホルダー）"""
-    print("[INFO] initialize_approval_system: 簡易版実行")
-    return {"status": "initialized"}
-
-def approve_item(item_id):
-    """アイテム承認（プレースホルダー）"""
-    print(f"[INFO] approve_item: {item_id} 承認")
-    return True
-
-def reject_item(item_id):
-    """アイテム拒否（プレースホルダー）"""
-    print(f"[INFO] reject_item: {item_id} 拒否")
-    return True
-
-def bulk_approve_items(item_ids):
-    """一括承認（プレースホルダー）"""
-    print(f"[INFO] bulk_approve_items: {len(item_ids)}件一括承認")
-    return {"approved": len(item_ids)}
-
-def apply_approval_to_dataframe(df, approvals):
-    """データフレームに承認状況適用（プレースホルダー）"""
-    print("[INFO] apply_approval_to_dataframe: 簡易版実行")
-    return df
-
-def get_approval_statistics(df):
-    """承認統計取得（プレースホルダー）"""
-    print("[INFO] get_approval_statistics: 簡易版実行")
-    return {"total": len(df), "approved": 0, "rejected": 0}
-
-def filter_pending_items(df):
-    """保留アイテムフィルター（プレースホルダー）"""
-    print("[INFO] filter_pending_items: 簡易版実行")
-    return df
-
-def export_approval_report(df):
-    """承認レポート出力（プレースホルダー）"""
-    print("[INFO] export_approval_report: 簡易版実行")
-    return "approval_report.xlsx"
-
-def suggest_auto_approval_candidates(df):
-    """自動承認候補提案（プレースホルダー）"""
-    print("[INFO] suggest_auto_approval_candidates: 簡易版実行")
-    return df.head(0)  # 空のデータフレームを返す
\ No newline at end of file
@@ -0,0 +1,229 @@
+# カタログ検索候補の再ランキング（ブランド・数量・美容用語・文字列類似度）
+import re
+import unicodedata
+
+try:
+    from core.helpers.quantity_helpers import parse_quantity
+except ImportError:
+    from quantity_helpers import parse_quantity
+
+# 各特徴量の重み（合計1.0）
+CANDIDATE_SCORE_WEIGHTS = {
+    'text': 0.35,
+    'brand': 0.25,
+    'quantity': 0.25,
+    'beauty_terms': 0.15
+}
+
+# 情報が無く判定できない特徴量のスコア
+NEUTRAL_FEATURE_SCORE = 0.5
+# 検索順位による微小な補正（同点時は上位を優先）
+RANK_PENALTY = 0.01
+# 単位あたり容量は同じで入数のみ異なる場合のスコア（単品とセット品の取り違え）
+PACK_MISMATCH_SCORE = 0.3
+QUANTITY_TOLERANCE = 0.03
+
+# 高確信と判定する基準（これを下回る場合は再検索の対象）
+DEFAULT_MIN_CONFIDENCE = 0.55
+DEFAULT_MIN_MARGIN = 0.08
+
+_SEPARATOR_PATTERN = re.compile(r"[\s　・/|,.:;!?！？、。「」『』【】\[\]()（）\-_~〜]+")
+_brand_pattern_cache = {}
+
+def _normalize(text):
+    """比較用の正規化（NFKC・小文字化・区切り記号の除去）"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    return _SEPARATOR_PATTERN.sub(' ', text).strip()
+
+def _bigrams(text):
+    compact = text.replace(' ', '')
+    if len(compact) < 2:
+        return {compact} if compact else set()
+    return {compact[i:i + 2] for i in range(len(compact) - 1)}
+
+def text_similarity(source_norm, candidate_norm):
+    """文字バイグラムのDice係数（分かち書きの無い日本語向け）"""
+    source_grams = _bigrams(source_norm)
+    candidate_grams = _bigrams(candidate_norm)
+    if not source_grams or not candidate_grams:
+        return 0.0
+    return 2 * len(source_grams & candidate_grams) / (len(source_grams) + len(candidate_grams))
+
+def _brand_pattern(brand_dict):
+    """ブランド辞書から表記ゆれ → ブランドの検出用正規表現を生成（辞書ごとにキャッシュ）"""
+    cache_key = id(brand_dict)
+    cached = _brand_pattern_cache.get(cache_key)
+    if cached is not None and cached[0] is brand_dict:
+        return cached[1], cached[2]
+
+    variation_to_brand = {}
+    for brand, variations in brand_dict.items():
+        if isinstance(variations, str):
+            if brand.startswith('_'):
+                continue
+            variations = [variations]
+        elif not isinstance(variations, list):
+            continue
+        for variation in list(variations) + [brand]:
+            key = _normalize(variation)
+            if len(key) >= 2:
+                variation_to_brand.setdefault(key, brand)
+
+    if not variation_to_brand:
+        pattern = None
+    else:
+        alternation = '|'.join(re.escape(v) for v in sorted(variation_to_brand, key=len, reverse=True))
+        pattern = re.compile(alternation)
+    _brand_pattern_cache[cache_key] = (brand_dict, pattern, variation_to_brand)
+    return pattern, variation_to_brand
+
+def detect_brands(text_norm, brand_dict):
+    """正規化済みテキストに含まれるブランドの集合"""
+    if not brand_dict or not text_norm:
+        return set()
+    pattern, variation_to_brand = _brand_pattern(brand_dict)
+    if pattern is None:
+        return set()
+    return {variation_to_brand[m.group(0)] for m in pattern.finditer(text_norm)}
+
+def detect_beauty_terms(text_norm, beauty_terms):
+    """正規化済みテキストに含まれる美容用語（英語キー）の集合"""
+    if not beauty_terms or not text_norm:
+        return set()
+    words = set(text_norm.split())
+    found = set()
+    for eng_word, jp_variations in beauty_terms.items():
+        if eng_word in words or any(jp in text_norm for jp in jp_variations):
+            found.add(eng_word)
+    return found
+
+def _brand_score(source_brands, candidate_brands):
+    if not source_brands:
+        return NEUTRAL_FEATURE_SCORE
+    if source_brands & candidate_brands:
+        return 1.0
+    # 別ブランドが明示されている候補は強く減点
+    return 0.0 if candidate_brands else 0.3
+
+def _quantity_score(source_quantity, candidate_quantity):
+    if not source_quantity or not candidate_quantity:
+        return NEUTRAL_FEATURE_SCORE
+    if source_quantity['quantity_base_unit'] != candidate_quantity['quantity_base_unit']:
+        return 0.0
+
+    def _close(a, b):
+        return abs(a - b) <= QUANTITY_TOLERANCE * max(a, b, 1e-9)
+
+    if _close(source_quantity['quantity_base_value'], candidate_quantity['quantity_base_value']):
+        return 1.0
+    source_unit_value = source_quantity['quantity_base_value'] / source_quantity['quantity_pack']
+    candidate_unit_value = candidate_quantity['quantity_base_value'] / candidate_quantity['quantity_pack']
+    if _close(source_unit_value, candidate_unit_value):
+        return PACK_MISMATCH_SCORE
+    return 0.0
+
+def _beauty_score(source_terms, candidate_terms):
+    if not source_terms and not candidate_terms:
+        return NEUTRAL_FEATURE_SCORE
+    return len(source_terms & candidate_terms) / len(source_terms | candidate_terms)
+
+def score_candidate(source_features, candidate_name, brand_dict=None, beauty_terms=None):
+    """
+    単一候補のスコア計算
+
+    Args:
+        source_features: build_source_features の戻り値
+        candidate_name: 候補の商品名
+        brand_dict: ブランド辞書
+        beauty_terms: 美容用語辞書（英語 → 日本語表記のリスト）
+
+    Returns:
+        dict: 特徴量ごとのスコアと総合スコア
+    """
+    candidate_norm = _normalize(candidate_name)
+    features = {
+        'text': text_similarity(source_features['norm'], candidate_norm),
+        'brand': _brand_score(source_features['brands'], detect_brands(candidate_norm, brand_dict)),
+        'quantity': _quantity_score(source_features['quantity'], parse_quantity(candidate_norm)),
+        'beauty_terms': _beauty_score(source_features['beauty_terms'], detect_beauty_terms(candidate_norm, beauty_terms))
+    }
+    features['total'] = sum(CANDIDATE_SCORE_WEIGHTS[key] * features[key] for key in CANDIDATE_SCORE_WEIGHTS)
+    return features
+
+def build_source_features(source_title, brand_dict=None, beauty_terms=None):
+    """検索元商品名の特徴量（候補ごとに再計算しない）"""
+    source_norm = _normalize(source_title)
+    return {
+        'norm': source_norm,
+        'brands': detect_brands(source_norm, brand_dict),
+        'quantity': parse_quantity(source_norm),
+        'beauty_terms': detect_beauty_terms(source_norm, beauty_terms)
+    }
+
+def resolve_catalog_candidates(source_title, candidates, brand_dict=None, beauty_terms=None,
+                               min_confidence=DEFAULT_MIN_CONFIDENCE, min_margin=DEFAULT_MIN_MARGIN):
+    """
+    カタログ検索候補を検索元商品名に対して再ランキングし、最良候補を選択
+
+    Args:
+        source_title: 検索元の商品名
+        candidates: [{'asin', 'item_name', 'rank', ...}] のリスト
+        brand_dict: ブランド辞書
+        beauty_terms: 美容用語辞書
+        min_confidence: 高確信と判定する最低スコア
+        min_margin: 高確信と判定する2位とのスコア差
+
+    Returns:
+        dict: asin / score / margin / confident / candidates（スコア降順、特徴量付き）
+    """
+    if not candidates:
+        return {'asin': '', 'score': 0.0, 'margin': 0.0, 'confident': False, 'candidates': []}
+
+    source_features = build_source_features(source_title, brand_dict, beauty_terms)
+    ranked = []
+    for position, candidate in enumerate(candidates):
+        features = score_candidate(source_features, candidate.get('item_name', ''), brand_dict, beauty_terms)
+        rank = candidate.get('rank', position)
+        score = features['total'] - RANK_PENALTY * rank
+        ranked.append({
+            **candidate,
+            'score': round(score, 4),
+            'features': {key: round(value, 4) for key, value in features.items() if key != 'total'}
+        })
+
+    ranked.sort(key=lambda c: (-c['score'], c.get('rank', 0)))
+    best = ranked[0]
+    margin = best['score'] - ranked[1]['score'] if len(ranked) > 1 else best['score']
+    # 商品名が取得できない候補しかない場合は判定不能
+    has_names = any(c.get('item_name') for c in ranked)
+
+    return {
+        'asin': best['asin'],
+        'score': best['score'],
+        'margin': round(margin, 4),
+        'confident': has_names and best['score'] >= min_confidence and margin >= min_margin,
+        'candidates': ranked
+    }
+
+def build_refined_query(source_title, brand_dict=None):
+    """
+    低確信時の再検索用クエリ（ブランド表記と数量表記を先頭に明示）
+
+    Returns:
+        str: 再検索クエリ（元のクエリと同じになる場合は空文字）
+    """
+    source_norm = _normalize(source_title)
+    parts = []
+    brands = sorted(detect_brands(source_norm, brand_dict))
+    parts.extend(brands)
+    quantity = parse_quantity(source_norm)
+    remainder = source_norm
+    if quantity:
+        remainder = remainder.replace(quantity['quantity_raw'], ' ')
+    parts.append(' '.join(remainder.split()))
+    if quantity:
+        parts.append(quantity['quantity_raw'])
+    refined = ' '.join(p for p in parts if p)
+    return refined if refined != source_norm else ''
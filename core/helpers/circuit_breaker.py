@@ -0,0 +1,287 @@
+# circuit_breaker.py - 外部API（SP-API・LLM）の遮断器（提供元・操作ごと、スレッド間で共有）
+#
+#   closed     通常どおり送信。失敗（429/5xx・接続エラー）が続くと open へ
+#                - 連続 failure_threshold 回の失敗
+#                - または直近 window_size 件（min_calls 件以上）の失敗率が failure_rate 以上
+#   open       送信せずに CircuitOpenError（待機・再試行に時間を使わない）。
+#              open_seconds（Retry-After の方が長ければその秒数）経過で half_open へ
+#   half_open  試験送信を probe_limit 件だけ通す。成功で closed、失敗で再び open
+#              （open の時間は倍にしていき max_open_seconds まで）。結果が記録されないまま
+#              open_seconds 経過した試験送信は枠を解放する
+#
+# 記録は呼び出し単位で行う（呼び出し側の再試行で回復した429は数えず、再試行しても失敗した呼び出しを1回の失敗とする）。
+#
+# 使い方:
+#   breaker = get_circuit_breaker('sp_api', 'getItemOffers')
+#   breaker.check()                      # open中は CircuitOpenError
+#   try:
+#       response = call_api()
+#   except Exception as e:
+#       breaker.record_error(e)          # 429/5xx・接続エラー・タイムアウトのみ失敗として数える
+#                                        # （応答の解析エラー・ImportError 等の手元の不具合は記録しない）
+#       raise
+#   breaker.record_success()
+import http.client
+import threading
+import time
+import urllib.error
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 10
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_OPEN_SECONDS = 30.0
+DEFAULT_MAX_OPEN_SECONDS = 300.0
+DEFAULT_PROBE_LIMIT = 1
+
+# 提供元が応答できていない（遮断の対象になる）HTTPステータス
+FAILURE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+# 接続エラー・タイムアウトとして扱う例外（ライブラリ固有の例外はインポートせずクラス名で判定）
+NETWORK_ERROR_TYPES = (ConnectionError, TimeoutError, urllib.error.URLError, http.client.HTTPException)
+NETWORK_ERROR_NAMES = frozenset({
+    'APIConnectionError', 'APITimeoutError',       # openai
+    'ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'Timeout',  # requests
+    'ConnectError', 'TimeoutException', 'NetworkError', 'RemoteProtocolError',  # httpx
+    'EndpointConnectionError', 'ConnectTimeoutError', 'ReadTimeoutError',  # botocore / urllib3
+    'DeadlineExceeded', 'ServiceUnavailable'        # google.api_core
+})
+
+STATE_COLUMNS = [
+    'provider', 'operation', 'state', 'failures', 'successes', 'rejected', 'opened', 'retry_in_seconds'
+]
+
+class CircuitOpenError(Exception):
+    """遮断中のため送信しなかった（行は「保留（deferred）」として後で再処理する）"""
+
+    def __init__(self, provider, operation, retry_in=None):
+        wait = f"（約{retry_in:.0f}秒後に試験送信）" if retry_in else ''
+        super().__init__(f"{provider}/{operation} 遮断中{wait}")
+        self.provider = provider
+        self.operation = operation
+        self.retry_in = retry_in
+
+def error_status(error):
+    """例外のHTTPステータス（SpApiHttpError.status / openai の status_code / SellingApiException.code）"""
+    for name in ('status', 'status_code', 'code'):
+        value = getattr(error, name, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_network_error(error):
+    """接続エラー・タイムアウトか（標準ライブラリの例外、またはHTTPクライアントの例外クラス名で判定）"""
+    if isinstance(error, NETWORK_ERROR_TYPES):
+        return True
+    return any(cls.__name__ in NETWORK_ERROR_NAMES for cls in type(error).__mro__)
+
+def is_provider_failure(error):
+    """遮断の対象になる失敗か（429/5xx、またはステータス無しの接続エラー・タイムアウト）"""
+    status = error_status(error)
+    if status is not None:
+        return status in FAILURE_STATUS_CODES
+    return is_network_error(error)
+
+class CircuitBreaker:
+    """1つの提供元・操作の遮断器"""
+
+    def __init__(self, provider, operation, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 window_size=DEFAULT_WINDOW_SIZE, min_calls=DEFAULT_MIN_CALLS, failure_rate=DEFAULT_FAILURE_RATE,
+                 open_seconds=DEFAULT_OPEN_SECONDS, max_open_seconds=DEFAULT_MAX_OPEN_SECONDS,
+                 probe_limit=DEFAULT_PROBE_LIMIT):
+        """
+        Args:
+            provider: 'sp_api' / 'openai' / 'gemini' 等
+            operation: API操作名またはモデル名
+            failure_threshold: open にする連続失敗回数
+            window_size: 失敗率を見る直近の件数
+            min_calls: 失敗率で判定する最低件数
+            failure_rate: open にする失敗率（0〜1）
+            open_seconds: open の最初の継続時間
+            max_open_seconds: 試験送信の失敗が続いた場合の継続時間の上限
+            probe_limit: half_open 中に同時に通す試験送信の件数
+        """
+        self.provider = provider
+        self.operation = operation
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.min_calls = max(1, int(min_calls))
+        self.failure_rate = float(failure_rate)
+        self.open_seconds = float(open_seconds)
+        self.max_open_seconds = max(float(max_open_seconds), self.open_seconds)
+        self.probe_limit = max(1, int(probe_limit))
+        self._results = deque(maxlen=max(1, int(window_size)))
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._current_open_seconds = self.open_seconds
+        self._probes = 0
+        self._probe_started = 0.0
+        self.failures = 0
+        self.successes = 0
+        self.rejected = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self, now):
+        if self._state == OPEN and now >= self._open_until:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def allow(self):
+        """送信してよいか（False の件数は rejected に加算）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes >= self.probe_limit \
+                    and now - self._probe_started >= self._current_open_seconds:
+                # 結果が記録されなかった試験送信（例外で抜けた等）の枠を解放
+                self._probes = 0
+            if self._state == HALF_OPEN and self._probes < self.probe_limit:
+                self._probes += 1
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self):
+        """送信前の確認（open中・試験送信の枠が埋まっている場合は CircuitOpenError）"""
+        if not self.allow():
+            raise CircuitOpenError(self.provider, self.operation, self.retry_in())
+
+    def retry_in(self):
+        """試験送信までの残り秒数（closed / half_open は0）"""
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic()) if self._state == OPEN else 0.0
+
+    def record_success(self):
+        """応答を受け取った（提供元は応答できている）"""
+        with self._lock:
+            self.successes += 1
+            self._results.append(False)
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self._results.clear()
+                self._current_open_seconds = self.open_seconds
+                print(f"[OK] {self.provider}/{self.operation} の遮断を解除しました")
+
+    def record_failure(self, retry_after=None):
+        """
+        失敗（429/5xx・接続エラー）
+
+        Args:
+            retry_after: 応答の Retry-After 秒（open の継続時間がこれより短い場合は延ばす）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            self.failures += 1
+            self._results.append(True)
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                # 試験送信の失敗: 継続時間を倍にして open に戻す
+                self._current_open_seconds = min(self._current_open_seconds * 2, self.max_open_seconds)
+                self._open(now, retry_after)
+            elif self._state == CLOSED and self._should_open():
+                self._open(now, retry_after)
+
+    def record_error(self, error):
+        """
+        例外の記録
+
+        429/5xx・接続エラー・タイムアウトは失敗、それ以外のHTTPステータス（404等）は応答があったものとして成功。
+        ステータスの無いその他の例外（応答の解析エラー・ImportError 等の手元の不具合）は提供元の状態と
+        無関係なため記録しない（呼び出し側でそのまま再送出する）。
+        """
+        if is_provider_failure(error):
+            self.record_failure(getattr(error, 'retry_after', None))
+        elif error_status(error) is not None:
+            self.record_success()
+
+    def _should_open(self):
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._results) < self.min_calls:
+            return False
+        return sum(self._results) / len(self._results) >= self.failure_rate
+
+    def _open(self, now, retry_after):
+        seconds = max(self._current_open_seconds, float(retry_after or 0))
+        self._state = OPEN
+        self._open_until = now + seconds
+        self._probes = 0
+        self.opened += 1
+        print(f"⚠️ {self.provider}/{self.operation} を遮断しました（{seconds:.0f}秒、連続失敗{self._consecutive_failures}回）")
+
+    def reset(self):
+        """closed に戻して集計をクリア"""
+        with self._lock:
+            self._state = CLOSED
+            self._results.clear()
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+            self._current_open_seconds = self.open_seconds
+            self._probes = 0
+            self.failures = self.successes = self.rejected = self.opened = 0
+
+    def snapshot(self):
+        """現在の状態（STATE_COLUMNS）"""
+        state = self.state
+        return {
+            'provider': self.provider,
+            'operation': self.operation,
+            'state': state,
+            'failures': self.failures,
+            'successes': self.successes,
+            'rejected': self.rejected,
+            'opened': self.opened,
+            'retry_in_seconds': self.retry_in()
+        }
+
+# ======================== プロセス内で共有する遮断器 ========================
+
+# (提供元, 操作) → CircuitBreaker
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(provider, operation, **settings):
+    """
+    提供元・操作の遮断器（初回のみ settings で作成、以降は同じインスタンス）
+
+    Args:
+        provider: 'sp_api' / 'openai' / 'gemini' 等
+        operation: API操作名またはモデル名
+        **settings: CircuitBreaker の引数（failure_threshold / open_seconds 等）
+    """
+    key = (provider, operation)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(provider, operation, **settings)
+        return breaker
+
+def get_circuit_breaker_states():
+    """全遮断器の状態（STATE_COLUMNS の dict のリスト）"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
+
+def reset_circuit_breakers():
+    """全遮断器を closed に戻す（再処理の前など）"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
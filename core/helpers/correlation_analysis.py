@@ -0,0 +1,178 @@
+# 相関分析エンジン（特徴量選択・大規模データのサンプリング・上位ペア抽出・歪んだスコアの順位相関）
+import numpy as np
+import pandas as pd
+
+# 相関計算に使う最大行数（超える場合は無作為抽出）
+DEFAULT_MAX_ROWS = 20000
+DEFAULT_MAX_FEATURES = 25
+# 非欠損率がこれ未満のカラムは除外
+MIN_NON_NULL_RATIO = 0.05
+# |歪度|がこれ以上のカラムは順位相関（Spearman）を優先
+SKEW_THRESHOLD = 1.0
+DEFAULT_PAIR_THRESHOLD = 0.3
+DEFAULT_TOP_K = 20
+SAMPLE_SEED = 42
+
+# 優先して採用するカラム（スコア・発送時間・フラグ）
+_PRIORITY_SUFFIXES = ('_score', '_confidence', '_percentage', '_coverage')
+_PRIORITY_COLUMNS = ('ship_hours', 'price')
+_FLAG_PREFIXES = ('is_', 'has_')
+
+def _feature_priority(column):
+    name = str(column)
+    if name.endswith(_PRIORITY_SUFFIXES) or name in _PRIORITY_COLUMNS:
+        return 0
+    if name.startswith(_FLAG_PREFIXES):
+        return 1
+    return 2
+
+def select_correlation_features(df, max_features=DEFAULT_MAX_FEATURES, min_non_null_ratio=MIN_NON_NULL_RATIO):
+    """
+    相関分析の対象カラムを選択
+
+    数値・真偽値カラムのうち、欠損が多いもの・定数のもの・連番（ID的なカラム）を除外し、
+    スコア → フラグ → その他の順に最大 max_features 件を採用する。
+
+    Returns:
+        list: 採用カラム名
+    """
+    total = len(df)
+    if total == 0:
+        return []
+
+    candidates = []
+    for position, col in enumerate(df.columns):
+        series = df[col]
+        if not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+            continue
+        non_null = series.notna().sum()
+        if non_null < max(2, min_non_null_ratio * total):
+            continue
+        unique_count = series.nunique(dropna=True)
+        if unique_count < 2:
+            continue
+        # 全行ユニークな整数カラムは連番・IDとみなす
+        if pd.api.types.is_integer_dtype(series) and unique_count == total:
+            continue
+        candidates.append((_feature_priority(col), position, col))
+
+    return [col for _, _, col in sorted(candidates)[:max_features]]
+
+def sample_for_correlation(df, max_rows=DEFAULT_MAX_ROWS, seed=SAMPLE_SEED):
+    """
+    相関計算用のサンプリング（max_rows 以下の場合はそのまま）
+
+    Returns:
+        tuple: (サンプル, サンプリングしたか)
+    """
+    if len(df) <= max_rows:
+        return df, False
+    return df.sample(n=max_rows, random_state=seed), True
+
+def _numeric_matrix(df, columns):
+    """選択カラムをfloat配列のDataFrameに変換（真偽値は0/1）"""
+    return pd.DataFrame(
+        {col: pd.to_numeric(df[col].astype(float) if pd.api.types.is_bool_dtype(df[col]) else df[col], errors='coerce')
+         for col in columns},
+        index=df.index
+    )
+
+def skewed_columns(frame, threshold=SKEW_THRESHOLD):
+    """|歪度|が閾値以上のカラム（フラグ列は対象外）"""
+    skew = frame.skew(numeric_only=True)
+    return [col for col, value in skew.items()
+            if pd.notna(value) and abs(value) >= threshold and not str(col).startswith(_FLAG_PREFIXES)]
+
+def top_correlation_pairs(matrix, k=DEFAULT_TOP_K, threshold=DEFAULT_PAIR_THRESHOLD):
+    """
+    相関行列の上三角から |r| の大きいペアを抽出
+
+    Args:
+        matrix: 相関行列（DataFrame）
+        k: 最大件数
+        threshold: これ以下の |r| は除外
+
+    Returns:
+        pd.DataFrame: var1 / var2 / r / abs_r（|r|降順）
+    """
+    values = matrix.to_numpy(dtype=float)
+    rows, cols = np.triu_indices(len(values), k=1)
+    pair_values = values[rows, cols]
+    abs_values = np.abs(pair_values)
+    keep = np.flatnonzero(np.nan_to_num(abs_values, nan=0.0) > threshold)
+    order = keep[np.argsort(-abs_values[keep], kind='stable')][:k]
+    labels = np.asarray(matrix.columns)
+    return pd.DataFrame({
+        'var1': labels[rows[order]],
+        'var2': labels[cols[order]],
+        'r': pair_values[order],
+        'abs_r': abs_values[order]
+    })
+
+def compute_correlation_analysis(df, max_rows=DEFAULT_MAX_ROWS, max_features=DEFAULT_MAX_FEATURES,
+                                 top_k=DEFAULT_TOP_K, threshold=DEFAULT_PAIR_THRESHOLD):
+    """
+    総合相関分析
+
+    歪んだスコア列（|歪度|≥1）を含むペアはSpearman順位相関、それ以外はPearson相関で評価する。
+
+    Args:
+        df: 処理済みデータフレーム
+        max_rows: 相関計算に使う最大行数
+        max_features: 最大カラム数
+        top_k: 抽出するペア数
+        threshold: ペア抽出の |r| 閾値
+
+    Returns:
+        dict: features / rows_used / sampled / skewed / pearson / spearman / pairs
+    """
+    # 特徴量選択もサンプル上で行う（全件でのnunique・歪度計算を避ける）
+    sample, sampled = sample_for_correlation(df, max_rows=max_rows)
+    features = select_correlation_features(sample, max_features=max_features)
+    result = {
+        'features': features, 'rows_used': 0, 'sampled': sampled, 'skewed': [],
+        'pearson': pd.DataFrame(), 'spearman': None,
+        'pairs': pd.DataFrame(columns=['var1', 'var2', 'method', 'r', 'abs_r', 'pearson', 'spearman'])
+    }
+    if len(features) < 2:
+        return result
+
+    frame = _numeric_matrix(sample, features)
+    pearson = frame.corr()
+    skewed = skewed_columns(frame)
+    result.update(rows_used=len(frame), skewed=skewed, pearson=pearson)
+
+    # 順位相関（順位化は1回のみ、歪んだ列が無い場合は計算しない）
+    spearman = frame.rank().corr() if skewed else None
+    result['spearman'] = spearman
+
+    # 候補はPearson・Spearmanの両方から拾い、採用値で並べ替え
+    candidate_k = top_k * 2
+    candidates = top_correlation_pairs(pearson, k=candidate_k, threshold=threshold)
+    if spearman is not None:
+        candidates = pd.concat([candidates, top_correlation_pairs(spearman, k=candidate_k, threshold=threshold)])
+    if candidates.empty:
+        return result
+    candidates = candidates.drop_duplicates(['var1', 'var2'])
+
+    var1, var2 = candidates['var1'].to_numpy(), candidates['var2'].to_numpy()
+    position = {col: i for i, col in enumerate(features)}
+    i, j = np.array([position[v] for v in var1]), np.array([position[v] for v in var2])
+    pearson_values = pearson.to_numpy()[i, j]
+    spearman_values = spearman.to_numpy()[i, j] if spearman is not None else np.full(len(i), np.nan)
+    skewed_set = set(skewed)
+    use_spearman = np.array([a in skewed_set or b in skewed_set for a, b in zip(var1, var2)], dtype=bool)
+    chosen = np.where(use_spearman, spearman_values, pearson_values)
+
+    pairs = pd.DataFrame({
+        'var1': var1,
+        'var2': var2,
+        'method': np.where(use_spearman, 'spearman', 'pearson'),
+        'r': chosen,
+        'abs_r': np.abs(chosen),
+        'pearson': pearson_values,
+        'spearman': spearman_values
+    })
+    pairs = pairs[pairs['abs_r'] > threshold]
+    result['pairs'] = pairs.sort_values('abs_r', ascending=False, kind='stable').head(top_k).reset_index(drop=True)
+    return result
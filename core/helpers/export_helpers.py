@@ -0,0 +1,259 @@
+# エクスポートサブシステム（ストリーミングExcel・Parquet・CSV）
+import io
+import pandas as pd
+import numpy as np
+from datetime import datetime, date
+
+# xlsxwriter（constant_memoryによる行ストリーミング書き込み）
+XLSXWRITER_AVAILABLE = False
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    pass
+
+# Parquetエンジン（pyarrow / fastparquet のいずれか）
+PARQUET_AVAILABLE = False
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        pass
+
+EXPORT_CHUNK_ROWS = 5000
+EXCEL_SHEET_NAME_LIMIT = 31
+
+_EXCEL_SCALAR_TYPES = (str, int, float, bool, datetime, date)
+
+def _to_excel_value(value):
+    """Excelに書き込めない値（リスト・辞書等）を文字列に変換"""
+    if value is None or isinstance(value, _EXCEL_SCALAR_TYPES):
+        return value
+    return str(value)
+
+def _iter_row_chunks(df, columns, positions=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    行をチャンク単位でPythonリストとして生成（グループ別の部分コピーを作らない）
+
+    Args:
+        df: 出力元DataFrame
+        columns: 出力カラム
+        positions: 出力する行位置（Noneで全行）
+        chunk_rows: 1チャンクの行数
+    """
+    total = len(df) if positions is None else len(positions)
+    object_columns = [i for i, col in enumerate(columns) if df[col].dtype == object]
+
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            chunk = df.iloc[start:start + chunk_rows][columns]
+        else:
+            chunk = df.iloc[positions[start:start + chunk_rows]][columns]
+        values = chunk.astype(object).where(chunk.notna(), None).values.tolist()
+        if object_columns:
+            for row in values:
+                for i in object_columns:
+                    row[i] = _to_excel_value(row[i])
+        yield values
+
+def compute_export_aggregates(df, group_column='shopee_group'):
+    """
+    エクスポート用集計値を一括計算（サマリー・統計シートの元データ）
+
+    Args:
+        df: 処理済みデータフレーム
+        group_column: グループカラム名
+
+    Returns:
+        dict: 全体統計とグループ別統計
+    """
+    total = len(df)
+    n = total
+
+    ship_hours = pd.to_numeric(df['ship_hours'], errors='coerce') if 'ship_hours' in df.columns else pd.Series(np.nan, index=df.index)
+    if 'is_prime' in df.columns:
+        is_prime = df['is_prime'].astype(str).str.lower().eq('true').values if df['is_prime'].dtype == object else df['is_prime'].fillna(False).astype(bool).values
+    else:
+        is_prime = np.zeros(n, dtype=bool)
+
+    if 'search_status' in df.columns:
+        success = int((df['search_status'] == 'success').sum())
+    elif 'asin' in df.columns:
+        success = int((df['asin'].notna() & (df['asin'].astype(str) != '')).sum())
+    else:
+        success = 0
+
+    metrics = pd.DataFrame({
+        'group': df[group_column].values if group_column in df.columns else np.full(n, 'B', dtype=object),
+        'shopee_score': pd.to_numeric(df['shopee_suitability_score'], errors='coerce').values if 'shopee_suitability_score' in df.columns else np.zeros(n),
+        'relevance': pd.to_numeric(df['relevance_score'], errors='coerce').values if 'relevance_score' in df.columns else np.zeros(n),
+        'is_prime': is_prime,
+        'ship_hours': ship_hours.values
+    })
+
+    grouped = metrics.groupby('group', sort=True).agg(
+        count=('group', 'size'),
+        avg_shopee_score=('shopee_score', 'mean'),
+        avg_relevance=('relevance', 'mean'),
+        prime_count=('is_prime', 'sum'),
+        ship_available=('ship_hours', 'count'),
+        avg_ship_hours=('ship_hours', 'mean')
+    )
+    grouped['prime_rate'] = grouped['prime_count'] / grouped['count'] * 100
+
+    ship_available = int(ship_hours.notna().sum())
+    aggregates = {
+        'total': total,
+        'success': success,
+        'success_rate': (success / total * 100) if total > 0 else 0,
+        'groups': grouped.fillna(0).to_dict('index'),
+        'ship_available': ship_available,
+        'ship_rate': (ship_available / total * 100) if total > 0 else 0,
+        'avg_ship_hours': float(ship_hours.mean()) if ship_available > 0 else 0,
+        'fast_shipping': int((ship_hours <= 24).sum()),
+        'prime_count': int(is_prime.sum()),
+        'prime_rate': (is_prime.sum() / total * 100) if total > 0 else 0,
+        'seller_counts': df['seller_type'].value_counts().to_dict() if 'seller_type' in df.columns else {},
+        'has_group_column': group_column in df.columns,
+        'has_ship_hours': 'ship_hours' in df.columns,
+        'has_prime': 'is_prime' in df.columns
+    }
+
+    if 'beauty_terms_coverage' in df.columns:
+        coverage = pd.to_numeric(df['beauty_terms_coverage'], errors='coerce')
+        aggregates['beauty_items'] = int((coverage > 0).sum())
+        aggregates['avg_beauty_coverage'] = float(coverage.mean()) if coverage.notna().any() else 0
+    else:
+        aggregates['beauty_items'] = 0
+        aggregates['avg_beauty_coverage'] = 0
+
+    return aggregates
+
+def group_positions(df, group_column='shopee_group'):
+    """
+    グループ別の行位置を一括取得（部分DataFrameを作らない）
+
+    Returns:
+        dict: グループ名 → 行位置のndarray
+    """
+    if group_column not in df.columns or len(df) == 0:
+        return {}
+    codes, uniques = pd.factorize(df[group_column], sort=True)
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {
+        uniques[i]: order[boundaries[i]:boundaries[i + 1]]
+        for i in range(len(uniques))
+    }
+
+def write_excel_streaming(sheets, output=None):
+    """
+    複数シートのExcelを行ストリーミングで書き込み
+
+    xlsxwriterのconstant_memoryモードで1行ずつ書き出すため、ブック全体をメモリに保持しない。
+    xlsxwriterが無い環境ではpandas(openpyxl)の通常書き込みにフォールバックする。
+
+    Args:
+        sheets: [{'name', 'df', 'positions'(任意), 'columns'(任意), 'description'(任意)}] のリスト
+        output: 出力先（ファイルパスまたはバイナリバッファ、Noneの場合はBytesIO）
+
+    Returns:
+        出力先（BytesIOの場合は先頭にシーク済み）
+    """
+    if output is None:
+        output = io.BytesIO()
+
+    if not XLSXWRITER_AVAILABLE:
+        print("⚠️ xlsxwriter未インストール: 通常書き込みにフォールバック")
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            for sheet in sheets:
+                sheet_df = sheet['df']
+                columns = sheet.get('columns') or list(sheet_df.columns)
+                positions = sheet.get('positions')
+                frame = sheet_df[columns] if positions is None else sheet_df.iloc[positions][columns]
+                frame.to_excel(writer, sheet_name=sheet['name'][:EXCEL_SHEET_NAME_LIMIT], index=False)
+        if hasattr(output, 'seek'):
+            output.seek(0)
+        return output
+
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'nan_inf_to_errors': True
+    })
+    header_format = workbook.add_format({'bold': True})
+
+    for sheet in sheets:
+        sheet_df = sheet['df']
+        columns = sheet.get('columns') or list(sheet_df.columns)
+        columns = [col for col in columns if col in sheet_df.columns]
+        worksheet = workbook.add_worksheet(sheet['name'][:EXCEL_SHEET_NAME_LIMIT])
+
+        row_number = 0
+        worksheet.write_row(row_number, 0, [str(col) for col in columns], header_format)
+        row_number += 1
+
+        description = sheet.get('description')
+        if description:
+            worksheet.write_row(row_number, 0, ['=' * 50, description, '=' * 50][:max(len(columns), 1)])
+            row_number += 1
+
+        for rows in _iter_row_chunks(sheet_df, columns, sheet.get('positions')):
+            for values in rows:
+                worksheet.write_row(row_number, 0, values)
+                row_number += 1
+
+    workbook.close()
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
+
+def export_csv(df, output=None, columns=None):
+    """
+    CSV出力（Excel互換のBOM付きUTF-8）
+
+    Returns:
+        出力先（BytesIOの場合は先頭にシーク済み）
+    """
+    if output is None:
+        output = io.BytesIO()
+    frame = df if columns is None else df[[col for col in columns if col in df.columns]]
+    frame.to_csv(output, index=False, encoding='utf-8-sig')
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
+
+def export_parquet(df, output=None, columns=None):
+    """
+    Parquet出力（機械処理向けの列指向フォーマット）
+
+    型が混在するobjectカラムは文字列化して書き込む。
+
+    Returns:
+        出力先、Parquetエンジンが無い場合はNone
+    """
+    if not PARQUET_AVAILABLE:
+        print("⚠️ Parquet出力: pyarrow/fastparquet が未インストールです")
+        return None
+
+    if output is None:
+        output = io.BytesIO()
+    frame = df if columns is None else df[[col for col in columns if col in df.columns]]
+
+    try:
+        frame.to_parquet(output, index=False)
+    except Exception:
+        object_columns = [col for col in frame.columns if frame[col].dtype == object]
+        frame = frame.astype({col: 'string' for col in object_columns})
+        if hasattr(output, 'seek'):
+            output.seek(0)
+            output.truncate()
+        frame.to_parquet(output, index=False)
+
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
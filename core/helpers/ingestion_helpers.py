@@ -0,0 +1,227 @@
+# 入力ファイル取り込みレイヤー（形式判定・カラム絞り込み・解析結果キャッシュ）
+import io
+import hashlib
+import importlib.util
+import pathlib
+from collections import OrderedDict
+
+import pandas as pd
+
+# 高速Excelリーダー（python-calamine）が利用可能か
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+# 高速CSVリーダー（pyarrow）が利用可能か
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# タイトル以外に読み込みを維持するカラム（大文字小文字を区別しない）
+DEFAULT_KEEP_COLUMNS = [
+    'asin', 'amazon_asin', 'name', 'brand', 'ブランド', 'price', '価格',
+    'category', 'カテゴリ', 'url', 'jan', 'sku'
+]
+
+INGESTION_CACHE_SIZE = 8
+
+_parse_cache = OrderedDict()
+
+def get_file_bytes(source):
+    """
+    アップロードファイル・パス・バッファから内容をバイト列で取得
+
+    Args:
+        source: StreamlitのUploadedFile、ファイルパス、またはバイナリバッファ
+
+    Returns:
+        bytes: ファイル内容
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, pathlib.Path)):
+        return pathlib.Path(source).read_bytes()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    position = source.tell() if hasattr(source, 'tell') else None
+    data = source.read()
+    if position is not None and hasattr(source, 'seek'):
+        source.seek(position)
+    return data
+
+def content_hash(data):
+    """内容ハッシュ（キャッシュキー）"""
+    return hashlib.sha1(data).hexdigest()
+
+def detect_file_format(data, filename=''):
+    """
+    ファイル形式の判定（先頭バイト優先、拡張子は補助）
+
+    Returns:
+        str: 'xlsx' / 'xls' / 'csv'
+    """
+    if data[:4] == b'PK\x03\x04':
+        return 'xlsx'
+    if data[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
+        return 'xls'
+    suffix = pathlib.Path(str(filename)).suffix.lower()
+    if suffix in ('.xlsx', '.xlsm'):
+        return 'xlsx'
+    if suffix == '.xls':
+        return 'xls'
+    return 'csv'
+
+def _excel_engine(file_format):
+    """Excelの読み込みエンジンを選択"""
+    if CALAMINE_AVAILABLE:
+        return 'calamine'
+    return 'openpyxl' if file_format == 'xlsx' else None
+
+def _parse(data, file_format, usecols=None, nrows=None, sheet_name=0):
+    """バイト列をDataFrameに解析（キャッシュなし）"""
+    if file_format == 'csv':
+        read_kwargs = {'usecols': usecols, 'nrows': nrows}
+        if PYARROW_AVAILABLE and nrows is None:
+            read_kwargs['engine'] = 'pyarrow'
+            read_kwargs.pop('nrows')
+        try:
+            return pd.read_csv(io.BytesIO(data), **read_kwargs)
+        except UnicodeDecodeError:
+            read_kwargs.pop('engine', None)
+            return pd.read_csv(io.BytesIO(data), encoding='cp932', usecols=usecols, nrows=nrows)
+
+    engine = _excel_engine(file_format)
+    try:
+        return pd.read_excel(io.BytesIO(data), sheet_name=sheet_name, usecols=usecols, nrows=nrows, engine=engine)
+    except (ImportError, ValueError):
+        if engine == 'calamine':
+            return pd.read_excel(io.BytesIO(data), sheet_name=sheet_name, usecols=usecols, nrows=nrows)
+        raise
+
+def optimize_layout(df, exclude=None, downcast=None):
+    """
+    解析直後に一度だけメモリレイアウトを最適化
+
+    カテゴリカラムの未使用カテゴリ削除を行う（文字列カラムはそのまま）。
+    数値カラムは後続の計算（価格 × 数量など）で桁あふれ・精度落ちが起きないよう int64 / float64 のまま残し、
+    downcast で明示したID・フラグ等の整数カラムのみ縮小する。
+
+    Args:
+        df: 解析済みDataFrame
+        exclude: 最適化対象外のカラム
+        downcast: ダウンキャストする整数カラム（計算に使わないもの）
+
+    Returns:
+        pd.DataFrame: 最適化済みDataFrame
+    """
+    exclude = set(exclude or [])
+    downcast = set(downcast or [])
+    optimized = {}
+    for col in df.columns:
+        if col in exclude:
+            continue
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            optimized[col] = series.cat.remove_unused_categories()
+        elif col in downcast and pd.api.types.is_integer_dtype(series):
+            optimized[col] = pd.to_numeric(series, downcast='integer')
+    df = df.copy()
+    for col, values in optimized.items():
+        df[col] = values
+    return df
+
+def _cache_get(key):
+    if key in _parse_cache:
+        _parse_cache.move_to_end(key)
+        return _parse_cache[key]
+    return None
+
+def _cache_put(key, value):
+    _parse_cache[key] = value
+    _parse_cache.move_to_end(key)
+    while len(_parse_cache) > INGESTION_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+
+def read_columns(source, filename=None, sheet_name=0):
+    """
+    ヘッダー行のみを解析してカラム一覧を取得（キャッシュ付き）
+
+    Returns:
+        list: カラム名のリスト
+    """
+    data = get_file_bytes(source)
+    filename = filename or getattr(source, 'name', '')
+    key = (content_hash(data), 'columns', sheet_name)
+    cached = _cache_get(key)
+    if cached is not None:
+        return list(cached)
+
+    file_format = detect_file_format(data, filename)
+    header_df = _parse(data, file_format, nrows=0, sheet_name=sheet_name)
+    columns = list(header_df.columns)
+    _cache_put(key, tuple(columns))
+    return columns
+
+def select_ingestion_columns(columns, required=None, keep=None):
+    """
+    読み込み対象カラムの決定（必須カラム＋維持カラム＋ASIN系カラム）
+
+    Args:
+        columns: ファイルのカラム一覧
+        required: 必須カラム（タイトル列など）
+        keep: 追加で維持するカラム名（Noneの場合はDEFAULT_KEEP_COLUMNS）
+
+    Returns:
+        list: ファイル上の順序を保った読み込み対象カラム
+    """
+    required = set(required or [])
+    keep_lower = {str(k).lower() for k in (keep if keep is not None else DEFAULT_KEEP_COLUMNS)}
+    selected = []
+    for col in columns:
+        col_lower = str(col).lower()
+        if col in required or col_lower in keep_lower or 'asin' in col_lower:
+            selected.append(col)
+    return selected
+
+def load_table(source, filename=None, usecols=None, nrows=None, sheet_name=0, optimize=True):
+    """
+    入力ファイルをDataFrameとして読み込み（内容ハッシュでキャッシュ）
+
+    同じ内容・同じ読み込み条件であれば再解析せずキャッシュを返す。
+    Streamlitの再実行ごとにブック全体を解析し直すことを避けるための入口。
+
+    Args:
+        source: UploadedFile・パス・バッファ
+        filename: 形式判定用のファイル名（省略時はsource.name）
+        usecols: 読み込むカラム（Noneで全カラム）
+        nrows: 読み込む行数（プレビュー用）
+        sheet_name: Excelのシート
+        optimize: 解析後にレイアウト最適化を行うか
+
+    Returns:
+        pd.DataFrame: 解析結果（呼び出し側で変更してもキャッシュには影響しない）
+    """
+    data = get_file_bytes(source)
+    filename = filename or getattr(source, 'name', '')
+    usecols_key = tuple(usecols) if usecols is not None else None
+    key = (content_hash(data), usecols_key, nrows, sheet_name, optimize)
+
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached.copy()
+
+    file_format = detect_file_format(data, filename)
+    if usecols is not None:
+        available = read_columns(data, filename, sheet_name)
+        usecols = [col for col in available if col in set(usecols)]
+        if not usecols:
+            usecols = None
+
+    df = _parse(data, file_format, usecols=usecols, nrows=nrows, sheet_name=sheet_name)
+    if optimize and len(df) > 0:
+        df = optimize_layout(df)
+
+    _cache_put(key, df)
+    print(f"[OK] 入力ファイル解析: {len(df)}行 x {len(df.columns)}列 (形式: {file_format}, エンジン: {_excel_engine(file_format) if file_format != 'csv' else 'csv'})")
+    return df.copy()
+
+def clear_ingestion_cache():
+    """解析キャッシュのクリア"""
+    _parse_cache.clear()
@@ -0,0 +1,141 @@
+# parallel_text.py - CPU処理（クレンジング・ブランド抽出・NG検出・関連性スコア）のプロセスプール並列実行
+#
+# 使い方:
+#   results = parallel_map(_brand_task, titles, context={'brand_index': compile_brand_index(brand_dict)})
+#
+#   - func は func(item, context) の形のモジュール関数（ワーカーへは参照のみ送られる）
+#   - プロセスプールはプロセス内で1つを使い回す（呼び出しごとの spawn・モジュール読み込みを避ける）。
+#     ワーカー数が変わった場合・プールが壊れた場合のみ作り直す
+#   - context（コンパイル済みのブランド索引・NG索引など）は呼び出しごとに1回だけpickleし、
+#     ワーカーは内容のハッシュで保持して、変わった場合のみ読み込み直す
+#   - 入力をチャンクに分けて各ワーカーへ配り、結果は入力と同じ順序で結合する
+#   - 件数が少ない・ワーカー1つ・プール起動に失敗した場合は同じ関数を逐次実行する
+#
+# 環境変数:
+#   TEXT_WORKERS   ワーカー数（既定: CPUコア数、1で常に逐次実行）
+import atexit
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# これ未満の件数はプールへの配布（チャンク・context の転送）の方が高くつくため逐次実行。
+# benchmarks.run_benchmarks の parallel_map_serial / parallel_map_pool の計測で、常駐プールへの
+# 1回の配布は約4ms、ブランド抽出・クレンジング・関連性スコアは1行あたり約40〜50µs
+# （2ワーカーで約200行が分岐点）のため、余裕を見て500行とする。
+# プールの起動（spawn・モジュール読み込み、約2秒）はプロセスごとに初回のみ。
+DEFAULT_MIN_PARALLEL_ITEMS = 500
+# 1ワーカーあたりのチャンク数（処理時間のばらつきを均すため複数に分ける）
+CHUNKS_PER_WORKER = 4
+# ワーカーが保持する context の件数（ステージごとに異なる context を交互に使うため複数保持）
+WORKER_CONTEXT_CACHE_SIZE = 8
+
+# ワーカー内の context（ハッシュ → 読み込み済みの値、_run_chunk で初回のみ読み込み）
+_worker_contexts = OrderedDict()
+
+# プロセス内で共有するプール（_get_pool で作成、ワーカー数が変わった場合のみ作り直す）
+_pool = None
+_pool_workers = 0
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def resolve_worker_count(workers=None):
+    """ワーカー数の決定（引数 → 環境変数 TEXT_WORKERS → CPUコア数）"""
+    if workers is None:
+        workers = os.getenv('TEXT_WORKERS', '').strip() or os.cpu_count() or 1
+    try:
+        return max(1, int(workers))
+    except (TypeError, ValueError):
+        return 1
+
+def _run_chunk(func, context_key, context_payload, items):
+    context = _worker_contexts.get(context_key)
+    if context is None:
+        context = pickle.loads(context_payload)
+        _worker_contexts[context_key] = context
+        while len(_worker_contexts) > WORKER_CONTEXT_CACHE_SIZE:
+            _worker_contexts.popitem(last=False)
+    else:
+        _worker_contexts.move_to_end(context_key)
+    return [func(item, context) for item in items]
+
+def _get_pool(workers):
+    """共有プールの取得（未作成・ワーカー数の変更・fork後の子プロセスでは作り直す）"""
+    global _pool, _pool_workers, _pool_pid
+    with _pool_lock:
+        if _pool is not None and (_pool_workers != workers or _pool_pid != os.getpid()):
+            if _pool_pid == os.getpid():
+                # 実行中の他の呼び出しは完了させる（新しい呼び出しは新しいプールへ）
+                _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+            _pool_pid = os.getpid()
+        return _pool
+
+def shutdown_pool():
+    """共有プールの停止（次回の parallel_map で作り直す）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+atexit.register(shutdown_pool)
+
+def _split_chunks(items, chunk_size):
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+def parallel_map(func, items, context=None, workers=None, chunk_size=None, min_items=DEFAULT_MIN_PARALLEL_ITEMS):
+    """
+    items の各要素に func(item, context) を適用（プロセスプールで並列、結果は入力順）
+
+    Args:
+        func: モジュールレベルの関数（lambda・ローカル関数は不可）
+        items: 入力（タイトル列など）
+        context: 全ワーカーで共有する読み取り専用の値（内容が変わった場合のみワーカーで読み込み直す）
+        workers: ワーカー数（Noneで resolve_worker_count）
+        chunk_size: 1タスクあたりの件数（Noneで件数・ワーカー数から決定）
+        min_items: これ未満の件数は逐次実行
+
+    Returns:
+        list: func の結果（items と同じ順序・同じ件数）
+    """
+    items = list(items)
+    context = context or {}
+    pool_workers = resolve_worker_count(workers)
+    workers = min(pool_workers, max(1, len(items)))
+    # デーモンプロセス（他のプールのワーカー）からは子プロセスを作れない
+    if workers <= 1 or len(items) < max(1, min_items) or multiprocessing.current_process().daemon:
+        return [func(item, context) for item in items]
+
+    chunk_size = chunk_size or math.ceil(len(items) / (workers * CHUNKS_PER_WORKER))
+    chunks = _split_chunks(items, max(1, int(chunk_size)))
+    try:
+        context_payload = pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL)
+        context_key = hashlib.sha1(context_payload).hexdigest()
+        executor = _get_pool(pool_workers)
+        count = len(chunks)
+        chunk_results = list(executor.map(_run_chunk, [func] * count, [context_key] * count,
+                                          [context_payload] * count, chunks))
+    except (BrokenProcessPool, OSError, pickle.PicklingError) as e:
+        # プールが使えない環境（__main__ ガードの無いスクリプト等）は逐次実行に切り替え
+        logger.warning(f"⚠️ プロセスプール並列実行に失敗したため逐次実行します: {e}")
+        if isinstance(e, BrokenProcessPool):
+            shutdown_pool()
+        return [func(item, context) for item in items]
+
+    results = []
+    for chunk_result in chunk_results:
+        results.extend(chunk_result)
+    logger.info(f"[OK] 並列実行完了: {len(items)}件 / {workers}ワーカー / {len(chunks)}チャンク")
+    return results
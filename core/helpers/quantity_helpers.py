@@ -0,0 +1,191 @@
+# 数量・容量抽出（単一スキャンの数量文法＋基準単位への正規化）
+import re
+import pandas as pd
+import numpy as np
+
+# 単位表記 → (正規化単位, 基準単位, 基準単位への換算係数)
+UNIT_TABLE = {
+    'ml': ('ml', 'ml', 1.0),
+    'cc': ('ml', 'ml', 1.0),
+    'l': ('l', 'ml', 1000.0),
+    'ℓ': ('l', 'ml', 1000.0),
+    'floz': ('fl oz', 'ml', 29.5735),
+    'mg': ('mg', 'g', 0.001),
+    'g': ('g', 'g', 1.0),
+    'kg': ('kg', 'g', 1000.0),
+    'oz': ('oz', 'g', 28.3495),
+    'lb': ('lb', 'g', 453.592),
+    '個': ('個', 'count', 1.0),
+    '本': ('本', 'count', 1.0),
+    '枚': ('枚', 'count', 1.0),
+    '袋': ('袋', 'count', 1.0),
+    '箱': ('箱', 'count', 1.0),
+    '錠': ('錠', 'count', 1.0),
+    '粒': ('粒', 'count', 1.0),
+    '包': ('包', 'count', 1.0),
+    'セット': ('セット', 'count', 1.0),
+    'set': ('set', 'count', 1.0),
+    'sets': ('set', 'count', 1.0),
+    'pack': ('pack', 'count', 1.0),
+    'packs': ('pack', 'count', 1.0),
+    'pcs': ('pcs', 'count', 1.0),
+    'pc': ('pcs', 'count', 1.0),
+    'piece': ('pcs', 'count', 1.0),
+    'pieces': ('pcs', 'count', 1.0),
+    'count': ('count', 'count', 1.0),
+    'ct': ('count', 'count', 1.0),
+    'inch': ('inch', 'mm', 25.4),
+    'cm': ('cm', 'mm', 10.0),
+    'mm': ('mm', 'mm', 1.0),
+    'gb': ('gb', 'gb', 1.0),
+    'tb': ('tb', 'gb', 1024.0),
+}
+
+# 容量・重量（ml/g）を個数より優先して主数量とする
+_BASE_UNIT_PRIORITY = {'ml': 0, 'g': 0, 'count': 1, 'mm': 2, 'gb': 2}
+
+_UNIT_ALTERNATION = (
+    r"fl\.?\s*oz|ml|cc|ℓ|kg|mg|lb|oz|g|l"
+    r"|個|本|枚|袋|箱|錠|粒|包|セット"
+    r"|packs?|pcs|pc|pieces?|sets?|count|ct|inch|cm|mm|gb|tb"
+)
+
+_PACK_SUFFIX = r"(?:\s*(?P<pack_word>個|本|袋|箱|セット|pcs|packs?|sets?))?"
+
+# 数値: 3桁区切りのカンマ（1,000）は除去、それ以外のカンマは小数点（1,5 / 12,50）
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d+(?:\.\d+|,\d{1,2}(?!\d))?"
+_THOUSANDS_PATTERN = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+# 寸法（3x5cm・10cm x 20）は倍数と区別できないため、個数表記（個/本/pack等）がある場合のみ倍数とする
+_DIMENSION_BASE_UNITS = ('mm',)
+
+# 数量文法（1回のfinditerで全候補を走査）
+#   [前置倍数 x] 数値 単位 [x 後置倍数 [個/本/セット...]]
+#   例: 120ml*2 / 490ml x 3 / 2 x 490ml / 1.5l / 1,000ml / 30錠
+QUANTITY_PATTERN = re.compile(
+    r"(?<![a-z0-9.,])"
+    r"(?:(?P<pre_pack>\d+)\s*[x×*]\s*)?"
+    r"(?P<value>" + _NUMBER + r")\s*"
+    r"(?P<unit>" + _UNIT_ALTERNATION + r")"
+    r"(?![a-z])"
+    r"(?:\s*[x×*]\s*(?P<post_pack>\d+)" + _PACK_SUFFIX + r"(?![a-z]))?",
+    re.IGNORECASE
+)
+
+QUANTITY_COLUMNS = [
+    'quantity_raw', 'quantity_value', 'quantity_unit', 'quantity_pack',
+    'quantity_base_value', 'quantity_base_unit'
+]
+
+# 主数量の直後にある個数表記（例: 490ml 3本セット）を倍数とみなす最大距離
+_ADJACENT_PACK_GAP = 3
+
+def _normalize_unit_token(token):
+    token = token.lower()
+    if token.startswith('fl'):
+        return 'floz'
+    return token
+
+def _parse_number(token):
+    """数値表記を float に変換（3桁区切りのカンマは除去、それ以外のカンマは小数点）"""
+    if _THOUSANDS_PATTERN.fullmatch(token):
+        return float(token.replace(',', ''))
+    return float(token.replace(',', '.'))
+
+def _match_to_result(match):
+    unit_key = _normalize_unit_token(match.group('unit'))
+    unit, base_unit, factor = UNIT_TABLE[unit_key]
+    value = _parse_number(match.group('value'))
+    pack = 1
+    if base_unit in _DIMENSION_BASE_UNITS:
+        if match.group('post_pack') and match.group('pack_word'):
+            pack = int(match.group('post_pack'))
+    elif match.group('post_pack'):
+        pack = int(match.group('post_pack'))
+    elif match.group('pre_pack'):
+        pack = int(match.group('pre_pack'))
+    pack = max(pack, 1)
+    return {
+        'quantity_raw': match.group(0).strip(),
+        'quantity_value': value,
+        'quantity_unit': unit,
+        'quantity_pack': pack,
+        'quantity_base_value': round(value * factor * pack, 4),
+        'quantity_base_unit': base_unit,
+        '_start': match.start(),
+        '_end': match.end()
+    }
+
+def parse_quantity(text):
+    """
+    商品名から数量を構造化して抽出（単一スキャン）
+
+    容量・重量を個数より優先し、同種の中では最初に出現したものを採用する。
+    主数量の直後に個数表記がある場合（例: "490ml 3本セット"）は倍数として扱う。
+
+    Args:
+        text: 商品名
+
+    Returns:
+        dict: quantity_raw / quantity_value / quantity_unit / quantity_pack /
+              quantity_base_value / quantity_base_unit（見つからない場合はNone）
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    candidates = [_match_to_result(m) for m in QUANTITY_PATTERN.finditer(text)]
+    if not candidates:
+        return None
+
+    primary = min(
+        enumerate(candidates),
+        key=lambda item: (_BASE_UNIT_PRIORITY.get(item[1]['quantity_base_unit'], 3), item[0])
+    )[1]
+
+    if primary['quantity_base_unit'] != 'count' and primary['quantity_pack'] == 1:
+        for candidate in candidates:
+            gap = candidate['_start'] - primary['_end']
+            if candidate['quantity_base_unit'] == 'count' and 0 <= gap <= _ADJACENT_PACK_GAP:
+                pack = int(candidate['quantity_value'])
+                if pack > 1:
+                    primary['quantity_pack'] = pack
+                    primary['quantity_base_value'] = round(primary['quantity_base_value'] * pack, 4)
+                    primary['quantity_raw'] = text[primary['_start']:candidate['_end']].strip()
+                break
+
+    return {key: primary[key] for key in QUANTITY_COLUMNS}
+
+def extract_quantity_text(text):
+    """
+    数量の表記文字列のみを取得（旧 extract_quantity 互換）
+
+    Returns:
+        str: 一致した数量表記（見つからない場合は空文字）
+    """
+    result = parse_quantity(text)
+    return result['quantity_raw'] if result else ""
+
+def parse_quantity_series(titles):
+    """
+    商品名Seriesの数量を一括抽出
+
+    同一タイトルは一度だけ解析し、結果をインデックスに展開する。
+
+    Args:
+        titles: 商品名のSeries
+
+    Returns:
+        pd.DataFrame: titlesと同じインデックスを持つ QUANTITY_COLUMNS のDataFrame
+    """
+    codes, uniques = pd.factorize(titles, use_na_sentinel=True)
+    parsed = [parse_quantity(title) for title in uniques]
+    unique_frame = pd.DataFrame(
+        [p if p is not None else {} for p in parsed],
+        columns=QUANTITY_COLUMNS
+    )
+    # 欠損タイトル（code=-1）用に空行を末尾に追加
+    unique_frame.loc[len(unique_frame)] = [np.nan] * len(QUANTITY_COLUMNS)
+    result = unique_frame.iloc[np.where(codes < 0, len(unique_frame) - 1, codes)]
+    result.index = titles.index
+    result['quantity_pack'] = result['quantity_pack'].astype('Int64')
+    return result
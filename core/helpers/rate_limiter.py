@@ -0,0 +1,37 @@
+# 送信レートの制限（スレッド間で共有するトークンバケット）
+import threading
+import time
+
+class RateLimiter:
+    """スレッド間で共有するトークンバケット（acquire は送信可能になるまで待機）"""
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate: 1秒あたりのリクエスト数（0以下で無制限）
+            burst: 連続送信できる上限（既定: rate）
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst or max(rate, 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """1リクエスト分の送信枠を確保（待機した秒数を返す）"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self.waited_seconds += waited
+                    return waited
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
@@ -0,0 +1,174 @@
+# 処理結果サマリー（グループ件数・Prime率・発送時間分布・ブランド/美容用語別集計を1回だけ計算）
+import numpy as np
+import pandas as pd
+
+# 美容用語効果分析の対象キーワード
+BEAUTY_KEYWORDS = ['oil', 'cream', 'serum', 'lotion', 'cleanser', 'mask', 'treatment', 'toner', 'essence', 'gel']
+
+# 発送時間カテゴリ（ダッシュボード・分析タブ共通）
+SHIP_CATEGORY_BINS = [0, 12, 24, 48, float('inf')]
+SHIP_CATEGORY_LABELS = ['12h以内', '12-24h', '24-48h', '48h超']
+
+# session_state上の保存キー
+SUMMARY_STATE_KEY = 'run_summary'
+SUMMARY_SOURCE_STATE_KEY = 'run_summary_source'
+
+def _numeric(df, column):
+    if column in df.columns:
+        return pd.to_numeric(df[column], errors='coerce')
+    return pd.Series(np.nan, index=df.index)
+
+def _bool_mask(df, columns):
+    """真偽値カラム（文字列'true'も許容）のマスク、カラムが無い場合はNone"""
+    column = next((col for col in columns if col in df.columns), None)
+    if column is None:
+        return None
+    values = df[column]
+    if pd.api.types.is_bool_dtype(values):
+        return values.fillna(False).astype(bool)
+    return values.astype(str).str.lower().eq('true')
+
+def _mean(series):
+    value = series.mean()
+    return float(value) if pd.notna(value) else 0.0
+
+def _brand_aggregates(df, scores):
+    """ブランド別集計（extracted_brand が空の行は除外、ブランド名順）"""
+    if 'extracted_brand' not in df.columns:
+        return pd.DataFrame()
+    brands = df['extracted_brand']
+    valid = brands.notna() & brands.astype(str).ne('')
+    if not valid.any():
+        return pd.DataFrame()
+    work = scores[valid].assign(brand=brands[valid].values)
+    result = work.groupby('brand').agg(
+        count=('shopee_suitability_score', 'size'),
+        avg_shopee_score=('shopee_suitability_score', 'mean'),
+        std_shopee_score=('shopee_suitability_score', 'std'),
+        avg_prime_score=('prime_confidence_score', 'mean'),
+        group_a_rate=('is_group_a', 'mean')
+    )
+    result['group_a_rate'] = result['group_a_rate'] * 100
+    return result
+
+def _keyword_aggregates(df, scores, keywords):
+    """美容用語別集計（clean_title に含まれるキーワードごと、該当なしのキーワードは除外）"""
+    if 'clean_title' not in df.columns:
+        return pd.DataFrame()
+    titles = df['clean_title'].astype(str).str.lower().where(df['clean_title'].notna(), '')
+    rows = []
+    for keyword in keywords:
+        mask = titles.str.contains(keyword.lower(), regex=False).values
+        count = int(mask.sum())
+        if count == 0:
+            continue
+        subset = scores[mask]
+        rows.append({
+            'keyword': keyword,
+            'count': count,
+            'avg_shopee_score': _mean(subset['shopee_suitability_score']),
+            'avg_prime_score': _mean(subset['prime_confidence_score']),
+            'avg_relevance': _mean(subset['relevance_score']),
+            'group_a_rate': subset['is_group_a'].mean() * 100
+        })
+    return pd.DataFrame(rows, columns=['keyword', 'count', 'avg_shopee_score', 'avg_prime_score',
+                                       'avg_relevance', 'group_a_rate'])
+
+def compute_run_summary(df, keywords=None):
+    """
+    処理結果のサマリーを一括計算（各タブはこの結果を参照し、processed_dfを再フィルタしない）
+
+    Args:
+        df: 処理・分類済みデータフレーム
+        keywords: 美容用語効果分析の対象キーワード（Noneで BEAUTY_KEYWORDS）
+
+    Returns:
+        dict: 件数・率・分布の値と、brand_frame / keyword_frame（DataFrame）
+    """
+    if df is None:
+        df = pd.DataFrame()
+
+    total = len(df)
+    has_group = 'shopee_group' in df.columns
+    group_counts = df['shopee_group'].value_counts() if has_group else pd.Series(dtype=int)
+
+    prime_mask = _bool_mask(df, ['is_prime', 'prime_status_bool'])
+    prime_count = int(prime_mask.sum()) if prime_mask is not None else 0
+
+    shopee_score = _numeric(df, 'shopee_suitability_score')
+    prime_score = _numeric(df, 'prime_confidence_score')
+    scores = pd.DataFrame({
+        'shopee_suitability_score': shopee_score,
+        'prime_confidence_score': prime_score,
+        'relevance_score': _numeric(df, 'relevance_score'),
+        'is_group_a': df['shopee_group'].eq('A') if has_group else pd.Series(False, index=df.index)
+    }, index=df.index)
+
+    hours = _numeric(df, 'ship_hours')
+    valid_hours = hours.dropna()
+    ship_categories = pd.cut(valid_hours, bins=SHIP_CATEGORY_BINS, labels=SHIP_CATEGORY_LABELS).value_counts(sort=False)
+
+    confidence = df['classification_confidence'] if 'classification_confidence' in df.columns else pd.Series(dtype=object)
+    fba_mask = _bool_mask(df, ['is_fba'])
+    brand_filled = 0
+    if 'extracted_brand' in df.columns:
+        brand_filled = int((df['extracted_brand'].notna() & df['extracted_brand'].astype(str).ne('')).sum())
+
+    return {
+        'total': total,
+        # グループ
+        'group_counts': {str(k): int(v) for k, v in group_counts.items()},
+        'group_a': int(group_counts.get('A', 0)),
+        'group_b': int(group_counts.get('B', 0)),
+        'group_c': int(group_counts.get('C', 0)),
+        'premium_count': int(confidence.eq('premium').sum()),
+        'high_confidence_count': int(confidence.eq('high').sum()),
+        # Prime
+        'prime_count': prime_count,
+        'non_prime_count': total - prime_count,
+        'prime_rate': (prime_count / total * 100) if total > 0 else 0.0,
+        'prime_avg_shopee_score': _mean(shopee_score[prime_mask]) if prime_mask is not None else 0.0,
+        'non_prime_avg_shopee_score': _mean(shopee_score[~prime_mask]) if prime_mask is not None else 0.0,
+        'fba_count': int(fba_mask.sum()) if fba_mask is not None else 0,
+        # スコア平均
+        'avg_shopee_score': _mean(shopee_score),
+        'avg_prime_score': _mean(prime_score),
+        'avg_ship_confidence': _mean(_numeric(df, 'ship_confidence')),
+        'brand_count': brand_filled,
+        # 発送時間
+        'with_shipping': int(len(valid_hours)),
+        'fast_24h': int((valid_hours <= 24).sum()),
+        'medium_48h': int(((valid_hours > 24) & (valid_hours <= 48)).sum()),
+        'slow_48h_plus': int((valid_hours > 48).sum()),
+        'avg_ship_hours': _mean(valid_hours),
+        'median_ship_hours': float(valid_hours.median()) if len(valid_hours) else 0.0,
+        'ship_category_counts': {str(k): int(v) for k, v in ship_categories.items()},
+        # ブランド・美容用語別
+        'brand_frame': _brand_aggregates(df, scores),
+        'keyword_frame': _keyword_aggregates(df, scores, keywords or BEAUTY_KEYWORDS)
+    }
+
+def get_run_summary(session_state, df=None):
+    """
+    セッション単位でキャッシュされたサマリーを取得
+
+    processed_df は再代入でのみ更新されるため、元のDataFrameオブジェクトが同一である間は
+    再計算しない（タブ切り替え・再実行で全件走査を繰り返さない）。
+
+    Args:
+        session_state: Streamlitのsession_state（辞書互換）
+        df: 対象データフレーム（Noneで session_state.processed_df）
+
+    Returns:
+        dict: compute_run_summary の結果
+    """
+    if df is None:
+        df = session_state.get('processed_df')
+    if session_state.get(SUMMARY_SOURCE_STATE_KEY) is df and session_state.get(SUMMARY_STATE_KEY) is not None:
+        return session_state[SUMMARY_STATE_KEY]
+
+    summary = compute_run_summary(df)
+    # 元DataFrameへの参照を保持（同一性判定。idの再利用による誤ヒットも防ぐ）
+    session_state[SUMMARY_SOURCE_STATE_KEY] = df
+    session_state[SUMMARY_STATE_KEY] = summary
+    return summary
@@ -0,0 +1,115 @@
+# ShippingTime取得率の集計エンジン（欠損理由の判定・カテゴリ別指標を1回のgroupbyで算出）
+import numpy as np
+import pandas as pd
+
+MISSING_REASON_API_FAILURE = "API呼び出し失敗"
+MISSING_REASON_THIRD_PARTY = "サードパーティ出品者"
+MISSING_REASON_NOT_PRIME = "非Prime商品"
+MISSING_REASON_ALL_FALLBACK_FAILED = "全フォールバック失敗"
+MISSING_REASON_UNKNOWN = "不明"
+
+# カテゴリ別分析に使うカラム（先に見つかったカラムを使用）
+CATEGORY_COLUMNS = ['main_category', 'amazon_brand', 'seller_type', 'brand']
+
+AMAZON_FALLBACK_REASON = "Amazon本体フォールバック"
+FBA_FALLBACK_REASON = "FBAフォールバック"
+
+# aggregate_shipping_metrics の出力カラム（集計キーを除く）
+METRIC_COLUMNS = [
+    'total', 'with_shipping', 'success_rate', 'miss_rate',
+    'amazon_fallback', 'fba_fallback', 'fallback_total',
+    'fast_24h', 'medium_48h', 'slow_48h_plus', 'avg_hours', 'median_hours'
+]
+
+def _column(df, name, default):
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
+
+def classify_missing_reasons(df):
+    """
+    ShippingTime欠損理由の判定（行ループなし）
+
+    判定順: API呼び出し失敗 → サードパーティ出品者 → 非Prime商品 → 全フォールバック失敗 → 不明
+
+    Returns:
+        pd.Series: 欠損行は理由、取得済みの行はNaN
+    """
+    missing = pd.to_numeric(_column(df, 'ship_hours', np.nan), errors='coerce').isna()
+    is_prime = _column(df, 'is_prime', False).fillna(False).astype(bool)
+    reason_text = _column(df, 'classification_reason', '').fillna('').astype(str)
+    reasons = np.select(
+        [
+            _column(df, 'api_source', '').eq('fallback'),
+            _column(df, 'seller_type', '').eq('third_party'),
+            ~is_prime,
+            reason_text.str.startswith('最終')
+        ],
+        [
+            MISSING_REASON_API_FAILURE,
+            MISSING_REASON_THIRD_PARTY,
+            MISSING_REASON_NOT_PRIME,
+            MISSING_REASON_ALL_FALLBACK_FAILED
+        ],
+        default=MISSING_REASON_UNKNOWN
+    )
+    return pd.Series(reasons, index=df.index, dtype=object).where(missing)
+
+def detect_category_column(df, candidates=None):
+    """カテゴリ別分析に使うカラムの検出（値が1件も無いカラムは除外、無い場合はNone）"""
+    for col in candidates or CATEGORY_COLUMNS:
+        if col in df.columns and df[col].notna().any():
+            return col
+    return None
+
+def aggregate_shipping_metrics(df, by=None, min_count=1):
+    """
+    ShippingTime指標の集計（取得率・フォールバック件数・24/48/48h超分布・平均/中央値）
+
+    Args:
+        df: ship_hours を含むデータフレーム
+        by: 集計キー（カラム名またはそのリスト、Noneで全体1行）
+        min_count: これ未満の件数のグループは除外
+
+    Returns:
+        pd.DataFrame: 1行/グループの集計表（取得率降順）
+    """
+    hours = pd.to_numeric(_column(df, 'ship_hours', np.nan), errors='coerce')
+    reason = _column(df, 'classification_reason', '').fillna('').astype(str)
+    work = pd.DataFrame({
+        'ship_hours': hours,
+        'has_ship': hours.notna(),
+        'amazon_fallback': reason.eq(AMAZON_FALLBACK_REASON),
+        'fba_fallback': reason.eq(FBA_FALLBACK_REASON),
+        'any_fallback': reason.str.contains('フォールバック', regex=False),
+        'fast': hours <= 24,
+        'medium': (hours > 24) & (hours <= 48),
+        'slow': hours > 48
+    }, index=df.index)
+
+    keys = [by] if isinstance(by, str) else list(by or [])
+    for key in keys:
+        work[key] = df[key]
+    if not keys:
+        work['bucket'] = 'overall'
+        keys = ['bucket']
+
+    result = work.groupby(keys, sort=False, dropna=True).agg(
+        total=('has_ship', 'size'),
+        with_shipping=('has_ship', 'sum'),
+        amazon_fallback=('amazon_fallback', 'sum'),
+        fba_fallback=('fba_fallback', 'sum'),
+        fallback_total=('any_fallback', 'sum'),
+        fast_24h=('fast', 'sum'),
+        medium_48h=('medium', 'sum'),
+        slow_48h_plus=('slow', 'sum'),
+        avg_hours=('ship_hours', 'mean'),
+        median_hours=('ship_hours', 'median')
+    ).reset_index()
+
+    result = result[result['total'] >= min_count]
+    result['success_rate'] = result['with_shipping'] / result['total'] * 100
+    result['miss_rate'] = 100 - result['success_rate']
+    return result[keys + METRIC_COLUMNS].sort_values(
+        ['success_rate', 'total'], ascending=[False, False], ignore_index=True
+    )
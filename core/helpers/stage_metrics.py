@@ -0,0 +1,200 @@
+# ステージ別計測（実時間・呼び出し数・再試行・キャッシュヒット・p50/p95/p99レイテンシ）
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
+import pandas as pd
+
+# パイプラインのステージ（表示順）
+PIPELINE_STAGES = {
+    'cleanse': 'クレンジング',
+    'keepa': 'Keepaランク',
+    'brand': 'ブランド抽出',
+    'translate': '日本語化',
+    'catalog_search': 'カタログ検索',
+    'offers': 'オファー取得',
+    'scoring': 'スコア計算',
+    'classify': '分類',
+    'ng': 'NGワード',
+    'export': '出力'
+}
+
+# stage_frame の出力カラム
+STAGE_COLUMNS = [
+    'stage', 'label', 'calls', 'errors', 'retries', 'cache_hits', 'total_seconds', 'share',
+    'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'calls_per_second'
+]
+
+_active_metrics = ContextVar('active_stage_metrics', default=None)
+
+class StageMetrics:
+    """1回の処理実行のステージ別計測値"""
+
+    def __init__(self, source=''):
+        self.source = source
+        self.started_at = None
+        self.finished_at = None
+        self.items = 0
+        self.failed_items = 0
+        self._durations = {}
+        self._errors = {}
+        self._retries = {}
+        self._cache_hits = {}
+        # 並列ワーカーからも記録されるためロックで保護
+        self._lock = threading.Lock()
+
+    # ======================== 記録 ========================
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        return self
+
+    def finish(self, items=None, failed_items=None):
+        """実行終了（処理件数・失敗件数を確定）"""
+        self.finished_at = time.perf_counter()
+        if items is not None:
+            self.items = int(items)
+        if failed_items is not None:
+            self.failed_items = int(failed_items)
+        return self
+
+    def record(self, stage, seconds, error=False):
+        """1呼び出しの所要時間を記録"""
+        with self._lock:
+            self._durations.setdefault(stage, []).append(float(seconds))
+        if error:
+            self.record_error(stage)
+
+    def record_error(self, stage, count=1):
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + count
+
+    def record_retry(self, stage, count=1):
+        with self._lock:
+            self._retries[stage] = self._retries.get(stage, 0) + count
+
+    def record_cache_hit(self, stage, count=1):
+        with self._lock:
+            self._cache_hits[stage] = self._cache_hits.get(stage, 0) + count
+
+    @contextmanager
+    def stage(self, name):
+        """ステージ1呼び出しの計測（例外はエラーとして記録して再送出）"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, time.perf_counter() - start, error=True)
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    # ======================== 集計 ========================
+
+    @property
+    def wall_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def stage_frame(self):
+        """
+        ステージ別集計表（PIPELINE_STAGES の順、未知のステージは末尾）
+
+        Returns:
+            pd.DataFrame: STAGE_COLUMNS
+        """
+        stages = set(self._durations) | set(self._errors) | set(self._retries) | set(self._cache_hits)
+        ordered = [s for s in PIPELINE_STAGES if s in stages] + sorted(stages - set(PIPELINE_STAGES))
+        total_measured = sum(sum(v) for v in self._durations.values())
+
+        rows = []
+        for stage in ordered:
+            durations = np.asarray(self._durations.get(stage, []), dtype=float)
+            total = float(durations.sum()) if len(durations) else 0.0
+            p50, p95, p99 = (np.percentile(durations, [50, 95, 99]) * 1000) if len(durations) else (0.0, 0.0, 0.0)
+            rows.append({
+                'stage': stage,
+                'label': PIPELINE_STAGES.get(stage, stage),
+                'calls': int(len(durations)),
+                'errors': int(self._errors.get(stage, 0)),
+                'retries': int(self._retries.get(stage, 0)),
+                'cache_hits': int(self._cache_hits.get(stage, 0)),
+                'total_seconds': total,
+                'share': (total / total_measured * 100) if total_measured > 0 else 0.0,
+                'mean_ms': float(durations.mean() * 1000) if len(durations) else 0.0,
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(durations.max() * 1000) if len(durations) else 0.0,
+                'calls_per_second': (len(durations) / total) if total > 0 else 0.0
+            })
+        return pd.DataFrame(rows, columns=STAGE_COLUMNS)
+
+    def overview(self):
+        """
+        実行全体の値（件数・実時間・スループット・エラー率）
+
+        Returns:
+            dict: items / failed_items / wall_seconds / items_per_minute / error_rate / success_rate /
+                  total_retries / total_cache_hits / source
+        """
+        wall = self.wall_seconds
+        items = self.items
+        return {
+            'source': self.source,
+            'items': items,
+            'failed_items': self.failed_items,
+            'wall_seconds': wall,
+            'items_per_minute': (items / wall * 60) if wall > 0 else 0.0,
+            'error_rate': (self.failed_items / items * 100) if items > 0 else 0.0,
+            'success_rate': ((items - self.failed_items) / items * 100) if items > 0 else 0.0,
+            'total_retries': int(sum(self._retries.values())),
+            'total_cache_hits': int(sum(self._cache_hits.values()))
+        }
+
+# ======================== 実行中の計測（呼び出し先からの記録） ========================
+
+@contextmanager
+def activate_metrics(metrics):
+    """
+    計測対象の実行範囲を指定（範囲内の stage_timer / record_* はこの metrics に記録される）
+
+    ContextVarで保持するため、スレッド・非同期タスクごとに独立する。
+    """
+    token = _active_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+
+def get_active_metrics():
+    """実行中の計測（無い場合はNone）"""
+    return _active_metrics.get()
+
+@contextmanager
+def stage_timer(name):
+    """実行中の計測へのステージ記録（計測外では何もしない）"""
+    metrics = _active_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+def record_stage_error(name, count=1):
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record_error(name, count)
+
+def record_stage_retry(name, count=1):
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record_retry(name, count)
+
+def record_stage_cache_hit(name, count=1):
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record_cache_hit(name, count)
@@ -0,0 +1,185 @@
+# 商品名の埋め込み（ハッシュ化文字n-gram）と近似最近傍探索（ランダム超平面LSH）
+import re
+import zlib
+import unicodedata
+import numpy as np
+
+EMBEDDING_DIM = 512
+NGRAM_SIZES = (2, 3)
+
+# LSH設定: 距離0.15付近の近傍を高い再現率で拾える構成（16テーブル × 8ビット）
+LSH_TABLES = 16
+LSH_BITS = 8
+LSH_SEED = 20240615
+# これ以下の件数では全件との厳密計算を行う（LSHより速い）
+BRUTE_FORCE_LIMIT = 2048
+
+_SEPARATOR_PATTERN = re.compile(r"[\s　・/|,.:;!?！？、。「」『』【】\[\]()（）\-_~〜]+")
+_BIT_WEIGHTS = (1 << np.arange(LSH_BITS)).astype(np.int64)
+
+def normalize_title(title):
+    """埋め込み用の正規化（NFKC・小文字化・区切り記号を空白1文字に統一）"""
+    if not title or not isinstance(title, str):
+        return ""
+    text = unicodedata.normalize('NFKC', title).lower()
+    return _SEPARATOR_PATTERN.sub(' ', text).strip()
+
+def embed_title(title, dim=EMBEDDING_DIM):
+    """
+    商品名をハッシュ化文字n-gramベクトルに変換（L2正規化済み）
+
+    CRC32でn-gramを次元と符号に割り当てるため、実行環境・プロセスをまたいで同じベクトルになる。
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    text = normalize_title(title)
+    if not text:
+        return vector
+    padded = f" {text} "
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            code = zlib.crc32(padded[i:i + n].encode('utf-8'))
+            vector[code % dim] += 1.0 if (code >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+def embed_titles(titles, dim=EMBEDDING_DIM):
+    """
+    複数商品名の埋め込み（同一の正規化タイトルは1回だけ計算）
+
+    Returns:
+        np.ndarray: (件数, dim) のfloat32配列
+    """
+    titles = list(titles)
+    cache = {}
+    vectors = np.zeros((len(titles), dim), dtype=np.float32)
+    for i, title in enumerate(titles):
+        key = normalize_title(title)
+        if key not in cache:
+            cache[key] = embed_title(key, dim)
+        vectors[i] = cache[key]
+    return vectors
+
+def cosine_distance(a, b):
+    """L2正規化済みベクトル同士のコサイン距離（1 - 内積）"""
+    return 1.0 - np.dot(a, b.T)
+
+class HashedLSHIndex:
+    """ランダム超平面LSHによる近似最近傍インデックス（コサイン距離）"""
+
+    def __init__(self, dim=EMBEDDING_DIM, tables=LSH_TABLES, bits=LSH_BITS, seed=LSH_SEED):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.planes = rng.standard_normal((tables, bits, dim)).astype(np.float32)
+        self.buckets = [dict() for _ in range(tables)]
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _codes(self, vectors):
+        """(件数, テーブル数) のバケットコード"""
+        projections = np.einsum('tbd,nd->ntb', self.planes, vectors) > 0
+        return projections.astype(np.int64) @ _BIT_WEIGHTS[:self.planes.shape[1]]
+
+    def add(self, vectors):
+        """
+        ベクトルの追加
+
+        Returns:
+            np.ndarray: 追加したベクトルのID
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = len(self.vectors)
+        ids = np.arange(start, start + len(vectors))
+        for row_id, codes in zip(ids, self._codes(vectors)):
+            for table, code in enumerate(codes):
+                self.buckets[table].setdefault(int(code), []).append(int(row_id))
+        self.vectors = np.vstack([self.vectors, vectors]) if start else vectors.copy()
+        return ids
+
+    def nearest(self, vectors, max_distance=1.0, k=1):
+        """
+        各クエリの近傍を距離の近い順に最大k件取得
+
+        Args:
+            vectors: (件数, dim) のクエリ
+            max_distance: これを超える近傍は無しとして扱う
+            k: 1クエリあたりの近傍の件数
+
+        Returns:
+            tuple: ((件数, k) の近傍ID配列（無しは-1）, (件数, k) の距離配列（無しはnan）)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = len(vectors)
+        k = max(1, int(k))
+        nearest_ids = np.full((n, k), -1, dtype=np.int64)
+        nearest_dist = np.full((n, k), np.nan)
+        if n == 0 or len(self.vectors) == 0:
+            return nearest_ids, nearest_dist
+
+        if len(self.vectors) <= BRUTE_FORCE_LIMIT:
+            distances = cosine_distance(vectors, self.vectors)
+            width = min(k, distances.shape[1])
+            best = np.argpartition(distances, width - 1, axis=1)[:, :width]
+            best_dist = np.take_along_axis(distances, best, axis=1)
+            order = np.argsort(best_dist, axis=1, kind='stable')
+            best = np.take_along_axis(best, order, axis=1)
+            best_dist = np.take_along_axis(best_dist, order, axis=1)
+            hit = best_dist <= max_distance
+            nearest_ids[:, :width] = np.where(hit, best, -1)
+            nearest_dist[:, :width] = np.where(hit, best_dist, np.nan)
+            return nearest_ids, nearest_dist
+
+        for i, codes in enumerate(self._codes(vectors)):
+            candidates = set()
+            for table, code in enumerate(codes):
+                candidates.update(self.buckets[table].get(int(code), ()))
+            if not candidates:
+                continue
+            candidate_ids = np.fromiter(candidates, dtype=np.int64)
+            distances = cosine_distance(vectors[i], self.vectors[candidate_ids])
+            best = np.argsort(distances, kind='stable')[:k]
+            best = best[distances[best] <= max_distance]
+            nearest_ids[i, :len(best)] = candidate_ids[best]
+            nearest_dist[i, :len(best)] = distances[best]
+        return nearest_ids, nearest_dist
+
+    def earliest_neighbours(self, max_distance):
+        """
+        インデックス内の各ベクトルについて、より前に追加された近傍のうち最も早いものを取得
+
+        バッチ内重複の判定用（各行は先に現れた行の重複として扱う）。
+
+        Returns:
+            tuple: (近傍ID配列（無しは-1）, 距離配列（無しはnan）)
+        """
+        n = len(self.vectors)
+        neighbour_ids = np.full(n, -1, dtype=np.int64)
+        neighbour_dist = np.full(n, np.nan)
+        if n < 2:
+            return neighbour_ids, neighbour_dist
+
+        if n <= BRUTE_FORCE_LIMIT:
+            distances = cosine_distance(self.vectors, self.vectors)
+            mask = (distances < max_distance) & np.tri(n, k=-1, dtype=bool)
+            has_neighbour = mask.any(axis=1)
+            first = mask.argmax(axis=1)
+            neighbour_ids[has_neighbour] = first[has_neighbour]
+            neighbour_dist[has_neighbour] = distances[np.arange(n), first][has_neighbour]
+            return neighbour_ids, neighbour_dist
+
+        for i, codes in enumerate(self._codes(self.vectors)):
+            candidates = set()
+            for table, code in enumerate(codes):
+                candidates.update(j for j in self.buckets[table].get(int(code), ()) if j < i)
+            if not candidates:
+                continue
+            candidate_ids = np.sort(np.fromiter(candidates, dtype=np.int64))
+            distances = cosine_distance(self.vectors[i], self.vectors[candidate_ids])
+            within = np.flatnonzero(distances < max_distance)
+            if len(within):
+                neighbour_ids[i] = candidate_ids[within[0]]
+                neighbour_dist[i] = float(distances[within[0]])
+        return neighbour_ids, neighbour_dist
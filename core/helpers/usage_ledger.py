@@ -0,0 +1,173 @@
+# 使用量台帳（実行・ステージ・プロバイダ別のリクエスト数・スロットリング・トークン数・推定コスト）
+import json
+import pathlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+import pandas as pd
+
+# 料金（USD）: per_request はリクエスト1件、input_per_1m / output_per_1m は100万トークンあたり
+# キーは 'プロバイダ:操作'（モデル名・API操作名）→ 'プロバイダ' の順に参照
+# SP-APIはリクエスト単位の料金を0としている（契約に応じて data/usage_pricing.json で上書き）
+DEFAULT_USAGE_PRICING = {
+    'openai:gpt-4o': {'input_per_1m': 2.50, 'output_per_1m': 10.00},
+    'openai:gpt-4o-mini': {'input_per_1m': 0.15, 'output_per_1m': 0.60},
+    'gemini:gemini-1.5-pro': {'input_per_1m': 1.25, 'output_per_1m': 5.00},
+    'gemini:gemini-1.5-pro-latest': {'input_per_1m': 1.25, 'output_per_1m': 5.00},
+    'sp_api': {'per_request': 0.0},
+    # Keepaは月額のトークンプラン（リクエスト単位の料金なし）
+    'keepa': {'per_request': 0.0},
+    # Shopee Open Platformは無料（レート制限のみ）
+    'shopee': {'per_request': 0.0}
+}
+
+USAGE_PRICING_FILE = 'usage_pricing.json'
+
+# usage_frame の出力カラム
+USAGE_COLUMNS = [
+    'stage', 'provider', 'operation', 'requests', 'throttled', 'retries', 'errors',
+    'input_tokens', 'output_tokens', 'cost_usd'
+]
+_COUNT_COLUMNS = ['requests', 'throttled', 'retries', 'errors', 'input_tokens', 'output_tokens']
+
+_active_usage = ContextVar('active_usage_ledger', default=None)
+
+def load_usage_pricing(data_dir=None):
+    """
+    料金表（DEFAULT_USAGE_PRICING に data/usage_pricing.json の内容を上書き）
+
+    Args:
+        data_dir: データディレクトリ（Noneでリポジトリの data/）
+    """
+    pricing = {key: dict(value) for key, value in DEFAULT_USAGE_PRICING.items()}
+    data_dir = pathlib.Path(data_dir) if data_dir else pathlib.Path(__file__).resolve().parents[2] / 'data'
+    pricing_path = data_dir / USAGE_PRICING_FILE
+    if pricing_path.exists():
+        try:
+            with open(pricing_path, 'r', encoding='utf-8') as f:
+                for key, value in json.load(f).items():
+                    pricing.setdefault(key, {}).update(value)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ {USAGE_PRICING_FILE} 読み込みエラー: {e}。既定の料金表を使用します。")
+    return pricing
+
+def estimate_cost(pricing, provider, operation, requests=0, input_tokens=0, output_tokens=0):
+    """推定コスト（USD、料金表に無いプロバイダは0）"""
+    rates = pricing.get(f"{provider}:{operation}") or pricing.get(provider) or {}
+    return (
+        requests * rates.get('per_request', 0.0)
+        + input_tokens / 1_000_000 * rates.get('input_per_1m', 0.0)
+        + output_tokens / 1_000_000 * rates.get('output_per_1m', 0.0)
+    )
+
+class UsageLedger:
+    """1回の処理実行の使用量台帳"""
+
+    def __init__(self, pricing=None):
+        self.pricing = pricing if pricing is not None else load_usage_pricing()
+        self._entries = {}
+        # 並列ワーカー（ショップ単位のスレッド等）からも記録されるためロックで保護
+        self._lock = threading.Lock()
+
+    def record(self, provider, stage, operation='', **counts):
+        """
+        使用量の加算
+
+        Args:
+            provider: 'sp_api' / 'openai' / 'gemini' 等
+            stage: パイプラインのステージ（PIPELINE_STAGES のキー）
+            operation: API操作名またはモデル名
+            **counts: requests / throttled / retries / errors / input_tokens / output_tokens
+        """
+        unknown = set(counts) - set(_COUNT_COLUMNS)
+        if unknown:
+            raise ValueError(f"未知の使用量項目です: {', '.join(sorted(unknown))}")
+        with self._lock:
+            entry = self._entries.setdefault((stage, provider, operation), dict.fromkeys(_COUNT_COLUMNS, 0))
+            for name, value in counts.items():
+                entry[name] += int(value or 0)
+
+    def usage_frame(self):
+        """
+        ステージ・プロバイダ・操作別の使用量と推定コスト
+
+        Returns:
+            pd.DataFrame: USAGE_COLUMNS
+        """
+        with self._lock:
+            entries = {key: dict(entry) for key, entry in self._entries.items()}
+        rows = []
+        for (stage, provider, operation), entry in sorted(entries.items()):
+            cost = estimate_cost(self.pricing, provider, operation, entry['requests'],
+                                 entry['input_tokens'], entry['output_tokens'])
+            rows.append({'stage': stage, 'provider': provider, 'operation': operation, **entry, 'cost_usd': cost})
+        return pd.DataFrame(rows, columns=USAGE_COLUMNS)
+
+    def totals(self, items=0, listed_items=0):
+        """
+        実行全体の使用量（件数あたりの値は件数が0の場合0）
+
+        Args:
+            items: 処理件数
+            listed_items: 出品対象件数（グループA等）
+
+        Returns:
+            dict: requests / throttled / retries / errors / input_tokens / output_tokens / cost_usd /
+                  requests_per_item / cost_per_item / cost_per_listed_item
+        """
+        return summarize_usage(self.usage_frame(), items, listed_items)
+
+def summarize_usage(usage, items=0, listed_items=0):
+    """使用量の合計と件数あたりの値（usage_frame・レジストリの記録のどちらにも使用）"""
+    totals = {name: int(usage[name].sum()) if not usage.empty else 0 for name in _COUNT_COLUMNS}
+    cost = float(usage['cost_usd'].sum()) if not usage.empty else 0.0
+    return {
+        **totals,
+        'cost_usd': cost,
+        'requests_per_item': (totals['requests'] / items) if items else 0.0,
+        'cost_per_item': (cost / items) if items else 0.0,
+        'cost_per_listed_item': (cost / listed_items) if listed_items else 0.0
+    }
+
+# ======================== 実行中の記録（呼び出し先からの記録） ========================
+
+@contextmanager
+def activate_usage(ledger):
+    """記録対象の実行範囲を指定（範囲内の record_api_usage / record_llm_usage はこの台帳に記録される）"""
+    token = _active_usage.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _active_usage.reset(token)
+
+def get_active_usage():
+    """実行中の台帳（無い場合はNone）"""
+    return _active_usage.get()
+
+def record_api_usage(provider, stage, operation='', **counts):
+    """実行中の台帳への加算（台帳外では何もしない）"""
+    ledger = _active_usage.get()
+    if ledger is not None:
+        ledger.record(provider, stage, operation, **counts)
+
+def record_llm_usage(provider, stage, model, response):
+    """
+    LLMレスポンスのトークン数を記録（1リクエストとして加算）
+
+    OpenAI形式（usage.prompt_tokens / completion_tokens）と
+    Gemini形式（usage_metadata.prompt_token_count / candidates_token_count）に対応。
+    """
+    ledger = _active_usage.get()
+    if ledger is None:
+        return
+    input_tokens = output_tokens = 0
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        input_tokens = getattr(usage, 'prompt_tokens', 0)
+        output_tokens = getattr(usage, 'completion_tokens', 0)
+    else:
+        metadata = getattr(response, 'usage_metadata', None)
+        if metadata is not None:
+            input_tokens = getattr(metadata, 'prompt_token_count', 0)
+            output_tokens = getattr(metadata, 'candidates_token_count', 0)
+    ledger.record(provider, stage, model, requests=1, input_tokens=input_tokens, output_tokens=output_tokens)
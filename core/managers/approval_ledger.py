@@ -0,0 +1,323 @@
+"""
+承認台帳（Approval Ledger）管理システム専用モジュール
+
+責任:
+- ASIN単位の承認/却下判断の永続化（判断・理由・承認者・日時）
+- 判断済みASINの一括参照（DataFrame結合用）
+- セッション・再実行をまたいだ承認結果の再利用
+- 判断ごとの追記ログ（JSONL）と定期的なスナップショットへの集約
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立
+- テスト容易性確保
+"""
+
+import json
+import pathlib
+import pandas as pd
+from typing import Dict, Any, Optional, Union, Iterable
+from datetime import datetime
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEDGER_VERSION = "1.0"
+VALID_DECISIONS = ("approved", "rejected")
+LEDGER_COLUMNS = ["ledger_decision", "ledger_reason", "ledger_approver", "ledger_decided_at"]
+# 追記ログがこの行数に達したらスナップショットへ集約してログを空にする
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+class ApprovalLedgerManager:
+    """ASINキーの承認台帳を管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None,
+                 compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        """
+        ApprovalLedgerManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            compact_threshold: 追記ログをスナップショットへ集約する行数
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.ledger_path = self.data_dir / 'approval_ledger.json'
+        self.log_path = self.data_dir / 'approval_ledger.log.jsonl'
+        self.compact_threshold = max(1, int(compact_threshold))
+        self.log_lines = 0
+        self.log_corrupted = False
+        self.entries = self.load_ledger()
+        if self.log_corrupted:
+            # 不正な行の後ろに追記しないよう、先に集約してログを作り直す
+            self.save_ledger()
+
+        logger.info(f"ApprovalLedgerManager初期化完了: {self.ledger_path} ({len(self.entries)}件)")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    def load_ledger(self) -> Dict[str, Dict[str, Any]]:
+        """
+        承認台帳の読み込み（スナップショットに追記ログを順に適用）
+
+        Returns:
+            ASIN → 判断情報 の辞書
+        """
+        entries = {}
+        try:
+            if self.ledger_path.exists():
+                with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                    ledger_data = json.load(f)
+                entries = ledger_data.get("entries", {})
+                logger.info(f"承認台帳読み込み成功: {self.ledger_path}")
+        except Exception as e:
+            logger.error(f"承認台帳読み込みエラー: {e}")
+
+        self.log_lines = 0
+        self.log_corrupted = False
+        try:
+            if self.log_path.exists():
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        self.log_lines += 1
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 書き込み途中で終了した行は無視
+                            self.log_corrupted = True
+                            logger.warning(f"承認台帳ログの不正な行を無視しました: {line[:80]!r}")
+                            continue
+                        if record.get("op") == "remove":
+                            entries.pop(record.get("asin"), None)
+                        elif record.get("asin"):
+                            entries[record["asin"]] = record["entry"]
+        except Exception as e:
+            logger.error(f"承認台帳ログ読み込みエラー: {e}")
+        return entries
+
+    def save_ledger(self) -> bool:
+        """
+        承認台帳の集約（スナップショットを一時ファイル経由で置き換え、追記ログを削除）
+
+        Returns:
+            保存成功フラグ
+        """
+        try:
+            self.data_dir.mkdir(exist_ok=True)
+            ledger_data = {
+                "version": LEDGER_VERSION,
+                "last_updated": datetime.now().isoformat(),
+                "entries": self.entries
+            }
+            tmp_path = self.ledger_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(ledger_data, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.ledger_path)
+            # スナップショットに反映済みのログは不要（削除前に終了しても再適用の結果は同じ）
+            self.log_path.unlink(missing_ok=True)
+            self.log_lines = 0
+            return True
+        except Exception as e:
+            logger.error(f"承認台帳保存エラー: {e}")
+            return False
+
+    def _append_log(self, records) -> bool:
+        """
+        判断の変更を追記ログに書き込む（行数が閾値に達したら集約）
+
+        Args:
+            records: {"op": "set"/"remove", "asin": ..., "entry": ...} のリスト
+
+        Returns:
+            保存成功フラグ
+        """
+        try:
+            self.data_dir.mkdir(exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+            self.log_lines += len(records)
+        except Exception as e:
+            logger.error(f"承認台帳ログ書き込みエラー: {e}")
+            return False
+        if self.log_lines >= self.compact_threshold:
+            return self.save_ledger()
+        return True
+
+    def record_decisions(self, asins: Iterable[str], decision: str,
+                         reason: str = "", approver: str = "システム",
+                         decided_at: Optional[datetime] = None) -> int:
+        """
+        複数ASINの判断を一括記録（保存は1回）
+
+        Args:
+            asins: 対象ASIN群
+            decision: 'approved' または 'rejected'
+            reason: 判断理由
+            approver: 承認者名
+            decided_at: 判断日時（Noneの場合は現在時刻）
+
+        Returns:
+            記録件数
+        """
+        if decision not in VALID_DECISIONS:
+            logger.warning(f"不正な判断種別: {decision}")
+            return 0
+
+        timestamp = (decided_at or datetime.now()).isoformat()
+        records = []
+        for asin in asins:
+            asin = str(asin).strip() if asin is not None else ''
+            if not asin or asin.upper() == 'N/A':
+                continue
+            entry = {
+                "decision": decision,
+                "reason": reason,
+                "approver": approver,
+                "decided_at": timestamp
+            }
+            self.entries[asin] = entry
+            records.append({"op": "set", "asin": asin, "entry": entry})
+
+        if records:
+            self._append_log(records)
+        return len(records)
+
+    def record_decision(self, asin: str, decision: str, reason: str = "",
+                        approver: str = "システム") -> bool:
+        """
+        単一ASINの判断を記録
+
+        Returns:
+            記録成功フラグ
+        """
+        return self.record_decisions([asin], decision, reason, approver) == 1
+
+    def get_decision(self, asin: str) -> Optional[Dict[str, Any]]:
+        """
+        ASINの判断情報を取得
+
+        Returns:
+            判断情報（未判断の場合はNone）
+        """
+        return self.entries.get(str(asin).strip())
+
+    def remove_decisions(self, asins: Iterable[str]) -> int:
+        """
+        判断の取り消し（再レビュー対象に戻す）
+
+        Returns:
+            削除件数
+        """
+        records = []
+        for asin in asins:
+            asin = str(asin).strip()
+            if self.entries.pop(asin, None) is not None:
+                records.append({"op": "remove", "asin": asin})
+        if records:
+            self._append_log(records)
+        return len(records)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        台帳をASINインデックスのDataFrameに変換（結合用）
+
+        Returns:
+            index=ASIN, columns=ledger_decision/ledger_reason/ledger_approver/ledger_decided_at
+        """
+        if not self.entries:
+            return pd.DataFrame(columns=LEDGER_COLUMNS, index=pd.Index([], name='asin'))
+
+        ledger_df = pd.DataFrame.from_dict(self.entries, orient='index')
+        ledger_df = ledger_df.rename(columns={
+            "decision": "ledger_decision",
+            "reason": "ledger_reason",
+            "approver": "ledger_approver",
+            "decided_at": "ledger_decided_at"
+        })
+        ledger_df.index.name = 'asin'
+        return ledger_df.reindex(columns=LEDGER_COLUMNS)
+
+    def join_decisions(self, asins: pd.Series) -> pd.DataFrame:
+        """
+        ASIN列に台帳を左結合
+
+        Args:
+            asins: ASINのSeries（インデックスは保持される）
+
+        Returns:
+            asinsと同じインデックスを持つ台帳カラムのDataFrame
+        """
+        keys = asins.astype(str).str.strip().rename('asin').to_frame()
+        return keys.join(self.to_frame(), on='asin')[LEDGER_COLUMNS]
+
+    def get_ledger_statistics(self) -> Dict[str, Any]:
+        """
+        台帳統計情報の取得
+
+        Returns:
+            統計情報
+        """
+        decisions = [entry.get("decision") for entry in self.entries.values()]
+        return {
+            "total": len(decisions),
+            "approved": decisions.count("approved"),
+            "rejected": decisions.count("rejected"),
+            "pending_log_lines": self.log_lines,
+            "ledger_path": str(self.ledger_path)
+        }
+
+# 便利関数
+def create_approval_ledger_manager(data_dir: Optional[Union[str, pathlib.Path]] = None,
+                                   **kwargs) -> ApprovalLedgerManager:
+    """
+    ApprovalLedgerManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+        **kwargs: compact_threshold
+
+    Returns:
+        ApprovalLedgerManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return ApprovalLedgerManager(data_dir, **kwargs)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_approval_ledger_manager(tmp_dir)
+
+        print("=== 承認台帳システムテスト ===")
+        manager.record_decisions(["B000000001", "B000000002"], "approved", "高Shopee適性", "test_user")
+        manager.record_decision("B000000003", "rejected", "NGワード該当", "test_user")
+
+        reloaded = create_approval_ledger_manager(tmp_dir)
+        print(f"再読み込み後の統計: {reloaded.get_ledger_statistics()}")
+        print(reloaded.join_decisions(pd.Series(["B000000001", "B000000003", "B000000009"])))
+
+        print("テスト完了")
@@ -0,0 +1,299 @@
+"""
+カタログ検索キャッシュ（Catalog Search Cache）管理システム専用モジュール
+
+責任:
+- 日本語商品名 → ASIN候補（上位k件＋スコア）の永続化
+- 検索結果なし（ネガティブキャッシュ）の短期保持
+- 正規化タイトルによるキー生成と有効期限管理
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立
+- テスト容易性確保
+"""
+
+import json
+import re
+import pathlib
+import unicodedata
+from typing import Dict, List, Any, Optional, Union, Iterable
+from datetime import datetime, timedelta
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = "1.0"
+DEFAULT_POSITIVE_TTL_DAYS = 30
+DEFAULT_NEGATIVE_TTL_HOURS = 24
+DEFAULT_TOP_K = 5
+
+_PUNCTUATION_PATTERN = re.compile(r"[\s　・/|,.:;!?！？、。「」『』【】\[\]()（）\-_~〜]+")
+
+def normalize_title_key(title: str) -> str:
+    """
+    キャッシュキー用の商品名正規化
+
+    NFKC正規化（全角英数→半角、半角カナ→全角）・小文字化・区切り記号の統一を行う。
+
+    Args:
+        title: 日本語商品名
+
+    Returns:
+        正規化済みキー（空の場合は空文字）
+    """
+    if not title:
+        return ""
+    key = unicodedata.normalize('NFKC', str(title)).lower()
+    key = _PUNCTUATION_PATTERN.sub(' ', key)
+    return key.strip()
+
+class CatalogSearchCacheManager:
+    """商品名 → ASIN候補のカタログ検索キャッシュを管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None,
+                 positive_ttl_days: int = DEFAULT_POSITIVE_TTL_DAYS,
+                 negative_ttl_hours: int = DEFAULT_NEGATIVE_TTL_HOURS,
+                 top_k: int = DEFAULT_TOP_K):
+        """
+        CatalogSearchCacheManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            positive_ttl_days: 検索結果ありの保持日数
+            negative_ttl_hours: 検索結果なしの保持時間
+            top_k: 保持する候補数
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.cache_path = self.data_dir / 'catalog_search_cache.json'
+        self.positive_ttl = timedelta(days=positive_ttl_days)
+        self.negative_ttl = timedelta(hours=negative_ttl_hours)
+        self.top_k = top_k
+        self.entries = self.load_cache()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "stored": 0}
+        self._dirty = False
+
+        logger.info(f"CatalogSearchCacheManager初期化完了: {self.cache_path} ({len(self.entries)}件)")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    def load_cache(self) -> Dict[str, Dict[str, Any]]:
+        """
+        キャッシュの読み込み（期限切れエントリは読み込み時に除外）
+
+        Returns:
+            正規化キー → エントリ の辞書
+        """
+        try:
+            if self.cache_path.exists():
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                now = datetime.now().isoformat()
+                entries = {
+                    key: entry for key, entry in cache_data.get("entries", {}).items()
+                    if entry.get("expires_at", "") > now
+                }
+                logger.info(f"カタログ検索キャッシュ読み込み成功: {self.cache_path}")
+                return entries
+            return {}
+        except Exception as e:
+            logger.error(f"カタログ検索キャッシュ読み込みエラー: {e}")
+            return {}
+
+    def save_cache(self) -> bool:
+        """
+        キャッシュの保存（一時ファイル経由で置き換え）
+
+        Returns:
+            保存成功フラグ
+        """
+        try:
+            self.data_dir.mkdir(exist_ok=True)
+            cache_data = {
+                "version": CACHE_VERSION,
+                "last_updated": datetime.now().isoformat(),
+                "entries": self.entries
+            }
+            tmp_path = self.cache_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.cache_path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            logger.error(f"カタログ検索キャッシュ保存エラー: {e}")
+            return False
+
+    def flush(self) -> bool:
+        """未保存の変更がある場合のみ保存"""
+        if self._dirty:
+            return self.save_cache()
+        return True
+
+    def lookup(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        商品名のキャッシュ参照
+
+        Args:
+            title: 日本語商品名
+
+        Returns:
+            有効なエントリ（{'status': 'hit'|'miss', 'candidates': [...], ...}）、無ければNone
+        """
+        key = normalize_title_key(title)
+        entry = self.entries.get(key) if key else None
+        if entry is None or entry.get("expires_at", "") <= datetime.now().isoformat():
+            if entry is not None:
+                self.entries.pop(key, None)
+                self._dirty = True
+            self.stats["misses"] += 1
+            return None
+
+        if entry.get("status") == "miss":
+            self.stats["negative_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        return entry
+
+    def store(self, title: str, candidates: List[Dict[str, Any]], persist: bool = True,
+              resolution: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        検索結果の保存（候補なしの場合はネガティブキャッシュとして短期保持）
+
+        Args:
+            title: 日本語商品名
+            candidates: [{'asin', 'score', 'item_name'}] のリスト（スコア降順）
+            persist: 直ちにファイルへ保存するか（Falseの場合はflushで保存）
+            resolution: 候補選択の結果（asin / score / margin / confident / refined）
+
+        Returns:
+            保存成功フラグ
+        """
+        key = normalize_title_key(title)
+        if not key:
+            return False
+
+        now = datetime.now()
+        candidates = list(candidates or [])[:self.top_k]
+        ttl = self.positive_ttl if candidates else self.negative_ttl
+        self.entries[key] = {
+            "status": "hit" if candidates else "miss",
+            "candidates": candidates,
+            "resolution": resolution,
+            "cached_at": now.isoformat(),
+            "expires_at": (now + ttl).isoformat()
+        }
+        self.stats["stored"] += 1
+        self._dirty = True
+
+        if persist:
+            return self.save_cache()
+        return True
+
+    def invalidate(self, titles: Iterable[str]) -> int:
+        """
+        指定商品名のキャッシュ削除（再検索させる）
+
+        Returns:
+            削除件数
+        """
+        removed = 0
+        for title in titles:
+            if self.entries.pop(normalize_title_key(title), None) is not None:
+                removed += 1
+        if removed > 0:
+            self.save_cache()
+        return removed
+
+    def purge_expired(self) -> int:
+        """
+        期限切れエントリの削除
+
+        Returns:
+            削除件数
+        """
+        now = datetime.now().isoformat()
+        expired = [key for key, entry in self.entries.items() if entry.get("expires_at", "") <= now]
+        for key in expired:
+            del self.entries[key]
+        if expired:
+            self.save_cache()
+        return len(expired)
+
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """
+        キャッシュ統計情報の取得
+
+        Returns:
+            統計情報（エントリ数・今回セッションのヒット率など）
+        """
+        statuses = [entry.get("status") for entry in self.entries.values()]
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        return {
+            "total": len(statuses),
+            "positive": statuses.count("hit"),
+            "negative": statuses.count("miss"),
+            "session_hits": self.stats["hits"],
+            "session_negative_hits": self.stats["negative_hits"],
+            "session_misses": self.stats["misses"],
+            "session_hit_rate": ((self.stats["hits"] + self.stats["negative_hits"]) / lookups * 100) if lookups > 0 else 0,
+            "cache_path": str(self.cache_path)
+        }
+
+# 便利関数
+def create_catalog_search_cache_manager(data_dir: Optional[Union[str, pathlib.Path]] = None,
+                                        **kwargs) -> CatalogSearchCacheManager:
+    """
+    CatalogSearchCacheManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+        **kwargs: positive_ttl_days / negative_ttl_hours / top_k
+
+    Returns:
+        CatalogSearchCacheManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return CatalogSearchCacheManager(data_dir, **kwargs)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_catalog_search_cache_manager(tmp_dir)
+
+        print("=== カタログ検索キャッシュテスト ===")
+        manager.store("ファンケル マイルドクレンジングオイル 120ml", [
+            {"asin": "B000000001", "score": 0.92, "item_name": "ファンケル マイルドクレンジング オイル 120mL"}
+        ])
+        manager.store("存在しない商品", [])
+
+        reloaded = create_catalog_search_cache_manager(tmp_dir)
+        print(reloaded.lookup("ファンケル　マイルドクレンジングオイル　１２０ml"))
+        print(reloaded.lookup("存在しない商品"))
+        print(reloaded.lookup("未検索の商品"))
+        print(f"統計: {reloaded.get_cache_statistics()}")
+
+        print("テスト完了")
@@ -19,6 +19,17 @@ from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 import logging
 import copy
+import sys
+
+# 自動承認ルールの既定値（core.helpers.approval_rules に1か所だけ定義）
+try:
+    from core.helpers.approval_rules import DEFAULT_AUTO_APPROVAL_RULES
+except ImportError:
+    # スクリプトとして直接実行した場合はプロジェクトルートを追加
+    _project_root = pathlib.Path(__file__).resolve().parent.parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.insert(0, str(_project_root))
+    from core.helpers.approval_rules import DEFAULT_AUTO_APPROVAL_RULES
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
@@ -72,7 +83,7 @@ class ThresholdConfigManager:
             デフォルト設定辞書
         """
         return {
-            "config_version": "4.0.1",
+            "config_version": "4.0.2",
             "last_updated": datetime.now().isoformat(),
             "last_updated_by": "system",
             
@@ -161,6 +172,13 @@ class ThresholdConfigManager:
                 "manual_review_threshold": 60        # 手動レビュー閾値
             },
             
+            # 自動承認ルール（定義順に評価、全条件AND、最初に合致したルールを記録）
+            "auto_approval_rules": {
+                "enabled": True,                     # 自動承認ルール有効
+                "approver_name": "自動承認ルール",      # 承認者名（監査記録用）
+                "rules": copy.deepcopy(DEFAULT_AUTO_APPROVAL_RULES)
+            },
+            
             # システム設定
             "system_settings": {
                 "enable_fallback": True,             # フォールバック有効
@@ -212,7 +230,7 @@ class ThresholdConfigManager:
             マイグレーション後の設定辞書
         """
         current_version = config.get("config_version", "3.0.0")
-        target_version = "4.0.1"
+        target_version = "4.0.2"
         
         if current_version != target_version:
             logger.info(f"設定ファイルマイグレーション: {current_version} → {target_version}")
@@ -434,6 +452,36 @@ class ThresholdConfigManager:
             logger.error(f"閾値更新エラー: {category}.{key} - {e}")
             return False
     
+    def get_auto_approval_rules(self) -> List[Dict[str, Any]]:
+        """
+        自動承認ルールの取得
+        
+        Returns:
+            有効なルールのリスト（自動承認が無効な場合は空リスト）
+        """
+        # 設定ファイルにルールが無い場合は既定ルール
+        rule_config = self.current_config.get("auto_approval_rules", {"rules": DEFAULT_AUTO_APPROVAL_RULES})
+        if not rule_config.get("enabled", True):
+            return []
+        return [rule for rule in rule_config.get("rules", []) if rule.get("enabled", True)]
+    
+    def update_auto_approval_rules(self, rules: List[Dict[str, Any]], user: str = "system") -> bool:
+        """
+        自動承認ルールの更新
+        
+        Args:
+            rules: 新しいルールのリスト
+            user: 更新者
+            
+        Returns:
+            更新成功フラグ
+        """
+        for rule in rules:
+            if not rule.get("name") or not isinstance(rule.get("conditions"), list):
+                logger.error(f"不正な自動承認ルール: {rule}")
+                return False
+        return self.update_threshold("auto_approval_rules", "rules", rules, user)
+    
     def get_preset_configs(self) -> Dict[str, Dict[str, Any]]:
         """
         プリセット設定の取得
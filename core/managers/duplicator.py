@@ -0,0 +1,382 @@
+"""
+重複チェック（Duplicator）管理システム専用モジュール
+
+責任:
+- 出品済み商品のタイトル埋め込みインデックスの永続化
+- ASINキー＋タイトル埋め込み距離による重複判定（仕様 3.2.3: 距離 < 0.15）
+- バッチ内重複・出品済み商品との重複の一括検出（API・LLM処理の前段）
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立
+- テスト容易性確保
+"""
+
+import sys
+import pathlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Union, Iterable, Tuple
+from datetime import datetime
+import logging
+
+try:
+    from core.helpers.title_embedding import (
+        HashedLSHIndex, embed_titles, normalize_title, EMBEDDING_DIM
+    )
+    from core.helpers.quantity_helpers import parse_quantity
+except ImportError:
+    # スクリプトとして直接実行された場合（core/managers がパス先頭）はプロジェクトルートを追加
+    _project_root = pathlib.Path(__file__).resolve().parent.parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.insert(0, str(_project_root))
+    from core.helpers.title_embedding import (
+        HashedLSHIndex, embed_titles, normalize_title, EMBEDDING_DIM
+    )
+    from core.helpers.quantity_helpers import parse_quantity
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = "1.0"
+DEFAULT_DUPLICATE_DISTANCE = 0.15
+# 出品済みとの照合で確認する近傍の件数（最近傍が数量違いでも次の近傍を確認する）
+DEFAULT_NEAREST_CANDIDATES = 5
+DUPLICATE_COLUMNS = ["dup_status", "dup_of", "dup_distance", "dup_reason"]
+
+STATUS_UNIQUE = "unique"
+STATUS_BATCH_DUPLICATE = "batch_duplicate"
+STATUS_LISTED_DUPLICATE = "listed_duplicate"
+
+def _clean_key(value) -> str:
+    """ASINキーの正規化（空・N/Aは空文字）"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    key = str(value).strip().upper()
+    return "" if key in ("", "N/A", "NAN", "NONE") else key
+
+def _quantities_conflict(quantity_a, quantity_b) -> bool:
+    """数量が両方とも抽出でき、かつ異なる場合True（容量違いは別商品）"""
+    if not quantity_a or not quantity_b:
+        return False
+    if quantity_a['quantity_base_unit'] != quantity_b['quantity_base_unit']:
+        return True
+    a, b = quantity_a['quantity_base_value'], quantity_b['quantity_base_value']
+    return abs(a - b) > 0.03 * max(a, b, 1e-9)
+
+class DuplicateIndexManager:
+    """出品済み商品の埋め込みインデックスと重複判定を管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None,
+                 distance_threshold: float = DEFAULT_DUPLICATE_DISTANCE,
+                 quantity_guard: bool = True,
+                 nearest_candidates: int = DEFAULT_NEAREST_CANDIDATES):
+        """
+        DuplicateIndexManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            distance_threshold: 重複とみなすコサイン距離（未満）
+            quantity_guard: 数量（容量・入数）が異なる場合は重複としない
+            nearest_candidates: 出品済みとの照合で距離の近い順に確認する近傍の件数
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.index_path = self.data_dir / 'duplicate_index.npz'
+        self.distance_threshold = distance_threshold
+        self.quantity_guard = quantity_guard
+        self.nearest_candidates = max(1, int(nearest_candidates))
+
+        self.keys: List[str] = []
+        self.titles: List[str] = []
+        self.added_at: List[str] = []
+        self.key_to_id: Dict[str, int] = {}
+        self.index = HashedLSHIndex()
+        self.load_index()
+
+        logger.info(f"DuplicateIndexManager初期化完了: {self.index_path} ({len(self.keys)}件)")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    def load_index(self) -> bool:
+        """
+        インデックスの読み込み（ベクトルを読み込みLSHバケットを再構築）
+
+        Returns:
+            読み込み成功フラグ
+        """
+        try:
+            if not self.index_path.exists():
+                return False
+            with np.load(self.index_path, allow_pickle=False) as data:
+                vectors = data["vectors"].astype(np.float32)
+                if vectors.ndim != 2 or vectors.shape[1] != EMBEDDING_DIM:
+                    logger.warning(f"重複インデックスの次元が一致しません: {vectors.shape}（再構築が必要）")
+                    return False
+                self.keys = data["keys"].tolist()
+                self.titles = data["titles"].tolist()
+                self.added_at = data["added_at"].tolist()
+            self.key_to_id = {key: i for i, key in enumerate(self.keys)}
+            self.index = HashedLSHIndex()
+            self.index.add(vectors)
+            logger.info(f"重複インデックス読み込み成功: {self.index_path}")
+            return True
+        except Exception as e:
+            logger.error(f"重複インデックス読み込みエラー: {e}")
+            return False
+
+    def save_index(self) -> bool:
+        """
+        インデックスの保存（一時ファイル経由で置き換え）
+
+        Returns:
+            保存成功フラグ
+        """
+        try:
+            self.data_dir.mkdir(exist_ok=True)
+            tmp_path = self.index_path.with_name(self.index_path.stem + '.tmp.npz')
+            np.savez_compressed(
+                tmp_path,
+                version=np.array(INDEX_VERSION),
+                vectors=self.index.vectors.astype(np.float16),
+                keys=np.array(self.keys, dtype=str),
+                titles=np.array(self.titles, dtype=str),
+                added_at=np.array(self.added_at, dtype=str)
+            )
+            tmp_path.replace(self.index_path)
+            return True
+        except Exception as e:
+            logger.error(f"重複インデックス保存エラー: {e}")
+            return False
+
+    def register_items(self, titles: Iterable[str], keys: Optional[Iterable[str]] = None) -> int:
+        """
+        出品済み商品の登録（保存は1回）
+
+        ASINキーが無い商品は正規化タイトルをキーとして登録する。登録済みのキーは無視する。
+
+        Args:
+            titles: 商品名
+            keys: ASIN（titlesと同じ長さ、任意）
+
+        Returns:
+            登録件数
+        """
+        titles = list(titles)
+        keys = list(keys) if keys is not None else [None] * len(titles)
+        timestamp = datetime.now().isoformat()
+
+        new_titles, new_keys = [], []
+        for title, key in zip(titles, keys):
+            title = "" if title is None else str(title)
+            key = _clean_key(key) or f"title:{normalize_title(title)}"
+            if key == "title:" or key in self.key_to_id:
+                continue
+            self.key_to_id[key] = len(self.keys) + len(new_keys)
+            new_keys.append(key)
+            new_titles.append(title)
+
+        if not new_keys:
+            return 0
+
+        self.index.add(embed_titles(new_titles))
+        self.keys.extend(new_keys)
+        self.titles.extend(new_titles)
+        self.added_at.extend([timestamp] * len(new_keys))
+        self.save_index()
+        return len(new_keys)
+
+    def detect_duplicates(self, df: pd.DataFrame, title_column: str,
+                          key_column: Optional[str] = None,
+                          distance_threshold: Optional[float] = None) -> pd.DataFrame:
+        """
+        バッチ内重複・出品済み重複の一括検出
+
+        判定順: ASINキー一致（出品済み → バッチ内）→ タイトル埋め込み距離（出品済み → バッチ内）。
+        バッチ内では先に現れた行を残し、後の行を重複とする。
+
+        Args:
+            df: 判定対象データフレーム
+            title_column: 商品名カラム
+            key_column: ASINカラム（任意）
+            distance_threshold: 重複とみなす距離（Noneの場合はインスタンス設定）
+
+        Returns:
+            dfと同じインデックスを持つ dup_status / dup_of / dup_distance / dup_reason のDataFrame
+        """
+        threshold = self.distance_threshold if distance_threshold is None else distance_threshold
+        n = len(df)
+        status = np.full(n, STATUS_UNIQUE, dtype=object)
+        dup_of = np.full(n, None, dtype=object)
+        distance = np.full(n, np.nan)
+        reason = np.full(n, "", dtype=object)
+        if n == 0:
+            return pd.DataFrame({"dup_status": status, "dup_of": dup_of, "dup_distance": distance,
+                                 "dup_reason": reason}, index=df.index)
+
+        titles = df[title_column].fillna("").astype(str).tolist()
+        labels = df.index.to_numpy()
+        unresolved = np.ones(n, dtype=bool)
+
+        # 1. ASINキー一致
+        if key_column and key_column in df.columns:
+            keys = pd.Series([_clean_key(v) for v in df[key_column]], index=df.index)
+            has_key = (keys != "").to_numpy()
+            listed = has_key & keys.isin(self.key_to_id.keys()).to_numpy()
+            status[listed] = STATUS_LISTED_DUPLICATE
+            dup_of[listed] = keys.to_numpy()[listed]
+            distance[listed] = 0.0
+            reason[listed] = "asin"
+            unresolved &= ~listed
+
+            repeated = has_key & keys.duplicated(keep='first').to_numpy() & unresolved
+            if repeated.any():
+                first_label = pd.Series(labels, index=keys.to_numpy()).groupby(level=0).first()
+                status[repeated] = STATUS_BATCH_DUPLICATE
+                dup_of[repeated] = first_label.reindex(keys.to_numpy()[repeated]).to_numpy()
+                distance[repeated] = 0.0
+                reason[repeated] = "asin"
+                unresolved &= ~repeated
+
+        vectors = embed_titles(titles)
+        has_title = np.array([bool(normalize_title(t)) for t in titles])
+        quantities = [parse_quantity(normalize_title(t)) for t in titles] if self.quantity_guard else None
+
+        # 2. 出品済みとの埋め込み距離
+        if len(self.index) > 0:
+            query_positions = np.flatnonzero(unresolved & has_title)
+            nearest_ids, nearest_dist = self.index.nearest(
+                vectors[query_positions], max_distance=threshold, k=self.nearest_candidates)
+            for position, candidate_ids, candidate_dist in zip(query_positions, nearest_ids, nearest_dist):
+                for listed_id, dist in zip(candidate_ids, candidate_dist):
+                    if listed_id < 0 or not dist < threshold:
+                        break
+                    if self.quantity_guard and _quantities_conflict(
+                            quantities[position], parse_quantity(normalize_title(self.titles[listed_id]))):
+                        continue
+                    status[position] = STATUS_LISTED_DUPLICATE
+                    dup_of[position] = self.keys[listed_id]
+                    distance[position] = round(float(dist), 4)
+                    reason[position] = "embedding"
+                    unresolved[position] = False
+                    break
+
+        # 3. バッチ内の埋め込み距離（先に現れた行を代表とする）
+        batch_positions = np.flatnonzero(has_title)
+        batch_index = HashedLSHIndex()
+        batch_index.add(vectors[batch_positions])
+        neighbour_ids, neighbour_dist = batch_index.earliest_neighbours(threshold)
+        for local_id, (neighbour, dist) in enumerate(zip(neighbour_ids, neighbour_dist)):
+            position = batch_positions[local_id]
+            if neighbour < 0 or not unresolved[position]:
+                continue
+            first_position = batch_positions[neighbour]
+            if self.quantity_guard and _quantities_conflict(quantities[position], quantities[first_position]):
+                continue
+            status[position] = STATUS_BATCH_DUPLICATE
+            dup_of[position] = labels[first_position]
+            distance[position] = round(float(dist), 4)
+            reason[position] = "embedding"
+            unresolved[position] = False
+
+        return pd.DataFrame({
+            "dup_status": status,
+            "dup_of": dup_of,
+            "dup_distance": distance,
+            "dup_reason": reason
+        }, index=df.index)
+
+    def filter_duplicates(self, df: pd.DataFrame, title_column: str,
+                          key_column: Optional[str] = None,
+                          distance_threshold: Optional[float] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        重複行を除外したデータフレームと重複レポートを返す
+
+        Returns:
+            (重複除外後のDataFrame, 重複と判定された行のレポート)
+        """
+        result = self.detect_duplicates(df, title_column, key_column, distance_threshold)
+        is_unique = (result["dup_status"] == STATUS_UNIQUE).to_numpy()
+        report = pd.concat([df.loc[~is_unique, [title_column]], result.loc[~is_unique]], axis=1)
+        return df.loc[is_unique], report
+
+    def get_index_statistics(self) -> Dict[str, Any]:
+        """
+        インデックス統計情報の取得
+
+        Returns:
+            統計情報
+        """
+        return {
+            "total": len(self.keys),
+            "asin_keys": sum(1 for key in self.keys if not key.startswith("title:")),
+            "title_keys": sum(1 for key in self.keys if key.startswith("title:")),
+            "distance_threshold": self.distance_threshold,
+            "index_path": str(self.index_path)
+        }
+
+# 便利関数
+def create_duplicate_index_manager(data_dir: Optional[Union[str, pathlib.Path]] = None,
+                                   **kwargs) -> DuplicateIndexManager:
+    """
+    DuplicateIndexManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+        **kwargs: distance_threshold / quantity_guard / nearest_candidates
+
+    Returns:
+        DuplicateIndexManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return DuplicateIndexManager(data_dir, **kwargs)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_duplicate_index_manager(tmp_dir)
+
+        print("=== 重複チェックシステムテスト ===")
+        manager.register_items(
+            ["FANCL Mild Cleansing Oil 120ml", "TSUBAKI Premium Moist Shampoo 490ml"],
+            ["B000000001", "B000000002"]
+        )
+
+        batch = pd.DataFrame({
+            "title": [
+                "fancl mild cleansing oil 120ml",
+                "Milbon Elujuda Bleach Care Gel Serum 120g",
+                "MILBON elujuda bleach care gel serum 120g",
+                "TSUBAKI Premium Moist Shampoo 490ml x 3",
+                "Orbis Essence Hair Milk 140g"
+            ],
+            "asin": ["", "B000000010", "", "", "B000000002"]
+        })
+
+        reloaded = create_duplicate_index_manager(tmp_dir)
+        print(pd.concat([batch, reloaded.detect_duplicates(batch, "title", "asin")], axis=1))
+        print(f"統計: {reloaded.get_index_statistics()}")
+
+        print("テスト完了")
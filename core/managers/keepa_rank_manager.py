@@ -0,0 +1,459 @@
+"""
+Keepa売れ筋ランク（Keepa Sales Rank）管理システム専用モジュール
+
+責任:
+- ASIN → 売れ筋ランク（現在値・履歴）の永続化と有効期限管理
+- 未取得ASINのバッチ取得（1リクエスト最大100件、トークン残量に合わせて分割・待機）
+- ランク閾値による候補の除外（living_spec §3.2.1: Keepa Rank > 10,000 は除外）
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立（Keepaクライアントは呼び出し側から注入可能）
+- テスト容易性確保（KEEPA_ENDPOINT でローカル検証サーバーへ差し替え）
+"""
+
+import json
+import sys
+import time
+import pathlib
+from typing import Dict, List, Any, Optional, Union, Iterable, Tuple
+from datetime import datetime, timedelta, timezone
+import logging
+import pandas as pd
+
+try:
+    from core.services.keepa_client import (
+        create_keepa_client, extract_sales_rank, KeepaError, KEEPA_MAX_ASINS_PER_REQUEST, KEEPA_TOKENS_PER_PRODUCT
+    )
+except ImportError:
+    # スクリプトとして直接実行した場合（core/managers が sys.path 先頭）はプロジェクトルートを追加
+    _project_root = pathlib.Path(__file__).resolve().parent.parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.insert(0, str(_project_root))
+    from core.services.keepa_client import (
+        create_keepa_client, extract_sales_rank, KeepaError, KEEPA_MAX_ASINS_PER_REQUEST, KEEPA_TOKENS_PER_PRODUCT
+    )
+
+# ステージ別計測・使用量台帳（処理実行中のみ記録）
+INSTRUMENTATION_AVAILABLE = False
+try:
+    from core.helpers.stage_metrics import stage_timer, record_stage_retry, record_stage_cache_hit
+    from core.helpers.usage_ledger import record_api_usage
+    INSTRUMENTATION_AVAILABLE = True
+except ImportError:
+    pass
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = "1.0"
+# living_spec §3.2.1 の除外閾値（❓閾値要調整のため呼び出し側で変更可能）
+DEFAULT_MAX_SALES_RANK = 10000
+DEFAULT_RANK_TTL_HOURS = 24
+DEFAULT_HISTORY_DAYS = 90
+# トークン補充待ちの上限（超える場合は残りを未取得として通過させる）
+DEFAULT_MAX_TOKEN_WAIT_SECONDS = 120
+# 取得全体の上限秒数（超えた時点で残りを未取得として通過させる）
+DEFAULT_FETCH_DEADLINE_SECONDS = 300
+DEFAULT_MAX_RETRIES = 3
+
+KEEPA_REPORT_COLUMNS = ["keepa_rank", "keepa_status", "keepa_source"]
+
+STATUS_KEPT = "kept"
+STATUS_RANK_EXCEEDED = "rank_exceeded"
+STATUS_NO_RANK = "no_rank"
+STATUS_NOT_FETCHED = "not_fetched"
+
+def _normalize_asin(value: Any) -> str:
+    asin = str(value).strip().upper() if value is not None else ""
+    return "" if asin in ("", "NAN", "NONE", "N/A") else asin
+
+class KeepaRankManager:
+    """ASIN → Keepa売れ筋ランクのキャッシュと閾値フィルタを管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None,
+                 ttl_hours: int = DEFAULT_RANK_TTL_HOURS,
+                 history_days: int = DEFAULT_HISTORY_DAYS):
+        """
+        KeepaRankManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            ttl_hours: ランクの保持時間（経過後は再取得）
+            history_days: 保持するランク履歴の日数
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.cache_path = self.data_dir / 'keepa_rank_cache.json'
+        self.ttl = timedelta(hours=ttl_hours)
+        self.history_days = history_days
+        self.entries = self.load_cache()
+        self.stats = {"hits": 0, "misses": 0, "fetched": 0, "requests": 0, "throttled": 0, "token_wait_seconds": 0.0}
+        self._dirty = False
+
+        logger.info(f"KeepaRankManager初期化完了: {self.cache_path} ({len(self.entries)}件)")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    def load_cache(self) -> Dict[str, Dict[str, Any]]:
+        """
+        キャッシュの読み込み（履歴は期限切れでも保持し、ランクの鮮度は expires_at で判定）
+
+        Returns:
+            ASIN → エントリ の辞書
+        """
+        try:
+            if self.cache_path.exists():
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                logger.info(f"Keepaランクキャッシュ読み込み成功: {self.cache_path}")
+                return cache_data.get("entries", {})
+            return {}
+        except Exception as e:
+            logger.error(f"Keepaランクキャッシュ読み込みエラー: {e}")
+            return {}
+
+    def save_cache(self) -> bool:
+        """
+        キャッシュの保存（一時ファイル経由で置き換え）
+
+        Returns:
+            保存成功フラグ
+        """
+        try:
+            self.data_dir.mkdir(exist_ok=True)
+            cache_data = {
+                "version": CACHE_VERSION,
+                "last_updated": datetime.now().isoformat(),
+                "entries": self.entries
+            }
+            tmp_path = self.cache_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False)
+            tmp_path.replace(self.cache_path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            logger.error(f"Keepaランクキャッシュ保存エラー: {e}")
+            return False
+
+    def flush(self) -> bool:
+        """未保存の変更がある場合のみ保存"""
+        if self._dirty:
+            return self.save_cache()
+        return True
+
+    def lookup(self, asin: str) -> Optional[Dict[str, Any]]:
+        """
+        ASINのキャッシュ参照
+
+        Returns:
+            有効期限内のエントリ（{'current_rank', 'history', 'fetched_at', ...}）、無ければNone
+        """
+        entry = self.entries.get(_normalize_asin(asin))
+        if entry is None or entry.get("expires_at", "") <= datetime.now().isoformat():
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry
+
+    def store(self, asin: str, current_rank: Optional[int], history: List[Tuple[str, int]],
+              persist: bool = True) -> bool:
+        """
+        取得したランクの保存（履歴は既存分とマージし、history_days より古い点は削除）
+
+        Args:
+            asin: ASIN
+            current_rank: 現在のランク（無い場合はNone）
+            history: [(ISO日時, ランク), ...]
+            persist: 直ちにファイルへ保存するか（Falseの場合はflushで保存）
+        """
+        asin = _normalize_asin(asin)
+        if not asin:
+            return False
+
+        now = datetime.now()
+        # 履歴の日時はUTC（keepa_minutes_to_datetime）
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.history_days)).isoformat()
+        previous = self.entries.get(asin, {}).get("history", [])
+        merged = {point[0]: point[1] for point in previous}
+        merged.update({timestamp: rank for timestamp, rank in history})
+        self.entries[asin] = {
+            "current_rank": current_rank,
+            "history": [[timestamp, merged[timestamp]] for timestamp in sorted(merged) if timestamp >= cutoff],
+            "fetched_at": now.isoformat(),
+            "expires_at": (now + self.ttl).isoformat()
+        }
+        self._dirty = True
+
+        if persist:
+            return self.save_cache()
+        return True
+
+    def get_rank_history(self, asin: str) -> pd.DataFrame:
+        """ASINのランク履歴（古い順、キャッシュに無い場合は空）"""
+        history = self.entries.get(_normalize_asin(asin), {}).get("history", [])
+        return pd.DataFrame(history, columns=["timestamp", "sales_rank"])
+
+    # ------------------------------------------------------------------
+    # バッチ取得
+    # ------------------------------------------------------------------
+    def fetch_ranks(self, asins: Iterable[str], client=None,
+                    batch_size: int = KEEPA_MAX_ASINS_PER_REQUEST,
+                    max_token_wait: float = DEFAULT_MAX_TOKEN_WAIT_SECONDS,
+                    max_retries: int = DEFAULT_MAX_RETRIES,
+                    deadline_seconds: Optional[float] = DEFAULT_FETCH_DEADLINE_SECONDS) -> Dict[str, Dict[str, Any]]:
+        """
+        ランクの取得（キャッシュ優先、未取得分はバッチでKeepaへ問い合わせ）
+
+        トークン残量が足りない場合は補充を待つ（max_token_wait を超える場合は打ち切り）。
+        残量が一部しか無い場合は残量分だけのバッチに縮めて送信する。
+        取得全体が deadline_seconds を超える場合（待機を含む）は打ち切り、残りは結果に含めない
+        （annotate_ranks では未取得（not_fetched）になる）。
+
+        Args:
+            asins: ASINのリスト
+            client: KeepaClient（Noneの場合は環境変数から作成、未設定ならキャッシュのみ）
+            batch_size: 1リクエストのASIN数（最大100）
+            max_token_wait: 1回の補充待ちの上限秒数
+            max_retries: 429・一時的な障害の再試行回数
+            deadline_seconds: 取得全体の上限秒数（Noneで無制限）
+
+        Returns:
+            ASIN → {'current_rank', 'history', 'source': 'cache'|'api'}（取得できなかったASINは含まない）
+        """
+        results = {}
+        pending = []
+        for asin in dict.fromkeys(_normalize_asin(a) for a in asins):
+            if not asin:
+                continue
+            entry = self.lookup(asin)
+            if entry is not None:
+                results[asin] = {**entry, "source": "cache"}
+                if INSTRUMENTATION_AVAILABLE:
+                    record_stage_cache_hit('keepa')
+            else:
+                pending.append(asin)
+
+        client = client if client is not None else create_keepa_client()
+        if client is None or not pending:
+            return results
+
+        batch_size = max(1, min(batch_size, KEEPA_MAX_ASINS_PER_REQUEST))
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+
+        def remaining_time():
+            return deadline - time.monotonic() if deadline is not None else float('inf')
+
+        position = 0
+        retries = 0
+        while position < len(pending):
+            if remaining_time() <= 0:
+                logger.warning(f"⚠️ Keepa取得の上限時間（{deadline_seconds:.0f}秒）を超えたため残り{len(pending) - position}件は未取得")
+                break
+            batch = pending[position:position + batch_size]
+            cost = len(batch) * KEEPA_TOKENS_PER_PRODUCT
+            wait = client.budget.wait_seconds(cost)
+            if wait > 0:
+                # 残量分だけ先に送る（残量が無い場合は補充を待つ）
+                affordable = client.budget.affordable(cost) // KEEPA_TOKENS_PER_PRODUCT
+                if affordable > 0:
+                    batch = batch[:affordable]
+                elif wait > min(max_token_wait, remaining_time()):
+                    logger.warning(f"⚠️ Keepaトークン不足: 補充まで{wait:.0f}秒のため残り{len(pending) - position}件は未取得")
+                    break
+                else:
+                    logger.info(f"Keepaトークン補充待ち: {wait:.1f}秒 (必要{cost}トークン)")
+                    self.stats["token_wait_seconds"] += wait
+                    time.sleep(wait)
+                    continue
+
+            try:
+                products = self._request_products(client, batch)
+            except KeepaError as e:
+                self.stats["throttled"] += int(e.status == 429)
+                if not e.retryable or retries >= max_retries:
+                    logger.error(f"❌ Keepa取得エラー: {e}。残り{len(pending) - position}件は未取得")
+                    if INSTRUMENTATION_AVAILABLE:
+                        record_api_usage('keepa', 'keepa', 'product', errors=1)
+                    break
+                retries += 1
+                wait = e.refill_in if e.refill_in is not None else retries
+                if wait > min(max_token_wait, remaining_time()):
+                    logger.warning(f"⚠️ Keepa {e.status}: 補充まで{wait:.0f}秒のため残り{len(pending) - position}件は未取得")
+                    break
+                if INSTRUMENTATION_AVAILABLE:
+                    record_stage_retry('keepa')
+                    record_api_usage('keepa', 'keepa', 'product', retries=1)
+                self.stats["token_wait_seconds"] += wait
+                time.sleep(wait)
+                continue
+
+            retries = 0
+            for product in products:
+                asin = _normalize_asin(product.get("asin"))
+                if not asin:
+                    continue
+                current_rank, history = extract_sales_rank(product)
+                self.store(asin, current_rank, history, persist=False)
+                results[asin] = {**self.entries[asin], "source": "api"}
+                self.stats["fetched"] += 1
+            position += len(batch)
+
+        self.flush()
+        return results
+
+    def _request_products(self, client, batch: List[str]) -> List[Dict[str, Any]]:
+        """1バッチの /product（処理実行中はステージ別計測・使用量台帳に記録）"""
+        self.stats["requests"] += 1
+        if not INSTRUMENTATION_AVAILABLE:
+            return client.get_products(batch)
+        with stage_timer('keepa'):
+            try:
+                products = client.get_products(batch)
+            except KeepaError as e:
+                record_api_usage('keepa', 'keepa', 'product', requests=1, throttled=int(e.status == 429))
+                raise
+        record_api_usage('keepa', 'keepa', 'product', requests=1)
+        return products
+
+    # ------------------------------------------------------------------
+    # 閾値フィルタ
+    # ------------------------------------------------------------------
+    def annotate_ranks(self, df: pd.DataFrame, asin_column: str, client=None,
+                       max_rank: int = DEFAULT_MAX_SALES_RANK, **fetch_kwargs) -> pd.DataFrame:
+        """
+        各行のランク・判定（KEEPA_REPORT_COLUMNS、df と同じindex）
+
+        判定:
+            kept: ランク ≤ max_rank / rank_exceeded: ランク > max_rank /
+            no_rank: Keepaにランク無し / not_fetched: 未取得（Keepa未設定・トークン不足・ASIN無し）
+        """
+        asins = df[asin_column].map(_normalize_asin)
+        ranks = self.fetch_ranks(asins[asins.ne("")].tolist(), client=client, **fetch_kwargs)
+
+        rank_values, statuses, sources = [], [], []
+        for asin in asins:
+            entry = ranks.get(asin)
+            if entry is None:
+                rank_values.append(None)
+                statuses.append(STATUS_NOT_FETCHED)
+                sources.append("")
+                continue
+            rank = entry.get("current_rank")
+            rank_values.append(rank)
+            sources.append(entry["source"])
+            if rank is None:
+                statuses.append(STATUS_NO_RANK)
+            elif rank > max_rank:
+                statuses.append(STATUS_RANK_EXCEEDED)
+            else:
+                statuses.append(STATUS_KEPT)
+        return pd.DataFrame({
+            "keepa_rank": pd.array(rank_values, dtype="Int64"),
+            "keepa_status": statuses,
+            "keepa_source": sources
+        }, index=df.index)
+
+    def filter_by_sales_rank(self, df: pd.DataFrame, asin_column: str, client=None,
+                             max_rank: int = DEFAULT_MAX_SALES_RANK,
+                             **fetch_kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        ランク閾値を超える行を除外したデータフレームと除外レポートを返す
+
+        ランクが無い・未取得の行は判断材料が無いため除外しない（keepa_status で区別可能）。
+
+        Returns:
+            (除外後のDataFrame（keepa_rank / keepa_status 付き）, 除外された行のレポート)
+        """
+        result = self.annotate_ranks(df, asin_column, client=client, max_rank=max_rank, **fetch_kwargs)
+        excluded = (result["keepa_status"] == STATUS_RANK_EXCEEDED).to_numpy()
+        report = pd.concat([df.loc[excluded, [asin_column]], result.loc[excluded]], axis=1)
+        kept = df.loc[~excluded].assign(
+            keepa_rank=result.loc[~excluded, "keepa_rank"],
+            keepa_status=result.loc[~excluded, "keepa_status"]
+        )
+        return kept, report
+
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """
+        キャッシュ統計情報の取得
+
+        Returns:
+            統計情報（エントリ数・今回セッションのヒット率・リクエスト数など）
+        """
+        now = datetime.now().isoformat()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "total": len(self.entries),
+            "fresh": sum(1 for entry in self.entries.values() if entry.get("expires_at", "") > now),
+            "with_rank": sum(1 for entry in self.entries.values() if entry.get("current_rank") is not None),
+            "session_hit_rate": (self.stats["hits"] / lookups * 100) if lookups > 0 else 0,
+            **{f"session_{key}": value for key, value in self.stats.items()},
+            "cache_path": str(self.cache_path)
+        }
+
+# 便利関数
+def create_keepa_rank_manager(data_dir: Optional[Union[str, pathlib.Path]] = None,
+                              **kwargs) -> KeepaRankManager:
+    """
+    KeepaRankManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+        **kwargs: ttl_hours / history_days
+
+    Returns:
+        KeepaRankManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return KeepaRankManager(data_dir, **kwargs)
+
+if __name__ == "__main__":
+    # テスト実行（ローカル検証サーバーのKeepa代替エンドポイントを使用）
+    import tempfile
+    from benchmarks.fake_api_server import start_fake_api_server
+    from core.services.keepa_client import KeepaClient
+
+    server = start_fake_api_server({'latency_scale': 0.0})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_keepa_rank_manager(tmp_dir)
+        client = KeepaClient('local-test-key', server.base_url)
+
+        print("=== Keepaランクフィルタテスト ===")
+        candidates = pd.DataFrame({
+            'asin': [f"B0{i:08d}" for i in range(12)] + [''],
+            'clean_title': [f"candidate {i}" for i in range(13)]
+        })
+        kept, report = manager.filter_by_sales_rank(candidates, 'asin', client=client)
+        print(kept[['asin', 'keepa_rank', 'keepa_status']])
+        print(report)
+        print(f"トークン: {client.budget.snapshot()}")
+
+        # 2回目はキャッシュから（リクエストなし）
+        manager.filter_by_sales_rank(candidates, 'asin', client=client)
+        print(f"統計: {manager.get_cache_statistics()}")
+        print(manager.get_rank_history(candidates['asin'].iloc[0]).tail(3))
+
+        print("テスト完了")
+    server.shutdown()
@@ -21,10 +21,53 @@ from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 import logging
 
+# CPU処理（NGワード検出）のプロセスプール並列実行
+try:
+    from core.helpers.parallel_text import parallel_map
+except ImportError:
+    def parallel_map(func, items, context=None, **kwargs):
+        return [func(item, context or {}) for item in items]
+
 # ログ設定
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def compile_ng_index(ng_words_dict: Dict[str, List[str]]) -> tuple:
+    """
+    NGワード辞書を照合用の索引に変換
+
+    Returns:
+        (カテゴリ, NGワード, コンパイル済みの単語境界パターン) のタプル列（辞書の順序）
+    """
+    return tuple(
+        (category, ng_word, re.compile(r'\b' + re.escape(ng_word.lower()) + r'\b'))
+        for category, words in (ng_words_dict or {}).items()
+        for ng_word in words
+        if isinstance(ng_word, str)
+    )
+
+def scan_ng_index(text: str, ng_index: tuple) -> tuple:
+    """
+    索引でテキストを走査
+
+    Returns:
+        (検出したNGワードのリスト, 対応するカテゴリのリスト)
+    """
+    text_lower = text.lower()
+    matched_words = []
+    ng_categories = []
+    for category, ng_word, pattern in ng_index:
+        if pattern.search(text_lower):
+            matched_words.append(ng_word)
+            ng_categories.append(category)
+    return matched_words, ng_categories
+
+def _ng_scan_task(text: str, context: Dict[str, Any]) -> tuple:
+    """1テキスト分のNGワード走査（索引はワーカー起動時に受け取った context['ng_index']）"""
+    if not text:
+        return [], []
+    return scan_ng_index(text, context['ng_index'])
+
 class NGWordManager:
     """NGワード管理システムのメインクラス"""
     
@@ -38,6 +81,8 @@ class NGWordManager:
         self.data_dir = self._determine_data_dir(data_dir)
         self.ng_words_path = self.data_dir / 'ng_words.json'
         self.ng_words_dict = self.load_ng_words()
+        self._ng_index = None
+        self._ng_index_source = None
         
         logger.info(f"NGWordManager初期化完了: {self.ng_words_path}")
     
@@ -137,6 +182,7 @@ class NGWordManager:
             
             logger.info(f"NGワード辞書保存成功: {self.ng_words_path}")
             self.ng_words_dict = ng_words_dict  # メモリ内辞書も更新
+            self._ng_index = None  # 追加・削除（同じ辞書の更新）でも索引を作り直す
             return True
         except Exception as e:
             logger.error(f"NGワード辞書保存エラー: {e}")
@@ -155,19 +201,24 @@ class NGWordManager:
         if not text or not self.ng_words_dict:
             return self._create_safe_result()
         
-        text_lower = text.lower()
-        matched_words = []
-        ng_categories = []
-        
-        for category, words in self.ng_words_dict.items():
-            for ng_word in words:
-                if isinstance(ng_word, str):
-                    # 完全一致と部分一致の両方をチェック
-                    pattern = r'\b' + re.escape(ng_word.lower()) + r'\b'
-                    if re.search(pattern, text_lower):
-                        matched_words.append(ng_word)
-                        ng_categories.append(category)
+        # 単語境界でのマッチ（パターンは辞書ごとに1回だけコンパイル）
+        matched_words, ng_categories = scan_ng_index(text, self.get_ng_index())
+        return self._create_check_result(matched_words, ng_categories)
+    
+    def get_ng_index(self) -> tuple:
+        """
+        現在の辞書のコンパイル済み索引（辞書の差し替え・追加・削除で作り直す）
         
+        Returns:
+            compile_ng_index の索引
+        """
+        if self._ng_index is None or self._ng_index_source is not self.ng_words_dict:
+            self._ng_index = compile_ng_index(self.ng_words_dict)
+            self._ng_index_source = self.ng_words_dict
+        return self._ng_index
+    
+    def _create_check_result(self, matched_words: List[str], ng_categories: List[str]) -> Dict[str, Any]:
+        """走査結果からチェック結果を作成"""
         # リスクレベル判定
         risk_level = self._determine_risk_level(ng_categories)
         
@@ -236,17 +287,25 @@ class NGWordManager:
         if text_columns is None:
             text_columns = ['clean_title', 'japanese_name', 'amazon_title']
         
-        # NGワードチェック実行
-        ng_check_results = []
-        for idx, row in df_filtered.iterrows():
-            # 複数カラムのテキストを結合
-            text_to_check = ""
-            for col in text_columns:
-                if col in row and pd.notna(row[col]):
-                    text_to_check += str(row[col]) + " "
-            
-            ng_result = self.check_ng_words(text_to_check.strip())
-            ng_check_results.append(ng_result)
+        # 複数カラムのテキストを結合
+        texts_to_check = [""] * len(df_filtered)
+        for col in text_columns:
+            if col in df_filtered.columns:
+                texts_to_check = [
+                    text + str(value) + " " if pd.notna(value) else text
+                    for text, value in zip(texts_to_check, df_filtered[col])
+                ]
+        
+        # NGワードチェック実行（件数が多い場合はプロセスプールで並列、索引はワーカーごとに1回だけ転送）
+        if self.ng_words_dict:
+            scan_results = parallel_map(_ng_scan_task, [text.strip() for text in texts_to_check],
+                                        context={'ng_index': self.get_ng_index()})
+        else:
+            scan_results = [([], [])] * len(texts_to_check)
+        ng_check_results = [
+            self._create_check_result(matched_words, ng_categories)
+            for matched_words, ng_categories in scan_results
+        ]
         
         # 結果をデータフレームに追加
         df_filtered['ng_check_is_ng'] = [result['is_ng'] for result in ng_check_results]
@@ -0,0 +1,830 @@
+"""
+商品レジストリ（registry.db）管理システム専用モジュール
+
+責任:
+- 商品状態テーブル（ASIN・オファースナップショット・日本語化・分類・承認・出品状態）の永続化
+- パイプラインからの一括アップサート
+- ダッシュボード・分析タブ向けの参照API
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立
+- テスト容易性確保
+"""
+
+import sqlite3
+import pathlib
+import uuid
+import pandas as pd
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Union, Iterable
+from datetime import datetime
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REGISTRY_SCHEMA_VERSION = 4
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    source TEXT,
+    row_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS products (
+    asin TEXT PRIMARY KEY,
+    title TEXT,
+    clean_title TEXT,
+    brand TEXT,
+    category TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS offers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asin TEXT NOT NULL,
+    run_id TEXT,
+    row_position INTEGER,
+    captured_at TEXT NOT NULL,
+    is_prime INTEGER,
+    seller_type TEXT,
+    seller_name TEXT,
+    seller_id TEXT,
+    is_fba INTEGER,
+    ship_hours REAL,
+    ship_bucket TEXT,
+    ship_source TEXT,
+    price REAL
+);
+CREATE INDEX IF NOT EXISTS idx_offers_asin_captured ON offers (asin, captured_at);
+CREATE INDEX IF NOT EXISTS idx_offers_run ON offers (run_id);
+CREATE TABLE IF NOT EXISTS translations (
+    source_title TEXT PRIMARY KEY,
+    japanese_name TEXT,
+    llm_source TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asin TEXT NOT NULL,
+    run_id TEXT,
+    row_position INTEGER,
+    shopee_group TEXT,
+    shopee_suitability_score REAL,
+    relevance_score REAL,
+    match_percentage REAL,
+    classified_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_asin ON classifications (asin, classified_at);
+CREATE INDEX IF NOT EXISTS idx_classifications_run ON classifications (run_id);
+CREATE INDEX IF NOT EXISTS idx_classifications_group ON classifications (shopee_group);
+CREATE TABLE IF NOT EXISTS approvals (
+    asin TEXT PRIMARY KEY,
+    decision TEXT NOT NULL,
+    reason TEXT,
+    approver TEXT,
+    decided_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_approvals_decision ON approvals (decision);
+CREATE TABLE IF NOT EXISTS listings (
+    asin TEXT NOT NULL,
+    store_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    shopee_item_id TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (asin, store_id)
+);
+CREATE INDEX IF NOT EXISTS idx_listings_status ON listings (status);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id TEXT PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    source TEXT,
+    items INTEGER,
+    failed_items INTEGER,
+    wall_seconds REAL,
+    items_per_minute REAL,
+    error_rate REAL,
+    total_retries INTEGER,
+    total_cache_hits INTEGER
+);
+CREATE TABLE IF NOT EXISTS run_stage_metrics (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    calls INTEGER,
+    errors INTEGER,
+    retries INTEGER,
+    cache_hits INTEGER,
+    total_seconds REAL,
+    mean_ms REAL,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    max_ms REAL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE TABLE IF NOT EXISTS run_usage (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    requests INTEGER,
+    throttled INTEGER,
+    retries INTEGER,
+    errors INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost_usd REAL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, stage, provider, operation)
+);
+"""
+
+# 最新状態（最新オファー・最新分類・承認・出品状態）を1行/ASINで返すクエリ
+LATEST_STATE_QUERY = """
+WITH latest_offer AS (
+    SELECT * FROM (
+        SELECT o.*, ROW_NUMBER() OVER (PARTITION BY asin ORDER BY captured_at DESC, id DESC) AS rn
+        FROM offers o
+    ) WHERE rn = 1
+),
+latest_class AS (
+    SELECT * FROM (
+        SELECT c.*, ROW_NUMBER() OVER (PARTITION BY asin ORDER BY classified_at DESC, id DESC) AS rn
+        FROM classifications c
+    ) WHERE rn = 1
+)
+SELECT
+    p.asin, p.title, p.clean_title, p.brand, p.category, p.first_seen, p.last_seen,
+    t.japanese_name, t.llm_source,
+    o.is_prime, o.seller_type, o.seller_name, o.ship_hours, o.ship_bucket, o.price,
+    c.shopee_group, c.shopee_suitability_score, c.relevance_score, c.match_percentage, c.classified_at,
+    a.decision AS approval_decision, a.decided_at AS approval_decided_at,
+    l.store_id, l.status AS listing_status, l.shopee_item_id
+FROM products p
+LEFT JOIN translations t ON t.source_title = p.clean_title
+LEFT JOIN latest_offer o ON o.asin = p.asin
+LEFT JOIN latest_class c ON c.asin = p.asin
+LEFT JOIN approvals a ON a.asin = p.asin
+LEFT JOIN listings l ON l.asin = p.asin
+"""
+
+# パイプライン出力カラム → レジストリカラム（先に見つかったカラムを使用）
+COLUMN_ALIASES = {
+    'asin': ['asin', 'amazon_asin'],
+    'title': ['original_title', 'title', 'Name', 'clean_title'],
+    'clean_title': ['clean_title'],
+    'brand': ['amazon_brand', 'extracted_brand', 'brand'],
+    'category': ['category', 'カテゴリ'],
+    'japanese_name': ['japanese_name', 'amazon_title'],
+    'llm_source': ['llm_source'],
+    'is_prime': ['is_prime'],
+    'seller_type': ['seller_type'],
+    'seller_name': ['seller_name'],
+    'seller_id': ['seller_id'],
+    'is_fba': ['is_fba'],
+    'ship_hours': ['ship_hours'],
+    'ship_bucket': ['ship_bucket'],
+    'ship_source': ['ship_source'],
+    'price': ['price', '価格'],
+    'shopee_group': ['shopee_group'],
+    'shopee_suitability_score': ['shopee_suitability_score'],
+    'relevance_score': ['relevance_score'],
+    'match_percentage': ['match_percentage']
+}
+
+def _column_values(df: pd.DataFrame, name: str) -> pd.Series:
+    """別名を考慮してカラムを取得（無い場合は全件None）"""
+    for alias in COLUMN_ALIASES.get(name, [name]):
+        if alias in df.columns:
+            return df[alias]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+def _to_sql_values(series: pd.Series, kind: str = 'text') -> List[Any]:
+    """SQLiteに渡せるPython値のリストに変換（欠損はNone）"""
+    if kind == 'real':
+        values = pd.to_numeric(series, errors='coerce')
+        return [None if pd.isna(v) else float(v) for v in values]
+    if kind == 'bool':
+        result = []
+        for v in series:
+            if v is None or (isinstance(v, float) and np.isnan(v)):
+                result.append(None)
+            elif isinstance(v, str):
+                result.append(1 if v.strip().lower() in ('true', '1', 'yes') else 0)
+            else:
+                result.append(1 if bool(v) else 0)
+        return result
+    return [None if (v is None or (isinstance(v, float) and np.isnan(v))) else str(v) for v in series]
+
+def _asin_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    有効なASINを持つ行のみ（ASINは正規化済みカラム '_asin'、元の行位置は '_row' に格納）
+
+    同じASINが1回の実行に複数行ある場合も、'_row' でオファーと分類を行単位に対応付けられる。
+    """
+    asins = _column_values(df, 'asin').astype(str).str.strip()
+    valid = asins.ne('') & ~asins.str.upper().isin(['N/A', 'NAN', 'NONE'])
+    frame = df.loc[valid.values]
+    return frame.assign(_asin=asins[valid].values, _row=np.arange(len(df))[valid.values])
+
+class ProductRegistryManager:
+    """SQLite商品レジストリを管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None, db_name: str = 'registry.db'):
+        """
+        ProductRegistryManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            db_name: データベースファイル名
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.db_path = self.data_dir / db_name
+        self._initialize_schema()
+
+        logger.info(f"ProductRegistryManager初期化完了: {self.db_path}")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    @contextmanager
+    def connect(self):
+        """
+        接続のコンテキストマネージャ（正常終了時にコミット、例外時にロールバック）
+
+        Streamlitの再実行はスレッドが変わるため、接続は呼び出しごとに開く。
+        """
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _initialize_schema(self) -> None:
+        """テーブル・インデックスの作成"""
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(REGISTRY_SCHEMA)
+            # v3以前のDB: 行位置カラムを追加（既存行はNULLのまま）
+            for table in ('offers', 'classifications'):
+                columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                if 'row_position' not in columns:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN row_position INTEGER")
+            connection.execute(f"PRAGMA user_version={REGISTRY_SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # 一括アップサート（パイプライン用）
+    # ------------------------------------------------------------------
+    def upsert_products(self, df: pd.DataFrame, connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        商品（ASIN）の一括アップサート（first_seenは保持、それ以外は更新）
+
+        Returns:
+            対象件数
+        """
+        frame = _asin_frame(df).drop_duplicates('_asin', keep='last')
+        if frame.empty:
+            return 0
+        now = datetime.now().isoformat()
+        rows = list(zip(
+            frame['_asin'],
+            _to_sql_values(_column_values(frame, 'title')),
+            _to_sql_values(_column_values(frame, 'clean_title')),
+            _to_sql_values(_column_values(frame, 'brand')),
+            _to_sql_values(_column_values(frame, 'category')),
+            [now] * len(frame),
+            [now] * len(frame)
+        ))
+        sql = """
+            INSERT INTO products (asin, title, clean_title, brand, category, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(asin) DO UPDATE SET
+                title = COALESCE(excluded.title, products.title),
+                clean_title = COALESCE(excluded.clean_title, products.clean_title),
+                brand = COALESCE(excluded.brand, products.brand),
+                category = COALESCE(excluded.category, products.category),
+                last_seen = excluded.last_seen
+        """
+        return self._executemany(sql, rows, connection)
+
+    def record_offer_snapshots(self, df: pd.DataFrame, run_id: Optional[str] = None,
+                               captured_at: Optional[datetime] = None,
+                               connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        オファー情報（Prime・出品者・発送時間）のスナップショットを追記
+
+        Returns:
+            追記件数
+        """
+        frame = _asin_frame(df)
+        if frame.empty:
+            return 0
+        timestamp = (captured_at or datetime.now()).isoformat()
+        rows = list(zip(
+            frame['_asin'],
+            [run_id] * len(frame),
+            frame['_row'].tolist(),
+            [timestamp] * len(frame),
+            _to_sql_values(_column_values(frame, 'is_prime'), 'bool'),
+            _to_sql_values(_column_values(frame, 'seller_type')),
+            _to_sql_values(_column_values(frame, 'seller_name')),
+            _to_sql_values(_column_values(frame, 'seller_id')),
+            _to_sql_values(_column_values(frame, 'is_fba'), 'bool'),
+            _to_sql_values(_column_values(frame, 'ship_hours'), 'real'),
+            _to_sql_values(_column_values(frame, 'ship_bucket')),
+            _to_sql_values(_column_values(frame, 'ship_source')),
+            _to_sql_values(_column_values(frame, 'price'), 'real')
+        ))
+        sql = """
+            INSERT INTO offers (asin, run_id, row_position, captured_at, is_prime, seller_type, seller_name,
+                                seller_id, is_fba, ship_hours, ship_bucket, ship_source, price)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._executemany(sql, rows, connection)
+
+    def upsert_translations(self, df: pd.DataFrame, connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        日本語化結果の一括アップサート（キー: clean_title）
+
+        Returns:
+            対象件数
+        """
+        source = _column_values(df, 'clean_title')
+        japanese = _column_values(df, 'japanese_name')
+        frame = pd.DataFrame({
+            'source': _to_sql_values(source),
+            'japanese': _to_sql_values(japanese),
+            'llm_source': _to_sql_values(_column_values(df, 'llm_source'))
+        }).dropna(subset=['source', 'japanese'])
+        frame = frame[frame['japanese'].str.strip() != ''].drop_duplicates('source', keep='last')
+        if frame.empty:
+            return 0
+        now = datetime.now().isoformat()
+        rows = [(s, j, l, now) for s, j, l in frame[['source', 'japanese', 'llm_source']].itertuples(index=False)]
+        sql = """
+            INSERT INTO translations (source_title, japanese_name, llm_source, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(source_title) DO UPDATE SET
+                japanese_name = excluded.japanese_name,
+                llm_source = excluded.llm_source,
+                updated_at = excluded.updated_at
+        """
+        return self._executemany(sql, rows, connection)
+
+    def record_classifications(self, df: pd.DataFrame, run_id: Optional[str] = None,
+                               connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        分類結果（グループ・スコア）を追記
+
+        Returns:
+            追記件数
+        """
+        frame = _asin_frame(df)
+        if frame.empty:
+            return 0
+        now = datetime.now().isoformat()
+        rows = list(zip(
+            frame['_asin'],
+            [run_id] * len(frame),
+            frame['_row'].tolist(),
+            _to_sql_values(_column_values(frame, 'shopee_group')),
+            _to_sql_values(_column_values(frame, 'shopee_suitability_score'), 'real'),
+            _to_sql_values(_column_values(frame, 'relevance_score'), 'real'),
+            _to_sql_values(_column_values(frame, 'match_percentage'), 'real'),
+            [now] * len(frame)
+        ))
+        sql = """
+            INSERT INTO classifications (asin, run_id, row_position, shopee_group, shopee_suitability_score,
+                                         relevance_score, match_percentage, classified_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._executemany(sql, rows, connection)
+
+    def upsert_approvals(self, entries: Dict[str, Dict[str, Any]],
+                         connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        承認判断の一括アップサート
+
+        Args:
+            entries: ASIN → {'decision', 'reason', 'approver', 'decided_at'}（承認台帳と同形式）
+
+        Returns:
+            対象件数
+        """
+        rows = [
+            (str(asin), entry.get('decision'), entry.get('reason'), entry.get('approver'),
+             entry.get('decided_at') or datetime.now().isoformat())
+            for asin, entry in entries.items() if asin and entry.get('decision')
+        ]
+        sql = """
+            INSERT INTO approvals (asin, decision, reason, approver, decided_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(asin) DO UPDATE SET
+                decision = excluded.decision,
+                reason = excluded.reason,
+                approver = excluded.approver,
+                decided_at = excluded.decided_at
+        """
+        return self._executemany(sql, rows, connection)
+
+    def sync_approval_ledger(self, ledger) -> int:
+        """承認台帳（ApprovalLedgerManager）の内容をレジストリへ反映"""
+        return self.upsert_approvals(getattr(ledger, 'entries', {}) or {})
+
+    def upsert_listing_status(self, asins: Iterable[str], status: str, store_id: str = 'default',
+                              shopee_item_ids: Optional[Iterable[Optional[str]]] = None,
+                              connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        出品状態の一括アップサート
+
+        Args:
+            asins: 対象ASIN
+            status: 'listed' / 'paused' / 'delisted' など
+            store_id: 店舗ID
+            shopee_item_ids: Shopee商品ID（asinsと同じ長さ、任意）
+
+        Returns:
+            対象件数
+        """
+        asins = [str(a).strip() for a in asins]
+        item_ids = list(shopee_item_ids) if shopee_item_ids is not None else [None] * len(asins)
+        now = datetime.now().isoformat()
+        rows = [
+            (asin, store_id, status, None if item_id is None else str(item_id), now)
+            for asin, item_id in zip(asins, item_ids) if asin
+        ]
+        sql = """
+            INSERT INTO listings (asin, store_id, status, shopee_item_id, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(asin, store_id) DO UPDATE SET
+                status = excluded.status,
+                shopee_item_id = COALESCE(excluded.shopee_item_id, listings.shopee_item_id),
+                updated_at = excluded.updated_at
+        """
+        return self._executemany(sql, rows, connection)
+
+    def record_pipeline_run(self, df: pd.DataFrame, source: str = '', run_id: Optional[str] = None) -> str:
+        """
+        処理結果を1トランザクションでレジストリへ記録（商品・オファー・日本語化・分類）
+
+        Args:
+            df: 処理・分類済みデータフレーム
+            source: 処理元（ファイル名・処理エンジンなど）
+            run_id: 実行ID（Noneの場合は自動採番）
+
+        Returns:
+            実行ID
+        """
+        run_id = run_id or f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO runs (run_id, created_at, source, row_count) VALUES (?, ?, ?, ?)",
+                (run_id, datetime.now().isoformat(), source, len(df))
+            )
+            products = self.upsert_products(df, connection)
+            offers = self.record_offer_snapshots(df, run_id, connection=connection)
+            translations = self.upsert_translations(df, connection)
+            classifications = self.record_classifications(df, run_id, connection)
+        logger.info(f"レジストリ記録: run={run_id} 商品{products}件 / オファー{offers}件 / 日本語化{translations}件 / 分類{classifications}件")
+        return run_id
+
+    def record_run_metrics(self, run_id: str, overview: Dict[str, Any], stages: pd.DataFrame) -> int:
+        """
+        実行のステージ別計測値を記録（同じ実行IDは上書き、出力など後続ステージの追記に対応）
+
+        Args:
+            run_id: 実行ID
+            overview: StageMetrics.overview() の戻り値
+            stages: StageMetrics.stage_frame() の戻り値
+
+        Returns:
+            記録したステージ数
+        """
+        stage_columns = ['calls', 'errors', 'retries', 'cache_hits', 'total_seconds',
+                         'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+        # Series.tolist() でnumpy型をPython型に変換（sqlite3はnumpy整数を受け付けない）
+        columns = [stages[col].tolist() for col in ['stage'] + stage_columns] if not stages.empty else []
+        rows = [(run_id, *values) for values in zip(*columns)]
+        with self.connect() as connection:
+            connection.execute(
+                """INSERT OR REPLACE INTO run_metrics
+                   (run_id, recorded_at, source, items, failed_items, wall_seconds, items_per_minute,
+                    error_rate, total_retries, total_cache_hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (run_id, datetime.now().isoformat(), overview.get('source', ''),
+                 int(overview.get('items', 0)), int(overview.get('failed_items', 0)),
+                 float(overview.get('wall_seconds', 0.0)), float(overview.get('items_per_minute', 0.0)),
+                 float(overview.get('error_rate', 0.0)), int(overview.get('total_retries', 0)),
+                 int(overview.get('total_cache_hits', 0)))
+            )
+            self._executemany(
+                f"INSERT OR REPLACE INTO run_stage_metrics (run_id, stage, {', '.join(stage_columns)}) "
+                f"VALUES ({', '.join('?' * (len(stage_columns) + 2))})",
+                rows, connection
+            )
+        return len(rows)
+
+    def record_run_usage(self, run_id: str, usage: pd.DataFrame) -> int:
+        """
+        実行の使用量を記録（同じ実行IDは置き換え）
+
+        Args:
+            run_id: 実行ID
+            usage: UsageLedger.usage_frame() の戻り値
+
+        Returns:
+            記録した行数
+        """
+        usage_columns = ['stage', 'provider', 'operation', 'requests', 'throttled', 'retries', 'errors',
+                         'input_tokens', 'output_tokens', 'cost_usd']
+        recorded_at = datetime.now().isoformat()
+        columns = [usage[col].tolist() for col in usage_columns] if not usage.empty else []
+        rows = [(run_id, *values, recorded_at) for values in zip(*columns)]
+        with self.connect() as connection:
+            connection.execute("DELETE FROM run_usage WHERE run_id = ?", (run_id,))
+            self._executemany(
+                f"INSERT INTO run_usage (run_id, {', '.join(usage_columns)}, recorded_at) "
+                f"VALUES ({', '.join('?' * (len(usage_columns) + 2))})",
+                rows, connection
+            )
+        return len(rows)
+
+    def _executemany(self, sql: str, rows: List[tuple], connection: Optional[sqlite3.Connection] = None) -> int:
+        if not rows:
+            return 0
+        if connection is not None:
+            connection.executemany(sql, rows)
+            return len(rows)
+        with self.connect() as own_connection:
+            own_connection.executemany(sql, rows)
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # 参照API（ダッシュボード・分析タブ用）
+    # ------------------------------------------------------------------
+    def query_frame(self, sql: str, params: Iterable[Any] = ()) -> pd.DataFrame:
+        """任意の読み取りクエリをDataFrameで取得"""
+        with self.connect() as connection:
+            return pd.read_sql_query(sql, connection, params=list(params))
+
+    def query_latest_state(self, asins: Optional[Iterable[str]] = None,
+                           shopee_group: Optional[str] = None,
+                           approval_decision: Optional[str] = None,
+                           listing_status: Optional[str] = None,
+                           limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        ASINごとの最新状態を取得（最新オファー・最新分類・承認・出品状態を結合）
+
+        Args:
+            asins: 対象ASIN（Noneで全件）
+            shopee_group: グループで絞り込み
+            approval_decision: 'approved' / 'rejected' で絞り込み
+            listing_status: 出品状態で絞り込み
+            limit: 最大件数
+
+        Returns:
+            1行/ASIN（店舗が複数ある場合は店舗ごと）のDataFrame
+        """
+        conditions, params = [], []
+        if asins is not None:
+            asins = [str(a) for a in asins]
+            if not asins:
+                return self.query_frame(LATEST_STATE_QUERY + " WHERE 0")
+            conditions.append(f"p.asin IN ({','.join('?' * len(asins))})")
+            params.extend(asins)
+        if shopee_group:
+            conditions.append("c.shopee_group = ?")
+            params.append(shopee_group)
+        if approval_decision:
+            conditions.append("a.decision = ?")
+            params.append(approval_decision)
+        if listing_status:
+            conditions.append("l.status = ?")
+            params.append(listing_status)
+
+        sql = LATEST_STATE_QUERY
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY p.last_seen DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self.query_frame(sql, params)
+
+    def list_runs(self, limit: int = 20) -> pd.DataFrame:
+        """実行履歴（新しい順）"""
+        return self.query_frame("SELECT * FROM runs ORDER BY created_at DESC LIMIT ?", [limit])
+
+    def load_run_frame(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        指定実行（Noneの場合は最新実行）の処理結果を再構成
+
+        ダッシュボード・分析タブでセッションにデータが無い場合の表示用。
+
+        Returns:
+            processed_df と同じカラム名を持つDataFrame（記録が無い場合は空）
+        """
+        if run_id is None:
+            runs = self.list_runs(limit=1)
+            if runs.empty:
+                return pd.DataFrame()
+            run_id = runs['run_id'].iloc[0]
+
+        # オファーは行位置で対応付ける（行位置の無い旧記録は ASIN ごとに最新1件に絞り、行が増えないようにする）
+        frame = self.query_frame("""
+            WITH run_offers AS (
+                SELECT * FROM (
+                    SELECT o.*, ROW_NUMBER() OVER (
+                        PARTITION BY asin, row_position ORDER BY captured_at DESC, id DESC
+                    ) AS rn
+                    FROM offers o
+                    WHERE o.run_id = ?
+                ) WHERE rn = 1
+            )
+            SELECT
+                c.asin, p.title AS original_title, p.clean_title, p.brand AS amazon_brand,
+                t.japanese_name, t.llm_source,
+                o.is_prime, o.seller_type, o.seller_name, o.seller_id, o.is_fba,
+                o.ship_hours, o.ship_bucket, o.ship_source, o.price,
+                c.shopee_group, c.shopee_suitability_score, c.relevance_score, c.match_percentage
+            FROM classifications c
+            JOIN products p ON p.asin = c.asin
+            LEFT JOIN translations t ON t.source_title = p.clean_title
+            LEFT JOIN run_offers o ON o.asin = c.asin AND o.row_position IS c.row_position
+            WHERE c.run_id = ?
+            ORDER BY c.id
+        """, [run_id, run_id])
+        for col in ('is_prime', 'is_fba'):
+            frame[col] = frame[col].map({1: True, 0: False})
+        frame['amazon_asin'] = frame['asin']
+        return frame
+
+    def get_run_metrics(self, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        実行の計測値（Noneの場合は最新の計測済み実行）
+
+        Returns:
+            dict: run_metrics の1行と 'stages'（ステージ別DataFrame）、記録が無い場合はNone
+        """
+        if run_id is None:
+            overview = self.query_frame("SELECT * FROM run_metrics ORDER BY recorded_at DESC LIMIT 1")
+        else:
+            overview = self.query_frame("SELECT * FROM run_metrics WHERE run_id = ?", [run_id])
+        if overview.empty:
+            return None
+        result = overview.iloc[0].to_dict()
+        result['stages'] = self.query_frame(
+            "SELECT * FROM run_stage_metrics WHERE run_id = ?", [result['run_id']]
+        )
+        return result
+
+    def list_run_metrics(self, limit: int = 20) -> pd.DataFrame:
+        """実行ごとの計測値の履歴（新しい順）"""
+        return self.query_frame("SELECT * FROM run_metrics ORDER BY recorded_at DESC LIMIT ?", [limit])
+
+    def get_run_usage(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        """実行の使用量（Noneの場合は最新の記録済み実行、記録が無い場合は空）"""
+        if run_id is None:
+            latest = self.query_frame("SELECT run_id FROM run_usage ORDER BY recorded_at DESC LIMIT 1")
+            if latest.empty:
+                return latest
+            run_id = latest['run_id'].iloc[0]
+        return self.query_frame(
+            "SELECT * FROM run_usage WHERE run_id = ? ORDER BY stage, provider, operation", [run_id]
+        )
+
+    def list_run_costs(self, limit: int = 20) -> pd.DataFrame:
+        """
+        実行ごとの使用量合計と件数あたりコスト（新しい順）
+
+        出品対象件数はその実行でグループAに分類された件数。
+        """
+        return self.query_frame("""
+            SELECT
+                u.run_id, r.created_at, r.source, r.row_count AS items,
+                (SELECT COUNT(*) FROM classifications c
+                 WHERE c.run_id = u.run_id AND c.shopee_group = 'A') AS listed_items,
+                SUM(u.requests) AS requests, SUM(u.throttled) AS throttled, SUM(u.retries) AS retries,
+                SUM(u.errors) AS errors, SUM(u.input_tokens) AS input_tokens,
+                SUM(u.output_tokens) AS output_tokens, SUM(u.cost_usd) AS cost_usd,
+                SUM(u.cost_usd) / NULLIF(r.row_count, 0) AS cost_per_item,
+                SUM(u.cost_usd) / NULLIF((SELECT COUNT(*) FROM classifications c
+                                          WHERE c.run_id = u.run_id AND c.shopee_group = 'A'), 0)
+                    AS cost_per_listed_item
+            FROM run_usage u
+            LEFT JOIN runs r ON r.run_id = u.run_id
+            GROUP BY u.run_id
+            ORDER BY MAX(u.recorded_at) DESC
+            LIMIT ?
+        """, [limit])
+
+    def get_group_history(self, asin: str) -> pd.DataFrame:
+        """ASINの分類履歴（グループ遷移の確認用）"""
+        return self.query_frame(
+            "SELECT run_id, shopee_group, shopee_suitability_score, relevance_score, classified_at "
+            "FROM classifications WHERE asin = ? ORDER BY classified_at", [asin]
+        )
+
+    def get_registry_statistics(self) -> Dict[str, Any]:
+        """
+        レジストリ統計情報の取得
+
+        Returns:
+            統計情報
+        """
+        with self.connect() as connection:
+            counts = {
+                table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('runs', 'products', 'offers', 'translations', 'classifications', 'approvals', 'listings',
+                              'run_metrics', 'run_usage')
+            }
+            listing_counts = dict(connection.execute(
+                "SELECT status, COUNT(*) FROM listings GROUP BY status"
+            ).fetchall())
+        return {**counts, 'listing_status': listing_counts, 'db_path': str(self.db_path)}
+
+# 便利関数
+def create_registry_manager(data_dir: Optional[Union[str, pathlib.Path]] = None) -> ProductRegistryManager:
+    """
+    ProductRegistryManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+
+    Returns:
+        ProductRegistryManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return ProductRegistryManager(data_dir)
+
+def load_latest_run_frame(data_dir: Optional[Union[str, pathlib.Path]] = None) -> Optional[pd.DataFrame]:
+    """
+    最新実行の処理結果を取得（ダッシュボード・分析タブ用）
+
+    Returns:
+        処理結果のDataFrame（未記録・読み込み失敗の場合はNone）
+    """
+    try:
+        frame = create_registry_manager(data_dir).load_run_frame()
+        return frame if not frame.empty else None
+    except Exception as e:
+        logger.error(f"レジストリ読み込みエラー: {e}")
+        return None
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = create_registry_manager(tmp_dir)
+
+        print("=== 商品レジストリテスト ===")
+        processed = pd.DataFrame({
+            'asin': ['B000000001', 'B000000002', ''],
+            'clean_title': ['fancl mild cleansing oil 120ml', 'tsubaki premium moist shampoo 490ml', 'no asin'],
+            'japanese_name': ['ファンケル マイルドクレンジングオイル', 'ツバキ プレミアムモイスト シャンプー', ''],
+            'amazon_brand': ['FANCL', 'TSUBAKI', None],
+            'is_prime': [True, False, False],
+            'seller_type': ['amazon', 'third_party', 'unknown'],
+            'ship_hours': [12, None, None],
+            'shopee_group': ['A', 'B', 'B'],
+            'shopee_suitability_score': [85, 55, 10],
+            'relevance_score': [90, 60, 0]
+        })
+        run_id = registry.record_pipeline_run(processed, source='demo')
+        registry.upsert_approvals({'B000000002': {'decision': 'approved', 'reason': 'test', 'approver': 'test_user'}})
+        registry.upsert_listing_status(['B000000001'], 'listed', store_id='sg')
+
+        print(registry.query_latest_state()[['asin', 'shopee_group', 'approval_decision', 'listing_status']])
+        print(registry.load_run_frame(run_id)[['asin', 'shopee_group', 'ship_hours', 'is_prime']])
+        print(f"統計: {registry.get_registry_statistics()}")
+
+        print("テスト完了")
@@ -0,0 +1,237 @@
+"""
+共有APIキャッシュ（shared_api_cache.db）管理システム専用モジュール
+
+責任:
+- 日本語化結果・getItemOffers応答など、外部API呼び出し結果の名前空間別キャッシュ
+- 複数プロセス（店舗・国別の並列ジョブ）からの同時読み書き（SQLite WAL）
+- 名前空間ごとの有効期限管理とヒット率の集計
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立（呼び出し側は activate_shared_cache で有効化した範囲のみ利用）
+- テスト容易性確保
+"""
+
+import json
+import sqlite3
+import pathlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Union
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_SCHEMA_VERSION = 1
+
+# 名前空間ごとの既定の有効期限（秒）
+#   translation: 英語タイトル → 日本語商品名（LLMの出力は安定しているため長め）
+#   offers: マーケットプレイス・ASIN → getItemOffers の応答（価格・在庫が変わるため短め）
+DEFAULT_TTL_SECONDS = {
+    'translation': 30 * 24 * 3600,
+    'offers': 6 * 3600
+}
+FALLBACK_TTL_SECONDS = 24 * 3600
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at);
+"""
+
+_active_cache = ContextVar('active_shared_api_cache', default=None)
+
+class SharedApiCacheManager:
+    """プロセス間で共有するAPI結果キャッシュを管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None, db_name: str = 'shared_api_cache.db',
+                 ttl_seconds: Optional[Dict[str, int]] = None):
+        """
+        SharedApiCacheManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            db_name: データベースファイル名
+            ttl_seconds: 名前空間ごとの有効期限（DEFAULT_TTL_SECONDS への上書き）
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.db_path = self.data_dir / db_name
+        self.ttl_seconds = {**DEFAULT_TTL_SECONDS, **(ttl_seconds or {})}
+        self.hits = {}
+        self.misses = {}
+        self._initialize_schema()
+
+        logger.info(f"SharedApiCacheManager初期化完了: {self.db_path}")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    @contextmanager
+    def connect(self):
+        """接続のコンテキストマネージャ（他プロセスの書き込み中は最大30秒待機）"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _initialize_schema(self) -> None:
+        """テーブル・インデックスの作成"""
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(CACHE_SCHEMA)
+            connection.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # 読み書き
+    # ------------------------------------------------------------------
+    def get(self, namespace: str, key: str, allow_expired: bool = False) -> Optional[Any]:
+        """
+        有効期限内の値の取得
+
+        Args:
+            namespace: 'translation' / 'offers' など
+            key: キー
+            allow_expired: Trueの場合は期限切れ（未削除）の値も返す（API遮断中の代替データ用）
+
+        Returns:
+            保存時の値（無い・期限切れの場合はNone）
+        """
+        expires_after = 0.0 if allow_expired else time.time()
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, str(key), expires_after)
+            ).fetchone()
+        counter = self.hits if row else self.misses
+        counter[namespace] = counter.get(namespace, 0) + 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """
+        値の保存（JSONに変換できる値のみ）
+
+        Args:
+            namespace: 'translation' / 'offers' など
+            key: キー
+            value: 保存する値
+            ttl_seconds: 有効期限（Noneで名前空間の既定値）
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds.get(namespace, FALLBACK_TTL_SECONDS)
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, str(key), json.dumps(value, ensure_ascii=False), now, now + ttl)
+            )
+
+    def purge_expired(self) -> int:
+        """期限切れの削除（削除件数を返す）"""
+        with self.connect() as connection:
+            return connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        統計情報の取得（件数は全プロセス分、ヒット・ミスはこのインスタンス分）
+
+        Returns:
+            統計情報
+        """
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT namespace, COUNT(*), SUM(expires_at > ?) FROM cache_entries GROUP BY namespace",
+                (time.time(),)
+            ).fetchall()
+        namespaces = {}
+        for namespace, total, valid in rows:
+            hits = self.hits.get(namespace, 0)
+            lookups = hits + self.misses.get(namespace, 0)
+            namespaces[namespace] = {
+                'entries': total,
+                'valid_entries': int(valid or 0),
+                'hits': hits,
+                'hit_rate': (hits / lookups * 100) if lookups else 0.0
+            }
+        return {'namespaces': namespaces, 'db_path': str(self.db_path)}
+
+# ======================== 実行中の共有キャッシュ（呼び出し先からの参照） ========================
+
+@contextmanager
+def activate_shared_cache(cache):
+    """共有キャッシュを使う実行範囲を指定（範囲外の get_active_shared_cache はNone）"""
+    token = _active_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _active_cache.reset(token)
+
+def get_active_shared_cache():
+    """実行中の共有キャッシュ（無い場合はNone）"""
+    return _active_cache.get()
+
+# 便利関数
+def create_shared_api_cache_manager(data_dir: Optional[Union[str, pathlib.Path]] = None,
+                                    ttl_seconds: Optional[Dict[str, int]] = None) -> SharedApiCacheManager:
+    """
+    SharedApiCacheManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+        ttl_seconds: 名前空間ごとの有効期限
+
+    Returns:
+        SharedApiCacheManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return SharedApiCacheManager(data_dir, ttl_seconds=ttl_seconds)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = create_shared_api_cache_manager(tmp_dir, ttl_seconds={'offers': 1})
+
+        print("=== 共有APIキャッシュテスト ===")
+        cache.put('translation', 'fancl mild cleansing oil 120ml', ['ファンケル マイルドクレンジングオイル 120ml', 'GPT-4o'])
+        cache.put('offers', 'A1VC38T7YXB528:B000000001', {'Offers': [{'SellerId': 'AN1VRQENFRJN5'}]})
+        print(f"日本語化: {cache.get('translation', 'fancl mild cleansing oil 120ml')}")
+        print(f"オファー: {cache.get('offers', 'A1VC38T7YXB528:B000000001')}")
+        print(f"未登録: {cache.get('translation', 'unknown title')}")
+        time.sleep(1.1)
+        print(f"期限切れ後: {cache.get('offers', 'A1VC38T7YXB528:B000000001')}")
+        print(f"期限切れ削除: {cache.purge_expired()}件")
+        print(f"統計: {cache.get_statistics()}")
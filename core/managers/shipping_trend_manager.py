@@ -0,0 +1,423 @@
+"""
+ShippingTime推移（Shipping Trend）管理システム専用モジュール
+
+責任:
+- 実行ごとのShippingTime取得率・発送時間分布の時系列保存
+- ASINごとの発送時間・取得成否・フォールバック理由の履歴保存
+- 出品者タイプ・ブランド・カテゴリ別の集計と、発送時間が悪化したASINの抽出
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立
+- テスト容易性確保
+"""
+
+import sqlite3
+import pathlib
+import uuid
+import pandas as pd
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TREND_SCHEMA_VERSION = 1
+
+TREND_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shipping_runs (
+    run_id TEXT PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    source TEXT,
+    total INTEGER,
+    with_shipping INTEGER,
+    success_rate REAL,
+    fast_24h INTEGER,
+    medium_48h INTEGER,
+    slow_48h_plus INTEGER,
+    avg_hours REAL,
+    median_hours REAL
+);
+CREATE TABLE IF NOT EXISTS shipping_observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    asin TEXT NOT NULL,
+    ship_hours REAL,
+    ship_success INTEGER NOT NULL,
+    ship_source TEXT,
+    fallback_reason TEXT,
+    missing_reason TEXT,
+    seller_type TEXT,
+    brand TEXT,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ship_obs_asin ON shipping_observations (asin, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_ship_obs_run ON shipping_observations (run_id);
+"""
+
+# 集計に使える軸（APIの引数 → カラム）
+ROLLUP_DIMENSIONS = ('seller_type', 'brand', 'category')
+
+# パイプライン出力カラム → 保存カラム（先に見つかったカラムを使用）
+TREND_COLUMN_ALIASES = {
+    'asin': ['asin', 'amazon_asin'],
+    'ship_hours': ['ship_hours'],
+    'ship_source': ['ship_source'],
+    'fallback_reason': ['classification_reason'],
+    'missing_reason': ['missing_reason'],
+    'seller_type': ['seller_type'],
+    'brand': ['amazon_brand', 'extracted_brand', 'brand'],
+    'category': ['main_category', 'category', 'カテゴリ']
+}
+
+# 悪化判定の既定値（ベースライン中央値からの増加時間）
+DEFAULT_DEGRADATION_HOURS = 24
+DEFAULT_BASELINE_RUNS = 5
+
+def _trend_column(df: pd.DataFrame, name: str) -> pd.Series:
+    """別名を考慮してカラムを取得（無い場合は全件None）"""
+    for alias in TREND_COLUMN_ALIASES.get(name, [name]):
+        if alias in df.columns:
+            return df[alias]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+def _text_values(series: pd.Series) -> List[Optional[str]]:
+    return [None if (v is None or (isinstance(v, float) and np.isnan(v)) or str(v) == '') else str(v)
+            for v in series]
+
+def summarize_shipping(ship_hours: pd.Series) -> Dict[str, Any]:
+    """
+    発送時間列の集計（取得率・24/48/48h超の分布・平均・中央値）
+
+    Args:
+        ship_hours: 発送時間（欠損は取得失敗）
+
+    Returns:
+        集計値の辞書
+    """
+    hours = pd.to_numeric(ship_hours, errors='coerce')
+    valid = hours.dropna()
+    total = len(hours)
+    return {
+        'total': total,
+        'with_shipping': int(len(valid)),
+        'success_rate': (len(valid) / total * 100) if total > 0 else 0.0,
+        'fast_24h': int((valid <= 24).sum()),
+        'medium_48h': int(((valid > 24) & (valid <= 48)).sum()),
+        'slow_48h_plus': int((valid > 48).sum()),
+        'avg_hours': float(valid.mean()) if len(valid) else None,
+        'median_hours': float(valid.median()) if len(valid) else None
+    }
+
+class ShippingTrendManager:
+    """ShippingTimeの実行別・ASIN別の時系列を管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None, db_name: str = 'shipping_trends.db'):
+        """
+        ShippingTrendManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            db_name: データベースファイル名
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.db_path = self.data_dir / db_name
+        self._initialize_schema()
+
+        logger.info(f"ShippingTrendManager初期化完了: {self.db_path}")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    @contextmanager
+    def connect(self):
+        """接続のコンテキストマネージャ（正常終了時にコミット、例外時にロールバック）"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _initialize_schema(self) -> None:
+        """テーブル・インデックスの作成"""
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(TREND_SCHEMA)
+            connection.execute(f"PRAGMA user_version={TREND_SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # 記録
+    # ------------------------------------------------------------------
+    def record_run(self, df: pd.DataFrame, source: str = '', run_id: Optional[str] = None,
+                   recorded_at: Optional[datetime] = None) -> Optional[str]:
+        """
+        処理結果のShippingTime情報を1実行分として記録
+
+        Args:
+            df: ship_hours を含む処理済みデータフレーム
+            source: 処理元（ファイル名・処理エンジンなど）
+            run_id: 実行ID（Noneの場合は自動採番。レジストリと同じIDを渡すと突き合わせ可能）
+            recorded_at: 記録時刻（Noneの場合は現在時刻）
+
+        Returns:
+            実行ID（ship_hoursカラムが無い場合はNone）
+        """
+        if df is None or 'ship_hours' not in df.columns:
+            logger.warning("ship_hoursカラムが無いため推移記録をスキップ")
+            return None
+
+        run_id = run_id or f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        timestamp = (recorded_at or datetime.now()).isoformat()
+        summary = summarize_shipping(df['ship_hours'])
+
+        asins = _trend_column(df, 'asin').astype(str).str.strip()
+        valid = (asins.ne('') & ~asins.str.upper().isin(['N/A', 'NAN', 'NONE'])).values
+        frame = df.loc[valid]
+        hours = pd.to_numeric(frame['ship_hours'], errors='coerce')
+        rows = list(zip(
+            [run_id] * len(frame),
+            [timestamp] * len(frame),
+            asins[valid].values,
+            [None if pd.isna(v) else float(v) for v in hours],
+            hours.notna().astype(int).tolist(),
+            *[_text_values(_trend_column(frame, name))
+              for name in ('ship_source', 'fallback_reason', 'missing_reason', 'seller_type', 'brand', 'category')]
+        ))
+
+        with self.connect() as connection:
+            connection.execute("""
+                INSERT OR REPLACE INTO shipping_runs
+                    (run_id, recorded_at, source, total, with_shipping, success_rate,
+                     fast_24h, medium_48h, slow_48h_plus, avg_hours, median_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (run_id, timestamp, source, summary['total'], summary['with_shipping'], summary['success_rate'],
+                  summary['fast_24h'], summary['medium_48h'], summary['slow_48h_plus'],
+                  summary['avg_hours'], summary['median_hours']))
+            connection.execute("DELETE FROM shipping_observations WHERE run_id = ?", (run_id,))
+            if rows:
+                connection.executemany("""
+                    INSERT INTO shipping_observations
+                        (run_id, recorded_at, asin, ship_hours, ship_success, ship_source,
+                         fallback_reason, missing_reason, seller_type, brand, category)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+
+        logger.info(f"ShippingTime推移記録: run={run_id} 取得率{summary['success_rate']:.1f}% ({len(rows)}ASIN)")
+        return run_id
+
+    # ------------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------------
+    def query_frame(self, sql: str, params: List[Any] = ()) -> pd.DataFrame:
+        """任意の読み取りクエリをDataFrameで取得"""
+        with self.connect() as connection:
+            return pd.read_sql_query(sql, connection, params=list(params))
+
+    def get_run_history(self, limit: int = 30) -> pd.DataFrame:
+        """実行ごとの取得率・分布の推移（古い順）"""
+        frame = self.query_frame(
+            "SELECT * FROM shipping_runs ORDER BY recorded_at DESC LIMIT ?", [limit]
+        )
+        return frame.iloc[::-1].reset_index(drop=True)
+
+    def get_previous_run(self, exclude_run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """直近の実行サマリー（比較用、指定IDの実行は除外）"""
+        frame = self.query_frame(
+            "SELECT * FROM shipping_runs WHERE run_id != ? ORDER BY recorded_at DESC LIMIT 1",
+            [exclude_run_id or '']
+        )
+        return frame.iloc[0].to_dict() if not frame.empty else None
+
+    def get_asin_history(self, asin: str) -> pd.DataFrame:
+        """ASINの発送時間・取得成否・フォールバック理由の履歴（古い順）"""
+        return self.query_frame(
+            "SELECT run_id, recorded_at, ship_hours, ship_success, ship_source, fallback_reason, "
+            "missing_reason, seller_type FROM shipping_observations WHERE asin = ? ORDER BY recorded_at, id",
+            [asin]
+        )
+
+    def rollup(self, dimension: str = 'seller_type', last_runs: Optional[int] = None,
+               by_run: bool = False) -> pd.DataFrame:
+        """
+        出品者タイプ・ブランド・カテゴリ別の集計
+
+        Args:
+            dimension: 'seller_type' / 'brand' / 'category'
+            last_runs: 直近N実行に限定（Noneで全期間）
+            by_run: Trueの場合は実行ごとにも分割（推移表示用）
+
+        Returns:
+            observations / success_rate / avg_hours / median_hours / fast_24h_rate / fallback_count の集計表
+        """
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"集計軸は {ROLLUP_DIMENSIONS} のいずれか: {dimension}")
+
+        sql = f"SELECT run_id, recorded_at, {dimension}, ship_hours, ship_success, fallback_reason FROM shipping_observations"
+        params: List[Any] = []
+        if last_runs:
+            sql += " WHERE run_id IN (SELECT run_id FROM shipping_runs ORDER BY recorded_at DESC LIMIT ?)"
+            params.append(int(last_runs))
+        frame = self.query_frame(sql, params)
+        if frame.empty:
+            return frame
+
+        frame[dimension] = frame[dimension].fillna('unknown')
+        frame['is_fast'] = frame['ship_hours'] <= 24
+        frame['is_fallback'] = frame['fallback_reason'].fillna('').str.contains('フォールバック')
+        keys = ['run_id', 'recorded_at', dimension] if by_run else [dimension]
+        result = frame.groupby(keys, sort=False).agg(
+            observations=('ship_success', 'size'),
+            success_rate=('ship_success', 'mean'),
+            avg_hours=('ship_hours', 'mean'),
+            median_hours=('ship_hours', 'median'),
+            fast_24h=('is_fast', 'sum'),
+            fallback_count=('is_fallback', 'sum')
+        ).reset_index()
+        result['success_rate'] = result['success_rate'] * 100
+        result['fast_24h_rate'] = result['fast_24h'] / result['observations'] * 100
+        if by_run:
+            return result.sort_values(['recorded_at', 'observations'], ascending=[True, False], ignore_index=True)
+        return result.sort_values('observations', ascending=False, ignore_index=True)
+
+    def find_degraded_asins(self, min_increase_hours: float = DEFAULT_DEGRADATION_HOURS,
+                            baseline_runs: int = DEFAULT_BASELINE_RUNS,
+                            include_lost: bool = True, run_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        発送時間が悪化したASINの抽出
+
+        対象実行（既定は最新実行）で観測したASINについて、その観測を
+        それ以前の直近 baseline_runs 回の発送時間中央値と比較する
+        （最新実行に含まれないASINの古い悪化は報告しない）。
+
+        Args:
+            min_increase_hours: 悪化とみなす増加時間
+            baseline_runs: ベースラインに使う過去観測数
+            include_lost: 以前は取得できていたが最新で取得失敗したASINも含めるか
+            run_id: 対象実行（Noneの場合は最新実行）
+
+        Returns:
+            asin / baseline_hours / latest_hours / increase_hours / degradation（'slower' | 'lost'）など
+        """
+        if run_id is None:
+            latest_run = self.get_previous_run()
+            if latest_run is None:
+                return pd.DataFrame()
+            run_id = latest_run['run_id']
+
+        columns = "asin, run_id, recorded_at, ship_hours, ship_success, fallback_reason, seller_type, brand, category"
+        # 対象実行の観測（同じASINが複数行ある場合は最後の行）
+        latest = self.query_frame(f"""
+            SELECT {columns} FROM (
+                SELECT o.*, ROW_NUMBER() OVER (PARTITION BY asin ORDER BY id DESC) AS rn
+                FROM shipping_observations o WHERE run_id = ?
+            ) WHERE rn = 1
+        """, [run_id])
+        if latest.empty:
+            return latest
+        # それより前の実行の観測（ASINごとに新しい順に baseline_runs 件）
+        history = self.query_frame(f"""
+            SELECT {columns} FROM (
+                SELECT o.*, ROW_NUMBER() OVER (PARTITION BY o.asin ORDER BY o.recorded_at DESC, o.id DESC) AS rn
+                FROM shipping_observations o
+                JOIN (SELECT DISTINCT asin, recorded_at AS target_at FROM shipping_observations WHERE run_id = ?) t
+                    ON t.asin = o.asin AND o.run_id != ? AND o.recorded_at < t.target_at
+            ) WHERE rn <= ?
+        """, [run_id, run_id, int(baseline_runs)])
+
+        latest = latest.set_index('asin')
+        baseline = history.groupby('asin')['ship_hours'].agg(baseline_hours='median', baseline_observations='count')
+
+        result = latest.join(baseline, how='inner')
+        result = result[result['baseline_observations'] > 0]
+        result = result.rename(columns={'ship_hours': 'latest_hours', 'run_id': 'latest_run_id'})
+        result['increase_hours'] = result['latest_hours'] - result['baseline_hours']
+
+        slower = result['increase_hours'] >= min_increase_hours
+        lost = result['latest_hours'].isna() if include_lost else pd.Series(False, index=result.index)
+        result['degradation'] = np.select([slower, lost], ['slower', 'lost'], default='')
+        result = result[result['degradation'] != ''].drop(columns=['ship_success'])
+        return result.reset_index().sort_values(
+            ['degradation', 'increase_hours'], ascending=[False, False], ignore_index=True
+        )
+
+    def get_trend_statistics(self) -> Dict[str, Any]:
+        """
+        推移ストア統計情報の取得
+
+        Returns:
+            統計情報
+        """
+        with self.connect() as connection:
+            runs = connection.execute("SELECT COUNT(*) FROM shipping_runs").fetchone()[0]
+            observations, asins = connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT asin) FROM shipping_observations"
+            ).fetchone()
+        return {'runs': runs, 'observations': observations, 'asins': asins, 'db_path': str(self.db_path)}
+
+# 便利関数
+def create_shipping_trend_manager(data_dir: Optional[Union[str, pathlib.Path]] = None) -> ShippingTrendManager:
+    """
+    ShippingTrendManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+
+    Returns:
+        ShippingTrendManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return ShippingTrendManager(data_dir)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_shipping_trend_manager(tmp_dir)
+
+        print("=== ShippingTime推移ストアテスト ===")
+        base = pd.DataFrame({
+            'asin': ['B000000001', 'B000000002', 'B000000003'],
+            'seller_type': ['amazon', 'third_party', 'official_manufacturer'],
+            'amazon_brand': ['FANCL', 'DHC', 'KOSE'],
+            'classification_reason': ['Amazon本体フォールバック', '', 'FBAフォールバック']
+        })
+        for i, hours in enumerate([[24, 48, 12], [24, 48, 12], [72, None, 12]]):
+            manager.record_run(base.assign(ship_hours=hours), source='demo',
+                               recorded_at=datetime(2024, 6, 1 + i))
+
+        print(manager.get_run_history()[['run_id', 'success_rate', 'avg_hours']])
+        print(manager.rollup('seller_type'))
+        print(manager.find_degraded_asins())
+        print(f"統計: {manager.get_trend_statistics()}")
+
+        print("テスト完了")
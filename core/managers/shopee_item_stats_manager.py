@@ -0,0 +1,351 @@
+"""
+Shopee商品 View/Sold 時系列（shopee_item_stats.db）管理システム専用モジュール
+
+責任:
+- 商品ごとの閲覧数・販売数・いいね数・状態・価格・在庫の時系列の永続化
+- 前回値から変化した商品のみ記録する差分保存（living_spec §3.2.2 の日次監視用）
+- 期間内の増分・商品別推移・ポーリング実行履歴の参照API
+
+設計原則:
+- Single Responsibility Principle準拠
+- 他モジュールから独立（取得処理は modules/analytics/shopee_item_poller）
+- テスト容易性確保
+"""
+
+import sqlite3
+import pathlib
+import uuid
+import pandas as pd
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Union, Iterable
+from datetime import datetime, timedelta
+import logging
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATS_SCHEMA_VERSION = 1
+
+# 差分判定・時系列に保存する値
+METRIC_COLUMNS = ['views', 'sold', 'likes', 'comment_count', 'rating_star', 'item_status', 'price', 'stock']
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS item_snapshots (
+    shop_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    views INTEGER,
+    sold INTEGER,
+    likes INTEGER,
+    comment_count INTEGER,
+    rating_star REAL,
+    item_status TEXT,
+    price REAL,
+    stock INTEGER,
+    PRIMARY KEY (shop_id, item_id, captured_at)
+);
+CREATE INDEX IF NOT EXISTS idx_item_snapshots_captured ON item_snapshots (captured_at);
+CREATE TABLE IF NOT EXISTS item_latest (
+    shop_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    views INTEGER,
+    sold INTEGER,
+    likes INTEGER,
+    comment_count INTEGER,
+    rating_star REAL,
+    item_status TEXT,
+    price REAL,
+    stock INTEGER,
+    PRIMARY KEY (shop_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS poll_runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    shops INTEGER,
+    items INTEGER,
+    fetched INTEGER,
+    changed INTEGER,
+    missing INTEGER,
+    requests INTEGER,
+    throttled INTEGER,
+    errors INTEGER,
+    wall_seconds REAL
+);
+"""
+
+POLL_RUN_COLUMNS = ['shops', 'items', 'fetched', 'changed', 'missing', 'requests', 'throttled', 'errors', 'wall_seconds']
+
+class ShopeeItemStatsManager:
+    """Shopee商品の View/Sold 時系列（差分保存）を管理するメインクラス"""
+
+    def __init__(self, data_dir: Optional[pathlib.Path] = None, db_name: str = 'shopee_item_stats.db'):
+        """
+        ShopeeItemStatsManagerの初期化
+
+        Args:
+            data_dir: データディレクトリのパス（Noneの場合は自動検出）
+            db_name: データベースファイル名
+        """
+        self.data_dir = self._determine_data_dir(data_dir)
+        self.db_path = self.data_dir / db_name
+        self._initialize_schema()
+
+        logger.info(f"ShopeeItemStatsManager初期化完了: {self.db_path}")
+
+    def _determine_data_dir(self, data_dir: Optional[pathlib.Path]) -> pathlib.Path:
+        """データディレクトリの決定"""
+        if data_dir:
+            return data_dir
+
+        # 自動検出: スクリプトのパス、親ディレクトリ、プロジェクトルート、カレントディレクトリの順
+        possible_paths = [
+            pathlib.Path(__file__).parent / 'data',
+            pathlib.Path(__file__).parent.parent / 'data',
+            pathlib.Path(__file__).parent.parent.parent / 'data',
+            pathlib.Path.cwd() / 'data'
+        ]
+
+        for path in possible_paths:
+            if path.exists():
+                return path
+
+        # 存在しない場合は最初のパスを作成
+        possible_paths[0].mkdir(parents=True, exist_ok=True)
+        return possible_paths[0]
+
+    @contextmanager
+    def connect(self):
+        """接続のコンテキストマネージャ（正常終了時にコミット、例外時にロールバック）"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _initialize_schema(self) -> None:
+        """テーブル・インデックスの作成"""
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(STATS_SCHEMA)
+            connection.execute(f"PRAGMA user_version={STATS_SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # 差分保存（ポーラー用）
+    # ------------------------------------------------------------------
+    def load_latest(self, shop_id: Union[str, int]) -> Dict[str, tuple]:
+        """
+        ショップの商品ごとの最新値
+
+        Returns:
+            item_id → METRIC_COLUMNS の値のタプル
+        """
+        columns = ', '.join(METRIC_COLUMNS)
+        with self.connect() as connection:
+            rows = connection.execute(
+                f"SELECT item_id, {columns} FROM item_latest WHERE shop_id = ?", (str(shop_id),)
+            ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def store_snapshots(self, shop_id: Union[str, int], records: Iterable[Dict[str, Any]],
+                        captured_at: Optional[str] = None) -> Dict[str, int]:
+        """
+        取得値の差分保存（前回値から変化した商品・初回の商品のみ時系列に追加）
+
+        変化の無い商品は item_latest.checked_at のみ更新する（最終確認日時の記録）。
+        records に無い項目（取得しなかった項目）は前回値を引き継ぐ。
+
+        Args:
+            shop_id: ショップID
+            records: item_id と METRIC_COLUMNS（の一部）を持つdict
+            captured_at: 取得日時（Noneで現在時刻）
+
+        Returns:
+            dict: changed / unchanged
+        """
+        shop_id = str(shop_id)
+        captured_at = captured_at or datetime.now().isoformat(timespec='seconds')
+        latest = self.load_latest(shop_id)
+
+        changed_rows = []
+        unchanged_ids = []
+        for record in records:
+            item_id = str(record['item_id'])
+            previous = latest.get(item_id) or (None,) * len(METRIC_COLUMNS)
+            values = tuple(record[column] if column in record else previous[i]
+                           for i, column in enumerate(METRIC_COLUMNS))
+            if latest.get(item_id) == values:
+                unchanged_ids.append((captured_at, shop_id, item_id))
+            else:
+                changed_rows.append((shop_id, item_id, captured_at, *values))
+
+        columns = ', '.join(METRIC_COLUMNS)
+        placeholders = ', '.join('?' for _ in METRIC_COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in METRIC_COLUMNS)
+        with self.connect() as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO item_snapshots (shop_id, item_id, captured_at, {columns}) "
+                f"VALUES (?, ?, ?, {placeholders})",
+                changed_rows
+            )
+            connection.executemany(
+                f"""
+                INSERT INTO item_latest (shop_id, item_id, captured_at, checked_at, {columns})
+                VALUES (?, ?, ?, ?, {placeholders})
+                ON CONFLICT(shop_id, item_id) DO UPDATE SET
+                    captured_at = excluded.captured_at,
+                    checked_at = excluded.checked_at,
+                    {updates}
+                """,
+                [(row[0], row[1], row[2], row[2], *row[3:]) for row in changed_rows]
+            )
+            connection.executemany(
+                "UPDATE item_latest SET checked_at = ? WHERE shop_id = ? AND item_id = ?", unchanged_ids
+            )
+        return {'changed': len(changed_rows), 'unchanged': len(unchanged_ids)}
+
+    def record_poll_run(self, summary: Dict[str, Any], run_id: Optional[str] = None) -> str:
+        """
+        ポーリング1回分の実行記録
+
+        Args:
+            summary: started_at / finished_at と POLL_RUN_COLUMNS の値
+            run_id: 実行ID（Noneの場合は自動採番）
+
+        Returns:
+            実行ID
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        with self.connect() as connection:
+            connection.execute(
+                f"""
+                INSERT OR REPLACE INTO poll_runs (run_id, started_at, finished_at, {', '.join(POLL_RUN_COLUMNS)})
+                VALUES (?, ?, ?, {', '.join('?' for _ in POLL_RUN_COLUMNS)})
+                """,
+                (run_id, summary.get('started_at') or datetime.now().isoformat(timespec='seconds'),
+                 summary.get('finished_at'), *(summary.get(column) for column in POLL_RUN_COLUMNS))
+            )
+        return run_id
+
+    # ------------------------------------------------------------------
+    # 参照API（分析用）
+    # ------------------------------------------------------------------
+    def query_frame(self, sql: str, params: Iterable[Any] = ()) -> pd.DataFrame:
+        """任意の読み取りクエリをDataFrameで取得"""
+        with self.connect() as connection:
+            return pd.read_sql_query(sql, connection, params=list(params))
+
+    def get_item_history(self, shop_id: Union[str, int], item_id: Union[str, int]) -> pd.DataFrame:
+        """商品の時系列（変化した時点のみ、古い順）"""
+        return self.query_frame(
+            f"SELECT captured_at, {', '.join(METRIC_COLUMNS)} FROM item_snapshots "
+            "WHERE shop_id = ? AND item_id = ? ORDER BY captured_at",
+            (str(shop_id), str(item_id))
+        )
+
+    def get_period_changes(self, days: int = 1, shop_id: Optional[Union[str, int]] = None) -> pd.DataFrame:
+        """
+        期間内の商品別の増分（最新値 − 期間開始時点の値）
+
+        期間開始時点の値は開始日時以前の最後の記録。開始後に初めて記録された商品の増分は欠損値。
+
+        Args:
+            days: 期間（日）
+            shop_id: ショップで絞り込み
+
+        Returns:
+            shop_id / item_id / views / sold / likes / item_status / views_delta / sold_delta / likes_delta /
+            checked_at（閲覧数の増分の降順）
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec='seconds')
+        shop_filter = "AND l.shop_id = ?" if shop_id is not None else ""
+        params = [since] + ([str(shop_id)] if shop_id is not None else [])
+        return self.query_frame(
+            f"""
+            SELECT l.shop_id, l.item_id, l.views, l.sold, l.likes, l.item_status,
+                   l.views - b.views AS views_delta,
+                   l.sold - b.sold AS sold_delta,
+                   l.likes - b.likes AS likes_delta,
+                   l.checked_at
+            FROM item_latest l
+            LEFT JOIN item_snapshots b
+                ON b.shop_id = l.shop_id AND b.item_id = l.item_id
+               AND b.captured_at = (
+                   SELECT MAX(s.captured_at) FROM item_snapshots s
+                   WHERE s.shop_id = l.shop_id AND s.item_id = l.item_id AND s.captured_at <= ?
+               )
+            WHERE 1 = 1 {shop_filter}
+            ORDER BY views_delta IS NULL, views_delta DESC
+            """,
+            params
+        )
+
+    def list_poll_runs(self, limit: int = 30) -> pd.DataFrame:
+        """ポーリング実行履歴（新しい順）"""
+        return self.query_frame(
+            f"SELECT run_id, started_at, finished_at, {', '.join(POLL_RUN_COLUMNS)} FROM poll_runs "
+            "ORDER BY started_at DESC LIMIT ?",
+            (int(limit),)
+        )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        統計情報の取得
+
+        Returns:
+            統計情報
+        """
+        with self.connect() as connection:
+            counts = {
+                table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('item_snapshots', 'item_latest', 'poll_runs')
+            }
+            shops = connection.execute("SELECT COUNT(DISTINCT shop_id) FROM item_latest").fetchone()[0]
+        return {**counts, 'shops': shops, 'db_path': str(self.db_path)}
+
+# 便利関数
+def create_shopee_item_stats_manager(data_dir: Optional[Union[str, pathlib.Path]] = None) -> ShopeeItemStatsManager:
+    """
+    ShopeeItemStatsManagerのファクトリ関数
+
+    Args:
+        data_dir: データディレクトリパス
+
+    Returns:
+        ShopeeItemStatsManagerインスタンス
+    """
+    if isinstance(data_dir, str):
+        data_dir = pathlib.Path(data_dir)
+    return ShopeeItemStatsManager(data_dir)
+
+if __name__ == "__main__":
+    # テスト実行
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stats = create_shopee_item_stats_manager(tmp_dir)
+
+        print("=== Shopee View/Sold 時系列テスト ===")
+        day1 = (datetime.now() - timedelta(days=2)).isoformat(timespec='seconds')
+        day2 = (datetime.now() - timedelta(hours=1)).isoformat(timespec='seconds')
+        first = [
+            {'item_id': 1001, 'views': 120, 'sold': 3, 'likes': 5, 'item_status': 'NORMAL', 'price': 1290.0, 'stock': 10},
+            {'item_id': 1002, 'views': 40, 'sold': 0, 'likes': 1, 'item_status': 'NORMAL', 'price': 890.0, 'stock': 5}
+        ]
+        second = [
+            {'item_id': 1001, 'views': 180, 'sold': 5, 'likes': 6, 'item_status': 'NORMAL', 'price': 1290.0, 'stock': 8},
+            {'item_id': 1002, 'views': 40, 'sold': 0, 'likes': 1, 'item_status': 'NORMAL', 'price': 890.0, 'stock': 5}
+        ]
+        print(f"1日目: {stats.store_snapshots('2001', first, captured_at=day1)}")
+        print(f"2日目: {stats.store_snapshots('2001', second, captured_at=day2)}")
+        print(stats.get_item_history('2001', 1001))
+        print(stats.get_period_changes(days=1))
+        print(f"統計: {stats.get_statistics()}")
@@ -0,0 +1,222 @@
+# keepa_client.py - Keepa Product APIクライアント（売れ筋ランク取得・トークン残量の追跡）
+#
+# 環境変数（.env可）:
+#   KEEPA_API_KEY     APIキー（未設定かつ KEEPA_ENDPOINT も未設定の場合はKeepa連携なし）
+#   KEEPA_ENDPOINT    例: http://127.0.0.1:8765  ローカル検証サーバー等への差し替え（既定: https://api.keepa.com）
+#   KEEPA_TIMEOUT     タイムアウト秒（既定: 30）
+import json
+import math
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+KEEPA_DEFAULT_ENDPOINT = 'https://api.keepa.com'
+# Keepaのドメイン番号（5 = Amazon.co.jp）
+KEEPA_DOMAIN_JP = 5
+# /product の1リクエストあたりのASIN上限
+KEEPA_MAX_ASINS_PER_REQUEST = 100
+# 1商品あたりの消費トークン（offers・buybox等を指定しない場合）
+KEEPA_TOKENS_PER_PRODUCT = 1
+# csv / stats.current のインデックス（3 = 売れ筋ランク）
+KEEPA_SALES_RANK_INDEX = 3
+# Keepa時間（2011-01-01からの分）とUNIX時間（分）の差
+KEEPA_TIME_OFFSET_MINUTES = 21564000
+# トークンの補充間隔（Keepaは1分ごとに refillRate 分を補充）
+KEEPA_REFILL_INTERVAL_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_LOCAL_API_KEY = 'local-test-key'
+
+class KeepaError(Exception):
+    """Keepa APIエラー（status・次回補充までの秒数を保持）"""
+
+    def __init__(self, status, message='', refill_in=None):
+        super().__init__(f"Keepa HTTP {status}: {message}")
+        self.status = status
+        self.refill_in = refill_in
+
+    @property
+    def retryable(self):
+        return self.status in (429, 500, 502, 503, 504)
+
+class KeepaTokenBudget:
+    """応答の tokensLeft / refillIn / refillRate から推定するトークン残量"""
+
+    def __init__(self, refill_interval=KEEPA_REFILL_INTERVAL_SECONDS):
+        self.refill_interval = refill_interval
+        self.tokens_left = None
+        self.refill_rate = 0
+        self.refill_in = 0.0
+        self.updated_at = None
+        self.tokens_consumed = 0
+
+    def update(self, body):
+        """応答（成功・429とも）のトークン情報を反映"""
+        if not isinstance(body, dict) or 'tokensLeft' not in body:
+            return
+        self.tokens_left = int(body['tokensLeft'])
+        self.refill_rate = int(body.get('refillRate') or 0)
+        self.refill_in = float(body.get('refillIn') or 0) / 1000.0
+        self.updated_at = time.monotonic()
+        self.tokens_consumed += int(body.get('tokensConsumed') or 0)
+
+    def _elapsed(self):
+        return time.monotonic() - self.updated_at if self.updated_at is not None else 0.0
+
+    def _refills_since_update(self):
+        elapsed = self._elapsed()
+        if elapsed < self.refill_in:
+            return 0
+        return 1 + int((elapsed - self.refill_in) // self.refill_interval)
+
+    def estimated_tokens(self):
+        """現時点の推定残量（未取得の場合はNone）"""
+        if self.tokens_left is None:
+            return None
+        return self.tokens_left + self._refills_since_update() * self.refill_rate
+
+    def wait_seconds(self, cost):
+        """
+        cost トークンが使えるまでの推定待ち秒数
+
+        Returns:
+            float: 0.0 で即時実行可（残量未取得の場合も0）、補充されない場合は inf
+        """
+        available = self.estimated_tokens()
+        if available is None or available >= cost:
+            return 0.0
+        if self.refill_rate <= 0:
+            return float('inf')
+        elapsed = self._elapsed()
+        if elapsed < self.refill_in:
+            next_refill = self.refill_in - elapsed
+        else:
+            next_refill = self.refill_interval - ((elapsed - self.refill_in) % self.refill_interval)
+        refills_needed = math.ceil((cost - available) / self.refill_rate)
+        return next_refill + (refills_needed - 1) * self.refill_interval
+
+    def affordable(self, cost):
+        """今すぐ使えるトークン数の範囲での件数（残量未取得の場合は cost のまま）"""
+        available = self.estimated_tokens()
+        if available is None:
+            return cost
+        return max(0, min(cost, available))
+
+    def snapshot(self):
+        return {
+            'tokens_left': self.estimated_tokens(),
+            'refill_rate': self.refill_rate,
+            'tokens_consumed': self.tokens_consumed
+        }
+
+class KeepaClient:
+    """Keepa Product APIのJSONクライアント（標準ライブラリのみ）"""
+
+    def __init__(self, api_key, endpoint=None, domain=KEEPA_DOMAIN_JP, timeout=None,
+                 refill_interval=KEEPA_REFILL_INTERVAL_SECONDS):
+        """
+        Args:
+            api_key: Keepa APIキー
+            endpoint: ベースURL（既定: https://api.keepa.com）
+            domain: Keepaのドメイン番号（既定: 日本）
+            timeout: タイムアウト秒
+            refill_interval: トークン補充間隔の秒数（ローカル検証サーバーで短縮する場合に指定）
+        """
+        self.api_key = api_key
+        self.endpoint = (endpoint or KEEPA_DEFAULT_ENDPOINT).rstrip('/')
+        self.domain = domain
+        self.timeout = timeout or float(os.getenv('KEEPA_TIMEOUT', DEFAULT_TIMEOUT_SECONDS))
+        self.budget = KeepaTokenBudget(refill_interval)
+
+    def _request(self, path, params):
+        url = f"{self.endpoint}{path}?{urllib.parse.urlencode({'key': self.api_key, **params})}"
+        request = urllib.request.Request(url, headers={'Accept': 'application/json', 'Accept-Encoding': 'identity'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read().decode('utf-8') or '{}')
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read().decode('utf-8', errors='replace') or '{}')
+            except ValueError:
+                body = {}
+            self.budget.update(body)
+            refill_in = float(body['refillIn']) / 1000.0 if body.get('refillIn') is not None else None
+            message = (body.get('error') or {}).get('message', '') if isinstance(body.get('error'), dict) else ''
+            raise KeepaError(e.code, message, refill_in) from None
+        self.budget.update(body)
+        return body
+
+    def get_products(self, asins, stats_days=90):
+        """
+        /product（売れ筋ランク履歴・統計付き、最大100件）
+
+        Args:
+            asins: ASINのリスト
+            stats_days: stats の集計期間（日）
+
+        Returns:
+            list: products
+        """
+        asins = list(asins)
+        if len(asins) > KEEPA_MAX_ASINS_PER_REQUEST:
+            raise ValueError(f"1リクエストの上限は{KEEPA_MAX_ASINS_PER_REQUEST}件です: {len(asins)}件")
+        body = self._request('/product', {
+            'domain': self.domain,
+            'asin': ','.join(asins),
+            'stats': stats_days,
+            'history': 1
+        })
+        return body.get('products') or []
+
+def create_keepa_client(api_key=None, endpoint=None, **kwargs):
+    """
+    KeepaClientのファクトリ関数
+
+    Args:
+        api_key: APIキー（Noneで環境変数 KEEPA_API_KEY）
+        endpoint: ベースURL（Noneで環境変数 KEEPA_ENDPOINT）
+
+    Returns:
+        KeepaClient（APIキー・エンドポイントともに未設定の場合はNone）
+    """
+    api_key = api_key or os.getenv('KEEPA_API_KEY', '').strip()
+    endpoint = endpoint or os.getenv('KEEPA_ENDPOINT', '').strip() or None
+    if not api_key and not endpoint:
+        return None
+    return KeepaClient(api_key or DEFAULT_LOCAL_API_KEY, endpoint, **kwargs)
+
+# ======================== /product レスポンスの解釈 ========================
+
+def keepa_minutes_to_datetime(keepa_minutes):
+    """Keepa時間（分）→ datetime（UTC）"""
+    return datetime.fromtimestamp((int(keepa_minutes) + KEEPA_TIME_OFFSET_MINUTES) * 60, tz=timezone.utc)
+
+def datetime_to_keepa_minutes(value):
+    """datetime → Keepa時間（分）"""
+    return int(value.timestamp() // 60) - KEEPA_TIME_OFFSET_MINUTES
+
+def extract_sales_rank(product):
+    """
+    商品の売れ筋ランク（現在値と履歴）
+
+    Returns:
+        tuple: (現在のランク（無い場合はNone）, [(ISO日時, ランク), ...]（古い順、欠測の-1は除外）)
+    """
+    csv = (product or {}).get('csv') or []
+    series = csv[KEEPA_SALES_RANK_INDEX] if len(csv) > KEEPA_SALES_RANK_INDEX else None
+    history = []
+    for i in range(0, len(series or []) - 1, 2):
+        rank = series[i + 1]
+        if rank is not None and rank >= 0:
+            history.append((keepa_minutes_to_datetime(series[i]).isoformat(), int(rank)))
+
+    current = None
+    stats_current = ((product or {}).get('stats') or {}).get('current') or []
+    if len(stats_current) > KEEPA_SALES_RANK_INDEX and stats_current[KEEPA_SALES_RANK_INDEX] is not None \
+            and stats_current[KEEPA_SALES_RANK_INDEX] >= 0:
+        current = int(stats_current[KEEPA_SALES_RANK_INDEX])
+    elif history:
+        current = history[-1][1]
+    return current, history
@@ -0,0 +1,170 @@
+# shopee_client.py - Shopee Open Platform v2 商品APIクライアント（get_item_base_info / get_item_extra_info）
+#
+# 環境変数（.env可）:
+#   SHOPEE_PARTNER_ID    パートナーID（未設定かつ SHOPEE_ENDPOINT も未設定の場合はShopee連携なし）
+#   SHOPEE_PARTNER_KEY   パートナーキー（署名に使用）
+#   SHOPEE_ENDPOINT      例: http://127.0.0.1:8765  ローカル検証サーバー等への差し替え
+#                        （既定: https://partner.shopeemobile.com）
+#   SHOPEE_TIMEOUT       タイムアウト秒（既定: 30）
+import hashlib
+import hmac
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+SHOPEE_DEFAULT_ENDPOINT = 'https://partner.shopeemobile.com'
+SHOPEE_ITEM_BASE_INFO_PATH = '/api/v2/product/get_item_base_info'
+SHOPEE_ITEM_EXTRA_INFO_PATH = '/api/v2/product/get_item_extra_info'
+# get_item_base_info / get_item_extra_info の1リクエストあたりの item_id 上限
+SHOPEE_MAX_ITEMS_PER_REQUEST = 50
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_LOCAL_PARTNER_ID = 1000001
+DEFAULT_LOCAL_PARTNER_KEY = 'local-test-partner-key'
+
+# 再試行対象（HTTPステータス・Shopeeのerrorコード）
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+THROTTLE_ERROR_CODES = ('error_too_many_request', 'error_rate_limit')
+
+class ShopeeApiError(Exception):
+    """Shopee APIエラー（HTTPステータス・Shopeeのerrorコードを保持）"""
+
+    def __init__(self, status, error='', message=''):
+        super().__init__(f"Shopee HTTP {status} {error}: {message}")
+        self.status = status
+        self.error = error
+        self.message = message
+
+    @property
+    def throttled(self):
+        return self.status == 429 or self.error in THROTTLE_ERROR_CODES
+
+    @property
+    def retryable(self):
+        return self.throttled or self.status in RETRYABLE_STATUS_CODES
+
+class ShopeeClient:
+    """Shopee Open Platform v2 のショップAPIクライアント（標準ライブラリのみ）"""
+
+    def __init__(self, partner_id, partner_key, endpoint=None, timeout=None, rate_limiter=None):
+        """
+        Args:
+            partner_id: パートナーID
+            partner_key: パートナーキー
+            endpoint: ベースURL（既定: https://partner.shopeemobile.com）
+            timeout: タイムアウト秒
+            rate_limiter: 送信前に acquire する RateLimiter（ショップ間で共有、Noneで無制限）
+        """
+        self.partner_id = int(partner_id)
+        self.partner_key = str(partner_key)
+        self.endpoint = (endpoint or SHOPEE_DEFAULT_ENDPOINT).rstrip('/')
+        self.timeout = timeout or float(os.getenv('SHOPEE_TIMEOUT', DEFAULT_TIMEOUT_SECONDS))
+        self.rate_limiter = rate_limiter
+
+    def sign(self, path, timestamp, access_token='', shop_id=''):
+        """ショップAPIの署名（partner_id + path + timestamp + access_token + shop_id のHMAC-SHA256）"""
+        base_string = f"{self.partner_id}{path}{timestamp}{access_token}{shop_id}"
+        return hmac.new(self.partner_key.encode('utf-8'), base_string.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _request(self, path, shop_id, access_token, params):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        timestamp = int(time.time())
+        query = {
+            'partner_id': self.partner_id,
+            'timestamp': timestamp,
+            'access_token': access_token,
+            'shop_id': shop_id,
+            'sign': self.sign(path, timestamp, access_token, shop_id),
+            **params
+        }
+        url = f"{self.endpoint}{path}?{urllib.parse.urlencode(query)}"
+        request = urllib.request.Request(url, headers={'Accept': 'application/json', 'Accept-Encoding': 'identity'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status = response.status
+                body = json.loads(response.read().decode('utf-8') or '{}')
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read().decode('utf-8', errors='replace') or '{}')
+            except ValueError:
+                body = {}
+            raise ShopeeApiError(e.code, body.get('error', ''), body.get('message', '')) from None
+        # Shopeeは業務エラーもHTTP 200の error フィールドで返す
+        if body.get('error'):
+            raise ShopeeApiError(status, body.get('error', ''), body.get('message', ''))
+        return body.get('response') or {}
+
+    def _item_list(self, path, shop_id, access_token, item_ids):
+        item_ids = [str(i) for i in item_ids]
+        if not item_ids or len(item_ids) > SHOPEE_MAX_ITEMS_PER_REQUEST:
+            raise ValueError(f"1リクエストの item_id は1〜{SHOPEE_MAX_ITEMS_PER_REQUEST}件です: {len(item_ids)}件")
+        response = self._request(path, shop_id, access_token, {'item_id_list': ','.join(item_ids)})
+        return response.get('item_list') or []
+
+    def get_item_base_info(self, shop_id, access_token, item_ids):
+        """
+        get_item_base_info（商品状態・価格・在庫、最大50件）
+
+        Returns:
+            list: item_list（存在しない・削除済みの item_id は含まれない）
+        """
+        return self._item_list(SHOPEE_ITEM_BASE_INFO_PATH, shop_id, access_token, item_ids)
+
+    def get_item_extra_info(self, shop_id, access_token, item_ids):
+        """
+        get_item_extra_info（閲覧数 views・販売数 sale・いいね数 likes・評価、最大50件）
+
+        Returns:
+            list: item_list
+        """
+        return self._item_list(SHOPEE_ITEM_EXTRA_INFO_PATH, shop_id, access_token, item_ids)
+
+def create_shopee_client(partner_id=None, partner_key=None, endpoint=None, **kwargs):
+    """
+    ShopeeClientのファクトリ関数
+
+    Args:
+        partner_id: パートナーID（Noneで環境変数 SHOPEE_PARTNER_ID）
+        partner_key: パートナーキー（Noneで環境変数 SHOPEE_PARTNER_KEY）
+        endpoint: ベースURL（Noneで環境変数 SHOPEE_ENDPOINT）
+
+    Returns:
+        ShopeeClient（パートナーID・エンドポイントともに未設定の場合はNone）
+    """
+    partner_id = partner_id or os.getenv('SHOPEE_PARTNER_ID', '').strip()
+    partner_key = partner_key or os.getenv('SHOPEE_PARTNER_KEY', '').strip()
+    endpoint = endpoint or os.getenv('SHOPEE_ENDPOINT', '').strip() or None
+    if not partner_id and not endpoint:
+        return None
+    return ShopeeClient(partner_id or DEFAULT_LOCAL_PARTNER_ID, partner_key or DEFAULT_LOCAL_PARTNER_KEY,
+                        endpoint, **kwargs)
+
+# ======================== レスポンスの解釈 ========================
+
+def parse_item_metrics(base_info=None, extra_info=None):
+    """
+    base_info / extra_info の1商品分を監視対象の値に変換
+
+    Returns:
+        dict: views / sold / likes / comment_count / rating_star / item_status / price / stock
+    """
+    base_info = base_info or {}
+    extra_info = extra_info or {}
+    price_info = (base_info.get('price_info') or [{}])[0] or {}
+    summary = ((base_info.get('stock_info_v2') or {}).get('summary_info') or {})
+    price = price_info.get('current_price')
+    stock = summary.get('total_available_stock')
+    rating = extra_info.get('rating_star')
+    return {
+        'views': extra_info.get('views'),
+        'sold': extra_info.get('sale'),
+        'likes': extra_info.get('likes'),
+        'comment_count': extra_info.get('comment_count'),
+        'rating_star': round(float(rating), 2) if rating is not None else None,
+        'item_status': base_info.get('item_status'),
+        'price': float(price) if price is not None else None,
+        'stock': int(stock) if stock is not None else None
+    }
@@ -0,0 +1,192 @@
+# sp_api_http.py - エンドポイント差し替え用のSP-API HTTPクライアント（ローカル検証サーバー・負荷試験用）
+#
+# 環境変数（.env可）:
+#   SP_API_ENDPOINT   例: http://127.0.0.1:8765  設定時は get_offer_info / get_seller_info / get_shipping_info /
+#                     カタログ検索がこのエンドポイントを呼ぶ（未設定時は従来どおり）
+#   SP_API_ACCESS_TOKEN  x-amz-access-token ヘッダー（既定: local-test-token）
+#   SP_API_TIMEOUT    タイムアウト秒（既定: 30）
+#   SP_API_MARKETPLACE  仕入れ元マーケットプレイスの国コード（既定: JP、MARKETPLACE_IDS のキー）
+#   OPENAI_BASE_URL   例: http://127.0.0.1:8765/v1  日本語化のchat completionの送信先
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+
+JP_MARKETPLACE_ID = 'A1VC38T7YXB528'
+# Amazon.co.jp 本体の出品者ID
+AMAZON_JP_SELLER_ID = 'AN1VRQENFRJN5'
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_ACCESS_TOKEN = 'local-test-token'
+
+# 国コード → マーケットプレイスID
+MARKETPLACE_IDS = {
+    'JP': JP_MARKETPLACE_ID,
+    'US': 'ATVPDKIKX0DER',
+    'UK': 'A1F83G8C2ARO7P',
+    'DE': 'A1PA6795UKMFR9',
+    'SG': 'A19VAU5U5O7RUS',
+    'AU': 'A39IBJ37TRP1C6'
+}
+# 国コード → Amazon本体の出品者ID（未登録の国はAmazon本体の判定なし）
+AMAZON_RETAIL_SELLER_IDS = {
+    'JP': AMAZON_JP_SELLER_ID,
+    'US': 'ATVPDKIKX0DER',
+    'UK': 'A3P5ROKL5A1OLE',
+    'DE': 'A3JWKAKR8XB7XF'
+}
+DEFAULT_MARKETPLACE = 'JP'
+
+# getListingOffersBatch / getItemOffersBatch の1リクエストあたりの上限
+BATCH_MAX_REQUESTS = 20
+
+# 再試行対象のHTTPステータス（クォータ超過・一時的な障害）
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class SpApiHttpError(Exception):
+    """SP-API HTTPエラー（status・Retry-After秒を保持）"""
+
+    def __init__(self, status, message='', retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status in RETRYABLE_STATUS_CODES
+
+def get_sp_api_endpoint():
+    """差し替え先のSP-APIエンドポイント（未設定の場合はNone）"""
+    endpoint = os.getenv('SP_API_ENDPOINT', '').strip()
+    return endpoint.rstrip('/') or None
+
+def get_marketplace_code():
+    """仕入れ元マーケットプレイスの国コード（環境変数 SP_API_MARKETPLACE、既定: JP）"""
+    code = os.getenv('SP_API_MARKETPLACE', '').strip().upper() or DEFAULT_MARKETPLACE
+    if code not in MARKETPLACE_IDS:
+        raise ValueError(f"未対応のマーケットプレイスです: {code}（{', '.join(MARKETPLACE_IDS)}）")
+    return code
+
+def get_llm_base_url():
+    """chat completionの送信先（未設定の場合はNone = OpenAIの既定）"""
+    base_url = os.getenv('OPENAI_BASE_URL', '').strip()
+    return base_url.rstrip('/') or None
+
+class SpApiHttpClient:
+    """SP-API互換エンドポイントへのJSONクライアント（標準ライブラリのみ）"""
+
+    def __init__(self, endpoint, access_token=None, marketplace_id=None, timeout=None):
+        """
+        Args:
+            endpoint: ベースURL（例: http://127.0.0.1:8765）
+            access_token: x-amz-access-token ヘッダー
+            marketplace_id: マーケットプレイスID（Noneで環境変数 SP_API_MARKETPLACE の国、既定: 日本）
+            timeout: タイムアウト秒
+        """
+        self.endpoint = endpoint.rstrip('/')
+        self.access_token = access_token or os.getenv('SP_API_ACCESS_TOKEN', DEFAULT_ACCESS_TOKEN)
+        if marketplace_id is None:
+            self.marketplace_code = get_marketplace_code()
+            self.marketplace_id = MARKETPLACE_IDS[self.marketplace_code]
+        else:
+            self.marketplace_code = next((code for code, mid in MARKETPLACE_IDS.items() if mid == marketplace_id), '')
+            self.marketplace_id = marketplace_id
+        # 出品者がAmazon本体かの判定に使用（未登録の国はNone）
+        self.amazon_seller_id = AMAZON_RETAIL_SELLER_IDS.get(self.marketplace_code)
+        self.timeout = timeout or float(os.getenv('SP_API_TIMEOUT', DEFAULT_TIMEOUT_SECONDS))
+
+    def _request(self, method, path, params=None, body=None, timeout=None):
+        url = f"{self.endpoint}{path}"
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers={
+            'x-amz-access-token': self.access_token,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read().decode('utf-8') or '{}')
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            try:
+                message = e.read().decode('utf-8', errors='replace')[:200]
+            except Exception:
+                message = ''
+            raise SpApiHttpError(e.code, message, float(retry_after) if retry_after else None) from None
+
+    # ======================== Product Pricing ========================
+
+    def get_item_offers(self, asin, item_condition='New', timeout=None):
+        """getItemOffers（payload を返す、timeout はこの呼び出しのタイムアウト秒（Noneでクライアント設定））"""
+        result = self._request('GET', f"/products/pricing/v0/items/{urllib.parse.quote(asin)}/offers", params={
+            'MarketplaceId': self.marketplace_id,
+            'ItemCondition': item_condition
+        }, timeout=timeout)
+        return result.get('payload', {})
+
+    def _batch(self, path, uris, item_condition):
+        if len(uris) > BATCH_MAX_REQUESTS:
+            raise ValueError(f"バッチの上限は{BATCH_MAX_REQUESTS}件です: {len(uris)}件")
+        body = {'requests': [
+            {'uri': uri, 'method': 'GET', 'MarketplaceId': self.marketplace_id, 'ItemCondition': item_condition}
+            for uri in uris
+        ]}
+        return self._request('POST', path, body=body).get('responses', [])
+
+    def get_item_offers_batch(self, asins, item_condition='New'):
+        """getItemOffersBatch（responses を返す、最大20件）"""
+        uris = [f"/products/pricing/v0/items/{urllib.parse.quote(asin)}/offers" for asin in asins]
+        return self._batch('/batches/products/pricing/v0/itemOffers', uris, item_condition)
+
+    def get_listing_offers_batch(self, seller_skus, item_condition='New'):
+        """getListingOffersBatch（responses を返す、最大20件）"""
+        uris = [f"/products/pricing/v0/listings/{urllib.parse.quote(sku)}/offers" for sku in seller_skus]
+        return self._batch('/batches/products/pricing/v0/listingOffers', uris, item_condition)
+
+    # ======================== Catalog Items ========================
+
+    def search_catalog_items(self, keywords, page_size=5, included_data='summaries'):
+        """searchCatalogItems（items を返す）"""
+        result = self._request('GET', '/catalog/2022-04-01/items', params={
+            'keywords': keywords,
+            'marketplaceIds': self.marketplace_id,
+            'pageSize': page_size,
+            'includedData': included_data
+        })
+        return result.get('items', [])
+
+def create_sp_api_http_client(endpoint=None, **kwargs):
+    """
+    SpApiHttpClientのファクトリ関数
+
+    Args:
+        endpoint: ベースURL（Noneで環境変数 SP_API_ENDPOINT）
+
+    Returns:
+        SpApiHttpClient（エンドポイント未設定の場合はNone）
+    """
+    endpoint = endpoint or get_sp_api_endpoint()
+    if not endpoint:
+        return None
+    return SpApiHttpClient(endpoint, **kwargs)
+
+# ======================== getItemOffers レスポンスの解釈 ========================
+
+def select_featured_offer(offers):
+    """表示対象のオファー（BuyBox獲得 → Prime → 先頭の順）"""
+    if not offers:
+        return None
+    for predicate in (lambda o: o.get('IsBuyBoxWinner'),
+                      lambda o: (o.get('PrimeInformation') or {}).get('IsPrime')):
+        for offer in offers:
+            if predicate(offer):
+                return offer
+    return offers[0]
+
+def offer_ship_hours(offer):
+    """オファーの発送時間（ShippingTime.maximumHours、無い場合はNone）"""
+    shipping_time = (offer or {}).get('ShippingTime') or {}
+    hours = shipping_time.get('maximumHours', shipping_time.get('minimumHours'))
+    return float(hours) if hours is not None else None
@@ -8,7 +8,6 @@ import json
 import unicodedata
 from pathlib import Path
 import numpy as np
-import traceback
 import logging
 
 # ログ設定
@@ -35,6 +34,110 @@ except ImportError as e:
     logger.warning(f"⚠️ config_manager.py インポート失敗: {e}")
     logger.info("📋 フォールバック: ハードコーディングされたスコア設定を使用")
 
+# 数量文法（単一スキャン・基準単位への正規化）
+QUANTITY_GRAMMAR_AVAILABLE = False
+try:
+    from core.helpers.quantity_helpers import parse_quantity
+    QUANTITY_GRAMMAR_AVAILABLE = True
+except ImportError:
+    try:
+        from quantity_helpers import parse_quantity
+        QUANTITY_GRAMMAR_AVAILABLE = True
+    except ImportError:
+        logger.warning("⚠️ quantity_helpers インポート失敗: 従来の数量パターンを使用")
+
+# エンドポイント差し替え（SP_API_ENDPOINT / OPENAI_BASE_URL でローカル検証サーバーへ向ける）
+SP_API_HTTP_AVAILABLE = False
+try:
+    from core.services.sp_api_http import (
+        create_sp_api_http_client, get_llm_base_url, select_featured_offer, offer_ship_hours, SpApiHttpError,
+        AMAZON_JP_SELLER_ID
+    )
+    SP_API_HTTP_AVAILABLE = True
+except ImportError:
+    try:
+        from sp_api_http import (
+            create_sp_api_http_client, get_llm_base_url, select_featured_offer, offer_ship_hours, SpApiHttpError,
+            AMAZON_JP_SELLER_ID
+        )
+        SP_API_HTTP_AVAILABLE = True
+    except ImportError:
+        pass
+
+# ステージ別計測（処理実行中のみ記録、計測外では何もしない）
+try:
+    from core.helpers.stage_metrics import stage_timer, record_stage_retry, record_stage_cache_hit
+except ImportError:
+    from contextlib import nullcontext as _nullcontext
+
+    def stage_timer(name):
+        return _nullcontext()
+
+    def record_stage_retry(name, count=1):
+        pass
+
+    def record_stage_cache_hit(name, count=1):
+        pass
+
+# 使用量台帳（リクエスト数・スロットリング・トークン数、処理実行中のみ記録）
+try:
+    from core.helpers.usage_ledger import record_api_usage, record_llm_usage
+except ImportError:
+    def record_api_usage(provider, stage, operation='', **counts):
+        pass
+
+    def record_llm_usage(provider, stage, model, response):
+        pass
+
+# 共有APIキャッシュ（店舗・国別の並列ジョブ間で日本語化・オファー応答を共有、有効化した実行範囲のみ）
+try:
+    from core.managers.shared_api_cache import get_active_shared_cache
+except ImportError:
+    def get_active_shared_cache():
+        return None
+
+# 送信レートの制限（ジョブごとのクォータ）
+try:
+    from core.helpers.rate_limiter import RateLimiter
+except ImportError:
+    RateLimiter = None
+
+# CPU処理（ブランド・数量抽出、関連性スコア）のプロセスプール並列実行
+try:
+    from core.helpers.parallel_text import parallel_map
+except ImportError:
+    def parallel_map(func, items, context=None, **kwargs):
+        return [func(item, context or {}) for item in items]
+
+# 遮断器（429/503等が続く提供元・操作への送信を止め、待機・再試行に時間を使わない）
+try:
+    from core.helpers.circuit_breaker import get_circuit_breaker, CircuitOpenError
+except ImportError:
+    class CircuitOpenError(Exception):
+        pass
+
+    class _NullCircuitBreaker:
+        def allow(self):
+            return True
+
+        def check(self):
+            pass
+
+        def record_success(self):
+            pass
+
+        def record_error(self, error):
+            pass
+
+        def retry_in(self):
+            return 0.0
+
+    def get_circuit_breaker(provider, operation, **settings):
+        return _NullCircuitBreaker()
+
+# getItemOffersのShippingTimeから得た発送時間の信頼度
+OFFERS_SHIP_CONFIDENCE = 90
+
 def get_config_value(category: str, key: str, fallback_value):
     """
     設定値の取得（フォールバック対応）
@@ -71,25 +174,83 @@ if not env_path.exists():
         logger.warning(f"Warning: .env file not found at {env_path} or {env_path_alt}")
 load_dotenv(env_path)
 
+_sp_api_http_client = None
+
+# ステージ（'offers' / 'translate'）→ RateLimiter（未設定のステージは無制限）
+_request_limiters = {}
+
+def set_request_rate(stage, rate_per_second, burst=None):
+    """
+    ステージの送信レートの設定（プロセス内で共通、ジョブごとのクォータ用）
+
+    Args:
+        stage: 'offers'（getItemOffers）/ 'translate'（LLM）
+        rate_per_second: 1秒あたりのリクエスト数（None・0以下で制限解除）
+        burst: 連続送信の上限
+    """
+    if not rate_per_second or rate_per_second <= 0 or RateLimiter is None:
+        _request_limiters.pop(stage, None)
+        return
+    _request_limiters[stage] = RateLimiter(rate_per_second, burst)
+
+def _throttle(stage):
+    limiter = _request_limiters.get(stage)
+    if limiter is not None:
+        limiter.acquire()
+
+def _circuit_breaker(provider, operation):
+    """提供元・操作の遮断器（設定ファイルの circuit_breaker.* は初回作成時のみ反映）"""
+    return get_circuit_breaker(
+        provider, operation,
+        failure_threshold=get_config_value('circuit_breaker', 'failure_threshold', 5),
+        open_seconds=get_config_value('circuit_breaker', 'open_seconds', 30),
+        max_open_seconds=get_config_value('circuit_breaker', 'max_open_seconds', 300)
+    )
+
+def get_sp_api_http_client():
+    """SP_API_ENDPOINT 設定時のHTTPクライアント（未設定・利用不可の場合はNone）"""
+    global _sp_api_http_client
+    if not SP_API_HTTP_AVAILABLE:
+        return None
+    if _sp_api_http_client is None:
+        _sp_api_http_client = create_sp_api_http_client()
+    return _sp_api_http_client
+
 def get_japanese_name_from_gpt4o(clean_title):
-    """GPT-4oによる高品質日本語化"""
+    """GPT-4oによる高品質日本語化（遮断中は送信せずに CircuitOpenError）"""
     try:
         import openai
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             return None, "OpenAI API Key not found"
-        client = openai.OpenAI(api_key=api_key)
+        # OPENAI_BASE_URL 設定時はその送信先（ローカル検証サーバー等）を使用
+        base_url = get_llm_base_url() if SP_API_HTTP_AVAILABLE else None
+        client = openai.OpenAI(api_key=api_key, base_url=base_url) if base_url else openai.OpenAI(api_key=api_key)
         prompt = f"次の英語の商品名を、日本のECサイトで通じる自然な日本語の商品名に翻訳してください。各単語は半角スペースで区切り、ブランドや容量も日本語で表記し、説明や余計な語句は不要：\n\n{clean_title}"
-        response = client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": prompt}], max_tokens=64, temperature=0.3,
-        )
+        breaker = _circuit_breaker('openai', 'gpt-4o')
+        breaker.check()
+        _throttle('translate')
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": prompt}], max_tokens=64, temperature=0.3,
+            )
+        except Exception as e_llm:
+            breaker.record_error(e_llm)
+            # 失敗したリクエストも件数に含める（429はスロットリングとして別集計）
+            record_api_usage('openai', 'translate', 'gpt-4o', requests=1, errors=1,
+                             throttled=int(getattr(e_llm, 'status_code', None) == 429))
+            raise
+        breaker.record_success()
+        record_llm_usage('openai', 'translate', 'gpt-4o', response)
         japanese_name = response.choices[0].message.content.strip()
         return japanese_name, "GPT-4o"
+    except CircuitOpenError:
+        raise
     except Exception as e:
         return None, f"GPT-4o Error: {e}"
 
 def get_japanese_name_from_gemini(clean_title):
-    """Geminiによる日本語化（バックアップ用）"""
+    """Geminiによる日本語化（バックアップ用、遮断中は送信せずに CircuitOpenError）"""
     try:
         import google.generativeai as genai
         api_key = os.getenv('GEMINI_API_KEY')
@@ -98,20 +259,58 @@ def get_japanese_name_from_gemini(clean_title):
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel('gemini-1.5-pro')
         prompt = f"次の英語の商品名を、日本語の商品名に自然に翻訳してください。ブランドや容量も自然な日本語で。余計な説明不要：\n\n{clean_title}"
-        response = model.generate_content(prompt)
+        breaker = _circuit_breaker('gemini', 'gemini-1.5-pro')
+        breaker.check()
+        _throttle('translate')
+        try:
+            response = model.generate_content(prompt)
+        except Exception as e_llm:
+            breaker.record_error(e_llm)
+            record_api_usage('gemini', 'translate', 'gemini-1.5-pro', requests=1, errors=1)
+            raise
+        breaker.record_success()
+        record_llm_usage('gemini', 'translate', 'gemini-1.5-pro', response)
         japanese_name = response.text.strip()
         return japanese_name, "Gemini"
+    except CircuitOpenError:
+        raise
     except Exception as e:
         return None, f"Gemini Error: {e}"
 
 def get_japanese_name_hybrid(clean_title):
-    """ハイブリッド日本語化（GPT-4o + Geminiバックアップ）"""
-    jp_name, source = get_japanese_name_from_gpt4o(clean_title)
-    if jp_name and not jp_name.isspace() and "変換不可" not in jp_name:
-        return jp_name, source
-    jp_name, source = get_japanese_name_from_gemini(clean_title)
-    if jp_name and not jp_name.isspace() and "変換不可" not in jp_name:
-        return jp_name, source
+    """
+    ハイブリッド日本語化（GPT-4o + Geminiバックアップ、共有キャッシュ有効時は同じタイトルを再翻訳しない）
+
+    遮断中の提供元は飛ばして次の提供元へ回す。全提供元が遮断中の場合は期限切れのキャッシュを使い、
+    それも無ければ CircuitOpenError（呼び出し側で保留にする）。
+    """
+    shared_cache = get_active_shared_cache()
+    cache_key = str(clean_title).strip()
+    if shared_cache is not None:
+        cached = shared_cache.get('translation', cache_key)
+        if cached:
+            record_stage_cache_hit('translate')
+            return cached[0], cached[1]
+    providers = (get_japanese_name_from_gpt4o, get_japanese_name_from_gemini)
+    circuit_errors = []
+    for translate in providers:
+        try:
+            jp_name, source = translate(clean_title)
+        except CircuitOpenError as e_open:
+            circuit_errors.append(e_open)
+            continue
+        if jp_name and not jp_name.isspace() and "変換不可" not in jp_name:
+            # LLMの結果のみ保存（失敗時の元タイトルは次回再試行する）
+            if shared_cache is not None:
+                shared_cache.put('translation', cache_key, [jp_name, source])
+            return jp_name, source
+    if len(circuit_errors) == len(providers):
+        if shared_cache is not None:
+            stale = shared_cache.get('translation', cache_key, allow_expired=True)
+            if stale:
+                record_stage_cache_hit('translate')
+                return stale[0], stale[1]
+        raise circuit_errors[0]
     return clean_title, "Original"
 
 def load_brand_dict():
@@ -289,8 +488,15 @@ def clean_product_name(title):
     
     return title
 
+def compile_brand_index(brand_dict):
+    """ブランド辞書を照合用の索引に変換（表記揺れを小文字化済みの (ブランド, 表記揺れ) タプル列）"""
+    return tuple(
+        (brand, tuple(str(variation).lower() for variation in variations))
+        for brand, variations in brand_dict.items()
+    )
+
 def extract_brand_and_quantity(title, brand_dict):
-    """商品名からブランド名と数量を抽出"""
+    """商品名からブランド名と数量を抽出（brand_dict はブランド辞書または compile_brand_index の索引）"""
     if not title:
         return None, None
     
@@ -298,17 +504,24 @@ def extract_brand_and_quantity(title, brand_dict):
     cleaned_title = clean_product_name(title)
     
     # ブランド名の抽出
+    brand_index = compile_brand_index(brand_dict) if isinstance(brand_dict, dict) else brand_dict
     brand_name = None
-    for brand, variations in brand_dict.items():
+    for brand, variations in brand_index:
         for variation in variations:
-            if variation.lower() in cleaned_title:
+            if variation in cleaned_title:
                 brand_name = brand
                 break
         if brand_name:
             break
     
-    # 数量の抽出
+    # 数量の抽出（記号「*」「×」を含む表記を扱うためクレンジング前のタイトルを解析）
     quantity = None
+    if QUANTITY_GRAMMAR_AVAILABLE:
+        quantity_details = parse_quantity(str(title).lower())
+        if quantity_details:
+            quantity = quantity_details['quantity_raw']
+        return brand_name, quantity
+    
     quantity_patterns = [
         r'(\d+)\s*(?:ml|g|oz|fl\.?\s*oz|piece|pcs|set|pack|bottle|tube|jar|box)',
         r'(?:ml|g|oz|fl\.?\s*oz|piece|pcs|set|pack|bottle|tube|jar|box)\s*(\d+)',
@@ -345,8 +558,40 @@ def _calculate_prime_confidence_score_internal(prime_info_dict):
         elif ship_hours <= 48: confidence_score += 5
     return max(0, min(100, confidence_score))
 
+# 出品者タイプ別の出品者スコア
+SELLER_TYPE_SCORES = {
+    'amazon': 1.0,
+    'official': 0.9,
+    'authorized': 0.8,
+    'verified': 0.7,
+    'third_party': 0.5
+}
+
+def _base_prime_info(reason, seller_type='unknown'):
+    """Prime判定結果の初期値（出品者・配送のカラムを含むフラットな辞書）"""
+    prime_info = {
+        'is_prime': False,
+        'prime_confidence': 0.0,
+        'prime_reason': reason,
+        'seller_name': '',
+        'seller_type': seller_type,
+        'seller_id': '',
+        'is_amazon_seller': False,
+        'is_official_seller': False,
+        'is_fba': False,
+        'shopee_score_bonus': 0.0
+    }
+    prime_info.update(_build_ship_info(None, 0, 'unknown'))
+    return prime_info
+
 def get_prime_and_seller_info_v8_enhanced(asin, brand_name=''):
-    """Prime情報と出品者情報を取得（Phase 4.0）"""
+    """
+    Prime情報と出品者情報を取得（Phase 4.0）
+
+    Returns:
+        dict: is_prime / prime_confidence / prime_reason / shopee_score_bonus と
+              出品者情報（seller_name / seller_type / ...）・配送情報（ship_hours / ship_bucket / ...）のフラットな辞書
+    """
     logger.info(f"🔍 Prime情報取得開始: ASIN={asin}, brand={brand_name}")
     
     # 設定値の取得
@@ -360,54 +605,36 @@ def get_prime_and_seller_info_v8_enhanced(asin, brand_name=''):
     # ASINの検証
     if not asin or not re.match(r'^[A-Z0-9]{10}$', asin):
         logger.warning(f"⚠️ 無効なASIN: {asin}")
-        return {
-            'is_prime': False,
-            'prime_confidence': 0.0,
-            'prime_reason': 'Invalid ASIN',
-            'seller_info': {},
-            'shipping_info': {},
-            'shopee_score_bonus': 0.0
-        }
+        return _base_prime_info('Invalid ASIN')
     
     try:
-        # 出品者情報の取得
-        seller_info = get_seller_info(asin)
+        # 出品者・配送情報の取得（getItemOffers は1ASINにつき1回）
+        seller_info, shipping_info = get_offer_info(asin)
         logger.info(f"👤 出品者情報: {seller_info}")
-        
-        # 配送情報の取得
-        shipping_info = get_shipping_info(asin)
         logger.info(f"🚚 配送情報: {shipping_info}")
         
-        # Prime判定ロジック
-        prime_info = {
-            'is_prime': False,
-            'prime_confidence': 0.0,
-            'prime_reason': '',
-            'seller_info': seller_info,
-            'shipping_info': shipping_info,
-            'shopee_score_bonus': 0.0
-        }
+        if seller_info is None:
+            # オファー無し（出品者がいない）: エラーではなく非Primeとして扱う
+            prime_info = _base_prime_info('No offers', seller_type='no_offer')
+            if shipping_info:
+                prime_info.update(shipping_info)
+            return prime_info
+        
+        prime_info = _base_prime_info('')
+        prime_info.update(seller_info)
+        if shipping_info:
+            prime_info.update(shipping_info)
         
         # 出品者スコアの計算
-        seller_score = 0.0
-        if seller_info.get('is_amazon'):
-            seller_score = 1.0
-        elif seller_info.get('is_official'):
-            seller_score = 0.9
-        elif seller_info.get('is_authorized'):
-            seller_score = 0.8
-        elif seller_info.get('is_verified'):
-            seller_score = 0.7
-        elif seller_info.get('is_third_party'):
-            seller_score = 0.5
+        seller_score = SELLER_TYPE_SCORES.get(prime_info['seller_type'], 0.0)
         
-        # 配送スコアの計算
-        shipping_score = 0.0
-        if shipping_info.get('is_prime'):
+        # 配送スコアの計算（発送時間が不明な場合は閾値判定しない）
+        ship_hours = prime_info['ship_hours']
+        if prime_info.get('is_prime_offer'):
             shipping_score = 1.0
-        elif shipping_info.get('is_fba'):
+        elif prime_info['is_fba']:
             shipping_score = 0.9
-        elif shipping_info.get('ship_hours', float('inf')) <= ship_hours_threshold:
+        elif ship_hours is not None and ship_hours <= ship_hours_threshold:
             shipping_score = 0.8
         else:
             shipping_score = 0.5
@@ -430,16 +657,12 @@ def get_prime_and_seller_info_v8_enhanced(asin, brand_name=''):
         
         return prime_info
         
+    except CircuitOpenError:
+        # 遮断中はエラー扱いにせず呼び出し側で保留にする
+        raise
     except Exception as e:
         logger.error(f"❌ Prime情報取得エラー: {str(e)}")
-        return {
-            'is_prime': False,
-            'prime_confidence': 0.0,
-            'prime_reason': f'Error: {str(e)}',
-            'seller_info': {},
-            'shipping_info': {},
-            'shopee_score_bonus': 0.0
-        }
+        return _base_prime_info(f'Error: {str(e)}')
 
 def calculate_prime_score(prime_info):
     """ Primeスコアの計算（Phase 4.0対応版） """
@@ -513,20 +736,22 @@ def calculate_shopee_suitability_score(product_info, prime_info):
         
         # 配送スコアの計算
         shipping_score = 0.0
-        if prime_info.get('shipping_info', {}).get('is_prime'):
+        ship_hours = prime_info.get('ship_hours')
+        if prime_info.get('is_prime_offer'):
             shipping_score = 0.2
-        elif prime_info.get('shipping_info', {}).get('is_fba'):
+        elif prime_info.get('is_fba'):
             shipping_score = 0.15
-        elif prime_info.get('shipping_info', {}).get('ship_hours', float('inf')) <= 48:
+        elif ship_hours is not None and ship_hours <= 48:
             shipping_score = 0.1
         
         # 出品者スコアの計算
         seller_score = 0.0
-        if prime_info.get('seller_info', {}).get('is_amazon'):
+        seller_type = prime_info.get('seller_type')
+        if prime_info.get('is_amazon_seller') or seller_type == 'amazon':
             seller_score = 0.1
-        elif prime_info.get('seller_info', {}).get('is_official'):
+        elif prime_info.get('is_official_seller') or seller_type == 'official':
             seller_score = 0.08
-        elif prime_info.get('seller_info', {}).get('is_authorized'):
+        elif seller_type == 'authorized':
             seller_score = 0.05
         
         # 総合スコアの計算
@@ -571,8 +796,60 @@ def calculate_shopee_bonus(prime_info, brand_name):
         logger.error(f"❌ Shopeeボーナス計算エラー: {e}")
         return 0  # エラー時のフォールバック値
 
-def process_batch_with_shopee_optimization(df, title_column='clean_title', limit=20):
-    """ Shopee出品最適化処理（Phase 4.0対応版） """
+# ======================== CPU処理の一括実行（parallel_map のワーカー関数） ========================
+
+def _brand_and_quantity_task(title, context):
+    """1タイトル分のブランド・数量抽出（索引はワーカー起動時に受け取った context['brand_index']）"""
+    if not title:
+        return '', None, None, None
+    try:
+        brand_name, quantity = extract_brand_and_quantity(title, context['brand_index'])
+        quantity_details = parse_quantity(title.lower()) if QUANTITY_GRAMMAR_AVAILABLE else None
+        return brand_name, quantity, quantity_details, None
+    except Exception as e:
+        return '', None, None, str(e)
+
+def _relevance_task(pair, context):
+    """1行分の関連性スコア・一致率（美容用語辞書は context['beauty_terms']）"""
+    original, japanese = pair
+    beauty_terms = context['beauty_terms']
+    return (calculate_relevance_score(original, japanese, beauty_terms),
+            calculate_match_percentage(original, japanese, beauty_terms))
+
+def extract_brands_and_quantities(titles, brand_dict):
+    """
+    タイトル列のブランド・数量抽出を一括実行（件数が多い場合はプロセスプールで並列）
+
+    Returns:
+        list: (ブランド名, 数量, 数量詳細, エラー内容) のタプル（titles と同じ順序）
+    """
+    return parallel_map(_brand_and_quantity_task, titles, context={'brand_index': compile_brand_index(brand_dict)})
+
+def calculate_relevance_scores(pairs):
+    """
+    (英語タイトル, 日本語名) 列の関連性スコア・一致率を一括計算（件数が多い場合はプロセスプールで並列）
+
+    Returns:
+        list: (relevance_score, match_percentage) のタプル（pairs と同じ順序）
+    """
+    return parallel_map(_relevance_task, pairs, context={'beauty_terms': load_beauty_terms_dict()})
+
+def process_batch_with_shopee_optimization(df, title_column='clean_title', limit=20, **pipeline_options):
+    """
+    Shopee出品最適化処理（Phase 4.0対応版）
+
+    ブランド抽出 → 日本語化 → ASIN決定 → Prime情報取得 → スコア計算を pipeline の
+    ステージエンジンで実行する（日本語化とオファー取得が別バッチで並行して進む）。
+
+    Args:
+        df: 入力データ
+        title_column: 商品名カラム
+        limit: 処理件数（設定 batch_processing_limit が上限）
+        **pipeline_options: pipeline.process_listing_batch への追加引数（classify / concurrency / batch_size など）
+
+    Returns:
+        pd.DataFrame: 入力カラム + 処理結果カラム（入力と同じ行順）
+    """
     logger.info(f"🚀 Shopee最適化処理開始（Phase 4.0）: {len(df) if df is not None else 0}件 (制限: {limit}件)")
     
     if df is None or df.empty: 
@@ -597,211 +874,22 @@ def process_batch_with_shopee_optimization(df, title_column='clean_title', limit
         logger.error(f"⚠️ ブランド辞書読み込み失敗: {e_brand}. フォールバック辞書使用")
         brand_dict = {"FANCL": ["ファンケル"], "ORBIS": ["オルビス"]}
     
-    results = []
-    success_count = 0
-    error_count = 0
-    retry_count = 0
-    
-    # エラー処理統計
-    error_stats = {
-        'title_empty': 0,
-        'brand_extraction_failed': 0,
-        'llm_failed': 0,
-        'prime_info_failed': 0,
-        'scoring_failed': 0,
-        'general_error': 0
-    }
-    
-    # 最大リトライ回数の取得
-    max_retries = get_config_value("system_settings", "max_retry_attempts", 2)
-    logger.info(f"🔄 バッチ処理開始... (最大リトライ回数: {max_retries})")
-
-    for idx, row_series in df_to_process.iterrows():
-        row_processing_success = False
-        retry_attempts = 0
-        
-        while not row_processing_success and retry_attempts <= max_retries:
-            try:
-                current_row_dict = row_series.to_dict() 
-                logger.info(f"\n🔍 処理中 {success_count + error_count + 1}/{len(df_to_process)}: {current_row_dict.get(title_column, 'N/A')[:50]}...")
-                if retry_attempts > 0:
-                    logger.info(f"  🔄 リトライ {retry_attempts}/{max_retries}")
-                    retry_count += 1
-
-                # Step 1: タイトル検証
-                clean_title_val = str(current_row_dict.get(title_column, '')).strip()
-                if not clean_title_val or clean_title_val.lower() == 'nan':
-                    logger.warning(f"⚠️ 行{idx}: 商品名が空または無効。")
-                    error_stats['title_empty'] += 1
-                    error_details = {
-                        'search_status': 'error', 
-                        'error_reason': '商品名が空または無効', 
-                        'data_source': '入力エラー',
-                        'error_category': 'title_empty',
-                        'retry_attempted': retry_attempts
-                    }
-                    results.append({**current_row_dict, **error_details})
-                    error_count += 1
-                    break  # リトライ不要なエラー
-
-                # Step 2: ブランド・数量抽出
-                try:
-                    extracted_info_val = extract_brand_and_quantity(clean_title_val, brand_dict)
-                    brand_name_val = extracted_info_val[0]
-                    cleaned_text_for_title_val = clean_title_val
-                    logger.info(f"  🏷️ ブランド検出後: brand_name='{brand_name_val}'")
-                except Exception as e_brand_extract:
-                    logger.error(f"  ⚠️ ブランド抽出エラー: {e_brand_extract}")
-                    error_stats['brand_extraction_failed'] += 1
-                    # ブランド抽出失敗でも処理続行
-                    brand_name_val = ''
-                    cleaned_text_for_title_val = clean_title_val
-
-                # Step 3: 日本語化
-                japanese_name_val = clean_title_val  # フォールバック
-                llm_source_val = "Original"
-                try:
-                    japanese_name_val, llm_source_val = get_japanese_name_hybrid(cleaned_text_for_title_val)
-                    logger.info(f"  🇯🇵 日本語化後: japanese_name='{japanese_name_val}', llm_source='{llm_source_val}'")
-                except Exception as e_llm:
-                    logger.error(f"  ⚠️ LLM日本語化エラー: {e_llm}. 元タイトル使用")
-                    error_stats['llm_failed'] += 1
-                    japanese_name_val = cleaned_text_for_title_val
-                    llm_source_val = "Error_Fallback"
-
-                # Step 4: ASIN決定
-                asin_val = current_row_dict.get('asin', current_row_dict.get('amazon_asin', f"GEN{str(success_count + error_count + 1).zfill(9)}V8K"))
-                logger.info(f"  🔍 ASIN決定: '{asin_val}'")
-
-                # Step 5: Prime情報取得
-                prime_info_val = {}
-                try:
-                    prime_info_val = get_prime_and_seller_info_v8_enhanced(asin=asin_val, brand_name=brand_name_val)
-                    logger.info(f"  🎯 prime_info取得後: is_prime={prime_info_val.get('is_prime')}, seller_type='{prime_info_val.get('seller_type')}', ship_hours={prime_info_val.get('ship_hours')}, prime_confidence_score={prime_info_val.get('prime_confidence')}")
-                except Exception as e_prime:
-                    logger.error(f"  ⚠️ Prime情報取得エラー: {e_prime}. フォールバック情報使用")
-                    error_stats['prime_info_failed'] += 1
-                    prime_info_val = {
-                        'is_prime': False, 'seller_name': 'エラー時フォールバック出品者', 'seller_type': 'unknown',
-                        'ship_hours': None, 'prime_confidence': 0.0, 'prime_reason': f'Error: {str(e_prime)}'
-                    }
-
-                # Step 6: Shopee適性スコア計算
-                shopee_score_val = 30  # フォールバック値
-                try:
-                    shopee_score_val = calculate_shopee_suitability_score(current_row_dict, prime_info_val)
-                    logger.info(f"  📊 Shopeeスコア計算後: shopee_score={shopee_score_val}")
-                except Exception as e_score:
-                    logger.error(f"  ⚠️ Shopeeスコア計算エラー: {e_score}. フォールバック値使用")
-                    error_stats['scoring_failed'] += 1
-                    shopee_score_val = 30
-
-                # Step 7: 関連性スコア計算
-                relevance_score_val = calculate_relevance_score(cleaned_text_for_title_val, japanese_name_val)
-                match_percentage_val = calculate_match_percentage(cleaned_text_for_title_val, japanese_name_val)
-                
-                # Step 8: 結果データ構築
-                result_data_to_update = {
-                    'clean_title': cleaned_text_for_title_val,
-                    'japanese_name': japanese_name_val,
-                    'amazon_title': japanese_name_val,
-                    'asin': asin_val,
-                    'amazon_asin': asin_val,
-                    'amazon_brand': brand_name_val,
-                    'extracted_brand': brand_name_val,
-                    'extracted_quantity': extracted_info_val[1],
-                    'llm_source': llm_source_val,
-                    'is_prime': prime_info_val.get('is_prime'),
-                    'seller_name': prime_info_val.get('seller_name'),
-                    'seller_type': prime_info_val.get('seller_type'),
-                    'seller_id': prime_info_val.get('seller_id'),
-                    'is_amazon_seller': prime_info_val.get('is_amazon_seller'),
-                    'is_official_seller': prime_info_val.get('is_official_seller'),
-                    'is_fba': prime_info_val.get('is_fba'),
-                    'ship_hours': prime_info_val.get('ship_hours'),
-                    'ship_confidence': prime_info_val.get('ship_confidence'),
-                    'ship_bucket': prime_info_val.get('ship_bucket'),
-                    'ship_category': prime_info_val.get('ship_category'),
-                    'ship_source': prime_info_val.get('ship_source'),
-                    'ship_priority': prime_info_val.get('ship_priority'),
-                    'prime_confidence': prime_info_val.get('prime_confidence'),
-                    'prime_reason': prime_info_val.get('prime_reason'),
-                    'shopee_suitability_score': shopee_score_val,
-                    'relevance_score': relevance_score_val,
-                    'match_percentage': match_percentage_val,
-                    'category': prime_info_val.get('category'),
-                    'classification_reason': prime_info_val.get('classification_reason'),
-                    'classification_confidence': prime_info_val.get('classification_confidence'),
-                    'shopee_score_bonus': prime_info_val.get('shopee_score_bonus'),
-                    'search_status': 'success',
-                    'api_source': 'v8_enhanced',
-                    'data_source': 'v8_ERROR_HANDLING_ENHANCED',
-                    'v8_system_used': 'Phase 4.0',
-                    'retry_attempted': retry_attempts,
-                    'processing_notes': f"成功（リトライ{retry_attempts}回）" if retry_attempts > 0 else "成功"
-                }
-                
-                final_result_row = current_row_dict.copy()
-                final_result_row.update(result_data_to_update) 
-                
-                results.append(final_result_row)
-                success_count += 1
-                row_processing_success = True  # 成功フラグ
-                
-                logger.info(f"   ✅ 成功: ASIN={asin_val}, Prime={final_result_row.get('is_prime')}, ShipH={final_result_row.get('ship_hours')}, PrimeScore={final_result_row.get('prime_confidence')}, ShopeeScore={shopee_score_val}")
-
-            except Exception as e_main_loop:
-                retry_attempts += 1
-                logger.error(f"❌ 行{idx} で一般エラー (試行{retry_attempts}/{max_retries+1}): {str(e_main_loop)}")
-                
-                if retry_attempts > max_retries:
-                    # 最大リトライ回数に達した場合
-                    logger.error(f"💥 行{idx} 最大リトライ回数超過。エラーデータとして記録。")
-                    error_count += 1
-                    error_stats['general_error'] += 1
-                    error_details_loop = {
-                        'search_status': 'error', 
-                        'error_reason': f"最大リトライ後エラー: {str(e_main_loop)[:150]}", 
-                        'data_source': '処理ループ内エラー',
-                        'error_category': 'general_error',
-                        'retry_attempted': retry_attempts-1,
-                        'processing_notes': f"失敗（{retry_attempts-1}回リトライ後）"
-                    }
-                    results.append({**current_row_dict, **error_details_loop})
-                    break
-                else:
-                    # リトライ継続
-                    logger.info(f"  🔄 {retry_attempts}秒待機後リトライ...")
-                    time.sleep(retry_attempts)  # 段階的待機時間
-            
-    # 処理結果サマリー
-    logger.info(f"\n📊 バッチ処理完了:")
-    logger.info(f"  ✅ 成功: {success_count}件")
-    logger.info(f"  ❌ エラー: {error_count}件")
-    logger.info(f"  🔄 リトライ実行: {retry_count}回")
-    
-    logger.info(f"\n📋 エラー内訳:")
-    for error_type, count in error_stats.items():
-        if count > 0:
-            logger.info(f"  {error_type}: {count}件")
-    
-    if results:
-        result_df = pd.DataFrame(results)
-        logger.info(f"📋 結果DFカラム数: {len(result_df.columns)}")
-        return result_df
-    else:
+    from pipeline.stages import process_listing_batch
+    result_df = process_listing_batch(df_to_process, title_column=title_column, brand_dict=brand_dict, **pipeline_options)
+    if result_df.empty:
         logger.error("❌ 処理結果が空です。")
         error_cols = ['search_status', 'error_reason', 'data_source', 'error_category', 'retry_attempted']
-        df_cols = df.columns.tolist() if df is not None else []
-        return pd.DataFrame(columns=list(set(df_cols + error_cols)))
+        return pd.DataFrame(columns=list(set(df.columns.tolist() + error_cols)))
+    return result_df
 
-def calculate_relevance_score(original, japanese):
+def calculate_relevance_score(original, japanese, beauty_terms=None):
     """関連性スコア計算（美容用語辞書対応版）"""
     if not original or not japanese: 
         return 0
     
-    # 美容用語辞書の読み込み
-    beauty_terms = load_beauty_terms_dict()
+    # 美容用語辞書の読み込み（一括計算時は呼び出し側で1回だけ読み込んで渡す）
+    if beauty_terms is None:
+        beauty_terms = load_beauty_terms_dict()
     
     # 英語の単語を小文字に、日本語は元のまま
     original_words = set(original.lower().split())
@@ -850,13 +938,14 @@ def calculate_relevance_score(original, japanese):
     
     return final_score
 
-def calculate_match_percentage(original, japanese):
+def calculate_match_percentage(original, japanese, beauty_terms=None):
     """一致率計算（美容用語辞書対応版）"""
     if not original or not japanese:
         return 0
     
-    # 美容用語辞書の読み込み
-    beauty_terms = load_beauty_terms_dict()
+    # 美容用語辞書の読み込み（一括計算時は呼び出し側で1回だけ読み込んで渡す）
+    if beauty_terms is None:
+        beauty_terms = load_beauty_terms_dict()
     
     # 英語の単語を小文字に、日本語は元のまま
     original_words = set(original.lower().split())
@@ -943,6 +1032,133 @@ def analyze_beauty_terms_coverage(text):
         'matched_details': matched_terms
     }
 
+def _shed_item_offers(shared_cache, cache_key, asin, breaker):
+    """遮断中の getItemOffers（共有キャッシュの期限切れの応答、無ければ CircuitOpenError）"""
+    stale = shared_cache.get('offers', cache_key, allow_expired=True) if shared_cache is not None else None
+    if stale is not None:
+        logger.info(f"ℹ️ getItemOffers遮断中のため期限切れのキャッシュを使用: ASIN={asin}")
+        record_stage_cache_hit('offers')
+        return stale
+    raise CircuitOpenError('sp_api', 'getItemOffers', breaker.retry_in())
+
+def _fetch_item_offers(client, asin, max_retries, timeout=None):
+    """
+    getItemOffers（429/503等はRetry-After・段階的待機で再試行、共有キャッシュ有効時は有効期限内の応答を再利用）
+
+    遮断器には呼び出し単位で記録する（再試行で回復した429は数えず、再試行しても失敗した呼び出しを1回の失敗とする）。
+    遮断中は送信・再試行せず、共有キャッシュに期限切れの応答があればそれを返し、無ければ CircuitOpenError。
+    timeout は1回の送信のタイムアウト秒（Noneでクライアント設定）。
+    """
+    shared_cache = get_active_shared_cache()
+    cache_key = f"{client.marketplace_id}:{asin}"
+    if shared_cache is not None:
+        cached = shared_cache.get('offers', cache_key)
+        if cached is not None:
+            record_stage_cache_hit('offers')
+            return cached
+    breaker = _circuit_breaker('sp_api', 'getItemOffers')
+    if not breaker.allow():
+        return _shed_item_offers(shared_cache, cache_key, asin, breaker)
+    for attempt in range(max_retries):
+        if attempt > 0 and breaker.retry_in() > 0:
+            # 待機中に他の呼び出しの失敗で遮断された: 再試行を打ち切る
+            return _shed_item_offers(shared_cache, cache_key, asin, breaker)
+        try:
+            _throttle('offers')
+            offers = client.get_item_offers(asin, timeout=timeout)
+        except SpApiHttpError as e_http:
+            record_api_usage('sp_api', 'offers', 'getItemOffers', requests=1, throttled=int(e_http.status == 429))
+            if not e_http.retryable or attempt >= max_retries - 1:
+                breaker.record_error(e_http)
+                record_api_usage('sp_api', 'offers', 'getItemOffers', errors=1)
+                raise
+            wait_seconds = e_http.retry_after if e_http.retry_after is not None else attempt + 1
+            logger.warning(f"⚠️ getItemOffers {e_http.status} (試行{attempt + 1}/{max_retries}): {wait_seconds}秒待機")
+            record_stage_retry('offers')
+            record_api_usage('sp_api', 'offers', 'getItemOffers', retries=1)
+            time.sleep(wait_seconds)
+            continue
+        except Exception as e:
+            # 接続エラー・タイムアウト
+            breaker.record_error(e)
+            raise
+        breaker.record_success()
+        record_api_usage('sp_api', 'offers', 'getItemOffers', requests=1)
+        if shared_cache is not None:
+            shared_cache.put('offers', cache_key, offers)
+        return offers
+    return {}
+
+def _build_ship_info(ship_hours, ship_confidence, ship_source):
+    """発送時間から配送情報（区分・カテゴリ・優先度）を構築"""
+    if ship_hours is None:
+        return {
+            'ship_hours': None,
+            'ship_confidence': 0,
+            'ship_bucket': '不明',
+            'ship_category': 'C',
+            'ship_source': 'unknown',
+            'ship_priority': 99
+        }
+    if ship_hours <= 12:
+        bucket, category, priority = "12h以内", "超高速", 1
+    elif ship_hours <= 24:
+        bucket, category, priority = "24h以内", "高速", 2
+    elif ship_hours <= 48:
+        bucket, category, priority = "48h以内", "標準", 3
+    elif ship_hours <= 72:
+        bucket, category, priority = "72h以内", "やや低速", 4
+    else:
+        bucket, category, priority = "72h超", "低速", 5
+    return {
+        'ship_hours': ship_hours,
+        'ship_confidence': ship_confidence,
+        'ship_bucket': bucket,
+        'ship_category': category,
+        'ship_source': ship_source,
+        'ship_priority': priority
+    }
+
+def _seller_info_from_offer(client, offer):
+    """getItemOffers の表示対象オファーから出品者情報を構築"""
+    seller_id = offer.get('SellerId', '')
+    # Amazon本体の出品者IDはマーケットプレイスごとに異なる
+    is_amazon = client.amazon_seller_id is not None and seller_id == client.amazon_seller_id
+    amazon_name = 'Amazon.co.jp' if client.amazon_seller_id == AMAZON_JP_SELLER_ID else 'Amazon'
+    return {
+        'seller_name': amazon_name if is_amazon else f'出品者{seller_id}',
+        'seller_type': 'amazon' if is_amazon else 'third_party',
+        'seller_id': seller_id,
+        'is_amazon_seller': is_amazon,
+        'is_official_seller': False,
+        'is_fba': bool(offer.get('IsFulfilledByAmazon')),
+        'is_prime_offer': bool((offer.get('PrimeInformation') or {}).get('IsPrime'))
+    }
+
+def _shipping_info_from_offer(offer):
+    """getItemOffers の表示対象オファーから配送情報を構築（オファー無し・発送時間無しは不明）"""
+    ship_hours = offer_ship_hours(offer)
+    return _build_ship_info(ship_hours, OFFERS_SHIP_CONFIDENCE if ship_hours is not None else 0, 'getItemOffers')
+
+def get_offer_info(asin):
+    """
+    出品者情報と配送情報を取得（SP_API_ENDPOINT 設定時は getItemOffers 1回の応答から両方を構築）
+
+    Returns:
+        tuple: (出品者情報（オファー無しはNone）, 配送情報)
+    """
+    client = get_sp_api_http_client()
+    if client is None:
+        return get_seller_info(asin), get_shipping_info(asin)
+
+    api_timeout = get_config_value("api_settings", "timeout", 30)
+    max_retries = get_config_value("api_settings", "max_retries", 3)
+    offer = select_featured_offer(_fetch_item_offers(client, asin, max_retries, api_timeout).get('Offers', []))
+    if offer is None:
+        logger.info(f"ℹ️ オファーなし: ASIN={asin}")
+        return None, _shipping_info_from_offer(None)
+    return _seller_info_from_offer(client, offer), _shipping_info_from_offer(offer)
+
 def get_seller_info(asin):
     """ 出品者情報の取得（Phase 4.0対応版） """
     logger.info(f"🔍 出品者情報取得開始: ASIN={asin}")
@@ -952,6 +1168,17 @@ def get_seller_info(asin):
         api_timeout = get_config_value("api_settings", "timeout", 30)
         max_retries = get_config_value("api_settings", "max_retries", 3)
         
+        # SP_API_ENDPOINT 設定時はgetItemOffersの結果から判定
+        client = get_sp_api_http_client()
+        if client is not None:
+            offer = select_featured_offer(_fetch_item_offers(client, asin, max_retries, api_timeout).get('Offers', []))
+            if offer is None:
+                logger.info(f"ℹ️ オファーなし: ASIN={asin}")
+                return None
+            seller_info = _seller_info_from_offer(client, offer)
+            logger.info(f"✅ 出品者情報取得成功: {seller_info['seller_name']} ({seller_info['seller_type']})")
+            return seller_info
+        
         # APIリクエストの実行
         for attempt in range(max_retries):
             try:
@@ -986,6 +1213,8 @@ def get_seller_info(asin):
                 else:
                     raise e_api
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"❌ 出品者情報取得エラー: {e}")
         return None
@@ -999,42 +1228,23 @@ def get_shipping_info(asin):
         api_timeout = get_config_value("api_settings", "timeout", 30)
         max_retries = get_config_value("api_settings", "max_retries", 3)
         
+        # SP_API_ENDPOINT 設定時はgetItemOffersのShippingTimeを使用
+        client = get_sp_api_http_client()
+        if client is not None:
+            offer = select_featured_offer(_fetch_item_offers(client, asin, max_retries, api_timeout).get('Offers', []))
+            ship_info = _shipping_info_from_offer(offer)
+            logger.info(f"✅ 配送情報取得成功: {ship_info['ship_hours']}時間 ({ship_info['ship_category']})")
+            return ship_info
+        
         # APIリクエストの実行
         for attempt in range(max_retries):
             try:
                 # TODO: 実際のAPIリクエストを実装
                 # 現在はダミーデータを返す
                 ship_hours = np.random.choice([12, 18, 24, 36, 48, 72, 96, None], p=[0.1, 0.2, 0.3, 0.15, 0.1, 0.05, 0.05, 0.05])
-                
-                if ship_hours is None:
-                    ship_info = {
-                        'ship_hours': None,
-                        'ship_confidence': 0,
-                        'ship_bucket': '不明',
-                        'ship_category': 'C',
-                        'ship_source': 'unknown',
-                        'ship_priority': 99
-                    }
-                else:
-                    if ship_hours <= 12:
-                        bucket, category, priority = "12h以内", "超高速", 1
-                    elif ship_hours <= 24:
-                        bucket, category, priority = "24h以内", "高速", 2
-                    elif ship_hours <= 48:
-                        bucket, category, priority = "48h以内", "標準", 3
-                    elif ship_hours <= 72:
-                        bucket, category, priority = "72h以内", "やや低速", 4
-                    else:
-                        bucket, category, priority = "72h超", "低速", 5
-                    
-                    ship_info = {
-                        'ship_hours': ship_hours,
-                        'ship_confidence': np.random.randint(50, 100),
-                        'ship_bucket': bucket,
-                        'ship_category': category,
-                        'ship_source': 'API取得',
-                        'ship_priority': priority
-                    }
+                ship_info = _build_ship_info(
+                    ship_hours, np.random.randint(50, 100) if ship_hours is not None else 0, 'API取得'
+                )
                 
                 logger.info(f"✅ 配送情報取得成功: {ship_info['ship_hours']}時間 ({ship_info['ship_category']})")
                 return ship_info
@@ -1046,6 +1256,8 @@ def get_shipping_info(asin):
                 else:
                     raise e_api
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"❌ 配送情報取得エラー: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,341 @@
+# store_orchestrator.py - 店舗・国別ジョブの並列実行（living_spec 長期ゴール: 各国 5,000 品 × 最大 3 店舗）
+#
+# ジョブ（店舗 × 国 × 入力ファイル）ごとに子プロセスを起動し、各プロセスで
+#   取り込み → クレンジング → （重複除外・Keepaランク除外） → 日本語化・オファー取得・スコア → 分類 → 出力
+# を実行する。認証情報（env）・マーケットプレイス・送信レート（quotas）はジョブごとに独立し、
+# 日本語化結果と getItemOffers の応答は共有APIキャッシュ（shared_api_cache.db）で全ジョブが再利用する。
+# 各ジョブのCPU処理（parallel_text のプロセスプール）は CPUコア数を同時実行ジョブ数で分けたワーカー数
+# （env の TEXT_WORKERS、ジョブ定義で指定した場合はその値）で動かし、ジョブ数 × コア数のプロセスにしない。
+#
+# 使い方（プロジェクトルートから）:
+#   python -m core.services.store_orchestrator --jobs jobs.json --processes 3 --output-dir output/stores
+#
+# ジョブ定義（JSON）:
+#   {"jobs": [{"name": "sg-main", "store_id": "main", "country": "SG", "marketplace": "JP",
+#              "input": "inputs/sg_main.xlsx", "title_column": "title", "limit": 5000,
+#              "keepa_max_rank": 10000, "skip_duplicates": true,
+#              "env": {"SP_API_ACCESS_TOKEN": "...", "OPENAI_API_KEY": "..."},
+#              "quotas": {"offers": 0.5, "translate": 5}}]}
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+DEFAULT_MAX_PROCESSES = 3
+DEFAULT_OUTPUT_DIR = 'output/stores'
+DEFAULT_JOB_LIMIT = 5000
+ASIN_COLUMN_CANDIDATES = ('asin', 'ASIN', 'amazon_asin', 'Amazon_ASIN')
+
+# combined summary の出力カラム
+SUMMARY_COLUMNS = [
+    'name', 'store_id', 'country', 'marketplace', 'status', 'input_rows', 'items', 'group_a', 'group_b',
+    'failed_items', 'excluded_duplicates', 'excluded_keepa', 'wall_seconds', 'items_per_minute',
+    'requests', 'throttled', 'cache_hits', 'cost_usd', 'cost_per_listed_item', 'registry_run_id',
+    'output_excel', 'output_csv', 'error'
+]
+
+def load_jobs(path):
+    """
+    ジョブ定義の読み込み（name は出力ファイル名に使うため一意であること）
+
+    Returns:
+        list: ジョブのdict
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    jobs = config.get('jobs', config) if isinstance(config, dict) else config
+    names = set()
+    for job in jobs:
+        for key in ('name', 'input', 'title_column'):
+            if not job.get(key):
+                raise ValueError(f"ジョブに {key} がありません: {job}")
+        if job['name'] in names:
+            raise ValueError(f"ジョブ名が重複しています: {job['name']}")
+        names.add(job['name'])
+    return jobs
+
+def _find_asin_column(df):
+    return next((column for column in ASIN_COLUMN_CANDIDATES if column in df.columns), None)
+
+def _empty_summary(job, status, error=''):
+    summary = dict.fromkeys(SUMMARY_COLUMNS)
+    summary.update({
+        'name': job.get('name'), 'store_id': job.get('store_id', job.get('name')),
+        'country': job.get('country', ''), 'marketplace': job.get('marketplace', 'JP'),
+        'status': status, 'error': error
+    })
+    return summary
+
+# ======================== 子プロセス（1ジョブ） ========================
+
+def resolve_job_text_workers(max_processes, job_count=None, cpu_count=None):
+    """
+    1ジョブあたりのCPU処理のワーカー数（CPUコア数 ÷ 同時実行ジョブ数、最小1）
+
+    Args:
+        max_processes: 同時に実行するジョブ数
+        job_count: ジョブ数（max_processes より少ない場合はこちらで割る）
+        cpu_count: CPUコア数（Noneで os.cpu_count()）
+
+    Returns:
+        int: TEXT_WORKERS に設定する値
+    """
+    concurrent_jobs = max(1, int(max_processes))
+    if job_count is not None:
+        concurrent_jobs = max(1, min(concurrent_jobs, int(job_count)))
+    return max(1, (cpu_count or os.cpu_count() or 1) // concurrent_jobs)
+
+def _with_text_workers(job, text_workers):
+    """ジョブの env に TEXT_WORKERS を設定（ジョブ定義で指定済みの場合はそのまま）"""
+    env = {'TEXT_WORKERS': str(text_workers)}
+    env.update(job.get('env') or {})
+    return dict(job, env=env)
+
+def run_store_job(job, output_dir, cache_dir=None, data_dir=None):
+    """
+    1ジョブの実行（子プロセスで呼ばれる。環境変数はこのプロセス内でのみ変更される）
+
+    Args:
+        job: ジョブ定義
+        output_dir: 出力ディレクトリ（ジョブ名のサブディレクトリに出力）
+        cache_dir: 共有APIキャッシュのディレクトリ（Noneで data/）
+        data_dir: レジストリ・Keepa・重複インデックスのディレクトリ（Noneで data/）
+
+    Returns:
+        dict: SUMMARY_COLUMNS の値
+    """
+    summary = _empty_summary(job, 'running')
+    job_dir = Path(output_dir) / job['name']
+    job_dir.mkdir(parents=True, exist_ok=True)
+    # 行ごとのログ・print出力は端末ではなくジョブのログファイルへ
+    with open(job_dir / 'job.log', 'a', encoding='utf-8', buffering=1) as log_file, \
+            contextlib.redirect_stdout(log_file):
+        logging.basicConfig(stream=log_file, level=logging.INFO, force=True,
+                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        return _run_job(job, summary, job_dir, cache_dir, data_dir)
+
+def _run_job(job, summary, job_dir, cache_dir, data_dir):
+    # 認証情報・マーケットプレイスはサービスのインポート前に設定（モジュール読み込み時に参照されるため）
+    os.environ.update({key: str(value) for key, value in (job.get('env') or {}).items()})
+    os.environ['SP_API_MARKETPLACE'] = str(job.get('marketplace', 'JP')).upper()
+
+    try:
+        from core.services import sp_api_service
+        from core.helpers.asin_helpers import classify_for_shopee_listing, listable_mask
+        from pipeline.stages import process_listing_batch
+        from core.helpers.ingestion_helpers import load_table
+        from core.helpers.export_helpers import write_excel_streaming, export_csv
+        from core.helpers.stage_metrics import StageMetrics, activate_metrics, stage_timer
+        from core.helpers.usage_ledger import UsageLedger, activate_usage
+        from core.managers.shared_api_cache import create_shared_api_cache_manager, activate_shared_cache
+
+        for stage, rate in (job.get('quotas') or {}).items():
+            sp_api_service.set_request_rate(stage, rate)
+
+        cache = create_shared_api_cache_manager(cache_dir)
+        metrics = StageMetrics(source=f"store_orchestrator:{job['name']}").start()
+        ledger = UsageLedger()
+        with activate_metrics(metrics), activate_usage(ledger), activate_shared_cache(cache):
+            df = load_table(job['input'])
+            summary['input_rows'] = len(df)
+            with stage_timer('cleanse'):
+                df = df.copy()
+                df['clean_title'] = df[job['title_column']].astype(str).str.strip()
+                df = df[(df['clean_title'] != '') & (df['clean_title'].str.lower() != 'nan')]
+
+            if job.get('skip_duplicates'):
+                from core.managers.duplicator import create_duplicate_index_manager
+                df, duplicate_report = create_duplicate_index_manager(data_dir).filter_duplicates(
+                    df, 'clean_title', key_column=_find_asin_column(df)
+                )
+                summary['excluded_duplicates'] = len(duplicate_report)
+
+            asin_column = _find_asin_column(df)
+            if job.get('keepa_max_rank') and asin_column is not None:
+                from core.managers.keepa_rank_manager import create_keepa_rank_manager
+                df, keepa_report = create_keepa_rank_manager(data_dir).filter_by_sales_rank(
+                    df, asin_column, max_rank=int(job['keepa_max_rank'])
+                )
+                summary['excluded_keepa'] = len(keepa_report)
+
+            df = df.head(int(job.get('limit') or DEFAULT_JOB_LIMIT))
+            # ジョブ全件を1つのパイプラインに流す（batch_processing_limit は画面からの1回の処理件数の上限で、
+            # ここで分割すると塊ごとにパイプラインが空になりステージが重ならない）
+            processed = process_listing_batch(df, title_column='clean_title', brand_dict=sp_api_service.load_brand_dict())
+            if processed is None or processed.empty:
+                metrics.finish(items=0)
+                summary.update({'status': 'empty', 'items': 0})
+                return summary
+            with stage_timer('classify'):
+                classified = classify_for_shopee_listing(processed)
+            classified['store_id'] = summary['store_id']
+            classified['country'] = summary['country']
+
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            export_started = time.perf_counter()
+            excel_path = job_dir / f"{job['name']}_{timestamp}.xlsx"
+            csv_path = job_dir / f"{job['name']}_{timestamp}_group_a.csv"
+            # 保留行・エラー行（オファー未取得）は出品対象・出品1件あたりのコストに含めない
+            group_a_positions = listable_mask(classified, 'A').to_numpy().nonzero()[0]
+            group_b_positions = listable_mask(classified, 'B').to_numpy().nonzero()[0]
+            write_excel_streaming([
+                {'name': '全件', 'df': classified},
+                {'name': 'グループA', 'df': classified, 'positions': group_a_positions},
+                {'name': 'グループB', 'df': classified, 'positions': group_b_positions}
+            ], str(excel_path))
+            export_csv(classified.iloc[group_a_positions], str(csv_path))
+            metrics.record('export', time.perf_counter() - export_started)
+
+        failed_items = int(classified['search_status'].eq('error').sum()) if 'search_status' in classified.columns else 0
+        metrics.finish(items=len(classified), failed_items=failed_items)
+        overview = metrics.overview()
+        usage = ledger.totals(items=len(classified), listed_items=len(group_a_positions))
+
+        registry_run_id = None
+        try:
+            from core.managers.registry_manager import create_registry_manager
+            registry = create_registry_manager(data_dir)
+            registry_run_id = registry.record_pipeline_run(
+                classified, source=f"store_orchestrator:{job['name']} ({summary['store_id']}/{summary['country']})"
+            )
+            registry.record_run_metrics(registry_run_id, overview, metrics.stage_frame())
+            registry.record_run_usage(registry_run_id, ledger.usage_frame())
+        except ImportError:
+            pass
+
+        summary.update({
+            'status': 'completed',
+            'items': len(classified),
+            'group_a': len(group_a_positions),
+            'group_b': len(group_b_positions),
+            'failed_items': failed_items,
+            'wall_seconds': overview['wall_seconds'],
+            'items_per_minute': overview['items_per_minute'],
+            'requests': usage['requests'],
+            'throttled': usage['throttled'],
+            'cache_hits': overview['total_cache_hits'],
+            'cost_usd': usage['cost_usd'],
+            'cost_per_listed_item': usage['cost_per_listed_item'],
+            'registry_run_id': registry_run_id,
+            'output_excel': str(excel_path),
+            'output_csv': str(csv_path)
+        })
+        return summary
+    except Exception as e:
+        logging.getLogger(__name__).error(traceback.format_exc())
+        summary.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+        return summary
+
+# ======================== 親プロセス ========================
+
+def run_store_jobs(jobs, output_dir=DEFAULT_OUTPUT_DIR, max_processes=DEFAULT_MAX_PROCESSES,
+                   cache_dir=None, data_dir=None):
+    """
+    全ジョブの並列実行と combined summary の出力
+
+    ジョブは spawn した子プロセスで1件ずつ実行する（環境変数・送信レート・モジュール状態をジョブ間で共有しない）。
+    各ジョブの env には TEXT_WORKERS（resolve_job_text_workers）を設定する。
+
+    Args:
+        jobs: ジョブ定義のリスト
+        output_dir: 出力ディレクトリ
+        max_processes: 同時に実行するジョブ数
+        cache_dir: 共有APIキャッシュのディレクトリ
+        data_dir: レジストリ等のディレクトリ
+
+    Returns:
+        tuple: (ジョブ別サマリーのDataFrame（SUMMARY_COLUMNS）, 全体の集計dict)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    # ジョブごとのCPU処理のワーカー数（ジョブ数 × コア数のプロセスで過負荷にならないように）
+    text_workers = resolve_job_text_workers(max_processes, len(jobs))
+    jobs = [_with_text_workers(job, text_workers) for job in jobs]
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max(1, int(max_processes)), mp_context=context,
+                             max_tasks_per_child=1) as executor:
+        futures = [(job, executor.submit(run_store_job, job, str(output_dir),
+                                         str(cache_dir) if cache_dir else None,
+                                         str(data_dir) if data_dir else None))
+                   for job in jobs]
+        results = []
+        for job, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # 子プロセスの異常終了（メモリ不足等）
+                results.append(_empty_summary(job, 'failed', f"{type(e).__name__}: {e}"))
+
+    frame = pd.DataFrame(results, columns=SUMMARY_COLUMNS)
+    wall_seconds = time.perf_counter() - started
+    items = int(frame['items'].fillna(0).sum())
+    group_a = int(frame['group_a'].fillna(0).sum())
+    cost = float(frame['cost_usd'].fillna(0).sum())
+    totals = {
+        'jobs': len(frame),
+        'completed': int(frame['status'].eq('completed').sum()),
+        'failed': int(frame['status'].eq('failed').sum()),
+        'items': items,
+        'group_a': group_a,
+        'wall_seconds': wall_seconds,
+        # ジョブの処理時間の合計（順番に実行した場合の目安）との比
+        'sequential_seconds': float(frame['wall_seconds'].fillna(0).sum()),
+        'items_per_minute': (items / wall_seconds * 60) if wall_seconds > 0 else 0.0,
+        'requests': int(frame['requests'].fillna(0).sum()),
+        'throttled': int(frame['throttled'].fillna(0).sum()),
+        'cache_hits': int(frame['cache_hits'].fillna(0).sum()),
+        'cost_usd': cost,
+        'cost_per_listed_item': (cost / group_a) if group_a else 0.0
+    }
+    totals['speedup'] = (totals['sequential_seconds'] / wall_seconds) if wall_seconds > 0 else 0.0
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    frame.to_csv(output_dir / f"summary_{timestamp}.csv", index=False, encoding='utf-8-sig')
+    with open(output_dir / f"summary_{timestamp}.json", 'w', encoding='utf-8') as f:
+        json.dump({'totals': totals, 'jobs': frame.astype(object).where(frame.notna(), None).to_dict('records')},
+                  f, ensure_ascii=False, indent=2)
+    return frame, totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='店舗・国別ジョブの並列実行')
+    parser.add_argument('--jobs', required=True, help='ジョブ定義JSON')
+    parser.add_argument('--processes', type=int, default=DEFAULT_MAX_PROCESSES, help='同時に実行するジョブ数')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--cache-dir', help='共有APIキャッシュのディレクトリ（既定: data/）')
+    parser.add_argument('--data-dir', help='レジストリ・Keepa・重複インデックスのディレクトリ（既定: data/）')
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    print(f"🚀 {len(jobs)}ジョブを最大{args.processes}プロセスで実行します")
+    frame, totals = run_store_jobs(jobs, args.output_dir, args.processes, args.cache_dir, args.data_dir)
+
+    for row in frame.itertuples():
+        if row.status == 'completed':
+            print(f"[OK] {row.name} ({row.store_id}/{row.country}): {int(row.items)}件 グループA {int(row.group_a)}件 "
+                  f"{row.wall_seconds:.1f}秒 キャッシュヒット {int(row.cache_hits)}件 → {row.output_excel}")
+        else:
+            print(f"⚠️ {row.name} ({row.store_id}/{row.country}): {row.status} {row.error or ''}")
+    print(f"📊 合計 {totals['items']}件 / グループA {totals['group_a']}件 / {totals['wall_seconds']:.1f}秒 "
+          f"（順次実行換算 {totals['sequential_seconds']:.1f}秒、{totals['speedup']:.1f}倍） / "
+          f"推定コスト ${totals['cost_usd']:.4f}")
+    return 0 if totals['failed'] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
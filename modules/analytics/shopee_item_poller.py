@@ -0,0 +1,316 @@
+# shopee_item_poller.py - Shopee出品商品の View/Sold 日次ポーリング（living_spec §3.2.2、n8n cron から実行）
+#
+# 1ショップの商品を50件ずつ get_item_extra_info（閲覧数・販売数）と get_item_base_info（状態・価格・在庫）で取得し、
+# 前回値から変化した商品のみ shopee_item_stats.db の時系列に追加する。複数ショップはスレッドで並列に処理し、
+# 送信レートはパートナー単位の RateLimiter で全ショップ共通に制限する。
+#
+# 使い方（プロジェクトルートから）:
+#   python -m modules.analytics.shopee_item_poller --shops data/shopee_shops.json --workers 4 --rate 10
+#   SHOPEE_ENDPOINT=http://127.0.0.1:8765 python -m modules.analytics.shopee_item_poller ...  （ローカル検証サーバー）
+#
+# ショップ設定（JSON配列）:
+#   [{"shop_id": 2001, "access_token": "...", "store_id": "main", "item_ids": [1001, 1002]}]
+#   item_ids を省略した場合はレジストリ（registry.db）で store_id（未指定時は shop_id）の
+#   出品中（listings.status = 'listed'）の shopee_item_id を対象とする
+import argparse
+import contextvars
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# modules/core と衝突しないようプロジェクトルートを先頭に追加
+_project_root = Path(__file__).resolve().parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from core.helpers.rate_limiter import RateLimiter
+from core.services.shopee_client import (
+    create_shopee_client, parse_item_metrics, ShopeeApiError, SHOPEE_MAX_ITEMS_PER_REQUEST
+)
+from core.managers.shopee_item_stats_manager import create_shopee_item_stats_manager
+
+# 出品状態の参照（item_ids 未指定のショップ用）
+REGISTRY_AVAILABLE = False
+try:
+    from core.managers.registry_manager import create_registry_manager
+    REGISTRY_AVAILABLE = True
+except ImportError:
+    pass
+
+# ステージ別計測・使用量台帳
+INSTRUMENTATION_AVAILABLE = False
+try:
+    from core.helpers.stage_metrics import StageMetrics, activate_metrics, stage_timer, record_stage_retry
+    from core.helpers.usage_ledger import UsageLedger, activate_usage, record_api_usage
+    INSTRUMENTATION_AVAILABLE = True
+except ImportError:
+    pass
+
+DEFAULT_SHOPS_FILE = 'shopee_shops.json'
+# Shopeeのレート制限はパートナー単位のため全ショップ共通（回/秒）
+DEFAULT_RATE_PER_SECOND = 10.0
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+# get_item_extra_info から得る項目（parse_item_metrics のキー）
+EXTRA_INFO_COLUMNS = ('views', 'sold', 'likes', 'comment_count', 'rating_star')
+
+OPERATION_STAGES = {
+    'get_item_extra_info': 'shopee_extra_info',
+    'get_item_base_info': 'shopee_base_info'
+}
+
+# ======================== 対象の読み込み ========================
+
+def load_shop_configs(path=None):
+    """
+    ショップ設定の読み込み
+
+    Args:
+        path: JSONファイル（Noneでリポジトリの data/shopee_shops.json）
+
+    Returns:
+        list: shop_id / access_token / store_id / item_ids を持つdict
+    """
+    path = Path(path) if path else _project_root / 'data' / DEFAULT_SHOPS_FILE
+    with open(path, 'r', encoding='utf-8') as f:
+        shops = json.load(f)
+    for shop in shops:
+        if 'shop_id' not in shop or 'access_token' not in shop:
+            raise ValueError(f"shop_id と access_token は必須です: {shop}")
+    return shops
+
+def load_listed_item_ids(store_id, data_dir=None):
+    """レジストリの出品中商品のShopee商品ID（重複除外・昇順）"""
+    if not REGISTRY_AVAILABLE:
+        return []
+    frame = create_registry_manager(data_dir).query_frame(
+        "SELECT DISTINCT shopee_item_id FROM listings "
+        "WHERE store_id = ? AND status = 'listed' AND shopee_item_id IS NOT NULL AND shopee_item_id != '' "
+        "ORDER BY shopee_item_id",
+        (str(store_id),)
+    )
+    return frame['shopee_item_id'].astype(str).tolist()
+
+def _resolve_item_ids(shop, data_dir=None):
+    if shop.get('item_ids') is not None:
+        item_ids = [str(i) for i in shop['item_ids']]
+    else:
+        item_ids = load_listed_item_ids(shop.get('store_id', shop['shop_id']), data_dir)
+    return list(dict.fromkeys(i for i in item_ids if i))
+
+# ======================== 取得 ========================
+
+def _record(counters, operation, **counts):
+    for name, value in counts.items():
+        counters[name] = counters.get(name, 0) + value
+    if INSTRUMENTATION_AVAILABLE:
+        record_api_usage('shopee', OPERATION_STAGES[operation], operation, **counts)
+
+def _call_with_retry(client, operation, shop, batch, counters, max_retries=DEFAULT_MAX_RETRIES):
+    """
+    1バッチの取得（スロットリング・一時的な障害は指数バックオフで再試行）
+
+    Returns:
+        list: item_list（再試行後も失敗した場合はNone）
+    """
+    call = getattr(client, operation)
+    for attempt in range(max_retries + 1):
+        try:
+            if INSTRUMENTATION_AVAILABLE:
+                with stage_timer(OPERATION_STAGES[operation]):
+                    items = call(shop['shop_id'], shop['access_token'], batch)
+            else:
+                items = call(shop['shop_id'], shop['access_token'], batch)
+            _record(counters, operation, requests=1)
+            return items
+        except ShopeeApiError as e:
+            _record(counters, operation, requests=1, throttled=int(e.throttled))
+            if not e.retryable or attempt >= max_retries:
+                _record(counters, operation, errors=1)
+                print(f"⚠️ shop {shop['shop_id']} {operation} 失敗（{len(batch)}件）: {e}")
+                return None
+        except OSError as e:
+            # 接続エラー・タイムアウト
+            _record(counters, operation, requests=1)
+            if attempt >= max_retries:
+                _record(counters, operation, errors=1)
+                print(f"⚠️ shop {shop['shop_id']} {operation} 接続エラー（{len(batch)}件）: {e}")
+                return None
+        _record(counters, operation, retries=1)
+        if INSTRUMENTATION_AVAILABLE:
+            record_stage_retry(OPERATION_STAGES[operation])
+        time.sleep(min(DEFAULT_BACKOFF_SECONDS * (2 ** attempt), MAX_BACKOFF_SECONDS))
+    return None
+
+def poll_shop(shop, client, stats_manager, batch_size=SHOPEE_MAX_ITEMS_PER_REQUEST,
+              include_base_info=True, max_retries=DEFAULT_MAX_RETRIES, data_dir=None):
+    """
+    1ショップのポーリング（50件ずつ取得し、変化した商品のみ時系列に保存）
+
+    Args:
+        shop: ショップ設定（shop_id / access_token / store_id / item_ids）
+        client: ShopeeClient
+        stats_manager: ShopeeItemStatsManager
+        batch_size: 1リクエストの item_id 数（上限50）
+        include_base_info: get_item_base_info（状態・価格・在庫）も取得するか
+        max_retries: 1バッチの最大再試行回数
+        data_dir: レジストリのデータディレクトリ
+
+    Returns:
+        dict: shop_id / items / fetched / changed / unchanged / missing / failed_batches /
+              requests / throttled / retries / errors / seconds
+    """
+    started = time.perf_counter()
+    batch_size = max(1, min(int(batch_size), SHOPEE_MAX_ITEMS_PER_REQUEST))
+    item_ids = _resolve_item_ids(shop, data_dir)
+    counters = {'requests': 0, 'throttled': 0, 'retries': 0, 'errors': 0}
+    captured_at = datetime.now().isoformat(timespec='seconds')
+
+    records = []
+    missing = failed_batches = 0
+    for i in range(0, len(item_ids), batch_size):
+        batch = item_ids[i:i + batch_size]
+        extra = _call_with_retry(client, 'get_item_extra_info', shop, batch, counters, max_retries)
+        base = _call_with_retry(client, 'get_item_base_info', shop, batch, counters, max_retries) \
+            if include_base_info else []
+        if extra is None or base is None:
+            # 一部の値だけで保存すると欠損が変化として記録されるため、バッチ全体を次回に回す
+            failed_batches += 1
+            continue
+        extra_by_id = {str(item.get('item_id')): item for item in extra}
+        base_by_id = {str(item.get('item_id')): item for item in base}
+        for item_id in batch:
+            if item_id not in extra_by_id and item_id not in base_by_id:
+                # 削除済み・他ショップの商品
+                missing += 1
+                continue
+            metrics = parse_item_metrics(base_by_id.get(item_id), extra_by_id.get(item_id))
+            if not include_base_info:
+                # 取得していない状態・価格・在庫は前回値を引き継ぐ（欠損を変化として記録しない）
+                metrics = {key: metrics[key] for key in EXTRA_INFO_COLUMNS}
+            records.append({'item_id': item_id, **metrics})
+
+    stored = stats_manager.store_snapshots(shop['shop_id'], records, captured_at=captured_at) \
+        if records else {'changed': 0, 'unchanged': 0}
+    return {
+        'shop_id': str(shop['shop_id']),
+        'items': len(item_ids),
+        'fetched': len(records),
+        **stored,
+        'missing': missing,
+        'failed_batches': failed_batches,
+        **counters,
+        'seconds': time.perf_counter() - started
+    }
+
+def poll_shops(shops, client=None, stats_manager=None, max_workers=DEFAULT_MAX_WORKERS,
+               rate_per_second=DEFAULT_RATE_PER_SECOND, burst=None,
+               batch_size=SHOPEE_MAX_ITEMS_PER_REQUEST, include_base_info=True,
+               max_retries=DEFAULT_MAX_RETRIES, data_dir=None):
+    """
+    全ショップのポーリング（ショップ単位で並列、送信レートは全ショップ共通で制限）
+
+    Args:
+        shops: ショップ設定のリスト
+        client: ShopeeClient（Noneで環境変数から作成）
+        stats_manager: ShopeeItemStatsManager（Noneで data_dir に作成）
+        max_workers: 並列に処理するショップ数
+        rate_per_second: 全ショップ合計の送信レート（回/秒、0以下で無制限）
+        burst: 連続送信の上限（既定: rate_per_second）
+        batch_size / include_base_info / max_retries: poll_shop を参照
+        data_dir: データディレクトリ
+
+    Returns:
+        dict: run_id / started_at / finished_at / shops / items / fetched / changed / missing / requests /
+              throttled / errors / wall_seconds / shop_results / stage_metrics / usage
+    """
+    client = client or create_shopee_client()
+    if client is None:
+        raise RuntimeError("Shopee APIの設定がありません（SHOPEE_PARTNER_ID / SHOPEE_ENDPOINT）")
+    if client.rate_limiter is None and rate_per_second and rate_per_second > 0:
+        client.rate_limiter = RateLimiter(rate_per_second, burst)
+    stats_manager = stats_manager or create_shopee_item_stats_manager(data_dir)
+
+    started_at = datetime.now().isoformat(timespec='seconds')
+    metrics = StageMetrics(source='shopee_item_poller').start() if INSTRUMENTATION_AVAILABLE else None
+    ledger = UsageLedger() if INSTRUMENTATION_AVAILABLE else None
+
+    def run_shop(shop):
+        try:
+            return poll_shop(shop, client, stats_manager, batch_size, include_base_info, max_retries, data_dir)
+        except Exception as e:
+            print(f"⚠️ shop {shop.get('shop_id')} のポーリングに失敗: {e}")
+            return {'shop_id': str(shop.get('shop_id')), 'items': 0, 'fetched': 0, 'changed': 0, 'unchanged': 0,
+                    'missing': 0, 'failed_batches': 0, 'requests': 0, 'throttled': 0, 'retries': 0,
+                    'errors': 1, 'seconds': 0.0, 'error': str(e)}
+
+    def run_all():
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+            # 計測・台帳はContextVarのため、ワーカースレッドへは実行時のコンテキストを引き継ぐ
+            futures = [executor.submit(contextvars.copy_context().run, run_shop, shop) for shop in shops]
+            return [future.result() for future in futures]
+
+    if INSTRUMENTATION_AVAILABLE:
+        with activate_metrics(metrics), activate_usage(ledger):
+            shop_results = run_all()
+    else:
+        shop_results = run_all()
+
+    totals = {name: sum(r[name] for r in shop_results)
+              for name in ('items', 'fetched', 'changed', 'missing', 'requests', 'throttled', 'errors')}
+    wall_seconds = sum(r['seconds'] for r in shop_results)
+    if metrics is not None:
+        metrics.finish(items=totals['items'], failed_items=totals['items'] - totals['fetched'] - totals['missing'])
+        wall_seconds = metrics.wall_seconds
+    summary = {
+        'started_at': started_at,
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'shops': len(shops),
+        **totals,
+        'wall_seconds': wall_seconds
+    }
+    summary['run_id'] = stats_manager.record_poll_run(summary)
+    summary['shop_results'] = shop_results
+    summary['stage_metrics'] = metrics.stage_frame() if metrics is not None else None
+    summary['usage'] = ledger.usage_frame() if ledger is not None else None
+    return summary
+
+# ======================== CLI（n8n cron 用） ========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Shopee出品商品の View/Sold 日次ポーリング')
+    parser.add_argument('--shops', help=f"ショップ設定JSON（既定: data/{DEFAULT_SHOPS_FILE}）")
+    parser.add_argument('--data-dir', help='shopee_item_stats.db・registry.db のディレクトリ（既定: data/）')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help='並列に処理するショップ数')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_PER_SECOND, help='全ショップ合計の送信レート（回/秒）')
+    parser.add_argument('--burst', type=int, default=None, help='連続送信の上限')
+    parser.add_argument('--batch-size', type=int, default=SHOPEE_MAX_ITEMS_PER_REQUEST, help='1リクエストの商品数（上限50）')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument('--skip-base-info', action='store_true', help='get_item_base_info（状態・価格・在庫）を取得しない')
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir) if args.data_dir else None
+    shops = load_shop_configs(args.shops)
+    summary = poll_shops(
+        shops, max_workers=args.workers, rate_per_second=args.rate, burst=args.burst,
+        batch_size=args.batch_size, include_base_info=not args.skip_base_info,
+        max_retries=args.max_retries, data_dir=data_dir
+    )
+
+    for result in summary['shop_results']:
+        print(f"shop {result['shop_id']}: {result['fetched']}/{result['items']}件取得 "
+              f"変化 {result['changed']}件 欠番 {result['missing']}件 "
+              f"リクエスト {result['requests']}（429: {result['throttled']}） {result['seconds']:.1f}秒")
+    print(f"[OK] {summary['shops']}ショップ {summary['items']}件 → 変化 {summary['changed']}件を記録 "
+          f"（{summary['requests']}リクエスト、{summary['wall_seconds']:.1f}秒、run_id={summary['run_id']}）")
+    # n8n側で失敗を検知できるよう、取得できなかった商品がある場合は終了コード1
+    return 1 if summary['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
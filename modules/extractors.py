@@ -1,7 +1,20 @@
 import re
 import json
+import sys
 from pathlib import Path
 
+# 単一スキャンの数量文法（core.helpers.quantity_helpers）
+QUANTITY_GRAMMAR_AVAILABLE = False
+try:
+    # modules/core と衝突しないようプロジェクトルートを先頭に追加
+    _project_root = Path(__file__).resolve().parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.insert(0, str(_project_root))
+    from core.helpers.quantity_helpers import parse_quantity
+    QUANTITY_GRAMMAR_AVAILABLE = True
+except ImportError:
+    pass
+
 BRANDS_PATH = Path("data/brands.json")
 
 def load_brand_dict():
@@ -180,41 +193,44 @@ def extract_quantity(clean_title):
     if not clean_title:
         return ""
     
+    if QUANTITY_GRAMMAR_AVAILABLE:
+        parsed = parse_quantity(clean_title.lower())
+        return parsed['quantity_raw'] if parsed else ""
+    
     quantity_patterns = [
+        r'(\d+ml\s*[*×x]\s*\d+)',
         r'(\d+(?:\.\d+)?)\s*ml\b',
         r'(\d+(?:\.\d+)?)\s*l\b',
         r'(\d+(?:\.\d+)?)\s*mg\b',
         r'(\d+(?:\.\d+)?)\s*g\b',
         r'(\d+(?:\.\d+)?)\s*kg\b',
-        r'(\d+)\s*個\b',
-        r'(\d+)\s*本\b',
-        r'(\d+)\s*枚\b',
-        r'(\d+)\s*袋\b',
-        r'(\d+)\s*箱\b',
-        r'(\d+)\s*セット\b',
-        r'(\d+)\s*pack\b',
-        r'(\d+)\s*piece\b',
-        r'(\d+)\s*count\b',
-        r'(\d+(?:\.\d+)?)\s*oz\b',
-        r'(\d+(?:\.\d+)?)\s*fl\s*oz\b',
+        r'(\d+)\s*(?:個|本|枚|袋|箱|セット)',
+        r'(\d+)\s*(?:pack|piece|count)\b',
+        r'(\d+(?:\.\d+)?)\s*(?:fl\s*)?oz\b',
         r'(\d+(?:\.\d+)?)\s*lb\b',
-        r'(\d+)\s*inch\b',
-        r'(\d+)\s*cm\b',
-        r'(\d+)\s*mm\b',
-        r'(\d+)\s*gb\b',
-        r'(\d+)\s*tb\b',
-        r'(\d+ml\*\d+)',
-        r'(\d+ml\s*×\s*\d+)',
-        r'(\d+ml\s*x\s*\d+)',
+        r'(\d+)\s*(?:inch|cm|mm|gb|tb)\b',
     ]
     
+    lowered = clean_title.lower()
     for pattern in quantity_patterns:
-        match = re.search(pattern, clean_title.lower())
+        match = re.search(pattern, lowered)
         if match:
             return match.group(0)
     
     return ""
 
+def extract_quantity_details(clean_title):
+    """
+    商品名から数量を構造化して抽出（基準単位への正規化付き）
+
+    Returns:
+        dict: quantity_raw / quantity_value / quantity_unit / quantity_pack /
+              quantity_base_value / quantity_base_unit（抽出できない場合はNone）
+    """
+    if not clean_title or not QUANTITY_GRAMMAR_AVAILABLE:
+        return None
+    return parse_quantity(clean_title.lower())
+
 def extract_product_name(clean_title, brand="", quantity=""):
     """商品名からブランドと数量を除いた本来の商品名を抽出"""
     if not clean_title:
@@ -252,12 +268,18 @@ def extract_product_name(clean_title, brand="", quantity=""):
 def extract_all_info(clean_title):
     """商品名から全ての情報を一括抽出"""
     brand = extract_brand(clean_title)
-    quantity = extract_quantity(clean_title)
+    quantity_details = extract_quantity_details(clean_title)
+    if quantity_details:
+        quantity = quantity_details['quantity_raw']
+    else:
+        quantity = extract_quantity(clean_title)
     product_name = extract_product_name(clean_title, brand, quantity)
     
     return {
         "brand": brand,
         "quantity": quantity,
+        "quantity_base_value": quantity_details['quantity_base_value'] if quantity_details else None,
+        "quantity_base_unit": quantity_details['quantity_base_unit'] if quantity_details else "",
         "product_name": product_name,
         "clean_title": clean_title
     }
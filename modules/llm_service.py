@@ -2,6 +2,14 @@ import openai
 import google.generativeai as genai
 import os
 
+# 使用量台帳（トークン数の記録、処理実行中のみ）
+USAGE_LEDGER_AVAILABLE = False
+try:
+    from core.helpers.usage_ledger import record_llm_usage
+    USAGE_LEDGER_AVAILABLE = True
+except ImportError:
+    pass
+
 def get_japanese_name_from_gpt4o(clean_title):
     api_key = os.getenv("OPENAI_API_KEY")
     client = openai.OpenAI(api_key=api_key)
@@ -12,6 +20,8 @@ def get_japanese_name_from_gpt4o(clean_title):
         max_tokens=64,
         temperature=0.3,
     )
+    if USAGE_LEDGER_AVAILABLE:
+        record_llm_usage('openai', 'translate', 'gpt-4o', response)
     return response.choices[0].message.content.strip()
 
 def get_japanese_name_from_gemini(clean_title):
@@ -20,6 +30,8 @@ def get_japanese_name_from_gemini(clean_title):
     model = genai.GenerativeModel('gemini-1.5-pro-latest')
     prompt = f"次の英語の商品名を、日本語の商品名に自然に翻訳してください。ブランドや容量も自然な日本語で。余計な説明不要：\n\n{clean_title}"
     response = model.generate_content(prompt)
+    if USAGE_LEDGER_AVAILABLE:
+        record_llm_usage('gemini', 'translate', 'gemini-1.5-pro-latest', response)
     return response.text.strip()
 
 def get_japanese_name_hybrid(clean_title):
@@ -1,26 +1,282 @@
-from sp_api.api import CatalogItems
-from sp_api.base import Marketplaces, SellingApiException
 import time
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def search_asin_by_title(jp_title, max_retries=3, delay=1):
+# python-amazon-sp-api（SP_API_ENDPOINT 宛てのHTTP送信のみの場合は不要）
+SP_API_LIBRARY_AVAILABLE = False
+try:
+    from sp_api.api import CatalogItems
+    from sp_api.base import Marketplaces, SellingApiException
+    SP_API_LIBRARY_AVAILABLE = True
+except ImportError:
+    pass
+
+# カタログ検索キャッシュ（core.managers.catalog_search_cache）
+CATALOG_CACHE_AVAILABLE = False
+try:
+    # modules/core と衝突しないようプロジェクトルートを先頭に追加
+    _project_root = Path(__file__).resolve().parent.parent
+    if str(_project_root) not in sys.path:
+        sys.path.insert(0, str(_project_root))
+    from core.managers.catalog_search_cache import (
+        create_catalog_search_cache_manager, normalize_title_key
+    )
+    CATALOG_CACHE_AVAILABLE = True
+except ImportError:
+    pass
+
+# 候補の再ランキング（core.helpers.candidate_ranking）
+CANDIDATE_RANKING_AVAILABLE = False
+try:
+    from core.helpers.candidate_ranking import resolve_catalog_candidates, build_refined_query
+    CANDIDATE_RANKING_AVAILABLE = True
+except ImportError:
+    pass
+
+# エンドポイント差し替え（SP_API_ENDPOINT 設定時はローカル検証サーバー等へ送信）
+SP_API_HTTP_AVAILABLE = False
+try:
+    from core.services.sp_api_http import create_sp_api_http_client, SpApiHttpError
+    SP_API_HTTP_AVAILABLE = True
+except ImportError:
+    pass
+
+# ステージ別計測（処理実行中のみ記録）
+STAGE_METRICS_AVAILABLE = False
+try:
+    from core.helpers.stage_metrics import stage_timer, record_stage_retry, record_stage_cache_hit
+    STAGE_METRICS_AVAILABLE = True
+except ImportError:
+    pass
+
+# 使用量台帳（リクエスト数・スロットリング、処理実行中のみ記録）
+USAGE_LEDGER_AVAILABLE = False
+try:
+    from core.helpers.usage_ledger import record_api_usage
+    USAGE_LEDGER_AVAILABLE = True
+except ImportError:
+    pass
+
+# 遮断器（429/503等が続く間は searchCatalogItems を送信せず、行を保留にする）
+CIRCUIT_BREAKER_AVAILABLE = False
+try:
+    from core.helpers.circuit_breaker import get_circuit_breaker, CircuitOpenError
+    CIRCUIT_BREAKER_AVAILABLE = True
+except ImportError:
+    class CircuitOpenError(Exception):
+        pass
+
+CATALOG_SEARCH_PAGE_SIZE = 5
+# 低確信時の再検索で取得する件数
+CATALOG_REFINED_PAGE_SIZE = 20
+
+_catalog_cache = None
+_ranking_dicts = None
+
+def get_catalog_search_cache():
+    """プロセス共有のカタログ検索キャッシュを取得（利用不可の場合はNone）"""
+    global _catalog_cache
+    if _catalog_cache is None and CATALOG_CACHE_AVAILABLE:
+        try:
+            _catalog_cache = create_catalog_search_cache_manager()
+        except Exception as e:
+            print(f"⚠️ カタログ検索キャッシュ初期化エラー: {e}")
+    return _catalog_cache
+
+def _item_name(item):
+    """検索結果アイテムから商品名を取得"""
+    summaries = item.get("summaries") or []
+    if summaries and isinstance(summaries, list):
+        return summaries[0].get("itemName", "") or ""
+    attributes = item.get("attributes") or {}
+    names = attributes.get("item_name") or []
+    if names and isinstance(names, list):
+        return names[0].get("value", "") or ""
+    return ""
+
+def _get_ranking_dicts():
+    """再ランキング用のブランド辞書・美容用語辞書を取得（初回のみ読み込み）"""
+    global _ranking_dicts
+    if _ranking_dicts is None:
+        brand_dict, beauty_terms = {}, {}
+        try:
+            from modules.extractors import load_brand_dict
+            brand_dict = load_brand_dict()
+        except Exception as e:
+            print(f"⚠️ ブランド辞書読み込みエラー: {e}")
+        try:
+            from core.services.sp_api_service import load_beauty_terms_dict
+            beauty_terms = load_beauty_terms_dict()
+        except Exception as e:
+            print(f"⚠️ 美容用語辞書読み込みエラー: {e}")
+        _ranking_dicts = (brand_dict, beauty_terms)
+    return _ranking_dicts
+
+def build_catalog_candidates(items, start_rank=0):
+    """検索結果アイテムを候補リストに変換（検索順位と商品名を保持）"""
+    candidates = []
+    for rank, item in enumerate(items, start=start_rank):
+        asin = item.get("asin", "")
+        if not asin:
+            continue
+        candidates.append({
+            "asin": asin,
+            "rank": rank,
+            "item_name": _item_name(item)
+        })
+    return candidates
+
+def _empty_resolution():
+    return {"asin": "", "score": 0.0, "margin": 0.0, "confident": False, "refined": False, "candidates": []}
+
+def _deferred_resolution():
+    """遮断中で検索しなかった（キャッシュせず、後で再処理する）"""
+    return {**_empty_resolution(), "deferred": True}
+
+def _resolve(jp_title, candidates):
+    """候補の再ランキング（利用不可の場合は検索順位1位を採用）"""
+    if not candidates:
+        return _empty_resolution()
+    if not CANDIDATE_RANKING_AVAILABLE:
+        return {"asin": candidates[0]["asin"], "score": 0.0, "margin": 0.0,
+                "confident": False, "refined": False, "candidates": candidates}
+    brand_dict, beauty_terms = _get_ranking_dicts()
+    resolution = resolve_catalog_candidates(jp_title, candidates, brand_dict, beauty_terms)
+    resolution["refined"] = False
+    return resolution
+
+def resolve_asin_by_title(jp_title, max_retries=3, delay=1, use_cache=True, persist=True, allow_refine=True):
     """
-    日本語商品名でAmazon商品を検索してASINを取得
+    日本語商品名でカタログ検索し、候補を再ランキングして最良のASINを選択
+
+    返却された全候補をブランド・数量・美容用語・商品名の類似度で採点する。
+    低確信（スコア不足または2位との差が小さい）の場合のみ、
+    ブランド・数量を明示したクエリで件数を増やして再検索する。
+    キャッシュに有効な結果（検索結果なしを含む）があればAPIを呼ばない。
+    APIエラーで終わった検索はキャッシュしない（次回再試行）。
+    searchCatalogItems の遮断中は検索せず deferred=True の空の結果を返す。
+
+    Returns:
+        dict: asin / score / margin / confident / refined / candidates（遮断中は deferred も）
     """
     if not jp_title or not jp_title.strip():
-        return ""
-    
+        return _empty_resolution()
+
+    cache = get_catalog_search_cache() if use_cache else None
+    if cache is not None:
+        entry = cache.lookup(jp_title)
+        if entry is not None:
+            if STAGE_METRICS_AVAILABLE:
+                record_stage_cache_hit('catalog_search')
+            if entry.get("resolution"):
+                return {**entry["resolution"], "candidates": list(entry.get("candidates", []))}
+            return _resolve(jp_title, list(entry.get("candidates", [])))
+
+    try:
+        items = _search_catalog_items(jp_title, max_retries, delay)
+    except CircuitOpenError as e:
+        print(f"⏸️ ASIN検索を保留: {jp_title[:30]}... ({e})")
+        return _deferred_resolution()
+    if items is None:
+        return _empty_resolution()
+
+    candidates = build_catalog_candidates(items)
+    resolution = _resolve(jp_title, candidates)
+
+    if allow_refine and CANDIDATE_RANKING_AVAILABLE and not resolution["confident"]:
+        refined_query = build_refined_query(jp_title, _get_ranking_dicts()[0])
+        if refined_query:
+            print(f"🔁 低確信のため再検索: {jp_title[:30]}... (score={resolution['score']:.2f}, margin={resolution['margin']:.2f})")
+            try:
+                refined_items = _search_catalog_items(refined_query, max_retries, delay, page_size=CATALOG_REFINED_PAGE_SIZE)
+            except CircuitOpenError:
+                # 再検索だけが遮断された場合は最初の検索結果で確定
+                refined_items = None
+            if refined_items:
+                known_asins = {c["asin"] for c in candidates}
+                extra = [c for c in build_catalog_candidates(refined_items, start_rank=len(candidates))
+                         if c["asin"] not in known_asins]
+                resolution = _resolve(jp_title, candidates + extra)
+                resolution["refined"] = True
+
+    if cache is not None:
+        summary = {key: resolution[key] for key in ("asin", "score", "margin", "confident", "refined")}
+        cache.store(jp_title, resolution["candidates"], persist=persist, resolution=summary)
+    return resolution
+
+def search_asin_candidates(jp_title, max_retries=3, delay=1, use_cache=True, persist=True):
+    """
+    日本語商品名でAmazon商品を検索してASIN候補（スコア降順）を取得
+
+    Returns:
+        list: [{'asin', 'score', 'rank', 'item_name', 'features'}]（結果なしは空リスト）
+    """
+    return resolve_asin_by_title(jp_title, max_retries, delay, use_cache=use_cache, persist=persist)["candidates"]
+
+def _search_catalog_items(jp_title, max_retries=3, delay=1, page_size=CATALOG_SEARCH_PAGE_SIZE):
+    """
+    searchCatalogItemsの呼び出し（リトライ付き、処理実行中はステージ別計測に記録）
+
+    Returns:
+        list: 検索結果アイテム（結果なしは空リスト）、エラー終了時はNone
+
+    Raises:
+        CircuitOpenError: searchCatalogItems の遮断中（送信・再試行しない）
+    """
+    if not STAGE_METRICS_AVAILABLE:
+        return _call_search_catalog_items(jp_title, max_retries, delay, page_size)
+    with stage_timer('catalog_search'):
+        return _call_search_catalog_items(jp_title, max_retries, delay, page_size)
+
+def _note_retry():
+    if STAGE_METRICS_AVAILABLE:
+        record_stage_retry('catalog_search')
+    _note_usage(retries=1)
+
+def _catalog_breaker():
+    if not CIRCUIT_BREAKER_AVAILABLE:
+        return None
+    return get_circuit_breaker('sp_api', 'searchCatalogItems')
+
+def _check_breaker(breaker):
+    if breaker is not None:
+        breaker.check()
+
+def _note_result(breaker, error=None):
+    """呼び出しの結果を遮断器に記録（error=None で成功、再試行後も失敗した場合のみ error を渡す）"""
+    if breaker is None:
+        return
+    if error is None:
+        breaker.record_success()
+    else:
+        breaker.record_error(error)
+
+def _note_usage(**counts):
+    if USAGE_LEDGER_AVAILABLE:
+        record_api_usage('sp_api', 'catalog_search', 'searchCatalogItems', **counts)
+
+def _call_search_catalog_items(jp_title, max_retries, delay, page_size):
+    http_client = create_sp_api_http_client() if SP_API_HTTP_AVAILABLE else None
+    if http_client is not None:
+        return _search_catalog_items_http(http_client, jp_title, max_retries, delay, page_size)
+
     lwa_app_id = os.getenv("LWA_APP_ID")
     lwa_client_secret = os.getenv("LWA_CLIENT_SECRET") 
     refresh_token = os.getenv("SP_API_REFRESH_TOKEN")
     
     if not all([lwa_app_id, lwa_client_secret, refresh_token]):
         print(f"❌ 環境変数が不足しています")
-        return ""
+        return None
+    if not SP_API_LIBRARY_AVAILABLE:
+        print(f"❌ python-amazon-sp-api が未インストールです（SP_API_ENDPOINT 未設定）")
+        return None
     
+    breaker = _catalog_breaker()
+    _check_breaker(breaker)
     for attempt in range(max_retries):
         try:
             credentials = {
@@ -29,15 +285,19 @@ def search_asin_by_title(jp_title, max_retries=3, delay=1):
                 "refresh_token": refresh_token
             }
             
+            # 仕入れ元マーケットプレイス（ジョブごとに SP_API_MARKETPLACE で指定、既定: JP）
             catalog = CatalogItems(
-                marketplace=Marketplaces.JP,
+                marketplace=getattr(Marketplaces, os.getenv('SP_API_MARKETPLACE', '').strip().upper() or 'JP'),
                 credentials=credentials
             )
             
             result = catalog.search_catalog_items(
                 keywords=jp_title.strip(),
-                pageSize=5
+                pageSize=page_size,
+                includedData="summaries"
             )
+            _note_result(breaker)
+            _note_usage(requests=1)
             
             if result.payload:
                 if isinstance(result.payload, dict):
@@ -46,53 +306,133 @@ def search_asin_by_title(jp_title, max_retries=3, delay=1):
                     items = result.payload
                 else:
                     print(f"予期しないレスポンス形式: {type(result.payload)}")
-                    return ""
+                    return None
                 
-                if items and len(items) > 0:
-                    first_item = items[0]
-                    asin = first_item.get("asin", "")
-                    if asin:
-                        print(f"ASIN検索成功: {jp_title[:30]}... → {asin}")
-                        return asin
-                
-                print(f"ASIN検索結果なし: {jp_title[:30]}...")
-                return ""
+                if not items:
+                    print(f"ASIN検索結果なし: {jp_title[:30]}...")
+                return list(items)
             else:
                 print(f"ASIN検索レスポンスなし: {jp_title[:30]}...")
-                return ""
+                return []
                 
         except SellingApiException as e:
             print(f"SP-API エラー (試行{attempt+1}/{max_retries}): {e}")
+            _note_usage(requests=1, throttled=int(getattr(e, 'code', None) == 429))
             if attempt < max_retries - 1:
+                _note_retry()
                 time.sleep(delay)
             else:
-                return ""
+                _note_result(breaker, e)
+                _note_usage(errors=1)
+                return None
                 
         except Exception as e:
             print(f"ASIN検索エラー (試行{attempt+1}/{max_retries}): {e}")
+            _note_usage(requests=1)
             if attempt < max_retries - 1:
+                _note_retry()
                 time.sleep(delay)
             else:
-                return ""
+                _note_result(breaker, e)
+                _note_usage(errors=1)
+                return None
     
-    return ""
+    return None
 
-def search_multiple_asins(jp_titles, progress_callback=None):
+def _search_catalog_items_http(http_client, jp_title, max_retries, delay, page_size):
+    """SP_API_ENDPOINT 宛てのsearchCatalogItems（429/503等はRetry-Afterを優先して再試行）"""
+    breaker = _catalog_breaker()
+    _check_breaker(breaker)
+    for attempt in range(max_retries):
+        try:
+            items = http_client.search_catalog_items(jp_title.strip(), page_size=page_size)
+            _note_result(breaker)
+            _note_usage(requests=1)
+            if not items:
+                print(f"ASIN検索結果なし: {jp_title[:30]}...")
+            return list(items)
+        except SpApiHttpError as e:
+            print(f"SP-API エラー (試行{attempt+1}/{max_retries}): {e}")
+            _note_usage(requests=1, throttled=int(e.status == 429))
+            if not e.retryable or attempt >= max_retries - 1:
+                _note_result(breaker, e)
+                _note_usage(errors=1)
+                return None
+            _note_retry()
+            time.sleep(e.retry_after if e.retry_after is not None else delay)
+        except Exception as e:
+            print(f"ASIN検索エラー (試行{attempt+1}/{max_retries}): {e}")
+            _note_usage(requests=1)
+            if attempt >= max_retries - 1:
+                _note_result(breaker, e)
+                _note_usage(errors=1)
+                return None
+            _note_retry()
+            time.sleep(delay)
+    return None
+
+def search_asin_by_title(jp_title, max_retries=3, delay=1, use_cache=True):
+    """
+    日本語商品名でAmazon商品を検索してASINを取得
+    """
+    resolution = resolve_asin_by_title(jp_title, max_retries, delay, use_cache=use_cache)
+    asin = resolution["asin"]
+    if asin:
+        print(f"ASIN検索成功: {jp_title[:30]}... → {asin} (score={resolution['score']:.2f}, margin={resolution['margin']:.2f})")
+    return asin
+
+def search_multiple_asins(jp_titles, progress_callback=None, use_cache=True, return_details=False):
     """
     複数の日本語商品名でASIN検索（進捗表示対応）
+
+    正規化後に同一となる商品名は1回だけ検索し、キャッシュ済みの商品名はAPIを呼ばない。
+    キャッシュの保存はバッチ終了時に1回のみ行う。
+
+    Args:
+        jp_titles: 日本語商品名のリスト
+        progress_callback: 進捗コールバック (完了数, 総数)
+        use_cache: カタログ検索キャッシュを使用するか
+        return_details: Trueの場合はASINに加えて選択結果（score/margin/confident）のリストも返す
+
+    Returns:
+        list: ASINのリスト（return_details=Trueの場合は (ASINリスト, 選択結果リスト)）
     """
-    asins = []
     total = len(jp_titles)
+    cache = get_catalog_search_cache() if use_cache else None
+    resolved = {}
+    asins = []
+    details = []
     
     for i, title in enumerate(jp_titles):
-        asin = search_asin_by_title(title)
-        asins.append(asin)
+        key = normalize_title_key(title) if CATALOG_CACHE_AVAILABLE else (title or "").strip()
+        if key not in resolved:
+            resolved[key] = resolve_asin_by_title(title, use_cache=use_cache, persist=False)
+        elif STAGE_METRICS_AVAILABLE:
+            # 同一バッチ内の重複商品名（APIを呼ばない）
+            record_stage_cache_hit('catalog_search')
+        resolution = resolved[key]
+        asins.append(resolution["asin"])
+        details.append({key_: resolution.get(key_) for key_ in ("asin", "score", "margin", "confident", "refined", "deferred")})
         
         if progress_callback:
             progress_callback(i + 1, total)
         elif i % 10 == 0:
             print(f"ASIN検索進捗: {i+1}/{total}")
     
+    low_confidence = sum(1 for r in resolved.values() if r["asin"] and not r["confident"])
+    if low_confidence:
+        print(f"⚠️ 低確信のASIN選択: {low_confidence}件（要確認）")
+    deferred = sum(1 for r in resolved.values() if r.get("deferred"))
+    if deferred:
+        print(f"⏸️ SP-API遮断中のため保留: {deferred}件（後で再検索）")
+    
+    if cache is not None:
+        cache.flush()
+        stats = cache.get_cache_statistics()
+        print(f"📦 カタログ検索キャッシュ: ヒット{stats['session_hits']}件 / 結果なしヒット{stats['session_negative_hits']}件 / 未キャッシュ{stats['session_misses']}件")
+    
+    if return_details:
+        return asins, details
     return asins
 
 def test_sp_api_connection():
@@ -0,0 +1,3 @@
+# pipeline - 宣言したステージを有界キューでつないだ出品候補処理パイプライン
+from pipeline.engine import Stage, StagedPipeline
+from pipeline.stages import build_listing_pipeline, process_listing_batch, run_pipeline, save_with_highlight
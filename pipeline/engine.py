@@ -0,0 +1,325 @@
+# engine.py - ステージ間を有界キューでつないだパイプライン実行エンジン
+#
+#   入力行をバッチ（batch_size 行）に分け、宣言した Stage を順に流す。
+#   - ステージごとに concurrency 本のスレッドが上流キューからバッチを取り出して処理する
+#   - ステージ間のキューは queue_size バッチまで（下流が詰まると上流が待つため、メモリは一定）
+#   - I/Oステージ（日本語化・オファー取得）とCPUステージが別スレッドで重なり、
+#     バッチNの日本語化中にバッチN-1のオファー取得が進む
+#   - ステージの例外（再試行後）はそのバッチの行をエラー行にして後続へ流す（行は失わない）
+#   - API遮断中で処理できなかった行は保留行（search_status='deferred'）として後続へ流す
+#   - CPUステージ（batch_size 指定）は上流のバッチを batch_size 行までまとめて1回で処理する
+#     （プロセスプール並列の parallel_map が小さいバッチで逐次実行に落ちないように）
+#   - 出力は入力と同じ行順
+#
+# 行は dict。'_pipeline_' で始まるキーはステージ間の受け渡し用で、出力時に取り除く。
+import contextvars
+import queue
+import threading
+import time
+
+import pandas as pd
+
+# ステージ別計測（処理実行中のみ記録）
+try:
+    from core.helpers.stage_metrics import record_stage_retry, record_stage_error
+except ImportError:
+    def record_stage_retry(name, count=1):
+        pass
+
+    def record_stage_error(name, count=1):
+        pass
+
+DEFAULT_BATCH_SIZE = 10
+# ステージ間キューに滞留できるバッチ数
+DEFAULT_QUEUE_SIZE = 4
+
+PRIVATE_KEY_PREFIX = '_pipeline_'
+# 入力順の位置（0始まり）
+POSITION_KEY = '_pipeline_position'
+# Trueの行は以降のステージ（include_skipped=False）を素通しする
+SKIP_KEY = '_pipeline_skip'
+
+STATS_COLUMNS = ['stage', 'concurrency', 'batches', 'rows', 'errors', 'retries', 'busy_seconds', 'rows_per_second']
+
+_END = object()
+
+def mark_row_failed(row, stage, reason, category=None, data_source='処理ループ内エラー'):
+    """行をエラー行にして以降のステージを素通しさせる"""
+    row.update({
+        'search_status': 'error',
+        'error_reason': str(reason)[:200],
+        'data_source': data_source,
+        'error_category': category or f'{stage}_failed'
+    })
+    row[SKIP_KEY] = True
+    return row
+
+def mark_row_deferred(row, stage, reason):
+    """行を保留（API遮断中のため未処理、後で再処理）にして以降のステージを素通しさせる"""
+    row.update({
+        'search_status': 'deferred',
+        'error_reason': str(reason)[:200],
+        'data_source': 'API遮断中（保留）',
+        'error_category': f'{stage}_deferred',
+        'processing_notes': '保留（API遮断中、後で再処理）'
+    })
+    row[SKIP_KEY] = True
+    return row
+
+class Stage:
+    """パイプラインの1ステージ（バッチ単位の処理関数と並列度）"""
+
+    def __init__(self, name, func, concurrency=1, retries=0, ordered=False, include_skipped=False, finish=None,
+                 batch_size=None):
+        """
+        Args:
+            name: ステージ名
+            func: func(rows) -> rows（行dictのリストを受け取り、同じ件数・同じ順序で返す）
+            concurrency: 同時に処理するバッチ数（スレッド数）
+            retries: 例外時の再試行回数（n回目は n 秒待機）
+            ordered: Trueの場合はバッチを入力順に処理（並列度は1、出力ステージ向け）
+            include_skipped: Trueの場合はエラー行も func に渡す（分類・NG・出力など全行対象のステージ）
+            finish: 全バッチ処理後に1回だけ呼ぶ関数（ファイルの書き出し等）
+            batch_size: 指定した場合は上流のバッチをこの行数までまとめて func に渡す（ordered とは併用不可。
+                        まとめた行の例外・再試行はまとめた単位）
+        """
+        self.name = name
+        self.func = func
+        self.concurrency = 1 if ordered else max(1, int(concurrency or 1))
+        self.retries = max(0, int(retries or 0))
+        self.ordered = ordered
+        self.include_skipped = include_skipped
+        self.finish = finish
+        self.batch_size = None if ordered or not batch_size else max(1, int(batch_size))
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, concurrency={self.concurrency})"
+
+class _StageState:
+    """実行中の1ステージの集計（ワーカースレッド間で共有）"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.alive = stage.concurrency
+        self.next_seq = 0
+        self.pending = {}
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+
+class StagedPipeline:
+    """宣言したステージを有界キューでつないで実行するエンジン"""
+
+    def __init__(self, stages, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE, progress_callback=None):
+        """
+        Args:
+            stages: Stage のリスト（実行順）
+            batch_size: 1バッチの行数
+            queue_size: ステージ間キューの上限（バッチ数）
+            progress_callback: progress_callback(完了行数, 全行数)（最終ステージを出たバッチごと）
+        """
+        if not stages:
+            raise ValueError("ステージが1つもありません")
+        self.stages = list(stages)
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        self.queue_size = max(1, int(queue_size or DEFAULT_QUEUE_SIZE))
+        self.progress_callback = progress_callback
+        self._states = []
+        self.wall_seconds = 0.0
+
+    # ======================== 実行 ========================
+
+    def run(self, rows):
+        """
+        行dictのリストを全ステージに流す
+
+        Returns:
+            list: 処理後の行dict（入力と同じ順序、'_pipeline_' キーは除去済み）
+        """
+        rows = [dict(row) for row in rows]
+        for position, row in enumerate(rows):
+            row[POSITION_KEY] = position
+        batches = [rows[start:start + self.batch_size] for start in range(0, len(rows), self.batch_size)]
+
+        started = time.perf_counter()
+        self._states = [_StageState(stage) for stage in self.stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        # 各スレッドは呼び出し元のコンテキスト（計測・使用量台帳・共有キャッシュ）のコピーで動かす
+        threads = [self._start_thread(self._feed, batches, queues[0])]
+        for index, state in enumerate(self._states):
+            for _ in range(state.stage.concurrency):
+                threads.append(self._start_thread(self._stage_worker, state, queues[index], queues[index + 1]))
+
+        completed = {}
+        done_rows = 0
+        while True:
+            item = queues[-1].get()
+            if item is _END:
+                break
+            seq, batch = item
+            completed[seq] = batch
+            done_rows += len(batch)
+            if self.progress_callback is not None:
+                self.progress_callback(done_rows, len(rows))
+
+        for thread in threads:
+            thread.join()
+        self.wall_seconds = time.perf_counter() - started
+
+        results = []
+        for seq in sorted(completed):
+            for row in completed[seq]:
+                results.append({key: value for key, value in row.items() if not str(key).startswith(PRIVATE_KEY_PREFIX)})
+        return results
+
+    def run_frame(self, df):
+        """DataFrame版の run（出力は入力の行順、インデックスは振り直し）"""
+        if df is None or df.empty:
+            return pd.DataFrame()
+        return pd.DataFrame(self.run(df.to_dict('records')))
+
+    @staticmethod
+    def _start_thread(target, *args):
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(target, *args), daemon=True)
+        thread.start()
+        return thread
+
+    def _feed(self, batches, outbox):
+        try:
+            for seq, batch in enumerate(batches):
+                outbox.put((seq, batch))
+        finally:
+            outbox.put(_END)
+
+    def _stage_worker(self, state, inbox, outbox):
+        try:
+            if state.stage.batch_size:
+                self._combined_worker(state, inbox, outbox)
+                return
+            while True:
+                item = inbox.get()
+                if item is _END:
+                    # 同じステージの他のワーカーにも終了を伝える
+                    inbox.put(_END)
+                    break
+                if not state.stage.ordered:
+                    seq, batch = item
+                    outbox.put((seq, self._process(state, batch)))
+                    continue
+                # 入力順での処理（届いたバッチを次の番号が揃うまで保留）
+                state.pending[item[0]] = item[1]
+                while state.next_seq in state.pending:
+                    batch = state.pending.pop(state.next_seq)
+                    outbox.put((state.next_seq, self._process(state, batch)))
+                    state.next_seq += 1
+        finally:
+            with state.lock:
+                state.alive -= 1
+                last = state.alive == 0
+            if last:
+                self._finish_stage(state)
+                outbox.put(_END)
+
+    def _combined_worker(self, state, inbox, outbox):
+        """上流のバッチを stage.batch_size 行までまとめて処理し、元のバッチ単位に分けて下流へ流す"""
+        held = []
+        held_rows = 0
+        while True:
+            item = inbox.get()
+            if item is _END:
+                inbox.put(_END)
+                break
+            held.append(item)
+            held_rows += len(item[1])
+            if held_rows >= state.stage.batch_size:
+                self._flush_combined(state, held, outbox)
+                held = []
+                held_rows = 0
+        if held:
+            self._flush_combined(state, held, outbox)
+
+    def _flush_combined(self, state, held, outbox):
+        processed = self._process(state, [row for _, batch in held for row in batch])
+        offset = 0
+        for seq, batch in held:
+            outbox.put((seq, processed[offset:offset + len(batch)]))
+            offset += len(batch)
+
+    def _process(self, state, batch):
+        stage = state.stage
+        targets = [i for i, row in enumerate(batch) if stage.include_skipped or not row.get(SKIP_KEY)]
+        if not targets:
+            return batch
+
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                processed = stage.func([batch[i] for i in targets])
+                if processed is None or len(processed) != len(targets):
+                    raise ValueError(f"ステージ {stage.name} の出力件数が入力と一致しません")
+                break
+            except Exception as e:
+                if attempt < stage.retries:
+                    attempt += 1
+                    record_stage_retry(stage.name)
+                    with state.lock:
+                        state.retries += 1
+                    time.sleep(attempt)
+                    continue
+                record_stage_error(stage.name)
+                with state.lock:
+                    state.errors += 1
+                processed = [
+                    mark_row_failed(batch[i], stage.name, f"{stage.name}: {e}") for i in targets
+                ]
+                break
+
+        merged = list(batch)
+        for i, row in zip(targets, processed):
+            merged[i] = row
+        with state.lock:
+            state.batches += 1
+            state.rows += len(targets)
+            state.busy_seconds += time.perf_counter() - started
+        return merged
+
+    def _finish_stage(self, state):
+        if state.stage.finish is None:
+            return
+        try:
+            state.stage.finish()
+        except Exception as e:
+            record_stage_error(state.stage.name)
+            with state.lock:
+                state.errors += 1
+            print(f"⚠️ ステージ {state.stage.name} の終了処理エラー: {e}")
+
+    # ======================== 集計 ========================
+
+    def stats_frame(self):
+        """
+        直近の run のステージ別集計
+
+        Returns:
+            pd.DataFrame: STATS_COLUMNS
+        """
+        rows = []
+        for state in self._states:
+            rows.append({
+                'stage': state.stage.name,
+                'concurrency': state.stage.concurrency,
+                'batches': state.batches,
+                'rows': state.rows,
+                'errors': state.errors,
+                'retries': state.retries,
+                'busy_seconds': state.busy_seconds,
+                # 並列ワーカーの合計処理時間あたり（1ワーカー相当の処理速度）
+                'rows_per_second': (state.rows / state.busy_seconds) if state.busy_seconds > 0 else 0.0
+            })
+        return pd.DataFrame(rows, columns=STATS_COLUMNS)
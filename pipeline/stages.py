@@ -0,0 +1,515 @@
+# stages.py - 出品候補処理の標準ステージと実行関数
+#
+#   cleanse → brand → translate → resolve_asin → offers → scoring → classify → ng → export
+#
+#   - build_listing_pipeline: 上記ステージを宣言した StagedPipeline を組み立てる
+#   - process_listing_batch:  core.services.sp_api_service.process_batch_with_shopee_optimization の本体
+#                             （データタブ・店舗別ジョブ・旧asin_processorの共通処理）
+#   - run_pipeline:           app.py（ASIN一括日本語化＆検索ツール）用。カタログ検索でASINを決定
+#   - save_with_highlight:    要確認行（ASIN未取得・NGワード検出・エラー）に色を付けたExcel出力
+#
+# API遮断中（core.helpers.circuit_breaker）に処理できなかった行は search_status='deferred' の保留行になり、
+# 以降のI/Oステージを素通しする（再試行で待たずに、遮断解除後の再実行で処理する）。
+#
+# CPUステージ（cleanse / brand / scoring / classify / ng）は上流のバッチを cpu_batch_size 行（既定は
+# parallel_map がプロセスプールを使う最小件数）までまとめて処理する。I/Oステージは batch_size 行ずつ。
+#
+# ステージの並列度（同時に処理するバッチ数）は DEFAULT_STAGE_CONCURRENCY → 設定ファイルの
+# pipeline_concurrency.<ステージ名> → 引数 concurrency の順に上書きする。
+import logging
+import threading
+
+import pandas as pd
+
+from pipeline.engine import (
+    Stage, StagedPipeline, mark_row_failed, mark_row_deferred, POSITION_KEY, PRIVATE_KEY_PREFIX,
+    DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE
+)
+from core.services.sp_api_service import (
+    get_config_value, load_brand_dict, extract_brands_and_quantities, get_japanese_name_hybrid,
+    get_prime_and_seller_info_v8_enhanced, calculate_shopee_suitability_score, calculate_relevance_scores,
+    advanced_product_name_cleansing, parallel_map, CircuitOpenError
+)
+
+# プロセスプール並列の最小件数（CPUステージのまとめ処理の既定行数）
+try:
+    from core.helpers.parallel_text import DEFAULT_MIN_PARALLEL_ITEMS as DEFAULT_CPU_BATCH_SIZE
+except ImportError:
+    DEFAULT_CPU_BATCH_SIZE = 500
+
+# ステージ別計測（処理実行中のみ記録）
+try:
+    from core.helpers.stage_metrics import stage_timer
+except ImportError:
+    from contextlib import nullcontext as _nullcontext
+
+    def stage_timer(name):
+        return _nullcontext()
+
+# 分類（core.helpers.asin_helpers）
+CLASSIFIER_AVAILABLE = False
+try:
+    from core.helpers.asin_helpers import classify_for_shopee_listing, mark_deferred_group
+    CLASSIFIER_AVAILABLE = True
+except ImportError:
+    pass
+
+# カタログ検索によるASIN決定（modules.spapi_service）
+CATALOG_RESOLVER_AVAILABLE = False
+try:
+    from modules.spapi_service import resolve_asin_by_title
+    CATALOG_RESOLVER_AVAILABLE = True
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# I/Oステージ（LLM・SP-API）は複数バッチを同時に処理し、CPUステージは1本（まとめた行を内部で parallel_map）
+DEFAULT_STAGE_CONCURRENCY = {
+    'cleanse': 1,
+    'brand': 1,
+    'translate': 4,
+    'resolve_asin': 2,
+    'offers': 4,
+    'scoring': 1,
+    'classify': 1,
+    'ng': 1,
+    'export': 1
+}
+
+# 要確認行の色（save_with_highlight）
+HIGHLIGHT_FILLS = {
+    'error': 'F8CBAD',
+    'deferred': 'BDD7EE',
+    'ng': 'FFC7CE',
+    'no_asin': 'FFEB9C'
+}
+
+_PRIME_INFO_KEY = '_pipeline_prime_info'
+
+def resolve_stage_concurrency(concurrency=None):
+    """ステージ名 → 並列度（既定値 → 設定ファイル → 引数の順に上書き）"""
+    settings = {}
+    for name, default in DEFAULT_STAGE_CONCURRENCY.items():
+        settings[name] = int(get_config_value('pipeline_concurrency', name, default) or default)
+    settings.update({name: int(value) for name, value in (concurrency or {}).items()})
+    return settings
+
+class _ErrorStats:
+    """ステージ横断のエラー内訳（旧 process_batch_with_shopee_optimization の error_stats と同じ分類）"""
+
+    CATEGORIES = ('title_empty', 'brand_extraction_failed', 'llm_failed', 'prime_info_failed',
+                  'scoring_failed', 'general_error')
+
+    def __init__(self):
+        self.counts = {category: 0 for category in self.CATEGORIES}
+        self._lock = threading.Lock()
+
+    def add(self, category, count=1):
+        with self._lock:
+            self.counts[category] = self.counts.get(category, 0) + count
+
+# ======================== ステージ関数 ========================
+
+def _present(value):
+    return value is not None and not (isinstance(value, float) and pd.isna(value)) and str(value).strip() != ''
+
+def _cleanse_task(title, context):
+    return advanced_product_name_cleansing(title)
+
+def make_cleanse_stage(title_column, normalize=False, error_stats=None, batch_size=None):
+    """
+    cleanse: 商品名を clean_title に設定（空・'nan' はエラー行）
+
+    Args:
+        title_column: 商品名カラム
+        normalize: Trueの場合は advanced_product_name_cleansing で宣伝文句・記号を除去
+        batch_size: まとめて処理する行数（CPUステージ）
+    """
+    def cleanse(rows):
+        with stage_timer('cleanse'):
+            titles = [str(row.get(title_column, '')).strip() for row in rows]
+            if normalize:
+                titles = parallel_map(_cleanse_task, titles)
+        for row, title in zip(rows, titles):
+            if not title or title.lower() == 'nan':
+                if error_stats is not None:
+                    error_stats.add('title_empty')
+                mark_row_failed(row, 'cleanse', '商品名が空または無効', category='title_empty', data_source='入力エラー')
+                row['retry_attempted'] = 0
+                continue
+            row['clean_title'] = title
+        return rows
+    return Stage('cleanse', cleanse, concurrency=1, batch_size=batch_size)
+
+def make_brand_stage(brand_dict, concurrency=1, error_stats=None, batch_size=None):
+    """brand: ブランド・数量抽出（まとめた行を parallel_map、索引はワーカー起動時に1回だけ転送）"""
+    def brand(rows):
+        with stage_timer('brand'):
+            extracted = extract_brands_and_quantities([row['clean_title'] for row in rows], brand_dict)
+        for row, (brand_name, quantity, quantity_details, error) in zip(rows, extracted):
+            if error is not None:
+                logger.error(f"  ⚠️ ブランド抽出エラー: {error}")
+                if error_stats is not None:
+                    error_stats.add('brand_extraction_failed')
+            row['extracted_brand'] = brand_name
+            row['extracted_quantity'] = quantity
+            row['quantity_base_value'] = quantity_details['quantity_base_value'] if quantity_details else None
+            row['quantity_base_unit'] = quantity_details['quantity_base_unit'] if quantity_details else ''
+        return rows
+    return Stage('brand', brand, concurrency=concurrency, batch_size=batch_size)
+
+def make_translate_stage(concurrency=1, error_stats=None):
+    """translate: LLMによる日本語化（共有キャッシュ・送信レート制限・遮断は get_japanese_name_hybrid 側）"""
+    def translate(rows):
+        for row in rows:
+            try:
+                with stage_timer('translate'):
+                    japanese_name, llm_source = get_japanese_name_hybrid(row['clean_title'])
+                logger.info(f"  🇯🇵 日本語化後: japanese_name='{japanese_name}', llm_source='{llm_source}'")
+            except CircuitOpenError as e:
+                logger.warning(f"  ⏸️ 日本語化を保留: {e}")
+                mark_row_deferred(row, 'translate', e)
+                continue
+            except Exception as e:
+                logger.error(f"  ⚠️ LLM日本語化エラー: {e}. 元タイトル使用")
+                if error_stats is not None:
+                    error_stats.add('llm_failed')
+                japanese_name, llm_source = row['clean_title'], 'Error_Fallback'
+            row['japanese_name'] = japanese_name
+            row['llm_source'] = llm_source
+        return rows
+    return Stage('translate', translate, concurrency=concurrency)
+
+def make_resolve_asin_stage(use_catalog_search=False, concurrency=1):
+    """
+    resolve_asin: ASIN決定
+
+    Args:
+        use_catalog_search: Trueの場合、入力にASINが無い行は日本語名でカタログ検索（見つからなければ空、
+                            遮断中は保留行）。Falseの場合は入力の asin / amazon_asin、無ければ位置から生成した仮ASIN
+    """
+    def resolve_asin(rows):
+        for row in rows:
+            if not use_catalog_search:
+                generated = f"GEN{str(row[POSITION_KEY] + 1).zfill(9)}V8K"
+                row['asin'] = row.get('asin', row.get('amazon_asin', generated))
+                continue
+            asin = next((row[key] for key in ('asin', 'amazon_asin', 'ASIN') if _present(row.get(key))), '')
+            if not asin and CATALOG_RESOLVER_AVAILABLE:
+                resolution = resolve_asin_by_title(row.get('japanese_name', ''))
+                if resolution.get('deferred'):
+                    row['asin'] = ''
+                    mark_row_deferred(row, 'resolve_asin', 'searchCatalogItems 遮断中')
+                    continue
+                asin = resolution['asin']
+            row['asin'] = str(asin) if asin else ''
+        return rows
+    return Stage('resolve_asin', resolve_asin, concurrency=concurrency)
+
+def make_offers_stage(concurrency=1, error_stats=None):
+    """offers: getItemOffers による出品者・配送（Prime）情報（遮断中でキャッシュも無い行は保留）"""
+    def offers(rows):
+        for row in rows:
+            try:
+                with stage_timer('offers'):
+                    prime_info = get_prime_and_seller_info_v8_enhanced(asin=row['asin'], brand_name=row.get('extracted_brand'))
+            except CircuitOpenError as e:
+                logger.warning(f"  ⏸️ オファー取得を保留: ASIN={row['asin']} ({e})")
+                mark_row_deferred(row, 'offers', e)
+                continue
+            except Exception as e:
+                logger.error(f"  ⚠️ Prime情報取得エラー: {e}. フォールバック情報使用")
+                if error_stats is not None:
+                    error_stats.add('prime_info_failed')
+                prime_info = {
+                    'is_prime': False, 'seller_name': 'エラー時フォールバック出品者', 'seller_type': 'unknown',
+                    'ship_hours': None, 'prime_confidence': 0.0, 'prime_reason': f'Error: {str(e)}'
+                }
+            row[_PRIME_INFO_KEY] = prime_info
+        return rows
+    return Stage('offers', offers, concurrency=concurrency)
+
+def _build_result_row(row, shopee_score, relevance_score, match_percentage):
+    """出力行（旧 process_batch_with_shopee_optimization と同じカラム構成・順序）"""
+    prime_info = row.get(_PRIME_INFO_KEY) or {}
+    brand_name = row.get('extracted_brand')
+    asin = row.get('asin')
+    result = {
+        'clean_title': row['clean_title'],
+        'japanese_name': row.get('japanese_name'),
+        'amazon_title': row.get('japanese_name'),
+        'asin': asin,
+        'amazon_asin': asin,
+        'amazon_brand': brand_name,
+        'extracted_brand': brand_name,
+        'extracted_quantity': row.get('extracted_quantity'),
+        'quantity_base_value': row.get('quantity_base_value'),
+        'quantity_base_unit': row.get('quantity_base_unit', ''),
+        'llm_source': row.get('llm_source'),
+        'is_prime': prime_info.get('is_prime'),
+        'seller_name': prime_info.get('seller_name'),
+        'seller_type': prime_info.get('seller_type'),
+        'seller_id': prime_info.get('seller_id'),
+        'is_amazon_seller': prime_info.get('is_amazon_seller'),
+        'is_official_seller': prime_info.get('is_official_seller'),
+        'is_fba': prime_info.get('is_fba'),
+        'ship_hours': prime_info.get('ship_hours'),
+        'ship_confidence': prime_info.get('ship_confidence'),
+        'ship_bucket': prime_info.get('ship_bucket'),
+        'ship_category': prime_info.get('ship_category'),
+        'ship_source': prime_info.get('ship_source'),
+        'ship_priority': prime_info.get('ship_priority'),
+        'prime_confidence': prime_info.get('prime_confidence'),
+        'prime_reason': prime_info.get('prime_reason'),
+        'shopee_suitability_score': shopee_score,
+        'relevance_score': relevance_score,
+        'match_percentage': match_percentage,
+        'category': prime_info.get('category'),
+        'classification_reason': prime_info.get('classification_reason'),
+        'classification_confidence': prime_info.get('classification_confidence'),
+        'shopee_score_bonus': prime_info.get('shopee_score_bonus'),
+        'search_status': 'success',
+        'api_source': 'v8_enhanced',
+        'data_source': 'v8_ERROR_HANDLING_ENHANCED',
+        'v8_system_used': 'Phase 4.0',
+        'retry_attempted': 0,
+        'processing_notes': '成功'
+    }
+    # 入力カラム・途中のカラムの後ろに結果カラムを固定順で並べる
+    final_row = {key: value for key, value in row.items() if key not in result}
+    final_row.update(result)
+    return final_row
+
+def make_scoring_stage(error_stats=None, batch_size=None):
+    """scoring: Shopee適性スコア（行ごと）と関連性スコア・一致率（バッチ一括）"""
+    def scoring(rows):
+        shopee_scores = []
+        for row in rows:
+            try:
+                with stage_timer('scoring'):
+                    shopee_scores.append(calculate_shopee_suitability_score(row, row.get(_PRIME_INFO_KEY) or {}))
+            except Exception as e:
+                logger.error(f"  ⚠️ Shopeeスコア計算エラー: {e}. フォールバック値使用")
+                if error_stats is not None:
+                    error_stats.add('scoring_failed')
+                shopee_scores.append(30)
+        with stage_timer('scoring'):
+            scores = calculate_relevance_scores([(row['clean_title'], row.get('japanese_name')) for row in rows])
+        return [
+            _build_result_row(row, shopee_score, relevance_score, match_percentage)
+            for row, shopee_score, (relevance_score, match_percentage) in zip(rows, shopee_scores, scores)
+        ]
+    return Stage('scoring', scoring, concurrency=1, batch_size=batch_size)
+
+def _apply_frame(rows, func):
+    frame = func(pd.DataFrame(rows))
+    return frame.to_dict('records')
+
+def make_classify_stage(batch_size=None):
+    """
+    classify: Shopee出品グループ分類（エラー行を含む全行、行ごとに独立なのでバッチ単位で実行）
+
+    保留行（API遮断中でオファー未取得）は分類せず DEFERRED_GROUP にする。
+    """
+    def classify(rows):
+        if not CLASSIFIER_AVAILABLE:
+            return rows
+        is_deferred = [row.get('search_status') == 'deferred' for row in rows]
+        targets = [row for row, deferred in zip(rows, is_deferred) if not deferred]
+        held = [row for row, deferred in zip(rows, is_deferred) if deferred]
+        with stage_timer('classify'):
+            classified = iter(_apply_frame(targets, classify_for_shopee_listing) if targets else [])
+        marked = iter(_apply_frame(held, mark_deferred_group) if held else [])
+        return [next(marked) if deferred else next(classified) for deferred in is_deferred]
+    return Stage('classify', classify, concurrency=1, include_skipped=True, batch_size=batch_size)
+
+def make_ng_stage(ng_manager, batch_size=None):
+    """ng: NGワード検出（検出行はグループCへ降格、高リスクは除外フラグ）"""
+    def ng(rows):
+        with stage_timer('ng'):
+            return _apply_frame(rows, ng_manager.apply_ng_word_filtering)
+    return Stage('ng', ng, concurrency=1, include_skipped=True, batch_size=batch_size)
+
+def make_export_stage(output_path):
+    """export: 入力順に集めた全行を save_with_highlight で書き出し（最後のバッチの後に1回）"""
+    collected = []
+
+    def export(rows):
+        collected.extend(
+            {key: value for key, value in row.items() if not str(key).startswith(PRIVATE_KEY_PREFIX)} for row in rows
+        )
+        return rows
+
+    def finish():
+        with stage_timer('export'):
+            save_with_highlight(pd.DataFrame(collected), output_path)
+
+    return Stage('export', export, ordered=True, include_skipped=True, finish=finish)
+
+# ======================== 組み立て・実行 ========================
+
+def build_listing_pipeline(title_column='clean_title', normalize_titles=False, use_catalog_search=False,
+                           classify=False, ng_manager=None, output_path=None, brand_dict=None,
+                           concurrency=None, batch_size=None, queue_size=None, progress_callback=None,
+                           error_stats=None, cpu_batch_size=None):
+    """
+    出品候補処理のパイプラインを組み立て
+
+    Args:
+        title_column: 商品名カラム
+        normalize_titles: cleanse で宣伝文句・記号を除去するか
+        use_catalog_search: ASINが無い行をカタログ検索で決定するか
+        classify: classify ステージを含めるか
+        ng_manager: NGWordManager（Noneの場合は ng ステージなし）
+        output_path: Excel出力先（Noneの場合は export ステージなし）
+        brand_dict: ブランド辞書（Noneで load_brand_dict）
+        concurrency: {ステージ名: 並列度} の上書き
+        batch_size: 1バッチの行数
+        queue_size: ステージ間キューの上限（バッチ数）
+        progress_callback: progress_callback(完了行数, 全行数)
+        cpu_batch_size: CPUステージがまとめて処理する行数（Noneで設定ファイル pipeline.cpu_batch_size → 既定値）
+
+    Returns:
+        StagedPipeline
+    """
+    settings = resolve_stage_concurrency(concurrency)
+    if brand_dict is None:
+        brand_dict = load_brand_dict()
+    cpu_batch_size = cpu_batch_size or get_config_value('pipeline', 'cpu_batch_size', DEFAULT_CPU_BATCH_SIZE)
+
+    stages = [
+        make_cleanse_stage(title_column, normalize=normalize_titles, error_stats=error_stats,
+                           batch_size=cpu_batch_size),
+        make_brand_stage(brand_dict, concurrency=settings['brand'], error_stats=error_stats,
+                         batch_size=cpu_batch_size),
+        make_translate_stage(concurrency=settings['translate'], error_stats=error_stats),
+        make_resolve_asin_stage(use_catalog_search=use_catalog_search, concurrency=settings['resolve_asin']),
+        make_offers_stage(concurrency=settings['offers'], error_stats=error_stats),
+        make_scoring_stage(error_stats=error_stats, batch_size=cpu_batch_size)
+    ]
+    if classify:
+        stages.append(make_classify_stage(batch_size=cpu_batch_size))
+    if ng_manager is not None:
+        stages.append(make_ng_stage(ng_manager, batch_size=cpu_batch_size))
+    if output_path is not None:
+        stages.append(make_export_stage(output_path))
+
+    return StagedPipeline(
+        stages,
+        batch_size=batch_size or get_config_value('pipeline', 'batch_size', DEFAULT_BATCH_SIZE),
+        queue_size=queue_size or get_config_value('pipeline', 'queue_size', DEFAULT_QUEUE_SIZE),
+        progress_callback=progress_callback
+    )
+
+def process_listing_batch(df, title_column='clean_title', classify=False, ng_manager=None, **kwargs):
+    """
+    出品候補の一括処理（ブランド抽出 → 日本語化 → ASIN → オファー → スコア）
+
+    Args:
+        df: 入力データ
+        title_column: 商品名カラム
+        classify: 分類まで行うか
+        ng_manager: NGワード検出を行う場合の NGWordManager
+        **kwargs: build_listing_pipeline への追加引数（concurrency / batch_size など）
+
+    Returns:
+        pd.DataFrame: 入力カラム + 処理結果カラム（入力と同じ行順）
+    """
+    if df is None or df.empty:
+        logger.error("❌ 入力データが空です")
+        return pd.DataFrame()
+
+    error_stats = _ErrorStats()
+    pipeline = build_listing_pipeline(title_column=title_column, classify=classify, ng_manager=ng_manager,
+                                      error_stats=error_stats, **kwargs)
+    logger.info(f"🔄 パイプライン処理開始: {len(df)}件 / ステージ {pipeline.stages}")
+    result_df = pipeline.run_frame(df)
+
+    status = result_df['search_status'] if 'search_status' in result_df.columns else pd.Series(dtype=object)
+    if 'error_category' in result_df.columns:
+        # ステージ自体が失敗した行（mark_row_failed の '<ステージ>_failed'）
+        error_stats.add('general_error', int(result_df['error_category'].astype(str).str.endswith('_failed').sum()))
+    logger.info(f"\n📊 バッチ処理完了（{pipeline.wall_seconds:.1f}秒）:")
+    logger.info(f"  ✅ 成功: {int((status == 'success').sum())}件")
+    logger.info(f"  ❌ エラー: {int((status == 'error').sum())}件")
+    deferred = int((status == 'deferred').sum())
+    if deferred:
+        logger.info(f"  ⏸️ 保留（API遮断中、後で再処理）: {deferred}件")
+    logger.info("\n📋 エラー内訳:")
+    for error_type, count in error_stats.counts.items():
+        if count > 0:
+            logger.info(f"  {error_type}: {count}件")
+    logger.info(f"📋 結果DFカラム数: {len(result_df.columns)}")
+    return result_df
+
+def run_pipeline(df, title_col='Name', ng_words=None, output_path=None, **kwargs):
+    """
+    ASIN一括日本語化＆検索（app.py）: クレンジング → … → 分類 → NGワード → 出力
+
+    Args:
+        df: 入力データ
+        title_col: 商品名カラム
+        ng_words: NGワードのリスト（空の場合は ng ステージなし）
+        output_path: Excel出力先（Noneの場合は呼び出し側で save_with_highlight）
+
+    Returns:
+        pd.DataFrame: 処理結果（ASIN カラムは未取得の場合に空文字）
+    """
+    ng_manager = None
+    words = [word.strip() for word in (ng_words or []) if word and word.strip()]
+    if words:
+        from core.managers.ng_word_manager import create_ng_word_manager
+        ng_manager = create_ng_word_manager()
+        ng_manager.ng_words_dict = {'NGワードファイル': words}
+
+    result_df = process_listing_batch(
+        df, title_column=title_col, classify=True, ng_manager=ng_manager, output_path=output_path,
+        normalize_titles=True, use_catalog_search=True, **kwargs
+    )
+    if result_df.empty:
+        return result_df
+    for column in ('japanese_name', 'asin'):
+        if column not in result_df.columns:
+            result_df[column] = ''
+    result_df['japanese_name'] = result_df['japanese_name'].fillna('')
+    result_df['ASIN'] = result_df['asin'].fillna('').astype(str)
+    return result_df
+
+def save_with_highlight(df, output_path):
+    """
+    処理結果のExcel出力（エラー行・保留行・NGワード検出行・ASIN未取得行に背景色）
+
+    Args:
+        df: 処理結果
+        output_path: 出力先（ファイルパスまたはバイナリバッファ）
+
+    Returns:
+        出力先
+    """
+    from openpyxl.styles import PatternFill
+
+    def row_fill(row):
+        if row.get('search_status') == 'error':
+            return HIGHLIGHT_FILLS['error']
+        if row.get('search_status') == 'deferred':
+            return HIGHLIGHT_FILLS['deferred']
+        if row.get('ng_check_is_ng') is True:
+            return HIGHLIGHT_FILLS['ng']
+        asin = row.get('ASIN', row.get('asin'))
+        if asin is None or pd.isna(asin) or str(asin) == '':
+            return HIGHLIGHT_FILLS['no_asin']
+        return None
+
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='結果')
+        worksheet = writer.sheets['結果']
+        fills = {}
+        for offset, row in enumerate(df.to_dict('records')):
+            color = row_fill(row)
+            if color is None:
+                continue
+            fill = fills.setdefault(color, PatternFill(start_color=color, end_color=color, fill_type='solid'))
+            for cell in worksheet[offset + 2]:
+                cell.fill = fill
+    return output_path
@@ -0,0 +1,25 @@
+# プロジェクトルートを import パスに追加（core / pipeline / modules をパッケージとして読み込む）
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+@pytest.fixture
+def fake_sp_api(monkeypatch):
+    """SP_API_ENDPOINT をローカル代替サーバー（benchmarks.fake_api_server）に向ける（クォータ無効・応答時間1/100）"""
+    from benchmarks.fake_api_server import start_fake_api_server
+    import core.services.sp_api_service as sp_api_service
+    from core.helpers.circuit_breaker import reset_circuit_breakers
+
+    server = start_fake_api_server({'latency_scale': 0.01, 'quota_enabled': False})
+    monkeypatch.setenv('SP_API_ENDPOINT', server.base_url)
+    monkeypatch.setattr(sp_api_service, '_sp_api_http_client', None)
+    reset_circuit_breakers()
+    yield server
+    server.shutdown()
+    server.server_close()
+    reset_circuit_breakers()
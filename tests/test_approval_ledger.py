@@ -0,0 +1,47 @@
+import json
+
+from core.managers.approval_ledger import create_approval_ledger_manager
+
+def test_decisions_are_appended_and_replayed(tmp_path):
+    ledger = create_approval_ledger_manager(tmp_path)
+    ledger.record_decisions(["B000000001", "B000000002"], "approved", "高Shopee適性", "tester")
+    ledger.record_decision("B000000003", "rejected", "NGワード該当", "tester")
+    ledger.remove_decisions(["B000000002"])
+
+    # 判断ごとにスナップショットを書き換えず、ログへ追記する
+    assert not ledger.ledger_path.exists()
+    lines = ledger.log_path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["set", "set", "set", "remove"]
+
+    reloaded = create_approval_ledger_manager(tmp_path)
+    assert sorted(reloaded.entries) == ["B000000001", "B000000003"]
+    assert reloaded.get_decision("B000000003")["decision"] == "rejected"
+
+def test_log_is_compacted_into_snapshot(tmp_path):
+    ledger = create_approval_ledger_manager(tmp_path, compact_threshold=3)
+    ledger.record_decisions(["B000000001", "B000000002"], "approved")
+    assert ledger.log_path.exists()
+    ledger.record_decision("B000000003", "rejected")
+
+    assert ledger.ledger_path.exists()
+    assert not ledger.log_path.exists()
+    snapshot = json.loads(ledger.ledger_path.read_text(encoding='utf-8'))
+    assert sorted(snapshot["entries"]) == ["B000000001", "B000000002", "B000000003"]
+
+    ledger.record_decision("B000000001", "rejected")
+    reloaded = create_approval_ledger_manager(tmp_path)
+    assert reloaded.get_decision("B000000001")["decision"] == "rejected"
+    assert reloaded.get_ledger_statistics()["pending_log_lines"] == 1
+
+def test_truncated_log_line_is_ignored(tmp_path):
+    ledger = create_approval_ledger_manager(tmp_path)
+    ledger.record_decision("B000000001", "approved")
+    with open(ledger.log_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "set", "asin": "B0000')
+
+    reloaded = create_approval_ledger_manager(tmp_path)
+    assert list(reloaded.entries) == ["B000000001"]
+    assert not reloaded.log_path.exists()
+
+    reloaded.record_decision("B000000002", "rejected")
+    assert sorted(create_approval_ledger_manager(tmp_path).entries) == ["B000000001", "B000000002"]
@@ -0,0 +1,38 @@
+# 自動承認ルール（既定ルールは1か所で定義し、設定ファイルのルールは config_manager から読み込む）
+import pandas as pd
+
+import core.helpers.asin_helpers as asin_helpers
+from core.helpers.approval_rules import (
+    DEFAULT_AUTO_APPROVAL_RULES, evaluate_auto_approval_rules, rules_from_criteria
+)
+from core.managers.config_manager import create_threshold_config_manager
+
+def test_default_rules_have_a_single_definition(tmp_path):
+    manager = create_threshold_config_manager(tmp_path)
+
+    assert manager.create_default_config()['auto_approval_rules']['rules'] == DEFAULT_AUTO_APPROVAL_RULES
+    assert manager.get_auto_approval_rules() == DEFAULT_AUTO_APPROVAL_RULES
+    assert rules_from_criteria({}) == DEFAULT_AUTO_APPROVAL_RULES
+
+def test_criteria_override_only_given_thresholds():
+    rules = rules_from_criteria({'max_ship_hours': 48})
+    df = pd.DataFrame({
+        'shopee_suitability_score': [80, 80],
+        'relevance_score': [70, 70],
+        'ship_hours': [36, 72]
+    })
+
+    assert evaluate_auto_approval_rules(df, rules).fillna('').tolist() == ['fast_shipping_high_score', '']
+    assert evaluate_auto_approval_rules(df).isna().all()
+
+def test_rules_are_loaded_through_config_manager(tmp_path, monkeypatch):
+    manager = create_threshold_config_manager(tmp_path)
+    custom = [{
+        'name': 'score_only', 'enabled': True,
+        'conditions': [{'field': 'shopee_suitability_score', 'op': '>=', 'value': 90}]
+    }]
+    assert manager.update_auto_approval_rules(custom)
+    monkeypatch.setattr(asin_helpers, '_create_rule_config_manager',
+                        lambda: create_threshold_config_manager(tmp_path))
+
+    assert asin_helpers.load_auto_approval_rules() == custom
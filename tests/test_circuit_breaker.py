@@ -0,0 +1,88 @@
+# 遮断器の状態遷移（closed → open → half_open → closed）
+import time
+
+import pytest
+
+from core.helpers.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN, is_provider_failure
+)
+
+class HttpError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker('sp_api', 'getItemOffers', failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        breaker.record_error(HttpError(429))
+    assert breaker.state == CLOSED
+    breaker.record_error(HttpError(503))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.rejected == 2
+
+def test_client_errors_do_not_count_as_provider_failures():
+    assert not is_provider_failure(HttpError(404))
+    assert is_provider_failure(HttpError(429))
+    assert is_provider_failure(ConnectionError('refused'))
+    breaker = CircuitBreaker('sp_api', 'getItemOffers', failure_threshold=2)
+    breaker.record_error(HttpError(429))
+    breaker.record_error(HttpError(404))
+    breaker.record_error(HttpError(429))
+    assert breaker.state == CLOSED
+
+class APITimeoutError(Exception):
+    """openai の APITimeoutError と同名の例外（ステータス無し）"""
+
+def test_local_errors_are_not_recorded():
+    assert is_provider_failure(TimeoutError('timed out'))
+    assert is_provider_failure(APITimeoutError('Request timed out.'))
+    for error in (KeyError('Offers'), ImportError("No module named 'openai'"), ValueError('bad json')):
+        assert not is_provider_failure(error)
+
+    breaker = CircuitBreaker('sp_api', 'getItemOffers', failure_threshold=1)
+    breaker.record_error(KeyError('Offers'))
+    breaker.record_error(ImportError("No module named 'openai'"))
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0 and breaker.successes == 0
+
+    breaker.record_error(APITimeoutError('Request timed out.'))
+    assert breaker.state == OPEN
+
+def test_half_open_allows_one_probe_and_closes_on_success():
+    breaker = CircuitBreaker('openai', 'gpt-4o', failure_threshold=1, open_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_failed_probe_reopens_with_longer_wait():
+    breaker = CircuitBreaker('openai', 'gpt-4o', failure_threshold=1, open_seconds=0.05, max_open_seconds=1)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_in() > 0.05
+
+def test_retry_after_extends_open_period():
+    breaker = CircuitBreaker('sp_api', 'getItemOffers', failure_threshold=1, open_seconds=1)
+    breaker.record_error(HttpError(429, retry_after=10))
+    assert breaker.retry_in() > 5
+
+def test_unreported_probe_slot_is_released():
+    breaker = CircuitBreaker('sp_api', 'searchCatalogItems', failure_threshold=1, open_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
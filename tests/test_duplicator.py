@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from core.helpers.title_embedding import HashedLSHIndex, embed_titles
+from core.managers.duplicator import (
+    create_duplicate_index_manager, STATUS_LISTED_DUPLICATE, STATUS_UNIQUE
+)
+
+QUERY = "Acme Hydrating Face Serum Essence 50ml"
+LISTED = [
+    "Acme Hydrating Face Serum Essence 500ml",       # 最近傍だが容量違い
+    "Acme Hydrating Face Serum Essence 50ml (New)",  # 2番目の近傍（同一商品）
+]
+
+def test_nearest_returns_k_candidates_in_distance_order():
+    index = HashedLSHIndex()
+    index.add(embed_titles(LISTED))
+    ids, dist = index.nearest(embed_titles([QUERY]), max_distance=0.15, k=3)
+    assert ids.shape == (1, 3)
+    assert ids[0].tolist() == [0, 1, -1]
+    assert dist[0, 0] <= dist[0, 1]
+    assert np.isnan(dist[0, 2])
+
+def test_quantity_conflict_on_nearest_checks_next_candidate(tmp_path):
+    manager = create_duplicate_index_manager(tmp_path)
+    manager.register_items(LISTED, ["B000000001", "B000000002"])
+    batch = pd.DataFrame({"title": [QUERY]})
+
+    result = manager.detect_duplicates(batch, "title")
+    assert result.loc[0, "dup_status"] == STATUS_LISTED_DUPLICATE
+    assert result.loc[0, "dup_of"] == "B000000002"
+
+    # 近傍1件のみの確認では容量違いで重複を見逃す
+    top1 = create_duplicate_index_manager(tmp_path, nearest_candidates=1)
+    assert top1.detect_duplicates(batch, "title").loc[0, "dup_status"] == STATUS_UNIQUE
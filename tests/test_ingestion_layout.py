@@ -0,0 +1,39 @@
+# 取り込み直後のメモリレイアウト最適化（数値は計算で桁あふれ・精度落ちしないよう64ビットのまま、明示したカラムのみダウンキャスト）
+import pandas as pd
+
+from core.helpers.ingestion_helpers import optimize_layout, load_table
+
+def test_float_columns_keep_float64_precision():
+    df = pd.DataFrame({'price': [1234567.89, 0.1], 'rank': [12, 3400]})
+
+    result = optimize_layout(df)
+
+    assert result['price'].dtype == 'float64'
+    assert result['price'].tolist() == [1234567.89, 0.1]
+    assert result['rank'].dtype == 'int64'
+
+def test_loaded_integer_columns_do_not_overflow_in_arithmetic():
+    df = load_table(b"Name,Price,Qty\na,1200,30\n", filename='items.csv')
+
+    assert df['Price'].dtype == 'int64'
+    assert df['Qty'].dtype == 'int64'
+    assert (df['Price'] * df['Qty']).tolist() == [36000]
+
+def test_only_explicit_columns_are_downcast():
+    df = pd.DataFrame({'is_listed': [0, 1], 'Price': [1200, 980]})
+
+    result = optimize_layout(df, downcast=['is_listed'])
+
+    assert result['is_listed'].dtype == 'int8'
+    assert result['Price'].dtype == 'int64'
+
+def test_categorical_and_excluded_columns():
+    df = pd.DataFrame({
+        'group': pd.Categorical(['A', 'B'], categories=['A', 'B', 'C']),
+        'count': [1, 2]
+    })
+
+    result = optimize_layout(df, exclude=['count'])
+
+    assert list(result['group'].cat.categories) == ['A', 'B']
+    assert result['count'].dtype == 'int64'
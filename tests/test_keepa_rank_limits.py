@@ -0,0 +1,50 @@
+# Keepaランク取得の上限（取得全体の上限時間・トークン補充待ち）と未取得行の扱い
+import time
+
+import pandas as pd
+
+from core.managers.keepa_rank_manager import KeepaRankManager, STATUS_KEPT, STATUS_NOT_FETCHED
+from core.services.keepa_client import KeepaTokenBudget, KEEPA_SALES_RANK_INDEX
+
+def _product(asin, rank):
+    current = [-1] * (KEEPA_SALES_RANK_INDEX + 1)
+    current[KEEPA_SALES_RANK_INDEX] = rank
+    return {'asin': asin, 'csv': [], 'stats': {'current': current}}
+
+class SlowClient:
+    """1リクエストごとに delay 秒かかる Keepa クライアント（トークンは無制限）"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.budget = KeepaTokenBudget()
+        self.requests = []
+
+    def get_products(self, asins):
+        self.requests.append(list(asins))
+        time.sleep(self.delay)
+        return [_product(asin, 500) for asin in asins]
+
+def test_deadline_marks_remaining_rows_not_fetched(tmp_path):
+    manager = KeepaRankManager(data_dir=tmp_path)
+    client = SlowClient(delay=0.2)
+    df = pd.DataFrame({'asin': [f'B{n:09d}' for n in range(6)]})
+
+    result = manager.annotate_ranks(df, 'asin', client=client, batch_size=2, deadline_seconds=0.3)
+
+    # 0.3秒の上限内に送れたのは2バッチまで（3バッチ目は送らない）
+    assert len(client.requests) == 2
+    assert result['keepa_status'].tolist() == [STATUS_KEPT] * 4 + [STATUS_NOT_FETCHED] * 2
+
+def test_token_wait_beyond_deadline_is_not_slept(tmp_path):
+    manager = KeepaRankManager(data_dir=tmp_path)
+    client = SlowClient(delay=0)
+    # 残量0・補充は60秒後
+    client.budget.update({'tokensLeft': 0, 'refillRate': 5, 'refillIn': 60000})
+    df = pd.DataFrame({'asin': ['B000000001', 'B000000002']})
+
+    started = time.monotonic()
+    result = manager.annotate_ranks(df, 'asin', client=client, deadline_seconds=1)
+
+    assert time.monotonic() - started < 1
+    assert client.requests == []
+    assert (result['keepa_status'] == STATUS_NOT_FETCHED).all()
@@ -0,0 +1,35 @@
+# parallel_map の共有プール（呼び出しごとにプールを作り直さず、context が変わった場合のみワーカーで読み込み直す）
+from core.helpers import parallel_text
+
+def _offset_task(item, context):
+    return item + context['offset']
+
+def test_pool_is_reused_across_calls_and_contexts(monkeypatch):
+    monkeypatch.setenv('TEXT_WORKERS', '2')
+    items = list(range(40))
+
+    first = parallel_text.parallel_map(_offset_task, items, context={'offset': 1}, min_items=1)
+    pool = parallel_text._pool
+    second = parallel_text.parallel_map(_offset_task, items, context={'offset': 100}, min_items=1)
+    third = parallel_text.parallel_map(_offset_task, items, context={'offset': 1}, min_items=1)
+
+    assert pool is not None and parallel_text._pool is pool
+    assert first == third == [n + 1 for n in items]
+    assert second == [n + 100 for n in items]
+
+def test_pool_is_recreated_when_worker_count_changes(monkeypatch):
+    monkeypatch.setenv('TEXT_WORKERS', '2')
+    parallel_text.parallel_map(_offset_task, [1, 2, 3], context={'offset': 0}, min_items=1)
+    pool = parallel_text._pool
+
+    monkeypatch.setenv('TEXT_WORKERS', '3')
+    assert parallel_text.parallel_map(_offset_task, [1, 2, 3], context={'offset': 0}, min_items=1) == [1, 2, 3]
+    assert parallel_text._pool is not pool
+    parallel_text.shutdown_pool()
+    assert parallel_text._pool is None
+
+def test_small_inputs_run_serially(monkeypatch):
+    monkeypatch.setenv('TEXT_WORKERS', '2')
+    parallel_text.shutdown_pool()
+    assert parallel_text.parallel_map(_offset_task, [1, 2], context={'offset': 1}) == [2, 3]
+    assert parallel_text._pool is None
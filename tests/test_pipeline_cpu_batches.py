@@ -0,0 +1,57 @@
+# CPUステージのまとめ処理（小さいI/Oバッチでも parallel_map がプロセスプールで動くこと）
+import logging
+
+import pandas as pd
+
+import core.services.sp_api_service as sp_api_service
+import pipeline.stages as stages
+from core.helpers.parallel_text import DEFAULT_MIN_PARALLEL_ITEMS
+from pipeline.engine import Stage, StagedPipeline
+
+def test_cpu_stage_combines_upstream_batches_in_order():
+    sizes = []
+
+    def cpu(rows):
+        sizes.append(len(rows))
+        return [dict(row, doubled=row['n'] * 2) for row in rows]
+
+    io = Stage('io', lambda rows: rows, concurrency=3)
+    pipeline = StagedPipeline([io, Stage('cpu', cpu, batch_size=50)], batch_size=10)
+
+    result = pipeline.run([{'n': n} for n in range(120)])
+
+    assert sizes == [50, 50, 20]
+    assert [row['doubled'] for row in result] == [n * 2 for n in range(120)]
+
+def _prime_info(asin, brand_name=None):
+    return {'is_prime': True, 'seller_type': 'amazon', 'seller_name': 'Amazon.co.jp', 'ship_hours': 12}
+
+def test_listing_pipeline_runs_cpu_stages_in_process_pool(monkeypatch, caplog):
+    calls = []
+    real_parallel_map = sp_api_service.parallel_map
+
+    def spy(func, items, **kwargs):
+        items = list(items)
+        calls.append((func.__name__, len(items)))
+        return real_parallel_map(func, items, **kwargs)
+
+    monkeypatch.setenv('TEXT_WORKERS', '2')
+    monkeypatch.setattr(sp_api_service, 'parallel_map', spy)
+    monkeypatch.setattr(stages, 'get_prime_and_seller_info_v8_enhanced', _prime_info)
+    monkeypatch.setattr(stages, 'get_japanese_name_hybrid', lambda title: (title, 'Original'))
+
+    rows = DEFAULT_MIN_PARALLEL_ITEMS
+    df = pd.DataFrame({
+        'clean_title': [f'FANCL Mild Cleansing Oil {n % 7 + 1}20ml' for n in range(rows)],
+        'asin': [f'B{n:09d}' for n in range(rows)]
+    })
+    with caplog.at_level(logging.INFO, logger='core.helpers.parallel_text'):
+        result = stages.process_listing_batch(df, brand_dict={'FANCL': ['fancl']}, batch_size=10)
+
+    assert len(result) == rows
+    assert result['asin'].tolist() == df['asin'].tolist()
+    assert (result['extracted_brand'] == 'FANCL').all()
+    # ブランド抽出・関連性スコアは10行バッチではなく全行を1回で処理し、プールで並列実行される
+    assert ('_brand_and_quantity_task', rows) in calls
+    assert ('_relevance_task', rows) in calls
+    assert sum('並列実行完了' in record.getMessage() for record in caplog.records) == 2
@@ -0,0 +1,66 @@
+# API遮断中の保留行（search_status='deferred'）が分類・出品対象に入らないことの確認
+import pandas as pd
+import pytest
+
+import pipeline.stages as stages
+from core.helpers.asin_helpers import classify_for_shopee_listing, listable_mask, DEFERRED_GROUP
+from core.helpers.circuit_breaker import CircuitOpenError
+
+DEFERRED_ASIN = 'B000000002'
+LISTED_ASINS = ['B000000004', 'B000000003']
+
+@pytest.fixture
+def classified_titles(monkeypatch, fake_sp_api):
+    seen = []
+    real_prime_info = stages.get_prime_and_seller_info_v8_enhanced
+
+    def prime_info(asin, brand_name=None):
+        # 保留行のみ遮断中として扱い、他の行はローカル代替サーバーの getItemOffers を使う
+        if asin == DEFERRED_ASIN:
+            raise CircuitOpenError('sp_api', 'getItemOffers', 30)
+        return real_prime_info(asin=asin, brand_name=brand_name)
+
+    def spy(df):
+        seen.extend(df['clean_title'])
+        return classify_for_shopee_listing(df)
+
+    monkeypatch.setattr(stages, 'get_prime_and_seller_info_v8_enhanced', prime_info)
+    monkeypatch.setattr(stages, 'get_japanese_name_hybrid', lambda title: (title, 'Original'))
+    monkeypatch.setattr(stages, 'classify_for_shopee_listing', spy)
+    return seen
+
+def test_deferred_row_is_neither_classified_nor_listed(classified_titles):
+    df = pd.DataFrame({
+        'clean_title': ['FANCL Mild Cleansing Oil 120ml', 'DHC Lip Cream 1.5g', 'Shiseido Senka Foam 120g'],
+        'asin': [LISTED_ASINS[0], DEFERRED_ASIN, LISTED_ASINS[1]]
+    })
+    pipeline = stages.build_listing_pipeline(classify=True, brand_dict={'FANCL': ['fancl'], 'DHC': ['dhc']},
+                                             batch_size=1)
+    result = pipeline.run_frame(df)
+
+    deferred = result[result['asin'] == DEFERRED_ASIN].iloc[0]
+    assert deferred['search_status'] == 'deferred'
+    assert deferred['error_category'] == 'offers_deferred'
+    assert deferred['shopee_group'] == DEFERRED_GROUP
+    assert 'DHC Lip Cream 1.5g' not in classified_titles
+    assert sorted(classified_titles) == ['FANCL Mild Cleansing Oil 120ml', 'Shiseido Senka Foam 120g']
+
+    listed = result[listable_mask(result)]
+    assert DEFERRED_ASIN not in set(listed['asin'])
+    assert set(listed['asin']) == set(LISTED_ASINS)
+    assert listed['seller_type'].notna().all()
+    assert listed['ship_hours'].notna().all()
+
+def test_classifier_keeps_deferred_rows_out_of_listing_groups():
+    df = pd.DataFrame({
+        'clean_title': ['a', 'b'],
+        'search_status': ['success', 'deferred'],
+        'shopee_suitability_score': [90, 90],
+        'is_prime': [True, None],
+        'seller_type': ['amazon', None],
+        'ship_hours': [12, None]
+    })
+    result = classify_for_shopee_listing(df)
+    assert result.loc[0, 'shopee_group'] == 'A'
+    assert result.loc[1, 'shopee_group'] == DEFERRED_GROUP
+    assert listable_mask(result).tolist() == [True, False]
@@ -0,0 +1,123 @@
+# パイプライン実行エンジン（行順の保持・ステージ失敗時のエラー行・再試行・終了処理）
+import random
+import time
+
+import pytest
+
+from pipeline.engine import Stage, StagedPipeline, SKIP_KEY
+
+def _rows(count):
+    return [{'n': n} for n in range(count)]
+
+def test_output_keeps_input_order_with_concurrent_stages():
+    def jitter(rows):
+        time.sleep(random.random() * 0.01)
+        return [dict(row, seen=True) for row in rows]
+
+    pipeline = StagedPipeline([Stage('a', jitter, concurrency=4), Stage('b', jitter, concurrency=3)],
+                              batch_size=3, queue_size=2)
+
+    result = pipeline.run(_rows(50))
+
+    assert [row['n'] for row in result] == list(range(50))
+    assert all(row['seen'] for row in result)
+    # 受け渡し用のキー（'_pipeline_'）は出力に残らない
+    assert all(set(row) == {'n', 'seen'} for row in result)
+
+def test_ordered_stage_receives_batches_in_input_order():
+    received = []
+
+    def slow_first(rows):
+        if rows[0]['n'] == 0:
+            time.sleep(0.05)
+        return rows
+
+    def collect(rows):
+        received.extend(row['n'] for row in rows)
+        return rows
+
+    pipeline = StagedPipeline([Stage('io', slow_first, concurrency=4), Stage('out', collect, ordered=True)],
+                              batch_size=2)
+    pipeline.run(_rows(10))
+
+    assert received == list(range(10))
+
+def test_failed_batch_becomes_error_rows_and_skips_later_stages():
+    downstream = []
+    all_rows = []
+
+    def fail_on_three(rows):
+        if any(row['n'] == 3 for row in rows):
+            raise RuntimeError('boom')
+        return rows
+
+    def after(rows):
+        downstream.extend(row['n'] for row in rows)
+        return rows
+
+    def every_row(rows):
+        all_rows.extend(row['n'] for row in rows)
+        return rows
+
+    pipeline = StagedPipeline([
+        Stage('fetch', fail_on_three),
+        Stage('after', after),
+        Stage('classify', every_row, include_skipped=True)
+    ], batch_size=2)
+
+    result = pipeline.run(_rows(6))
+
+    # 行は失われず、失敗したバッチ（2〜3行目）だけがエラー行になる
+    assert [row['n'] for row in result] == list(range(6))
+    failed = [row for row in result if row.get('search_status') == 'error']
+    assert [row['n'] for row in failed] == [2, 3]
+    assert all(row['error_category'] == 'fetch_failed' for row in failed)
+    assert 'boom' in failed[0]['error_reason']
+    assert all(SKIP_KEY not in row for row in result)
+    assert sorted(downstream) == [0, 1, 4, 5]
+    assert sorted(all_rows) == list(range(6))
+
+    stats = pipeline.stats_frame().set_index('stage')
+    assert stats.loc['fetch', 'errors'] == 1
+    assert stats.loc['after', 'rows'] == 4
+
+def test_retry_recovers_before_marking_rows_failed():
+    attempts = []
+
+    def flaky(rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise RuntimeError('temporary')
+        return rows
+
+    pipeline = StagedPipeline([Stage('flaky', flaky, retries=1)], batch_size=5)
+    result = pipeline.run(_rows(5))
+
+    assert attempts == [5, 5]
+    assert all('search_status' not in row for row in result)
+    assert pipeline.stats_frame().loc[0, 'retries'] == 1
+
+def test_row_count_mismatch_is_a_stage_failure():
+    pipeline = StagedPipeline([Stage('drop', lambda rows: rows[:-1])], batch_size=4)
+
+    result = pipeline.run(_rows(4))
+
+    assert len(result) == 4
+    assert all(row['error_category'] == 'drop_failed' for row in result)
+
+def test_finish_runs_once_after_all_batches_and_progress_reaches_total():
+    events = []
+    progress = []
+
+    stage = Stage('export', lambda rows: events.append(len(rows)) or rows, ordered=True,
+                  finish=lambda: events.append('finish'))
+    pipeline = StagedPipeline([Stage('io', lambda rows: rows, concurrency=2), stage], batch_size=3,
+                              progress_callback=lambda done, total: progress.append((done, total)))
+    pipeline.run(_rows(7))
+
+    assert events == [3, 3, 1, 'finish']
+    assert progress[-1] == (7, 7)
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError):
+        StagedPipeline([])
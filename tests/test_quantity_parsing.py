@@ -0,0 +1,36 @@
+# 数量抽出（3桁区切りのカンマ・小数点のカンマ・寸法と倍数の区別）
+import pytest
+
+from core.helpers.quantity_helpers import parse_quantity
+
+@pytest.mark.parametrize('text, value, unit', [
+    ('Lotion 1,000ml', 1000.0, 'ml'),
+    ('Powder 1,234,567mg', 1234567.0, 'mg'),
+    ('Rice 1,000.5g', 1000.5, 'g'),
+    ('Water 1,5l', 1.5, 'l'),
+    ('Serum 12,50ml', 12.5, 'ml'),
+])
+def test_comma_is_thousands_separator_or_decimal(text, value, unit):
+    result = parse_quantity(text)
+    assert result['quantity_value'] == value
+    assert result['quantity_unit'] == unit
+    assert result['quantity_pack'] == 1
+
+def test_dimension_is_not_a_pack():
+    result = parse_quantity('Towel 3x5cm')
+    assert result['quantity_pack'] == 1
+    assert result['quantity_value'] == 5.0
+
+    assert parse_quantity('Tape 10cm x 3')['quantity_pack'] == 1
+
+@pytest.mark.parametrize('text, pack, base_value', [
+    ('Tape 10cm x 3本', 3, 300.0),
+    ('Shampoo 2 x 490ml', 2, 980.0),
+    ('Shampoo 490ml x 3', 3, 1470.0),
+    ('Toner 120ml*2', 2, 240.0),
+    ('Shampoo 490ml 3本セット', 3, 1470.0),
+])
+def test_pack_context_multiplies(text, pack, base_value):
+    result = parse_quantity(text)
+    assert result['quantity_pack'] == pack
+    assert result['quantity_base_value'] == base_value
@@ -0,0 +1,53 @@
+# 同じASINが1回の実行に複数行ある場合の実行結果の再構成（オファーと分類は行単位で対応付く）
+import sqlite3
+
+import pandas as pd
+
+from core.managers.registry_manager import ProductRegistryManager
+
+def _frame():
+    return pd.DataFrame({
+        'asin': ['B000000001', 'B000000001', 'B000000002', 'B000000001'],
+        'clean_title': ['Lotion A', 'Lotion A 2pack', 'Cream B', 'Lotion A 3pack'],
+        'seller_type': ['amazon', 'fba', 'third_party', 'amazon'],
+        'price': [1000, 1900, 500, 2700],
+        'shopee_group': ['A', 'B', 'B', 'A']
+    })
+
+def test_duplicate_asins_do_not_multiply_rows(tmp_path):
+    registry = ProductRegistryManager(data_dir=tmp_path)
+    run_id = registry.record_pipeline_run(_frame(), source='test')
+
+    frame = registry.load_run_frame(run_id)
+
+    assert len(frame) == 4
+    assert frame['price'].tolist() == [1000, 1900, 500, 2700]
+    assert frame['seller_type'].tolist() == ['amazon', 'fba', 'third_party', 'amazon']
+    assert frame['shopee_group'].tolist() == ['A', 'B', 'B', 'A']
+
+def test_legacy_rows_without_position_keep_one_offer_per_asin(tmp_path):
+    registry = ProductRegistryManager(data_dir=tmp_path)
+    run_id = registry.record_pipeline_run(_frame(), source='test')
+    # v3以前の記録（行位置なし）を再現
+    with sqlite3.connect(registry.db_path) as connection:
+        connection.execute("UPDATE offers SET row_position = NULL")
+        connection.execute("UPDATE classifications SET row_position = NULL")
+
+    frame = registry.load_run_frame(run_id)
+
+    assert len(frame) == 4
+    assert frame['shopee_group'].tolist() == ['A', 'B', 'B', 'A']
+
+def test_v3_database_is_migrated(tmp_path):
+    with sqlite3.connect(tmp_path / 'registry.db') as connection:
+        connection.execute("CREATE TABLE offers (id INTEGER PRIMARY KEY AUTOINCREMENT, asin TEXT NOT NULL, "
+                           "run_id TEXT, captured_at TEXT NOT NULL, price REAL)")
+        connection.execute("CREATE TABLE classifications (id INTEGER PRIMARY KEY AUTOINCREMENT, asin TEXT NOT NULL, "
+                           "run_id TEXT, shopee_group TEXT, classified_at TEXT NOT NULL)")
+
+    registry = ProductRegistryManager(data_dir=tmp_path)
+
+    with sqlite3.connect(registry.db_path) as connection:
+        for table in ('offers', 'classifications'):
+            columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            assert 'row_position' in columns
@@ -0,0 +1,48 @@
+# ShippingTime推移ストア（悪化ASINは最新実行で観測したASINに限る）
+from datetime import datetime
+
+import pandas as pd
+
+from core.managers.shipping_trend_manager import ShippingTrendManager
+
+def _run(manager, day, hours):
+    frame = pd.DataFrame({
+        'asin': list(hours),
+        'ship_hours': list(hours.values()),
+        'seller_type': ['amazon'] * len(hours)
+    })
+    return manager.record_run(frame, source='test', recorded_at=datetime(2024, 6, day))
+
+def test_degraded_asins_are_limited_to_latest_run(tmp_path):
+    manager = ShippingTrendManager(data_dir=tmp_path)
+    _run(manager, 1, {'B000000001': 24, 'B000000002': 24})
+    _run(manager, 2, {'B000000001': 24, 'B000000002': 72})
+    # 最新実行には B000000002 が含まれない（前回の悪化は報告しない）
+    latest = _run(manager, 3, {'B000000001': 72, 'B000000003': 12})
+
+    degraded = manager.find_degraded_asins()
+
+    assert degraded['asin'].tolist() == ['B000000001']
+    assert degraded.loc[0, 'latest_run_id'] == latest
+    assert degraded.loc[0, 'baseline_hours'] == 24
+
+def test_degraded_asins_for_a_given_run(tmp_path):
+    manager = ShippingTrendManager(data_dir=tmp_path)
+    _run(manager, 1, {'B000000001': 24, 'B000000002': 24})
+    second = _run(manager, 2, {'B000000001': 24, 'B000000002': None})
+    _run(manager, 3, {'B000000001': 24})
+
+    degraded = manager.find_degraded_asins(run_id=second)
+
+    assert degraded['asin'].tolist() == ['B000000002']
+    assert degraded.loc[0, 'degradation'] == 'lost'
+
+def test_rollup_by_seller_type(tmp_path):
+    manager = ShippingTrendManager(data_dir=tmp_path)
+    _run(manager, 1, {'B000000001': 12, 'B000000002': None})
+
+    rollup = manager.rollup('seller_type')
+
+    assert rollup.loc[0, 'seller_type'] == 'amazon'
+    assert rollup.loc[0, 'observations'] == 2
+    assert rollup.loc[0, 'success_rate'] == 50
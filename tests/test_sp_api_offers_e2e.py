@@ -0,0 +1,59 @@
+# SP_API_ENDPOINT をローカル代替サーバーに向けた getItemOffers 〜 出力行の確認
+import time
+
+import pandas as pd
+
+import core.services.sp_api_service as sp_api_service
+import pipeline.stages as stages
+
+NO_OFFER_ASIN = 'B000000001'
+OFFER_ASINS = ['B000000002', 'B000000003', 'B000000004']
+
+def _offers_requests(server, expected, timeout=5.0):
+    """getItemOffers の受信件数（サーバーは応答の送信後に集計するため、expected 件に達するまで待つ）"""
+    deadline = time.monotonic() + timeout
+    while True:
+        count = server.state.snapshot()['operations'].get('getItemOffers', {}).get('requests', 0)
+        if count >= expected or time.monotonic() >= deadline:
+            # 余分な呼び出しがあれば集計に現れるよう少し待ってから確定
+            time.sleep(0.05)
+            return server.state.snapshot()['operations'].get('getItemOffers', {}).get('requests', 0)
+        time.sleep(0.01)
+
+def test_prime_info_is_flat_and_fetches_offers_once(fake_sp_api):
+    for asin in OFFER_ASINS:
+        prime_info = sp_api_service.get_prime_and_seller_info_v8_enhanced(asin)
+        featured = sp_api_service.select_featured_offer(fake_sp_api.state.item_offers_payload(asin)['Offers'])
+        assert prime_info['seller_id'] == featured['SellerId']
+        assert prime_info['seller_type'] in ('amazon', 'third_party')
+        assert prime_info['seller_name']
+        assert prime_info['ship_hours'] == featured['ShippingTime']['maximumHours']
+        assert prime_info['prime_reason'] in ('High confidence score', 'Low confidence score')
+    assert _offers_requests(fake_sp_api, len(OFFER_ASINS)) == len(OFFER_ASINS)
+
+def test_no_offers_is_not_an_error(fake_sp_api):
+    prime_info = sp_api_service.get_prime_and_seller_info_v8_enhanced(NO_OFFER_ASIN)
+    assert prime_info['prime_reason'] == 'No offers'
+    assert prime_info['seller_type'] == 'no_offer'
+    assert prime_info['is_prime'] is False
+    assert prime_info['ship_hours'] is None
+    assert _offers_requests(fake_sp_api, 1) == 1
+
+def test_pipeline_rows_carry_seller_and_shipping_columns(fake_sp_api, monkeypatch):
+    monkeypatch.setattr(stages, 'get_japanese_name_hybrid', lambda title: (title, 'Original'))
+    asins = [NO_OFFER_ASIN] + OFFER_ASINS
+    df = pd.DataFrame({
+        'clean_title': ['FANCL Mild Cleansing Oil 120ml', 'DHC Lip Cream 1.5g',
+                        'Shiseido Senka Foam 120g', 'Kao Biore UV Aqua Rich 50g'],
+        'asin': asins
+    })
+    pipeline = stages.build_listing_pipeline(brand_dict={'FANCL': ['fancl'], 'DHC': ['dhc']}, batch_size=2)
+    result = pipeline.run_frame(df).set_index('asin')
+
+    offered = result.loc[OFFER_ASINS]
+    assert offered['seller_type'].notna().all()
+    assert offered['seller_name'].notna().all()
+    assert offered['ship_hours'].notna().all()
+    assert not result['prime_reason'].astype(str).str.startswith('Error').any()
+    assert result.loc[NO_OFFER_ASIN, 'prime_reason'] == 'No offers'
+    assert _offers_requests(fake_sp_api, len(asins)) == len(asins)
@@ -0,0 +1,24 @@
+import core.services.sp_api_service as sp_api_service
+
+class _RecordingClient:
+    marketplace_id = 'A1VC38T7YXB528'
+    amazon_seller_id = 'AN1VRQENFRJN5'
+
+    def __init__(self):
+        self.timeouts = []
+
+    def get_item_offers(self, asin, item_condition='New', timeout=None):
+        self.timeouts.append(timeout)
+        return {'Offers': [{'SellerId': 'AN1VRQENFRJN5', 'IsBuyBoxWinner': True, 'IsFulfilledByAmazon': True}]}
+
+def test_seller_info_uses_configured_api_timeout(monkeypatch):
+    client = _RecordingClient()
+    settings = {('api_settings', 'timeout'): 7, ('api_settings', 'max_retries'): 1}
+    monkeypatch.setattr(sp_api_service, 'get_sp_api_http_client', lambda: client)
+    monkeypatch.setattr(sp_api_service, 'get_config_value',
+                        lambda section, key, default=None: settings.get((section, key), default))
+
+    seller_info = sp_api_service.get_seller_info('B000000001')
+
+    assert seller_info['is_amazon_seller']
+    assert client.timeouts == [7]
@@ -0,0 +1,17 @@
+# 店舗ジョブの並列実行: ジョブごとのCPU処理のワーカー数（ジョブ数 × コア数のプロセスにしない）
+from core.services.store_orchestrator import resolve_job_text_workers, _with_text_workers
+
+def test_text_workers_split_cores_across_concurrent_jobs():
+    assert resolve_job_text_workers(3, job_count=5, cpu_count=12) == 4
+    assert resolve_job_text_workers(3, job_count=2, cpu_count=12) == 6
+    assert resolve_job_text_workers(4, job_count=4, cpu_count=2) == 1
+    assert resolve_job_text_workers(1, cpu_count=8) == 8
+
+def test_job_env_gets_text_workers_unless_specified():
+    job = {'name': 'sg-main', 'env': {'SP_API_ACCESS_TOKEN': 'token'}}
+    assert _with_text_workers(job, 2)['env'] == {'TEXT_WORKERS': '2', 'SP_API_ACCESS_TOKEN': 'token'}
+    assert job['env'] == {'SP_API_ACCESS_TOKEN': 'token'}
+
+    pinned = {'name': 'my-main', 'env': {'TEXT_WORKERS': '1'}}
+    assert _with_text_workers(pinned, 4)['env'] == {'TEXT_WORKERS': '1'}
+    assert _with_text_workers({'name': 'tw-main'}, 3)['env'] == {'TEXT_WORKERS': '3'}